@@ -531,21 +531,23 @@ def main():
     print(f"  → {HTML_OUT.name}")
 
     print("[2/3] Playwright PDF 변환...")
-    from playwright.sync_api import sync_playwright
-    with sync_playwright() as p:
-        browser = p.chromium.launch()
-        page = browser.new_page()
-        page.goto(HTML_OUT.resolve().as_uri())
-        page.wait_for_load_state("networkidle")
-        page.emulate_media(media="screen")  # print 미디어가 absolute/flex 일부를 잘라먹음 — screen 강제
-        if PDF_OUT.exists():
-            PDF_OUT.unlink()
-        page.pdf(
-            path=str(PDF_OUT.resolve()),
+    # 공용 렌더 서비스 — 상주 렌더 서버가 떠 있으면 브라우저 기동 없이 연결
+    sys.path.insert(0, str(SCRIPT_DIR.parents[2] / "90_공통기준" / "렌더서비스"))
+    from render_service import RenderJob, get_service
+    if PDF_OUT.exists():
+        PDF_OUT.unlink()
+    result = get_service().render(RenderJob(
+        HTML_OUT, PDF_OUT,
+        viewport=(1280, 720),
+        wait_until="networkidle",
+        media="screen",  # print 미디어가 absolute/flex 일부를 잘라먹음 — screen 강제
+        pdf_options=dict(
             print_background=True,
             prefer_css_page_size=True,  # CSS @page 우선 — format/margin 인자와 충돌 방지
-        )
-        browser.close()
+        ),
+    ))
+    if not result.ok:
+        raise RuntimeError(f"PDF 변환 실패: {result.error}")
 
     print(f"[3/3] 완료 — {PDF_OUT}")
     print(f"   크기: {PDF_OUT.stat().st_size / 1024:,.1f} KB")
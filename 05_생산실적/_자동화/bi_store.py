@@ -0,0 +1,349 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+BI 생산실적 로컬 저장소 — 대원테크_라인별 생산실적_BI.xlsx → 색인된 SQLite 표 (날짜 × 라인 × 주야)
+
+BI 파일은 매일 행이 붙기만 하는데 소비자마다 전체를 다시 파싱했다 (라인마다 재로드하는 곳도 있음).
+이 모듈은 BI 파일이 바뀐 경우에만 한 번 읽어 로컬 표에 반영하고, 소비자는 색인 조회만 한다.
+
+  - 갱신 판정 : 파일 크기·mtime 같으면 그대로 → 다르면 내용 해시 비교 (복사로 mtime만 바뀐 경우)
+  - 증분 반영 : 헤더와 기존 행 전체(누적 해시)가 같으면 새로 붙은 행만 추가, 아니면 전체 재구성
+  - 행 원본   : 시트 행 값 tuple 그대로 보관 (datetime·int/float 타입 유지) → 기존 파싱 코드에 그대로 투입
+  - 색인 열   : day(YYYY-MM-DD) · line(E열) · shift(F열) · night · qty(O열)
+                night = 라인별 야간 구분값(그 라인에서 처음 나온 '주간' 외 구분, 예: '야간' / '추가')과 같은 행
+
+사용처: build_master.py / monthly-pnl-rollup / build_formula_version.py / night-scan-compare /
+        production-result-upload / daily-routine
+
+사용법:
+    sys.path.insert(0, str(REPO_ROOT / "05_생산실적" / "_자동화"))
+    from bi_store import open_store
+    store = open_store(BI_PATH)                         # 필요 시 증분 반영 후 반환 (프로세스 내 재사용)
+    store.night_totals(["SP3M3", "SD9A01"], 2026, 4)    # {라인: (야간수량 합, 일수)}
+    store.night_rows("SP3M3", 2026, 4)                  # 야간 행 원본 tuple (파일 순서)
+    store.rows_on("2026-04-15")                         # 해당 일자 행
+    store.days("2026-04-01", "2026-04-07")              # 행이 있는 일자 집합
+    store.rows(start="2026-01-01", end="2026-12-31")    # 기간 행
+    store.rows(after=n)                                 # 앞 n행 이후 새로 붙은 행 (같은 generation일 때)
+
+    python bi_store.py                    # 기본 BI 파일 반영 + 현황
+    python bi_store.py --bi <경로> --rebuild
+"""
+
+import argparse
+import hashlib
+import pickle
+import sqlite3
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+DEFAULT_BI_PATH = Path(__file__).resolve().parents[1] / "BI실적" / "대원테크_라인별 생산실적_BI.xlsx"
+SCHEMA_VERSION = 1
+
+# BI 시트 열 (0-base): E=라인명, F=야간구분, H=날짜, O=생산량(ea)
+COL_LINE, COL_SHIFT, COL_DATE, COL_QTY = 4, 5, 7, 14
+DAY_SHIFT = "주간"
+
+# day_src: 날짜 원본 형식 — 소비자별 기존 판정과 맞추기 위한 구분
+#   'dt' = datetime / 'date' = date / 'str' = 문자열(앞 10자) / 'num' = 엑셀 일련번호
+DATE_KINDS_ALL = ("dt", "date", "str", "num")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value BLOB);
+CREATE TABLE IF NOT EXISTS bi_rows (
+    rowno   INTEGER PRIMARY KEY,   -- 시트 행 번호
+    day     TEXT,
+    day_src TEXT,
+    line    TEXT,
+    shift   TEXT,
+    night   INTEGER NOT NULL DEFAULT 0,
+    qty     REAL,
+    data    BLOB NOT NULL          -- 행 값 tuple (pickle)
+);
+CREATE INDEX IF NOT EXISTS ix_bi_line_day ON bi_rows (line, night, day);
+CREATE INDEX IF NOT EXISTS ix_bi_day ON bi_rows (day);
+CREATE TABLE IF NOT EXISTS night_shift (line TEXT PRIMARY KEY, shift TEXT NOT NULL);
+"""
+
+
+def _day_key(v):
+    """날짜 셀 값 → (YYYY-MM-DD, 형식). 날짜로 볼 수 없으면 (None, None)."""
+    if isinstance(v, datetime):
+        return v.strftime("%Y-%m-%d"), "dt"
+    if isinstance(v, date):
+        return v.isoformat(), "date"
+    if isinstance(v, str):
+        return v[:10], "str"
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        try:
+            return (datetime(1899, 12, 30) + timedelta(days=int(v))).strftime("%Y-%m-%d"), "num"
+        except (OverflowError, ValueError):
+            return None, None
+    return None, None
+
+
+def _cell(row, i):
+    return row[i] if len(row) > i else None
+
+
+def _as_day(d):
+    return d.isoformat()[:10] if isinstance(d, (date, datetime)) else str(d)[:10]
+
+
+def _month_range(year, month):
+    start = date(year, month, 1)
+    end = date(year + (month == 12), month % 12 + 1, 1) - timedelta(days=1)
+    return start.isoformat(), end.isoformat()
+
+
+def _file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class BIStore:
+    """BI 파일 1개 ↔ SQLite 저장소 1개. db_path 생략 시 BI 파일 옆 _bi_store.sqlite."""
+
+    def __init__(self, xlsx_path=DEFAULT_BI_PATH, db_path=None):
+        self.xlsx_path = Path(xlsx_path)
+        self.db_path = Path(db_path) if db_path else self.xlsx_path.with_name("_bi_store.sqlite")
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+        self._db.executescript(_SCHEMA)
+        self.last_refresh = None
+
+    # ── 메타 ──
+    def _meta(self, key, default=None):
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return pickle.loads(row[0]) if row else default
+
+    def _set_meta(self, **values):
+        self._db.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                             [(k, pickle.dumps(v)) for k, v in values.items()])
+
+    @property
+    def header(self):
+        return self._meta("header", ())
+
+    @property
+    def row_count(self):
+        return self._meta("n_rows", 0)
+
+    @property
+    def generation(self):
+        """전체 재구성 횟수. 같은 세대 안에서는 기존 행이 바뀌지 않는다 (뒤에 붙기만 함)."""
+        return self._meta("generation", 0)
+
+    # ── 반영 ──
+    def refresh(self, force=False):
+        """BI 파일 변경분 반영 → {'mode': 'fresh'|'append'|'rebuild', 'added', 'rows', 'sec'}."""
+        t0 = time.perf_counter()
+        if not self.xlsx_path.exists():
+            raise FileNotFoundError(f"BI 원본 없음: {self.xlsx_path}")
+        st = self.xlsx_path.stat()
+        self._db.execute("BEGIN IMMEDIATE")     # 다른 프로세스 동시 반영 방지
+        try:
+            stats = self._refresh_locked(st, force)
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        stats["sec"] = round(time.perf_counter() - t0, 2)
+        self.last_refresh = stats
+        return stats
+
+    def _refresh_locked(self, st, force):
+        valid = self._meta("schema") == SCHEMA_VERSION and not force
+        if valid and self._meta("size") == st.st_size and self._meta("mtime_ns") == st.st_mtime_ns:
+            return {"mode": "fresh", "added": 0, "rows": self.row_count}
+        digest = _file_hash(self.xlsx_path)
+        if valid and self._meta("file_hash") == digest:
+            self._set_meta(size=st.st_size, mtime_ns=st.st_mtime_ns)
+            return {"mode": "fresh", "added": 0, "rows": self.row_count}
+
+        import openpyxl
+        wb = openpyxl.load_workbook(self.xlsx_path, data_only=True, read_only=True)
+        try:
+            it = wb.worksheets[0].iter_rows(values_only=True)
+            header = next(it, ())
+            n_prev = self.row_count if valid and header == self.header else 0
+            prefix_hash = self._meta("prefix_hash") if n_prev else None
+
+            rolling = hashlib.sha1()
+            prefix_rows = []        # 기존 행 검증이 끝날 때까지 보관 (불일치 시 전체 재구성에 사용)
+            for row in it:
+                if len(prefix_rows) == n_prev:
+                    break
+                prefix_rows.append(row)
+                rolling.update(repr(row).encode("utf-8"))
+            else:
+                row = None          # 파일 끝
+
+            if n_prev and len(prefix_rows) == n_prev and rolling.hexdigest() == prefix_hash:
+                mode, start_rowno, pending = "append", n_prev + 2, []
+                nights = dict(self._db.execute("SELECT line, shift FROM night_shift"))
+            else:                   # 첫 반영 / 기존 행이 바뀜 → 전체 재구성
+                mode, start_rowno, pending = "rebuild", 2, prefix_rows
+                rolling, nights = hashlib.sha1(), {}
+                self._set_meta(generation=self.generation + 1)
+                self._db.execute("DELETE FROM bi_rows")
+                self._db.execute("DELETE FROM night_shift")
+
+            def tail():
+                yield from pending
+                if row is not None:
+                    yield row
+                    yield from it
+
+            added = self._insert(tail(), start_rowno, nights, rolling)
+        finally:
+            wb.close()
+
+        n_rows = start_rowno - 2 + added
+        self._set_meta(schema=SCHEMA_VERSION, header=header, n_rows=n_rows, prefix_hash=rolling.hexdigest(),
+                       size=st.st_size, mtime_ns=st.st_mtime_ns, file_hash=digest,
+                       source=str(self.xlsx_path.resolve()), refreshed_at=datetime.now().isoformat())
+        return {"mode": mode, "added": added, "rows": n_rows}
+
+    def _insert(self, rows, rowno, nights, rolling, batch=5000):
+        """행 → bi_rows 일괄 추가 + 누적 해시 갱신. nights(라인 → 야간 구분값)는 처음 나온 '주간' 외 구분으로 채워 간다."""
+        buf, added, new_nights = [], 0, {}
+        for row in rows:
+            rolling.update(repr(row).encode("utf-8"))
+            line, shift = _cell(row, COL_LINE), _cell(row, COL_SHIFT)
+            if line is not None and line not in nights and shift not in (None, DAY_SHIFT):
+                nights[line] = new_nights[line] = shift
+            day, src = _day_key(_cell(row, COL_DATE))
+            qty = _cell(row, COL_QTY)
+            buf.append((rowno, day, src,
+                        line if line is None or isinstance(line, str) else str(line),
+                        shift if shift is None or isinstance(shift, str) else str(shift),
+                        int(line is not None and nights.get(line) == shift),
+                        qty if isinstance(qty, (int, float)) and not isinstance(qty, bool) else None,
+                        pickle.dumps(row, protocol=pickle.HIGHEST_PROTOCOL)))
+            rowno += 1
+            added += 1
+            if len(buf) >= batch:
+                self._db.executemany("INSERT INTO bi_rows VALUES (?, ?, ?, ?, ?, ?, ?, ?)", buf)
+                buf.clear()
+        if buf:
+            self._db.executemany("INSERT INTO bi_rows VALUES (?, ?, ?, ?, ?, ?, ?, ?)", buf)
+        self._db.executemany("INSERT OR REPLACE INTO night_shift (line, shift) VALUES (?, ?)",
+                             list(new_nights.items()))
+        return added
+
+    # ── 조회 ──
+    def rows(self, line=None, start=None, end=None, night=None, date_kinds=DATE_KINDS_ALL, after=None):
+        """조건에 맞는 행 원본 tuple 목록 (파일 순서). start/end: 날짜 또는 'YYYY-MM-DD' (양끝 포함).
+        after=n → 데이터 행 앞 n개 이후에 붙은 행만 (row_count를 기억해 두고 새 행만 받을 때)."""
+        where, args = [], []
+        if after is not None:
+            where.append("rowno > ?")
+            args.append(after + 1)
+        if line is not None:
+            where.append("line = ?")
+            args.append(line)
+        if night is not None:
+            where.append("night = ?")
+            args.append(int(bool(night)))
+        if start is not None:
+            where.append("day >= ?")
+            args.append(_as_day(start))
+        if end is not None:
+            where.append("day <= ?")
+            args.append(_as_day(end))
+        if tuple(date_kinds) != DATE_KINDS_ALL:
+            where.append(f"day_src IN ({','.join('?' * len(date_kinds))})")
+            args.extend(date_kinds)
+        sql = "SELECT data FROM bi_rows" + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY rowno"
+        return [pickle.loads(data) for (data,) in self._db.execute(sql, args)]
+
+    def records(self, **filters):
+        """rows()와 같은 조건 → {헤더: 값} dict 목록."""
+        header = self.header
+        return [dict(zip(header, row)) for row in self.rows(**filters)]
+
+    def rows_on(self, day):
+        """해당 일자 행 (날짜 셀의 문자열 앞 10자 = day인 행 — 일련번호 날짜 제외)."""
+        return self.rows(start=day, end=day, date_kinds=("dt", "date", "str"))
+
+    def days(self, start=None, end=None, date_kinds=("dt", "date", "str")):
+        """기간 안에서 행이 있는 일자 집합 ('YYYY-MM-DD')."""
+        where, args = [f"day_src IN ({','.join('?' * len(date_kinds))})"], list(date_kinds)
+        if start is not None:
+            where.append("day >= ?")
+            args.append(_as_day(start))
+        if end is not None:
+            where.append("day <= ?")
+            args.append(_as_day(end))
+        sql = "SELECT DISTINCT day FROM bi_rows WHERE " + " AND ".join(where)
+        return {day for (day,) in self._db.execute(sql, args)}
+
+    def night_shift(self, line):
+        """라인 야간 구분값 (야간 행이 없으면 None)."""
+        row = self._db.execute("SELECT shift FROM night_shift WHERE line = ?", (line,)).fetchone()
+        return row[0] if row else None
+
+    def night_rows(self, line, year, month):
+        """라인×월 야간 행 원본 (날짜 셀이 datetime인 행만, 파일 순서)."""
+        start, end = _month_range(year, month)
+        return self.rows(line=line, start=start, end=end, night=True, date_kinds=("dt",))
+
+    def night_totals(self, lines, year, month):
+        """{라인: (야간수량 합, 일수)} — 생산량 있는 야간 행 1개 = 1일."""
+        out = {}
+        for line in lines:
+            total = days = 0
+            for row in self.night_rows(line, year, month):
+                qty = _cell(row, COL_QTY)
+                if qty:
+                    total += qty
+                    days += 1
+            out[line] = (total, days)
+        return out
+
+    def close(self):
+        self._db.close()
+
+
+_stores = {}
+
+
+def open_store(xlsx_path=DEFAULT_BI_PATH, db_path=None):
+    """BI 파일 반영 후 저장소 반환. 같은 프로세스에서는 파일 상태 확인만 하고 재사용."""
+    key = (str(Path(xlsx_path).resolve()), str(db_path))
+    store = _stores.get(key)
+    if store is None:
+        store = _stores[key] = BIStore(xlsx_path, db_path)
+    stats = store.refresh()
+    if stats["mode"] != "fresh":
+        print(f"  [BI 저장소] {stats['mode']}: +{stats['added']:,}행 → {stats['rows']:,}행 ({stats['sec']}초)")
+    return store
+
+
+def main():
+    ap = argparse.ArgumentParser(description="BI 생산실적 로컬 저장소 반영")
+    ap.add_argument("--bi", default=str(DEFAULT_BI_PATH), help="BI xlsx 경로")
+    ap.add_argument("--db", default=None, help="저장소 경로 (기본: BI 파일 옆 _bi_store.sqlite)")
+    ap.add_argument("--rebuild", action="store_true", help="전체 재구성")
+    args = ap.parse_args()
+
+    store = BIStore(args.bi, args.db)
+    stats = store.refresh(force=args.rebuild)
+    print(f"[BI 저장소] {store.db_path}")
+    print(f"  {stats['mode']}: +{stats['added']:,}행 → {stats['rows']:,}행 ({stats['sec']}초)")
+    nights = dict(store._db.execute("SELECT line, shift FROM night_shift ORDER BY line"))
+    print(f"  야간 구분: {nights}")
+    first, last = store._db.execute("SELECT MIN(day), MAX(day) FROM bi_rows WHERE day_src IN ('dt', 'date')").fetchone()
+    print(f"  기간: {first} ~ {last}")
+    store.close()
+
+
+if __name__ == "__main__":
+    sys.stdout.reconfigure(encoding="utf-8")
+    main()
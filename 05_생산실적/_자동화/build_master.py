@@ -4,14 +4,25 @@
 생산관리 마스터리스트 자동 생성 스크립트
 BI 실적 + 임률단가 + 조립비시스템 API → 생산관리_마스터리스트.xlsx
 
+BI 행은 집계 큐브(날짜 × 라인 × 야간구분 → 수량·시간·금액)로 한 번 모으고, 요약 시트는 모두 큐브에서 그린다.
+큐브는 출력 파일 옆 생산관리_마스터리스트_cube.pkl에 저장 → --incremental 실행 시 직전 빌드 이후 BI 새 행만 반영
+(일일실적은 새 일자 행만 작성하고 기존 행은 직전 출력의 행 XML을 옮겨 붙임, 요약 시트는 큐브에서 다시 그림).
+
 사용법:
-    PYTHONUTF8=1 python build_master.py
+    PYTHONUTF8=1 python build_master.py                 # 전체 생성
+    PYTHONUTF8=1 python build_master.py --incremental   # 증분 (불가하면 사유 출력 후 전체 생성)
 """
 
 import os
+import re
 import sys
 import json
+import pickle
+import zipfile
+import hashlib
+import argparse
 import urllib.request
+import xml.etree.ElementTree as ET
 from datetime import datetime, date
 from collections import defaultdict
 
@@ -20,6 +31,8 @@ from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, numbers
 from openpyxl.utils import get_column_letter
 from openpyxl.formatting.rule import CellIsRule
 
+from bi_store import open_store
+
 # ─── 경로 설정 ───────────────────────────────────────────
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 PROJECT_DIR = os.path.dirname(BASE_DIR)
@@ -27,6 +40,9 @@ PROJECT_DIR = os.path.dirname(BASE_DIR)
 BI_FILE = os.path.join(BASE_DIR, "BI실적", "대원테크_라인별 생산실적_BI.xlsx")
 COST_FILE = os.path.join(PROJECT_DIR, "02_급여단가", "임률단가", "03_대원테크", "임률단가_대원테크_독립계산.xlsx")
 OUTPUT_FILE = os.path.join(BASE_DIR, "생산관리_마스터리스트.xlsx")
+CUBE_FILE = os.path.splitext(OUTPUT_FILE)[0] + "_cube.pkl"
+
+BI_YEAR = 2026
 
 ASSY_API_URL = "http://ax.samsong.com:33200/api/assembly-cost-operation?"
 LINE_API_URL = "http://ax.samsong.com:33200/api/line-operation"
@@ -52,22 +68,20 @@ DECIMAL_FMT = '#,##0.0'
 #  데이터 로딩
 # ═══════════════════════════════════════════════════════════
 
-def load_bi_data():
-    """BI 엑셀에서 2026년 데이터만 읽기"""
+def load_bi_data(start=None, after=None):
+    """BI 엑셀에서 2026년 데이터만 읽기 (BI 저장소 조회 — BI 파일 변경분만 반영)
+    start: 이 일자 이후만 / after: BI 데이터 행 앞 n개 이후에 붙은 행만 (증분용)"""
     print("[1/4] BI 파일 로딩...")
-    wb = openpyxl.load_workbook(BI_FILE, data_only=True, read_only=True)
-    ws = wb.active
-
-    rows = list(ws.iter_rows(min_row=1, values_only=True))
-    wb.close()
-
-    if not rows:
+    store = open_store(BI_FILE)
+    header = store.header
+    if not header:
         print("  ERROR: BI 데이터 없음")
         return []
 
-    header = rows[0]
+    first = f"{BI_YEAR}-01-01"
+    start = max(first, start.isoformat() if isinstance(start, date) else start) if start else first
     data = []
-    for row in rows[1:]:
+    for row in store.rows(start=start, end=f"{BI_YEAR}-12-31", date_kinds=("dt", "date", "num"), after=after):
         if not row or not row[0]:
             continue
         rec = dict(zip(header, row))
@@ -85,14 +99,14 @@ def load_bi_data():
         else:
             continue
 
-        if dt.year != 2026:
+        if dt.year != BI_YEAR:
             continue
 
         rec["_date"] = dt
         rec["_month"] = f"{dt.year}-{dt.month:02d}"
         data.append(rec)
 
-    print(f"  → 2026년 데이터 {len(data)}행 로딩 완료")
+    print(f"  → {BI_YEAR}년 데이터 {len(data)}행 로딩 완료")
     return data
 
 
@@ -227,9 +241,9 @@ def write_row(ws, row_num, values, formats=None):
             cell.number_format = formats[col - 1]
 
 
-def auto_width(ws, max_width=25):
-    """열 너비 자동 조정"""
-    for col in ws.columns:
+def auto_width(ws, max_width=25, min_row=1):
+    """열 너비 자동 조정 (min_row: 이 행부터만 — 범위 안 빈 셀도 생성되므로 증분 시 앞 행 제외)"""
+    for col in ws.iter_cols(min_row=min_row):
         max_len = 0
         col_letter = get_column_letter(col[0].column)
         for cell in col:
@@ -259,14 +273,228 @@ def apply_conditional_format(ws, col_letter, min_row, max_row, thresholds, rever
             operator="lessThan", formula=[str(thresholds[0])], fill=RED_FILL))
 
 
+# ═══════════════════════════════════════════════════════════
+#  집계 큐브 (날짜 × 라인 × 야간구분)
+# ═══════════════════════════════════════════════════════════
+
+CUBE_VERSION = 1
+MEASURES = (
+    "qty", "work_h", "down_h", "active_h", "target_qty", "uph_sum", "upmh_sum",
+    "eff_sum", "headcount_sum", "count", "prod_amt", "labor_cost",
+)
+
+
+def new_cube():
+    """cells: (날짜, 라인, 야간구분) → 측정값 합 + 유형(마지막 행) + seq(반영 순서)
+    lines: 라인 → 첫 행의 유형·대표기종 + 야간운영 여부"""
+    return {"cells": {}, "lines": {}, "seq": 0}
+
+
+def cube_add(cube, bi_data, cost_data):
+    """BI 레코드를 큐브에 누적 (행당 1회 — 요약 시트는 이 합계만 읽는다)"""
+    cells, lines = cube["cells"], cube["lines"]
+    for rec in bi_data:
+        line = str(get_field(rec, "라인명", default="") or "").strip()
+        shift = str(get_field(rec, "야간구분", default="")).strip()
+        c = cells.get((rec["_date"], line, shift))
+        if c is None:
+            c = cells[(rec["_date"], line, shift)] = dict.fromkeys(MEASURES, 0)
+        qty = to_num(get_field(rec, "생산량(ea)", "생산량"))
+        work_h = to_num(get_field(rec, "근무시간(h)", "근무시간"))
+        c["qty"] += qty
+        c["work_h"] += work_h
+        c["down_h"] += to_num(get_field(rec, "품질,설비 비가동(h)", "비가동(h)"))
+        c["active_h"] += to_num(get_field(rec, "실가동시간(h)", "실가동시간"))
+        c["target_qty"] += to_num(get_field(rec, "실가동시간 목표수량(ea)", "목표수량(ea)"))
+        c["uph_sum"] += to_num(get_field(rec, "실적UPH(ea)", "실적UPH"))
+        c["upmh_sum"] += to_num(get_field(rec, "UPMH"))
+        eff = to_num(get_field(rec, "가동효율"))
+        if eff and isinstance(eff, (int, float)):
+            c["eff_sum"] += eff if eff <= 1 else eff / 100
+        c["headcount_sum"] += to_num(get_field(rec, "생산인원"))
+        c["count"] += 1
+
+        cost = cost_data.get(line, {})
+        c["prod_amt"] += qty * cost.get("업체기준최종단가", 0)
+        c["labor_cost"] += cost.get("총인건비_h", 0) * work_h
+        c["유형"] = get_field(rec, "유형", default="") or ""
+        cube["seq"] += 1
+        c["seq"] = cube["seq"]
+
+        if line not in lines:
+            lines[line] = {
+                "유형": get_field(rec, "유형", default=""),
+                "대표기종": get_field(rec, "대표기종", default=""),
+                "야간운영": False,
+            }
+        if shift in ("야간", "추가"):
+            lines[line]["야간운영"] = True
+    return cube
+
+
+def cube_drop_from(cube, day):
+    """day 이후 일자 셀 제거 (재집계 준비) → 제거된 BI 행 수"""
+    drop = [k for k in cube["cells"] if k[0] >= day]
+    return sum(cube["cells"].pop(k)["count"] for k in drop)
+
+
+def cube_rows(cube):
+    return sum(c["count"] for c in cube["cells"].values())
+
+
+def cube_last_date(cube):
+    return max((k[0] for k in cube["cells"]), default=None)
+
+
+def rollup_monthly(cube):
+    """큐브 → 월 × 라인 집계 {(연월, 라인): {dates, 측정값…, 유형}} (유형 = 가장 나중에 반영된 행)"""
+    agg = {}
+    for (day, line, _), c in sorted(cube["cells"].items(), key=lambda kv: kv[1]["seq"]):
+        key = (f"{day.year}-{day.month:02d}", line)
+        a = agg.get(key)
+        if a is None:
+            a = agg[key] = dict.fromkeys(MEASURES, 0) | {"dates": set(), "유형": ""}
+        a["dates"].add(day)
+        for m in MEASURES:
+            a[m] += c[m]
+        a["유형"] = c["유형"]
+    return agg
+
+
+def cost_signature(cost_data):
+    return hashlib.sha1(repr(sorted(cost_data.items())).encode("utf-8")).hexdigest()
+
+
+def save_cube(cube, store, cost_data, daily_widths):
+    """큐브 + 빌드 기준(BI 저장소 세대·행 수, 단가 지문, 출력 파일 상태) + 일일실적 열 너비 저장"""
+    st = os.stat(OUTPUT_FILE)
+    state = {
+        "version": CUBE_VERSION, "cube": cube, "daily_widths": daily_widths,
+        "bi_generation": store.generation, "bi_rows": store.row_count,
+        "cost_hash": cost_signature(cost_data),
+        "output_size": st.st_size, "output_mtime_ns": st.st_mtime_ns,
+        "built_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    tmp = CUBE_FILE + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, CUBE_FILE)
+
+
+def load_cube_state(store, cost_data):
+    """증분 가능한 직전 빌드 상태 → (state, None) / 불가 → (None, 사유)"""
+    if not os.path.exists(CUBE_FILE):
+        return None, "큐브 파일 없음"
+    if not os.path.exists(OUTPUT_FILE):
+        return None, "출력 파일 없음"
+    try:
+        with open(CUBE_FILE, "rb") as f:
+            state = pickle.load(f)
+    except Exception as e:
+        return None, f"큐브 파일 읽기 실패 ({e})"
+    st = os.stat(OUTPUT_FILE)
+    if state.get("version") != CUBE_VERSION:
+        return None, "큐브 형식 변경"
+    if (state["output_size"], state["output_mtime_ns"]) != (st.st_size, st.st_mtime_ns):
+        return None, "출력 파일이 직전 빌드 이후 바뀜"
+    if state["bi_generation"] != store.generation or state["bi_rows"] > store.row_count:
+        return None, "BI 기존 행 변경 (저장소 재구성)"
+    if state["cost_hash"] != cost_signature(cost_data):
+        return None, "임률단가 변경"
+    return state, None
+
+
+# ═══════════════════════════════════════════════════════════
+#  증분 저장 (일일실적 기존 행 XML 옮겨 붙이기)
+# ═══════════════════════════════════════════════════════════
+# openpyxl은 문자열을 inlineStr로 쓴다 (공유 문자열 표 없음) → 행 XML은 스타일 번호(s)만 맞추면 다른 패키지로 옮길 수 있다.
+# 증분 실행은 새 워크북에 일일실적 헤더 + 재집계 구간 행만 쓰고, 저장한 패키지에 직전 출력의 유지 행을 끼워 넣는다.
+
+DAILY_SHEET = "일일실적"
+_NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_CELL_STYLE = re.compile(rb'(<c r="([A-Z]+)\d+" s=")(\d+)"')
+
+
+def _sheet_part(zf, title):
+    """패키지 안 시트 XML 경로 (workbook.xml 시트 이름 → workbook.xml.rels 대상)"""
+    book = ET.fromstring(zf.read("xl/workbook.xml"))
+    rid = next(sh.get(f"{_NS_REL}id") for sh in book.iter(f"{_NS_MAIN}sheet") if sh.get("name") == title)
+    rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    target = next(r.get("Target") for r in rels if r.get("Id") == rid)
+    return target.lstrip("/") if target.startswith("/") else "xl/" + target
+
+
+def read_daily_rows(path, n):
+    """출력 파일 일일실적 2 ~ n+1행 <row> XML (bytes)"""
+    if n <= 0:
+        return b""
+    with zipfile.ZipFile(path) as zf:
+        xml = zf.read(_sheet_part(zf, DAILY_SHEET))
+    start = xml.index(b'<row r="2"')
+    end = xml.find(b'<row r="%d"' % (n + 2), start)
+    if end < 0:
+        end = xml.index(b"</sheetData>", start)
+    return xml[start:end]
+
+
+def splice_daily_rows(path, kept):
+    """저장된 패키지의 일일실적 1행(헤더) 뒤에 kept 행 XML 삽입.
+    스타일 번호는 열마다 새 패키지의 첫 데이터 행 값으로 바꾼다 (일일실적은 열별 서식이 모든 행에서 같음)."""
+    with zipfile.ZipFile(path) as zf:
+        part = _sheet_part(zf, DAILY_SHEET)
+        xml = zf.read(part)
+    head_end = xml.index(b"</row>") + len(b"</row>")
+    first_end = xml.find(b"</row>", head_end)
+    new_ids = {m.group(2): m.group(3) for m in _CELL_STYLE.finditer(xml, head_end, first_end)}
+
+    remap = {}
+    for m in _CELL_STYLE.finditer(kept):
+        col, old = m.group(2), m.group(3)
+        new = new_ids.get(col)
+        if new is None or remap.setdefault(old, new) != new:
+            raise ValueError(f"일일실적 {col}열 스타일 대응 불가 (s={old.decode()})")
+    kept = _CELL_STYLE.sub(lambda m: m.group(1) + remap[m.group(3)] + b'"', kept)
+    xml = xml[:head_end] + kept + xml[head_end:]
+
+    tmp = path + ".splice"
+    with zipfile.ZipFile(path) as src, zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as dst:
+        for item in src.infolist():
+            dst.writestr(item, xml if item.filename == part else src.read(item.filename))
+    os.replace(tmp, path)
+
+
+def save_output(wb, path, kept=b""):
+    """임시 파일에 저장 (+ 일일실적 유지 행 삽입) 후 교체 — 중간 실패 시 기존 출력 보존"""
+    tmp = path + ".tmp.xlsx"
+    try:
+        wb.save(tmp)
+        if kept:
+            splice_daily_rows(tmp, kept)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
 # ═══════════════════════════════════════════════════════════
 #  시트 생성
 # ═══════════════════════════════════════════════════════════
 
-def build_daily_sheet(wb, bi_data, cost_data):
-    """시트1: 일일실적"""
+DAILY_FMTS = [
+    None, None, None, None, None, NUMBER_FMT,
+    DECIMAL_FMT, DECIMAL_FMT, DECIMAL_FMT, NUMBER_FMT,
+    NUMBER_FMT, PERCENT_FMT,
+    NUMBER_FMT, NUMBER_FMT, NUMBER_FMT, NUMBER_FMT,
+    PERCENT_FMT, None
+]
+
+
+def build_daily_sheet(wb, bi_data, cost_data, start_row=2, widths=None):
+    """시트1: 일일실적
+    증분: start_row부터 재집계 구간 행만 작성 (앞 행은 저장 시 직전 출력에서 옮김), widths = 직전 열 너비"""
     print("  시트1: 일일실적...")
-    ws = wb.create_sheet("일일실적")
+    ws = wb.create_sheet(DAILY_SHEET)
     ws.sheet_properties.tabColor = "4472C4"
 
     headers = [
@@ -276,18 +504,29 @@ def build_daily_sheet(wb, bi_data, cost_data):
         "업체기준단가(원)", "생산금액(원)", "인건비(원)", "인건비단가(원/ea)",
         "목표달성률(%)", "판정"
     ]
-    fmts = [
-        None, None, None, None, None, NUMBER_FMT,
-        DECIMAL_FMT, DECIMAL_FMT, DECIMAL_FMT, NUMBER_FMT,
-        NUMBER_FMT, PERCENT_FMT,
-        NUMBER_FMT, NUMBER_FMT, NUMBER_FMT, NUMBER_FMT,
-        PERCENT_FMT, None
-    ]
     write_header(ws, headers)
+    write_daily_rows(ws, bi_data, cost_data, start_row)
+
+    auto_width(ws, min_row=1 if start_row == 2 else start_row)
+    for col, width in (widths or {}).items():
+        dim = ws.column_dimensions[col]
+        dim.width = max(dim.width or 0, width)
 
-    header_keys = list(bi_data[0].keys()) if bi_data else []
+    # 조건부서식: 가동효율(L열)
+    total = start_row - 2 + len(bi_data)
+    if total > 0:
+        apply_conditional_format(ws, "L", 2, total + 1, [0.80, 0.85])
+
+    if start_row > 2:
+        print(f"    → {len(bi_data)}행 작성 + 기존 {start_row - 2}행 유지")
+    else:
+        print(f"    → {len(bi_data)}행 작성 완료")
+    return ws
 
-    for i, rec in enumerate(sorted(bi_data, key=lambda x: (x["_date"], str(get_field(x, "라인명", default="")))), 1):
+
+def write_daily_rows(ws, bi_data, cost_data, start_row):
+    """일일실적 행 작성 (날짜·라인 순) — 증분 시 새 일자 행만 start_row부터 이어 쓴다"""
+    for i, rec in enumerate(sorted(bi_data, key=lambda x: (x["_date"], str(get_field(x, "라인명", default="")))), start_row):
         line = str(get_field(rec, "라인명", default="") or "").strip()
         qty = to_num(get_field(rec, "생산량(ea)", "생산량"))
         work_h = to_num(get_field(rec, "근무시간(h)", "근무시간"))
@@ -336,57 +575,15 @@ def build_daily_sheet(wb, bi_data, cost_data):
             target_rate if target_rate else None,
             verdict,
         ]
-        write_row(ws, i + 1, values, fmts)
-
-    auto_width(ws)
-
-    # 조건부서식: 가동효율(L열)
-    if len(bi_data) > 0:
-        apply_conditional_format(ws, "L", 2, len(bi_data) + 1, [0.80, 0.85])
-
-    print(f"    → {len(bi_data)}행 작성 완료")
-    return ws
+        write_row(ws, i, values, DAILY_FMTS)
 
 
-def build_monthly_by_line(wb, bi_data, cost_data):
+def build_monthly_by_line(wb, monthly_agg):
     """시트2: 라인별 월간요약"""
     print("  시트2: 라인별_월간요약...")
     ws = wb.create_sheet("라인별_월간요약")
     ws.sheet_properties.tabColor = "70AD47"
-
-    # 집계
-    agg = defaultdict(lambda: {
-        "dates": set(), "qty": 0, "work_h": 0, "down_h": 0,
-        "active_h": 0, "target_qty": 0, "uph_sum": 0, "upmh_sum": 0,
-        "eff_sum": 0, "headcount_sum": 0, "count": 0,
-        "prod_amt": 0, "labor_cost": 0, "유형": ""
-    })
-
-    for rec in bi_data:
-        line = str(get_field(rec, "라인명", default="") or "").strip()
-        month = rec["_month"]
-        key = (month, line)
-        a = agg[key]
-        a["dates"].add(rec["_date"])
-        qty = to_num(get_field(rec, "생산량(ea)", "생산량"))
-        work_h = to_num(get_field(rec, "근무시간(h)", "근무시간"))
-        a["qty"] += qty
-        a["work_h"] += work_h
-        a["down_h"] += to_num(get_field(rec, "품질,설비 비가동(h)", "비가동(h)"))
-        a["active_h"] += to_num(get_field(rec, "실가동시간(h)", "실가동시간"))
-        a["target_qty"] += to_num(get_field(rec, "실가동시간 목표수량(ea)", "목표수량(ea)"))
-        a["uph_sum"] += to_num(get_field(rec, "실적UPH(ea)", "실적UPH"))
-        a["upmh_sum"] += to_num(get_field(rec, "UPMH"))
-        eff = to_num(get_field(rec, "가동효율"))
-        if eff and isinstance(eff, (int, float)):
-            a["eff_sum"] += eff if eff <= 1 else eff / 100
-        a["headcount_sum"] += to_num(get_field(rec, "생산인원"))
-        a["count"] += 1
-        a["유형"] = get_field(rec, "유형", default="") or ""
-
-        c = cost_data.get(line, {})
-        a["prod_amt"] += qty * c.get("업체기준최종단가", 0)
-        a["labor_cost"] += c.get("총인건비_h", 0) * work_h
+    agg = monthly_agg
 
     headers = [
         "연월", "라인명", "유형", "근무일수", "총생산량(ea)", "일평균생산량(ea)",
@@ -429,7 +626,7 @@ def build_monthly_by_line(wb, bi_data, cost_data):
 
     auto_width(ws)
     print(f"    → {row_num - 2}행 작성 완료")
-    return ws, agg
+    return ws
 
 
 def build_monthly_by_type(wb, monthly_agg):
@@ -552,23 +749,17 @@ def build_cost_trend(wb, monthly_agg):
     print(f"    → {len(lines)}개 라인 × {len(months)}개월 크로스탭 작성 완료")
 
 
-def build_labor_analysis(wb, bi_data, cost_data):
+def build_labor_analysis(wb, monthly_agg, cost_data):
     """시트5: 인건비 분석"""
     print("  시트5: 인건비_분석...")
     ws = wb.create_sheet("인건비_분석")
     ws.sheet_properties.tabColor = "9DC3E6"
 
     # 당월 판단 (최신 월)
-    current_month = max(rec["_month"] for rec in bi_data) if bi_data else "2026-03"
+    current_month = max(m for m, _ in monthly_agg) if monthly_agg else "2026-03"
 
     # 당월 데이터 라인별 집계
-    line_stats = defaultdict(lambda: {"work_h": 0, "qty": 0})
-    for rec in bi_data:
-        if rec["_month"] != current_month:
-            continue
-        line = str(get_field(rec, "라인명", default="") or "").strip()
-        line_stats[line]["work_h"] += to_num(get_field(rec, "근무시간(h)", "근무시간"))
-        line_stats[line]["qty"] += to_num(get_field(rec, "생산량(ea)", "생산량"))
+    line_stats = {line: a for (m, line), a in monthly_agg.items() if m == current_month}
 
     headers = [
         "라인코드", "라인명", "작업자수", "관리자수",
@@ -608,25 +799,12 @@ def build_labor_analysis(wb, bi_data, cost_data):
     print(f"    → {row_num - 2}행 작성 완료")
 
 
-def build_line_master(wb, cost_data, bi_data):
-    """시트6: 라인 마스터"""
+def build_line_master(wb, cost_data, line_info):
+    """시트6: 라인 마스터 (line_info = 큐브 lines: 라인별 유형/대표기종/야간여부)"""
     print("  시트6: 라인_마스터...")
     ws = wb.create_sheet("라인_마스터")
     ws.sheet_properties.tabColor = "A5A5A5"
 
-    # BI에서 라인별 유형/대표기종/야간여부 추출
-    line_info = {}
-    for rec in bi_data:
-        line = str(get_field(rec, "라인명", default="") or "").strip()
-        if line not in line_info:
-            line_info[line] = {
-                "유형": get_field(rec, "유형", default=""),
-                "대표기종": get_field(rec, "대표기종", default=""),
-                "야간운영": False
-            }
-        if str(get_field(rec, "야간구분", default="")).strip() in ("야간", "추가"):
-            line_info[line]["야간운영"] = True
-
     headers = [
         "라인코드", "라인명", "유형", "대표기종",
         "작업자수", "관리자수", "실효UPH(ea)", "C/T",
@@ -653,13 +831,13 @@ def build_line_master(wb, cost_data, bi_data):
     print(f"    → {row_num - 2}행 작성 완료")
 
 
-def build_dashboard(wb, bi_data, cost_data, monthly_agg):
+def build_dashboard(wb, monthly_agg):
     """시트7: 당월 대시보드"""
     print("  시트7: 당월_대시보드...")
     ws = wb.create_sheet("당월_대시보드")
     ws.sheet_properties.tabColor = "FF0000"
 
-    months_sorted = sorted(set(rec["_month"] for rec in bi_data))
+    months_sorted = sorted(set(m for m, _ in monthly_agg))
     current = months_sorted[-1] if months_sorted else "2026-03"
     prev = months_sorted[-2] if len(months_sorted) >= 2 else None
 
@@ -738,7 +916,7 @@ def build_dashboard(wb, bi_data, cost_data, monthly_agg):
     print(f"    → {len(lines)}개 라인 대시보드 작성 완료")
 
 
-def build_validation_sheet(wb, bi_data, cost_data, api_data):
+def build_validation_sheet(wb, monthly_agg, api_data):
     """시트8: 정합성 검증 (BI vs 조립비시스템 API)"""
     print("  시트8: 정합성_검증...")
     ws = wb.create_sheet("정합성_검증")
@@ -750,14 +928,7 @@ def build_validation_sheet(wb, bi_data, cost_data, api_data):
         return
 
     # BI 월간 라인별 집계
-    bi_agg = defaultdict(lambda: {"qty": 0, "amt": 0})
-    for rec in bi_data:
-        line = str(get_field(rec, "라인명", default="") or "").strip()
-        month = rec["_month"]
-        qty = to_num(get_field(rec, "생산량(ea)", "생산량"))
-        c = cost_data.get(line, {})
-        bi_agg[(month, line)]["qty"] += qty
-        bi_agg[(month, line)]["amt"] += qty * c.get("업체기준최종단가", 0)
+    bi_agg = {key: {"qty": a["qty"], "amt": a["prod_amt"]} for key, a in monthly_agg.items()}
 
     # API 월간 라인별 집계
     api_agg = defaultdict(lambda: {"qty": 0, "amt": 0})
@@ -863,9 +1034,83 @@ def build_labor_validation(wb, cost_data, line_api_data):
 #  메인
 # ═══════════════════════════════════════════════════════════
 
+def build_summary_sheets(wb, cube, cost_data, api_data, line_api):
+    """시트2~9: 큐브 월 집계에서 그림 (BI 행을 다시 읽지 않는다)"""
+    monthly_agg = rollup_monthly(cube)
+    build_monthly_by_line(wb, monthly_agg)
+    build_monthly_by_type(wb, monthly_agg)
+    build_cost_trend(wb, monthly_agg)
+    build_labor_analysis(wb, monthly_agg, cost_data)
+    build_line_master(wb, cost_data, cube["lines"])
+    build_dashboard(wb, monthly_agg)
+    build_validation_sheet(wb, monthly_agg, api_data)
+    build_labor_validation(wb, cost_data, line_api)
+
+
+def build_full(cost_data, api_data, line_api):
+    """전체 생성 → (wb, cube, b"")"""
+    bi_data = load_bi_data()
+    if not bi_data:
+        print(f"ERROR: {BI_YEAR}년 BI 데이터가 없습니다.")
+        sys.exit(1)
+    cube = cube_add(new_cube(), bi_data, cost_data)
+
+    # 워크북 생성
+    wb = openpyxl.Workbook()
+    # 기본 시트 삭제
+    wb.remove(wb.active)
+
+    print("\n시트 생성 시작...")
+    build_daily_sheet(wb, bi_data, cost_data)
+    build_summary_sheets(wb, cube, cost_data, api_data, line_api)
+    return wb, cube, b""
+
+
+def build_incremental(state, cost_data, api_data, line_api):
+    """직전 빌드 이후 BI에 붙은 행만 반영 → (wb, cube, 유지 행 XML) / 과거 일자 행이 끼어 있으면 None
+
+    재집계 시작일 = 새 행의 가장 이른 일자 (새 행 없으면 직전 마지막 일자) — 직전 마지막 일자보다 이르면 불가.
+    큐브 셀을 그 일자부터 지우고 해당 기간 BI 행을 다시 넣는다 (마지막 일자 야간 행이 다음 날 붙는 경우 포함).
+    일일실적은 그 앞 행을 직전 출력에서 행 XML 그대로 옮기고, 요약 시트는 큐브에서 다시 그린다.
+    """
+    cube = state["cube"]
+    last = cube_last_date(cube)
+    if last is None:
+        print("  증분 불가: 큐브 비어 있음")
+        return None
+    new = load_bi_data(after=state["bi_rows"])
+    reopen = min((rec["_date"] for rec in new), default=last)
+    if reopen < last:
+        print(f"  증분 불가: 직전 마지막 일자({last:%Y-%m-%d}) 이전 일자 행 추가 ({reopen:%Y-%m-%d})")
+        return None
+
+    kept_n = cube_rows(cube) - cube_drop_from(cube, reopen)
+    try:
+        kept = read_daily_rows(OUTPUT_FILE, kept_n)
+    except (KeyError, StopIteration, ValueError, zipfile.BadZipFile) as e:
+        print(f"  증분 불가: 직전 출력 일일실적 읽기 실패 ({type(e).__name__})")
+        return None
+    bi_data = load_bi_data(start=reopen)
+    cube_add(cube, bi_data, cost_data)
+    print(f"  증분: BI 새 행 {len(new)}행 / {reopen:%Y-%m-%d}부터 재집계 {len(bi_data)}행 (유지 {kept_n}행)")
+
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+
+    print("\n시트 생성 시작...")
+    build_daily_sheet(wb, bi_data, cost_data, start_row=kept_n + 2, widths=state.get("daily_widths"))
+    build_summary_sheets(wb, cube, cost_data, api_data, line_api)
+    return wb, cube, kept
+
+
 def main():
+    ap = argparse.ArgumentParser(description="생산관리 마스터리스트 생성")
+    ap.add_argument("--incremental", action="store_true",
+                    help="직전 빌드 이후 BI 새 행만 반영 (불가하면 전체 생성)")
+    args = ap.parse_args()
+
     print("=" * 60)
-    print("  생산관리 마스터리스트 생성")
+    print("  생산관리 마스터리스트 생성" + (" (증분)" if args.incremental else ""))
     print(f"  실행시각: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("=" * 60)
 
@@ -876,40 +1121,33 @@ def main():
             sys.exit(1)
 
     # 데이터 로딩
-    bi_data = load_bi_data()
+    store = open_store(BI_FILE)
     cost_data = load_cost_data()
     api_data = load_assy_api_data()
     line_api = load_line_api_data()
 
-    if not bi_data:
-        print("ERROR: 2026년 BI 데이터가 없습니다.")
-        sys.exit(1)
-
-    # 워크북 생성
-    wb = openpyxl.Workbook()
-    # 기본 시트 삭제
-    wb.remove(wb.active)
-
-    print("\n시트 생성 시작...")
-    build_daily_sheet(wb, bi_data, cost_data)
-    _, monthly_agg = build_monthly_by_line(wb, bi_data, cost_data)
-    build_monthly_by_type(wb, monthly_agg)
-    build_cost_trend(wb, monthly_agg)
-    build_labor_analysis(wb, bi_data, cost_data)
-    build_line_master(wb, cost_data, bi_data)
-    build_dashboard(wb, bi_data, cost_data, monthly_agg)
-    build_validation_sheet(wb, bi_data, cost_data, api_data)
-    build_labor_validation(wb, cost_data, line_api)
+    built = None
+    if args.incremental:
+        state, reason = load_cube_state(store, cost_data)
+        if state is None:
+            print(f"  증분 불가: {reason} → 전체 생성")
+        else:
+            built = build_incremental(state, cost_data, api_data, line_api)
+    if built is None:
+        built = build_full(cost_data, api_data, line_api)
+    wb, cube, kept = built
 
     # 저장
     print(f"\n저장 중: {OUTPUT_FILE}")
     try:
-        wb.save(OUTPUT_FILE)
+        save_output(wb, OUTPUT_FILE, kept)
+        widths = {col: dim.width for col, dim in wb[DAILY_SHEET].column_dimensions.items()}
+        save_cube(cube, store, cost_data, widths)
         print(f"✓ 저장 완료: {OUTPUT_FILE}")
     except PermissionError:
         alt = OUTPUT_FILE.replace(".xlsx", f"_{datetime.now().strftime('%H%M%S')}.xlsx")
-        wb.save(alt)
-        print(f"! 원본 파일 열려있음 → 대체 저장: {alt}")
+        save_output(wb, alt, kept)
+        print(f"! 원본 파일 열려있음 → 대체 저장: {alt} (큐브 미갱신 — 다음 증분은 직전 빌드 기준)")
 
     # 요약
     print("\n" + "=" * 60)
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Step 캐시 바이너리 형식 (.bin) — 열 단위(columnar) 타입 배열 + zlib
+_step_io.save_result / load_result가 Step 2~5 캐시(_cache/stepN_*.bin)에 사용한다.
+JSON으로 표현 가능한 값(dict·list·str·int·float·bool·None)만 받으며, 읽으면 json.load와 같은 값이 나온다.
+
+인코딩 (JSON 트리 → 노드 트리 → pickle protocol 5):
+  - 표 (같은 키 순서의 dict 목록, 예: master 행·정산 items) → 열 이름 + 열 목록
+  - 큰 dict (16키 이상, 예: 품번 피벗·lookup)             → 키 열 + 값 열
+  - 열 종류: 정수 → 최소 폭 array('b'/'h'/'i'/'q') / 실수 → array('d')
+             문자열 → 반복 많으면 사전(고유값 + 인덱스 배열), 'SP3M3|PN|1234.0' 같은 복합키는 '|' 조각별 열
+             스칼라 list 값 (예: 단가 목록) → 길이 배열 + 펼친 열
+             그 외 (None 섞임 등) → 값 목록 그대로 / 중첩 값 → 재귀 인코딩
+  - 같은 문자열은 파일 전체에서 1번만 저장 (피벗 여러 개가 같은 품번 키 공유)
+
+파일 구조: MAGIC(8) + 형식 버전(1) + 플래그(1, bit0 = zlib) + payload
+
+사용법:
+    from _cache_format import dump, load
+    dump(result, path)
+    data = load(path)                   # 전체 읽기
+    data = load(path, use_mmap=True)    # 파일을 메모리 매핑해 복사 없이 해제·복원 (큰 캐시)
+
+    python _cache_format.py _cache/step5_settlement.bin [출력.json]   # 사람이 읽는 JSON으로 내보내기
+"""
+
+import json
+import mmap
+import os
+import pickle
+import sys
+import zlib
+from array import array
+from itertools import accumulate
+
+MAGIC = b'STLCACHE'
+FORMAT_VERSION = 1
+FLAG_ZLIB = 0x01
+HEADER_SIZE = len(MAGIC) + 2
+
+TABLE_MIN_ROWS = 2      # 이 행 수 이상인 dict 목록만 표로
+MAP_MIN_KEYS = 16       # 이 키 수 이상인 dict만 키/값 열로
+KEY_SEP = '|'
+
+# 노드 태그 (노드 = tuple — 입력 tuple은 list로 바꾸므로 트리 안 tuple은 항상 노드)
+_TABLE, _MAP = 'T', 'M'
+# 열 태그
+_INT, _FLOAT, _DICT_STR, _COMPOUND, _RAGGED, _PLAIN, _NESTED = 'i', 'f', 's', 'k', 'r', 'l', 'v'
+
+_SCALARS = (str, int, float, bool, type(None))
+
+
+class CacheFormatError(ValueError):
+    """.bin 캐시가 아니거나 지원하지 않는 형식 버전."""
+
+
+# ── 인코딩 ────────────────────────────────────────────────────
+def _json_key(k):
+    """json.dump와 같은 dict 키 변환 (str 외 키 → 문자열)."""
+    if isinstance(k, str):
+        return str(k)
+    if k is True or k is False:
+        return 'true' if k else 'false'
+    if k is None:
+        return 'null'
+    if isinstance(k, int):
+        return int.__repr__(k)
+    if isinstance(k, float):
+        return float.__repr__(k)
+    raise TypeError(f"캐시 dict 키 형식 불가: {type(k).__name__}")
+
+
+def _narrow_ints(values):
+    """정수 목록 → 값 범위에 맞는 최소 폭 array (int64 초과면 None)."""
+    lo, hi = min(values), max(values)
+    for tc in 'bhiq':
+        bound = 1 << (array(tc).itemsize * 8 - 1)
+        if -bound <= lo and hi < bound:
+            return array(tc, values)
+    return None
+
+
+class _Encoder:
+    def __init__(self):
+        self._strings = {}
+
+    def _str(self, s):
+        return self._strings.setdefault(s, s)
+
+    def value(self, o):
+        t = type(o)
+        if t is str:
+            return self._str(o)
+        if t is bool or o is None or t is int or t is float:
+            return o
+        if isinstance(o, dict):
+            return self._dict(o)
+        if isinstance(o, (list, tuple)):
+            return self._list(o)
+        if isinstance(o, bool):
+            return bool(o)
+        if isinstance(o, int):
+            return int(o)
+        if isinstance(o, float):
+            return float(o)
+        if isinstance(o, str):
+            return self._str(str(o))
+        raise TypeError(f"캐시 값 형식 불가 (JSON 직렬화 불가): {t.__name__}")
+
+    def _dict(self, d):
+        keys = [self._str(_json_key(k)) for k in d]
+        if len(keys) >= MAP_MIN_KEYS:
+            return (_MAP, self._column(keys), self._column(list(d.values())))
+        return dict(zip(keys, (self.value(v) for v in d.values())))
+
+    def _list(self, items):
+        if len(items) >= TABLE_MIN_ROWS and type(items[0]) is dict:
+            names = tuple(items[0])
+            if all(isinstance(n, str) for n in names) and all(
+                    type(r) is dict and len(r) == len(names) and tuple(r) == names for r in items):
+                return (_TABLE, tuple(self._str(n) for n in names),
+                        [self._column([r[n] for r in items]) for n in names])
+        return [self.value(v) for v in items]
+
+    def _column(self, values):
+        types = set(map(type, values))
+        if types == {int}:
+            packed = _narrow_ints(values)
+            if packed is not None:
+                return (_INT, packed)
+        if types == {float}:
+            return (_FLOAT, array('d', values))
+        if types == {str}:
+            return self._str_column(values)
+        if types <= set(_SCALARS):
+            return (_PLAIN, [self._str(v) if type(v) is str else v for v in values])
+        if types == {list}:
+            flat = [x for v in values for x in v]
+            if set(map(type, flat)) <= set(_SCALARS):
+                return (_RAGGED, _narrow_ints([len(v) for v in values]), self._column(flat))
+        return (_NESTED, [self.value(v) for v in values])
+
+    def _str_column(self, values, split=True):
+        if split:
+            n_sep = values[0].count(KEY_SEP)
+            if n_sep and all(v.count(KEY_SEP) == n_sep for v in values):
+                parts = zip(*(v.split(KEY_SEP) for v in values))
+                return (_COMPOUND, [self._str_column(list(p), split=False) for p in parts])
+        index = {}
+        codes = [index.setdefault(v, len(index)) for v in values]
+        if len(index) * 2 <= len(values):
+            return (_DICT_STR, [self._str(v) for v in index], _narrow_ints(codes))
+        return (_PLAIN, [self._str(v) for v in values])
+
+
+# ── 디코딩 ────────────────────────────────────────────────────
+def _decode_column(col):
+    tag = col[0]
+    if tag == _INT or tag == _FLOAT:
+        return col[1].tolist()
+    if tag == _DICT_STR:
+        uniq = col[1]
+        return [uniq[i] for i in col[2]]
+    if tag == _COMPOUND:
+        return [KEY_SEP.join(p) for p in zip(*map(_decode_column, col[1]))]
+    if tag == _RAGGED:
+        flat = _decode_column(col[2])
+        ends = list(accumulate(col[1]))
+        return [flat[end - n:end] for n, end in zip(col[1], ends)]
+    if tag == _PLAIN:
+        return col[1]
+    return [_decode(v) for v in col[1]]
+
+
+def _decode(o):
+    t = type(o)
+    if t is dict:
+        return {k: _decode(v) for k, v in o.items()}
+    if t is list:
+        return [_decode(v) for v in o]
+    if t is tuple:
+        if o[0] == _TABLE:
+            names = o[1]
+            return [dict(zip(names, row)) for row in zip(*map(_decode_column, o[2]))]
+        return dict(zip(_decode_column(o[1]), _decode_column(o[2])))
+    return o
+
+
+# ── 파일 입출력 ───────────────────────────────────────────────
+def dumps(obj, compress=True):
+    """값 → .bin 바이트."""
+    payload = pickle.dumps(_Encoder().value(obj), protocol=5)
+    flags = 0
+    if compress:
+        payload, flags = zlib.compress(payload, 1), FLAG_ZLIB
+    return MAGIC + bytes((FORMAT_VERSION, flags)) + payload
+
+
+def loads(data):
+    """.bin 바이트(또는 bytes-like) → 값."""
+    with memoryview(data) as view:
+        if len(view) < HEADER_SIZE or view[:len(MAGIC)] != MAGIC:
+            raise CacheFormatError("캐시 바이너리 형식 아님 (MAGIC 불일치)")
+        version, flags = view[len(MAGIC)], view[len(MAGIC) + 1]
+        if version != FORMAT_VERSION:
+            raise CacheFormatError(f"캐시 형식 버전 {version} 미지원 (지원: {FORMAT_VERSION}) — Step 재실행 필요")
+        with view[HEADER_SIZE:] as payload:   # mmap 닫기 전에 버퍼 참조 해제
+            tree = pickle.loads(zlib.decompress(payload) if flags & FLAG_ZLIB else payload)
+    return _decode(tree)
+
+
+def dump(obj, path, compress=True):
+    """값 → path (.bin). 임시 파일에 쓴 뒤 교체 — 중단돼도 이전 캐시가 깨지지 않는다."""
+    data = dumps(obj, compress)
+    tmp = f'{path}.tmp{os.getpid()}'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def load(path, use_mmap=False):
+    """path (.bin) → 값. use_mmap=True면 파일을 읽어 들이지 않고 매핑한 채로 해제·복원."""
+    with open(path, 'rb') as f:
+        if not use_mmap:
+            return loads(f.read())
+        if os.fstat(f.fileno()).st_size < HEADER_SIZE:
+            raise CacheFormatError(f"캐시 바이너리 형식 아님 (크기 부족): {path}")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return loads(mm)
+
+
+def is_cache_file(path):
+    """path가 .bin 캐시(MAGIC 일치)인지."""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def export_json(path, out_path=None):
+    """.bin → 사람이 읽는 JSON (기존 _cache JSON과 같은 indent=2). out_path 생략 시 확장자만 .json."""
+    out_path = out_path or os.path.splitext(path)[0] + '.json'
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump(load(path), f, ensure_ascii=False, indent=2)
+    return out_path
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (2, 3):
+        print("사용법: python _cache_format.py <캐시.bin> [출력.json]")
+        sys.exit(1)
+    print(f"JSON 내보내기: {export_json(*sys.argv[1:])}")
@@ -178,7 +178,7 @@ def calc_recv_amt(amt_diff, excl_reason):
 # ──────────────────────────────────────────────────────────────
 # 본체 라인시트 S 컬럼 분류 수식 생성 (build_formula_version용)
 # ──────────────────────────────────────────────────────────────
-def build_classify_formula(out_r, line_group):
+def build_classify_formula(out_r, line_group, pn_count_col=None):
     """라인시트 S 컬럼(19) 분류 수식.
 
     셀 참조:
@@ -190,6 +190,7 @@ def build_classify_formula(out_r, line_group):
       Q = 금액차이
       R = 수량차이
       A = 품번
+      pn_count_col = 같은 시트 품번 건수 보조열 (예: 'U'). 주면 COUNTIF(A:A,A) 대신 참조 (indexed 레이아웃)
 
     분류 우선순위 (위에서 아래로 첫 매칭):
       1. ROUND(Q,0)=0 → 정상
@@ -216,7 +217,7 @@ def build_classify_formula(out_r, line_group):
     g_qty = f'(I{r}+J{r}>0)'              # GERP 수량 존재
     e_qty = f'(M{r}+N{r}>0)'              # 구ERP 수량 존재
     master = f'(G{r}>0)'                  # 마스터 단가 존재
-    countif = f'COUNTIF(A:A,A{r})>1'
+    countif = f'{pn_count_col}{r}>1' if pn_count_col else f'COUNTIF(A:A,A{r})>1'
 
     parts = []
     cnt = 0
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+원본 엑셀(GERP / 구ERP) 공통 로더 — 컬럼 sidecar 캐시
+step1·2·3·7이 같은 월 원본을 각자 pd.read_excel로 전체 파싱하던 것을 한 번으로 줄인다.
+
+  - 첫 로드: 시트를 1회 파싱하며 매핑된 컬럼(GERP_COL 등)만 usecols로 남겨 DataFrame sidecar로 저장
+  - 이후 로드: 원본 내용 해시가 같으면 sidecar만 읽음 (엑셀 파싱 없음)
+  - 원본이 바뀌면 해시가 달라져 자동 재생성, 이전 해시 sidecar는 삭제
+
+sidecar 위치: CACHE_DIR/_ingest/{파일명}_{해시16}_{시트}_{컬럼}_pd{pandas 버전}.pkl
+  - pandas pickle은 다른 pandas 버전에서 못 읽거나 다르게 풀릴 수 있어 버전을 키에 넣는다
+    (pandas 업그레이드 후 첫 실행은 엑셀을 다시 파싱해 새 sidecar를 만든다)
+기준정보는 _master_index.py (컴파일 인덱스)가 담당한다.
+반환 DataFrame은 헤더 행을 제외한 데이터 행이며, 컬럼 라벨은 원본 0-based 열 인덱스 그대로다.
+  예) data[GERP_COL['qty']]  ← 기존 data.iloc[:, GERP_COL['qty']]와 동일 값
+
+사용법:
+    from _ingest import load_gerp, load_olderp
+    data, meta = load_gerp(cfg)       # meta = {'n_rows', 'n_cols'} (헤더 포함 원본 시트 크기)
+    cfg = RunConfig (생략 시 _pipeline_config 기본값) — 입력 파일·sidecar 위치를 실행 단위로 결정
+"""
+
+import hashlib
+import json
+import os
+import pickle
+
+import pandas as pd
+
+from _metrics import span
+from _pipeline_config import GERP_COL, OLDERP_COL
+from _run_config import RunConfig
+
+# 원본별 보관 컬럼 (0-based) / 헤더 행 수
+GERP_USECOLS   = sorted(set(GERP_COL.values()) | {5})   # 5: 차종(vtype) — step2
+OLDERP_USECOLS = sorted(set(OLDERP_COL.values()))
+GERP_SKIP, OLDERP_SKIP = 2, 2
+
+_hash_memo = {}   # (경로, size, mtime) → 내용 해시
+
+
+def content_hash(path):
+    """원본 파일 내용 sha256 (같은 프로세스 안에서는 size/mtime 기준 재사용)."""
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    if key not in _hash_memo:
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        _hash_memo[key] = h.hexdigest()
+    return _hash_memo[key]
+
+
+def _sidecar_name(path, digest, tag):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return f"{stem}_{digest[:16]}_{tag}"
+
+
+def _atomic_write(target, write):
+    """임시파일에 쓴 뒤 교체 (병렬 Step이 같은 sidecar를 동시에 만들어도 안전)."""
+    tmp = f"{target}.{os.getpid()}.tmp"
+    write(tmp)
+    os.replace(tmp, target)
+
+
+def _ingest_dir(cfg):
+    """sidecar 폴더 (실행 설정의 CACHE_DIR/_ingest)."""
+    cfg = cfg or RunConfig.default()
+    path = os.path.join(cfg.CACHE_DIR, '_ingest')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _drop_stale(ingest_dir, path, digest, suffix):
+    """같은 원본·같은 컬럼 구성의 이전 해시 sidecar 삭제."""
+    stem = os.path.splitext(os.path.basename(path))[0] + '_'
+    for name in os.listdir(ingest_dir):
+        old = name[len(stem):len(stem) + 16]
+        if (not name.startswith(stem) or name[len(stem) + 16:] != suffix
+                or old == digest[:16] or len(old) != 16):
+            continue
+        try:
+            os.remove(os.path.join(ingest_dir, name))
+        except OSError:
+            pass
+
+
+def sheet_names(path, cfg=None):
+    """워크북 시트명 목록 (sidecar 캐시)."""
+    ingest_dir = _ingest_dir(cfg)
+    digest = content_hash(path)
+    sc = os.path.join(ingest_dir, _sidecar_name(path, digest, 'sheets.json'))
+    if os.path.exists(sc):
+        with open(sc, encoding='utf-8') as f:
+            return json.load(f)
+    with pd.ExcelFile(path) as xf:
+        names = list(xf.sheet_names)
+
+    def write(tmp):
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(names, f, ensure_ascii=False)
+    _atomic_write(sc, write)
+    _drop_stale(ingest_dir, path, digest, '_sheets.json')
+    return names
+
+
+def read_sheets(path, sheets, usecols, skiprows, cfg=None):
+    """여러 시트의 지정 컬럼 로드 → {시트: (data, meta)}. 없는 시트는 결과에서 빠진다.
+
+    sidecar가 없는 시트가 있을 때만 워크북을 1회 열어 파싱한다 (usecols 외 열은 DataFrame에 싣지 않음).
+    meta의 열 수는 usecols 판정에 넘어온 열 인덱스로 센다 — 전체 시트를 읽었을 때의 shape와 같다.
+    원본 시트 열 수가 usecols보다 적으면 ValueError (기존 iloc IndexError에 해당).
+    """
+    ingest_dir = _ingest_dir(cfg)
+    digest = content_hash(path)
+    names = sheet_names(path, cfg)
+    colsig = '-'.join(str(c) for c in usecols) + f'_s{skiprows}_pd{pd.__version__}'
+
+    out, missing = {}, []
+    for sheet in sheets:
+        sheet_key = names[sheet] if isinstance(sheet, int) else sheet
+        if sheet_key not in names:
+            continue
+        sc = os.path.join(ingest_dir, _sidecar_name(path, digest, f'{sheet_key}_{colsig}.pkl'))
+        if os.path.exists(sc):
+            with open(sc, 'rb') as f:
+                out[sheet] = pickle.load(f)
+        else:
+            missing.append((sheet, sheet_key, sc))
+
+    if missing:
+        keep = set(usecols)
+        with pd.ExcelFile(path) as xf:
+            for sheet, sheet_key, sc in missing:
+                seen = []
+                df = pd.read_excel(xf, sheet_name=sheet_key, header=None,
+                                   usecols=lambda c: seen.append(c) or c in keep)
+                n_cols = max(seen) + 1 if seen else 0
+                meta = {'n_rows': int(df.shape[0]), 'n_cols': n_cols}
+                over = [c for c in usecols if c >= n_cols]
+                if over and df.shape[0] > skiprows:
+                    raise ValueError(
+                        f"{os.path.basename(path)} [{sheet_key}] 열 수 {n_cols} < 필요 컬럼 {over}")
+                data = df.reindex(columns=usecols).iloc[skiprows:].reset_index(drop=True)
+                entry = (data, meta)
+
+                def write(tmp, entry=entry):
+                    with open(tmp, 'wb') as f:
+                        pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+                _atomic_write(sc, write)
+                _drop_stale(ingest_dir, path, digest, f'_{sheet_key}_{colsig}.pkl')
+                out[sheet] = entry
+    return out
+
+
+def read_columns(path, sheet, usecols, skiprows, cfg=None):
+    """단일 시트 지정 컬럼 로드 → (data, meta). 시트가 없으면 KeyError."""
+    loaded = read_sheets(path, [sheet], usecols, skiprows, cfg)
+    if sheet not in loaded:
+        raise KeyError(f"{os.path.basename(path)}: 시트 없음 '{sheet}'")
+    return loaded[sheet]
+
+
+def load_gerp(cfg=None):
+    """GERP 첫 시트 (데이터 row 2+)."""
+    cfg = cfg or RunConfig.default()
+    with span('load_gerp') as sp:
+        data, meta = read_columns(cfg.GERP_FILE, 0, GERP_USECOLS, GERP_SKIP, cfg)
+        sp.rows = len(data)
+    return data, meta
+
+
+def load_olderp(sheet, cfg=None):
+    """구ERP 지정 시트 (데이터 row 2+)."""
+    cfg = cfg or RunConfig.default()
+    with span('load_olderp') as sp:
+        data, meta = read_columns(cfg.OLDERP_FILE, sheet, OLDERP_USECOLS, OLDERP_SKIP, cfg)
+        sp.rows = len(data)
+    return data, meta
+
+
+def gerp_price_set(df):
+    """(라인, 품번)별 GERP 단가 목록 → {'라인|품번': [단가 오름차순]} (단가 > 0만).
+
+    df: line·product_no·unit_price 컬럼 (업체 필터 후, 이관 제외·RSP 변환 전 행).
+    step2가 결과 JSON에 실어 두고 step7이 원본 재파싱 없이 GERP단가 열에 사용한다.
+    """
+    pos = df[df['unit_price'] > 0]
+    keys = pos['line'] + '|' + pos['product_no']
+    uniq = pos['unit_price'].groupby(keys, sort=False).unique()
+    return {k: sorted(float(p) for p in v) for k, v in uniq.items()}
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+기준정보(MASTER_FILE) 컴파일 인덱스
+step1·step4·build_formula_version.py·assy-registration-check/sync_master.py가 같은 기준정보를
+각자 openpyxl/pandas로 다시 읽고 룩업을 만들던 것을 기준정보 버전(내용 해시)당 1회 빌드로 줄인다.
+
+  - 빌드: 모든 시트를 openpyxl read_only로 1회 순회 → A~H 원본값 + 행번호 보관, 룩업 컴파일
+  - 저장: 기준정보 폴더/_master_index/{파일명}_{해시16}.pkl (이전 해시 인덱스는 삭제)
+  - 로드: 해시가 같으면 pickle 1회 로드 (엑셀 파싱 없음), 같은 프로세스 안에서는 메모리 재사용
+
+컴파일 룩업:
+  - by_part      : 시트별 품번 → 행 위치 목록
+  - prices       : 시트별 품번 → 숫자 단가 목록 (다중단가 식별 — build_formula_version)
+  - settlement   : 업체코드 필터 + (품번, 단가) 중복 제거 행 (step4 master)
+  - rsp_pairs    : 시트별 (E열 RSP 모듈품번, C열 품번) (step4 rsp_map)
+
+사용법:
+    from _master_index import load_master_index
+    idx = load_master_index()                      # 기본: _pipeline_config.MASTER_FILE
+    rows, dup = idx.settlement_rows('SP3M3', '0109')
+    for row_no, vals in idx.rows('SP3M3'): ...     # vals = A~H 원본값 8개
+"""
+
+import hashlib
+import os
+import pickle
+
+import openpyxl
+
+from _metrics import span
+
+INDEX_VERSION = 1     # 인덱스 구조 변경 시 +1 (기존 pkl 무효화)
+INDEX_DIRNAME = '_master_index'
+HEADER_ROWS   = 3     # row 1 라인명 / row 2 공란 / row 3 헤더 / row 4+ 데이터
+NCOLS         = 8     # A~H: 품번 | 업체코드 | 라인 | 조립품번 | Usage | 단가구분 | 단가 | 차종
+
+# 기본 열 배치 (_pipeline_config.MASTER_COL과 동일, settlement_rows(cols=)로 교체 가능)
+DEFAULT_COL = {
+    'part_no': 0, 'vendor_cd': 1, 'line_code': 2, 'assy_part': 3,
+    'usage': 4, 'price_type': 5, 'price': 6, 'vtype': 7,
+}
+
+# pd.read_excel 기본 NA 문자열 — step4가 pandas로 읽던 때와 같은 값 해석 유지
+NA_STRINGS = frozenset({
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+    '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+})
+
+_loaded = {}   # (경로, 해시) → MasterIndex
+
+
+def _content_hash(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _cell(v):
+    """원본 셀값 → pandas 해석값 (NA 문자열은 None, 정수값 float은 int)."""
+    if v is None or (isinstance(v, str) and v in NA_STRINGS):
+        return None
+    if isinstance(v, float) and v.is_integer():
+        return int(v)
+    return v
+
+
+def _text(v):
+    """셀값 → strip 문자열 (빈 셀·NA는 '')."""
+    v = _cell(v)
+    return str(v).strip() if v is not None else ''
+
+
+class MasterIndex:
+    """기준정보 1개 버전의 원본 행 + 컴파일 룩업."""
+
+    def __init__(self, source, digest):
+        self.version = INDEX_VERSION
+        self.source = source
+        self.digest = digest
+        self.sheet_names = []
+        self.sheet_rows = {}    # 시트 → [(행번호, A~H 값 tuple)] (데이터 행 전체, 빈 행 포함)
+        self.sheet_shape = {}   # 시트 → (n_rows, n_cols) — 헤더 포함, 끝 공란 행/열 제외
+        self.by_part = {}       # 시트 → {품번: [sheet_rows 위치]} (품번 = str(A열).strip())
+        self.prices = {}        # 시트 → {품번: [숫자 단가]}
+        self.rsp_pairs = {}     # 시트 → [(RSP 모듈품번, C열 품번)]
+        self._settlement = {}   # (시트, 업체코드) → (rows, dup_count)
+
+    # ── 빌드 ─────────────────────────────────────────────────────
+    def _compile_sheet(self, sheet, raw_rows):
+        rows = []
+        n_rows = n_cols = 0
+        for row_no, raw in enumerate(raw_rows, start=1):
+            width = len(raw)
+            while width and raw[width - 1] in (None, ''):
+                width -= 1
+            if width:
+                n_rows = row_no
+                n_cols = max(n_cols, width)
+            if row_no > HEADER_ROWS:
+                vals = tuple(raw[:NCOLS]) + (None,) * (NCOLS - min(len(raw), NCOLS))
+                rows.append((row_no, vals))
+        rows = [r for r in rows if r[0] <= n_rows]
+
+        by_part, prices, rsp = {}, {}, []
+        for i, (_, vals) in enumerate(rows):
+            pn, price = vals[0], vals[6]
+            if pn:
+                key = str(pn).strip()   # 원본값 기준 키 (build_formula_version / sync_master와 동일)
+                by_part.setdefault(key, []).append(i)
+                if isinstance(price, (int, float)):
+                    prices.setdefault(key, []).append(price)
+            if n_cols >= 5:
+                pn_c, pn_e = _text(vals[2]), _text(vals[4])   # C열: 품번 / E열: 모듈품번
+                if pn_e.startswith('RSP') and pn_c and pn_c != 'nan':
+                    rsp.append((pn_e, pn_c))
+
+        self.sheet_names.append(sheet)
+        self.sheet_rows[sheet] = rows
+        self.sheet_shape[sheet] = (n_rows, n_cols)
+        self.by_part[sheet] = by_part
+        self.prices[sheet] = prices
+        self.rsp_pairs[sheet] = rsp
+
+    @classmethod
+    def build(cls, path, digest):
+        idx = cls(os.path.abspath(path), digest)
+        wb = openpyxl.load_workbook(path, data_only=True, read_only=True)
+        try:
+            for ws in wb.worksheets:
+                ws.reset_dimensions()   # 잘못된 dimension 태그 대비 (pandas와 동일)
+                idx._compile_sheet(ws.title, ws.iter_rows(min_row=1, values_only=True))
+        finally:
+            wb.close()
+        return idx
+
+    # ── 조회 ─────────────────────────────────────────────────────
+    def __contains__(self, sheet):
+        return sheet in self.sheet_rows
+
+    def rows(self, sheet):
+        """데이터 행 전체 [(행번호, A~H 값)] — 빈 품번 행 포함 (원본 순서)."""
+        return self.sheet_rows.get(sheet, [])
+
+    def part_rows(self, sheet, part_no):
+        """품번의 데이터 행 [(행번호, A~H 값)] (다중단가면 여러 행)."""
+        rows = self.sheet_rows.get(sheet, [])
+        return [rows[i] for i in self.by_part.get(sheet, {}).get(part_no, [])]
+
+    def data_row_count(self, sheet):
+        """헤더(3행) 제외 데이터 행 수 (끝 공란 행 제외)."""
+        return self.sheet_shape.get(sheet, (0, 0))[0] - HEADER_ROWS
+
+    def settlement_rows(self, sheet, vendor_cd, cols=None):
+        """step4 master 행: 업체코드 일치 + 품번 있음, (품번, 단가) 중복 제거 → (rows, 제거 건수).
+
+        다중 단가(같은 품번, 다른 단가)는 유지한다. cols = MASTER_COL 형식 열 배치.
+        """
+        c = cols or DEFAULT_COL
+        key = (sheet, vendor_cd, tuple(sorted(c.items())))
+        if key in self._settlement:
+            return self._settlement[key]
+        rows, seen, dup_count = [], set(), 0
+        for _, vals in self.sheet_rows.get(sheet, []):
+            pn, vcode = _text(vals[c['part_no']]), _text(vals[c['vendor_cd']])
+            if not pn or pn == 'nan':
+                continue
+            if vcode != vendor_cd:
+                continue
+            usage = _cell(vals[c['usage']])
+            price_raw = _cell(vals[c['price']])
+            try:
+                price = float(price_raw) if price_raw is not None else float('nan')   # 빈 단가 = NaN (기존 동작)
+            except (TypeError, ValueError):
+                price = 0.0
+            if (pn, price) in seen:
+                dup_count += 1
+                continue
+            seen.add((pn, price))
+            rows.append({
+                'part_no':    pn,
+                'assy_part':  _text(vals[c['assy_part']]),
+                'price':      price,
+                'usage':      int(usage) if usage is not None else 1,
+                'price_type': _text(vals[c['price_type']]),
+                'vtype':      _text(vals[c['vtype']]),
+            })
+        self._settlement[key] = (rows, dup_count)
+        return self._settlement[key]
+
+    def rsp_map(self, sheets):
+        """RSP 모듈품번 → 완성품 품번 (sheets 순서대로, 뒤 시트가 덮어씀)."""
+        out = {}
+        for sheet in sheets:
+            out.update(self.rsp_pairs.get(sheet, []))
+        return out
+
+
+def _index_path(path, digest):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(os.path.dirname(os.path.abspath(path)), INDEX_DIRNAME, f'{stem}_{digest[:16]}.pkl')
+
+
+def load_master_index(path=None):
+    """기준정보 인덱스 로드 (없거나 원본이 바뀌었으면 빌드 후 저장)."""
+    if path is None:
+        from _pipeline_config import MASTER_FILE
+        path = MASTER_FILE
+    path = os.fspath(path)
+    digest = _content_hash(path)
+    key = (os.path.abspath(path), digest)
+    if key in _loaded:
+        return _loaded[key]
+
+    pkl = _index_path(path, digest)
+    with span('load_master_index') as sp:
+        idx = None
+        if os.path.exists(pkl):
+            try:
+                with open(pkl, 'rb') as f:
+                    idx = pickle.load(f)
+                if getattr(idx, 'version', None) != INDEX_VERSION:
+                    idx = None
+            except (OSError, pickle.UnpicklingError, AttributeError, EOFError):
+                idx = None
+
+        if idx is None:
+            idx = MasterIndex.build(path, digest)
+            os.makedirs(os.path.dirname(pkl), exist_ok=True)
+            tmp = f'{pkl}.{os.getpid()}.tmp'
+            with open(tmp, 'wb') as f:
+                pickle.dump(idx, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, pkl)
+            # 같은 기준정보 파일의 이전 버전 인덱스 정리
+            stem = os.path.splitext(os.path.basename(path))[0] + '_'
+            for name in os.listdir(os.path.dirname(pkl)):
+                if (name.startswith(stem) and name.endswith('.pkl') and len(name) == len(stem) + 20
+                        and name != os.path.basename(pkl)):
+                    try:
+                        os.remove(os.path.join(os.path.dirname(pkl), name))
+                    except OSError:
+                        pass
+        sp.rows = sum(len(rows) for rows in idx.sheet_rows.values())
+
+    _loaded[key] = idx
+    return idx
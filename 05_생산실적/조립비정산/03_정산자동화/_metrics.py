@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+실행 계측 (span) — Step 내부 구간별 소요시간·CPU·최대 메모리·처리 행 수
+run_settlement_pipeline.py가 Step마다 수집해 _summary.json의 steps[].spans에 합치고,
+--compare가 지난 실행과 비교해 "데이터가 늘었는지 / 코드·환경이 느려졌는지"를 구분한다.
+
+  - span(name, rows=None) : with 블록 1개 = 구간 1개. rows는 블록 안에서 sp.rows = n 으로 지정 가능
+  - collect()             : 현재 스레드에서 닫힌 span 기록 수집 (실행기가 Step 실행 전후로 사용)
+  - 수집기가 없으면 (Step 단독 실행 등) 측정만 하고 버린다 — 비용은 구간당 시계 호출 몇 번
+  - --subprocess 모드     : 실행기가 환경변수 SETTLEMENT_SPAN_FILE을 넘기면 자식 프로세스 종료 시 그 파일에 기록
+
+CPU 시간은 스레드 기준(time.thread_time). 메모리는 프로세스 최대 RSS(high-water mark, MB)라
+같은 프로세스에서 앞서 실행된 Step의 최대치가 포함될 수 있다.
+
+사용법:
+    from _metrics import span
+    with span('load_gerp') as sp:
+        data, _ = load_gerp(cfg)
+        sp.rows = len(data)
+"""
+
+import atexit
+import glob
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:     # Windows
+    resource = None
+
+SPAN_FILE_ENV = 'SETTLEMENT_SPAN_FILE'
+OTHER_SPAN = '(구간 외)'    # Step 소요시간 - 최상위 span 합 (span으로 감싸지 않은 계산)
+
+_local = threading.local()
+
+
+# ── 자원 측정 ──────────────────────────────────────────────────
+def _win_peak_rss_mb():
+    """Windows: GetProcessMemoryInfo의 PeakWorkingSetSize (실패 시 None)."""
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class _Counters(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    'PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage',
+                    'QuotaPagedPoolUsage', 'QuotaPeakNonPagedPoolUsage', 'QuotaNonPagedPoolUsage',
+                    'PagefileUsage', 'PeakPagefileUsage')]
+
+        counters = _Counters()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return None
+        return round(counters.PeakWorkingSetSize / 2**20, 1)
+    except (AttributeError, OSError):
+        return None
+
+
+def peak_rss_mb():
+    """현재 프로세스 최대 RSS (MB). 측정 불가 환경이면 None."""
+    if resource is None:
+        return _win_peak_rss_mb()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (2**20 if sys.platform == 'darwin' else 2**10), 1)   # macOS: bytes, Linux: KB
+
+
+# ── span ──────────────────────────────────────────────────────
+class Span:
+    """구간 1개. with 블록을 나갈 때 기록이 확정된다."""
+    __slots__ = ('name', 'rows', 'depth', '_wall0', '_cpu0')
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+        self.depth = 0
+
+    def __enter__(self):
+        stack = _local.__dict__.setdefault('stack', [])
+        self.depth = len(stack)
+        stack.append(self)
+        self._wall0 = time.perf_counter()
+        self._cpu0 = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._wall0
+        cpu = time.thread_time() - self._cpu0
+        _local.stack.pop()
+        records = getattr(_local, 'records', None)
+        if records is None:
+            return False
+        rows = None if self.rows is None else int(self.rows)
+        record = {
+            'name': self.name,
+            'depth': self.depth,
+            'wall_sec': round(wall, 3),
+            'cpu_sec': round(cpu, 3),
+            'rows': rows,
+            'rows_per_sec': round(rows / wall, 1) if rows and wall > 0 else None,
+            'peak_rss_mb': peak_rss_mb(),
+        }
+        if exc_type is not None:
+            record['error'] = exc_type.__name__
+        records.append(record)
+        return False
+
+
+def span(name, rows=None):
+    """with span('load_gerp', rows=n): … — 구간 계측 (수집기 없으면 기록 안 함)."""
+    return Span(name, rows)
+
+
+@contextmanager
+def collect():
+    """현재 스레드의 span 기록을 list로 모은다 (중첩 시 안쪽 수집기가 우선)."""
+    prev = getattr(_local, 'records', None)
+    records = _local.records = []
+    try:
+        yield records
+    finally:
+        _local.records = prev
+
+
+def other_span(elapsed_sec, spans):
+    """Step 소요시간 중 최상위 span 밖 시간 → 구간 기록 (음수면 0)."""
+    covered = sum(s['wall_sec'] for s in spans if s['depth'] == 0)
+    return {'name': OTHER_SPAN, 'depth': 0, 'wall_sec': round(max(elapsed_sec - covered, 0.0), 3),
+            'cpu_sec': None, 'rows': None, 'rows_per_sec': None, 'peak_rss_mb': None}
+
+
+def _dump_span_file(path, records):
+    payload = {'spans': records, 'cpu_sec': round(time.process_time(), 3), 'peak_rss_mb': peak_rss_mb()}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False)
+
+
+# --subprocess 자식 프로세스: 메인 스레드 span을 종료 시 파일로 넘긴다
+if os.environ.get(SPAN_FILE_ENV) and threading.current_thread() is threading.main_thread():
+    _local.records = []
+    atexit.register(_dump_span_file, os.environ[SPAN_FILE_ENV], _local.records)
+
+
+# ── 실행 이력 비교 (--compare) ─────────────────────────────────
+def load_history(log_dir, month=None):
+    """run_logs/*_summary.json → [(파일명, 요약)] 오래된 순 (일괄 요약 제외, month 지정 시 해당 월만)."""
+    runs = []
+    for path in sorted(glob.glob(os.path.join(log_dir, '*_summary.json'))):
+        if path.endswith('_batch_summary.json'):
+            continue
+        try:
+            with open(path, encoding='utf-8') as f:
+                summary = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if month and summary.get('month') != month:
+            continue
+        runs.append((os.path.basename(path), summary))
+    return runs
+
+
+def _step_entries(summary):
+    """요약 → {(step, 구간명): {'wall_sec', 'rows'}} (실행된 Step만, 같은 이름 구간은 합산).
+
+    span 기록이 없는 이전 요약도 Step 전체 소요시간(구간명 '')은 비교된다.
+    """
+    out = {}
+    for step in summary.get('steps', []):
+        if step.get('status') != 'SUCCESS':
+            continue
+        out[(step['step'], '')] = {'wall_sec': step['elapsed_sec'], 'rows': None}
+        for s in step.get('spans', []):
+            entry = out.setdefault((step['step'], s['name']), {'wall_sec': 0.0, 'rows': None})
+            entry['wall_sec'] += s['wall_sec']
+            if s.get('rows') is not None:
+                entry['rows'] = (entry['rows'] or 0) + s['rows']
+    return out
+
+
+def _median(values):
+    values = [v for v in values if v is not None]
+    return statistics.median(values) if values else None
+
+
+def compare_runs(latest, baseline, threshold=1.2, min_sec=0.5):
+    """최근 실행 vs 이전 실행들(중앙값) 비교 → 항목 목록.
+
+    판정 (소요시간 비율 ≥ threshold이고 최근 소요시간 ≥ min_sec일 때만):
+      - '데이터 증가'      : 행 수가 늘었고 행/초 처리속도는 유지 (1/threshold 이내)
+      - '처리속도 저하'    : 행/초가 떨어짐 → 코드·환경 변화 의심
+      - '느려짐'           : 행 수 기록 없음 (Step 전체·구간 외 시간)
+    """
+    now = _step_entries(latest)
+    before = [_step_entries(s) for s in baseline]
+    rows = []
+    for key in now:     # Step 순서, Step 안에서는 구간 실행 순서
+        cur = now[key]
+        base_wall = _median([b[key]['wall_sec'] for b in before if key in b])
+        base_rows = _median([b[key]['rows'] for b in before if key in b])
+        if base_wall is None:
+            continue
+        ratio = cur['wall_sec'] / base_wall if base_wall > 0 else None
+        verdict = ''
+        if ratio is not None and ratio >= threshold and cur['wall_sec'] >= min_sec:
+            if cur['rows'] and base_rows:
+                speed = (cur['rows'] / cur['wall_sec']) / (base_rows / base_wall)
+                verdict = '데이터 증가' if speed >= 1 / threshold else '처리속도 저하'
+            else:
+                verdict = '느려짐'
+        rows.append({
+            'step': key[0], 'span': key[1] or '(Step 전체)',
+            'wall_sec': round(cur['wall_sec'], 2), 'base_wall_sec': round(base_wall, 2),
+            'ratio': round(ratio, 2) if ratio is not None else None,
+            'rows': cur['rows'], 'base_rows': base_rows, 'verdict': verdict,
+        })
+    return rows
+
+
+def format_compare(rows, latest_name, baseline_names):
+    """compare_runs 결과 → 콘솔 표 문자열."""
+    lines = [f"비교: {latest_name}  vs  이전 {len(baseline_names)}회 중앙값 "
+             f"({baseline_names[0]} ~ {baseline_names[-1]})" if baseline_names else f"비교: {latest_name}",
+             f"{'Step':>4}  {'구간':<24} {'최근(s)':>9} {'이전(s)':>9} {'비율':>6} {'행':>11} {'이전 행':>11}  판정"]
+    def fmt_rows(n):
+        return f"{n:,.0f}" if n is not None else '-'
+
+    for r in rows:
+        ratio = f"{r['ratio']:.2f}" if r['ratio'] is not None else '-'
+        indent = '' if r['span'] == '(Step 전체)' else '  '
+        lines.append(f"{r['step']:>4}  {indent + r['span']:<24} {r['wall_sec']:>9.2f} {r['base_wall_sec']:>9.2f} "
+                     f"{ratio:>6} {fmt_rows(r['rows']):>11} {fmt_rows(r['base_rows']):>11}  {r['verdict']}")
+    flagged = [r for r in rows if r['verdict']]
+    lines.append(f"느려진 항목 {len(flagged)}개" if flagged else "느려진 항목 없음")
+    return '\n'.join(lines)
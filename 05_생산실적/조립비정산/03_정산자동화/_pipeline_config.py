@@ -119,12 +119,12 @@ MASTER_COL = {
 }
 
 # ============================================================
-# JSON 캐시 파일 경로
+# Step 캐시 파일 경로 (1: 검증 결과 JSON, 2~5: _cache_format 바이너리)
 # ============================================================
 CACHE_STEP1 = os.path.join(CACHE_DIR, 'step1_validation.json')
-CACHE_STEP2 = os.path.join(CACHE_DIR, 'step2_gerp.json')
-CACHE_STEP3 = os.path.join(CACHE_DIR, 'step3_olderp.json')
-CACHE_STEP4 = os.path.join(CACHE_DIR, 'step4_matched.json')
-CACHE_STEP5 = os.path.join(CACHE_DIR, 'step5_settlement.json')
+CACHE_STEP2 = os.path.join(CACHE_DIR, 'step2_gerp.bin')
+CACHE_STEP3 = os.path.join(CACHE_DIR, 'step3_olderp.bin')
+CACHE_STEP4 = os.path.join(CACHE_DIR, 'step4_matched.bin')
+CACHE_STEP5 = os.path.join(CACHE_DIR, 'step5_settlement.bin')
 
 os.makedirs(CACHE_DIR, exist_ok=True)
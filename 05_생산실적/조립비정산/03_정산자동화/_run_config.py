@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+실행 단위 설정 (RunConfig) — 월·입력 파일·캐시 경로를 실행마다 명시적으로 전달
+_pipeline_config.py 값을 기본으로 복사하고 월별 경로만 덮어쓴다. 파일을 고쳐 쓰지 않으므로
+여러 월을 동시에 실행해도 서로의 설정·캐시를 건드리지 않는다.
+
+월 폴더 규칙 (setup_month.py와 동일):
+  MM월 정산 → BASE_DIR/{MM+1}월/
+    실적데이터/  G-ERP·구ERP 실적 파일 (파일명에 'M월' 포함)
+    _cache/      Step 캐시·sidecar·fingerprint (월별 격리)
+    정산결과_MM월.xlsx
+
+사용법:
+    from _run_config import RunConfig, cli_config
+    cfg = RunConfig.default()          # _pipeline_config.py 값 그대로
+    cfg = RunConfig.for_month('03')    # 03월 정산 (04월 폴더)
+    main(upstream, cfg)                # step main에 전달
+    cfg = cli_config()                 # 단독 실행: python stepN_*.py [--month MM]
+"""
+
+import argparse
+import os
+
+import _pipeline_config
+
+# Step 번호 → 캐시 파일명 (CACHE_DIR 기준, .bin = _cache_format 바이너리)
+CACHE_FILES = {
+    1: 'step1_validation.json',
+    2: 'step2_gerp.bin',
+    3: 'step3_olderp.bin',
+    4: 'step4_matched.bin',
+    5: 'step5_settlement.bin',
+}
+
+
+def folder_month(month):
+    """정산 대상월 → 처리 폴더 월 (12월 정산 → 01월 폴더)."""
+    m = int(month) + 1
+    return f'{m - 12 if m > 12 else m:02d}'
+
+
+def find_month_input(data_dir, tokens, month):
+    """월 폴더 실적데이터/에서 입력 파일 탐색 (파일명 토큰 + 'M월'/'MM월'). 없으면 None."""
+    if not os.path.isdir(data_dir):
+        return None
+    month_int = int(month)
+    hits = []
+    for name in sorted(os.listdir(data_dir)):
+        low = name.lower()
+        if not low.endswith(('.xlsx', '.xls')) or name.startswith('~$'):
+            continue
+        if any(t in low for t in tokens) and (f'{month}월' in name or f'{month_int}월' in name):
+            hits.append(name)
+    return os.path.join(data_dir, hits[-1]) if hits else None
+
+
+class RunConfig:
+    """실행 1회분 설정. 속성 이름은 _pipeline_config 변수명과 같다 (cfg.GERP_FILE, cfg.LINE_INFO …).
+
+    프로세스 풀로 넘길 수 있도록 평범한 속성만 가진다 (pickle 가능).
+    """
+
+    def __init__(self, **overrides):
+        for name in dir(_pipeline_config):
+            if name.isupper():
+                setattr(self, name, getattr(_pipeline_config, name))
+        unknown = [k for k in overrides if not k.isupper()]
+        if unknown:
+            raise AttributeError(f"RunConfig: 설정 이름은 대문자 — {unknown}")
+        for name, value in overrides.items():
+            setattr(self, name, value)
+        for step_no, fname in CACHE_FILES.items():
+            key = f'CACHE_STEP{step_no}'
+            if key not in overrides:
+                setattr(self, key, os.path.join(self.CACHE_DIR, fname))
+        os.makedirs(self.CACHE_DIR, exist_ok=True)
+
+    @classmethod
+    def default(cls):
+        """_pipeline_config.py 값 그대로."""
+        return cls()
+
+    @classmethod
+    def for_month(cls, month, base_dir=None):
+        """MM월 정산 설정. config의 MONTH와 같은 월이면 config 경로 그대로 (setup_month.py 세팅 우선)."""
+        month = f'{int(month):02d}'
+        if month == _pipeline_config.MONTH and base_dir is None:
+            return cls()
+        base_dir = base_dir or _pipeline_config.BASE_DIR
+        folder = os.path.join(base_dir, f'{folder_month(month)}월')
+        data_dir = os.path.join(folder, '실적데이터')
+        month_int = int(month)
+        gerp = (find_month_input(data_dir, ('g-erp', 'gerp'), month)
+                or os.path.join(data_dir, f'G-ERP {month_int}월실적.xlsx'))
+        olderp = (find_month_input(data_dir, ('구erp',), month)
+                  or os.path.join(data_dir, f'구ERP {month_int}월실적.xlsx'))
+        return cls(
+            BASE_DIR=base_dir,
+            MONTH=month,
+            CACHE_DIR=os.path.join(folder, '_cache'),
+            GERP_FILE=gerp,
+            OLDERP_FILE=olderp,
+            OUTPUT_FILE=os.path.join(folder, f'정산결과_{month}월.xlsx'),
+        )
+
+    def __repr__(self):
+        return f"RunConfig(MONTH={self.MONTH!r}, CACHE_DIR={self.CACHE_DIR!r})"
+
+
+def parse_months(spec):
+    """'01-06' / '01,03,05' / '01-03,07' → ['01', '02', …] (중복 제거, 순서 유지)."""
+    months = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            lo, hi = (int(x) for x in part.split('-', 1))
+            rng = range(lo, hi + 1)
+        else:
+            rng = [int(part)]
+        for m in rng:
+            if not 1 <= m <= 12:
+                raise ValueError(f"월 범위 밖: {m} ({spec})")
+            mm = f'{m:02d}'
+            if mm not in months:
+                months.append(mm)
+    if not months:
+        raise ValueError(f"월 지정 없음: {spec!r}")
+    return months
+
+
+def cli_config(argv=None):
+    """Step 단독 실행용: [--month MM] → RunConfig (미지정 시 config 기본값)."""
+    ap = argparse.ArgumentParser(add_help=False)
+    ap.add_argument('--month', default=None)
+    args, _ = ap.parse_known_args(argv)
+    return RunConfig.for_month(args.month) if args.month else RunConfig.default()
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Step 5 정산 엔진 — 라인별 정산을 기준정보 행 DataFrame 연산으로 계산
+step5_정산계산.py와 tests/diff_step5.py가 사용한다.
+
+기준정보 행(step4 master) 1라인 = DataFrame 1개. GERP/구ERP 피벗(step2/3)은 품번 join으로 붙인다.
+  - 다중단가 "첫 행만 GERP 합계"  : 품번 그룹 내 순번 0 (duplicated)
+  - SP3M3 야간 10자리 fallback    : 야간키 = 전체품번(피벗에 있으면) 또는 앞 10자리,
+                                    야간키 그룹 내 순번 0에만 야간수량 할당 (수량 > 0일 때)
+  - 미매핑 품번 / RSP 미매칭       : GERP 피벗 품번 - 기준정보 품번 (anti-join)
+
+행 dict 구성·키 순서·값 타입(int/float)은 기존 행 단위 루프 구현과 같다.
+합계는 행 순서대로 Python sum (기존 누적과 같은 순서·같은 값).
+
+사용법:
+    from _settlement_engine import settle
+    lines_result, summary_rows, notes = settle(step2, step3, step4, cfg)
+    # what-if 단가: settle(..., price_overrides={('SD9A01', 품번): 단가})
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from _error_types import classify_error_type, classify_exclusion, calc_recv_amt
+
+MISSING_PRICE_NOTE = '단가 미매핑(기준정보 등록필요)'
+
+
+def _num(value, default=0):
+    try:
+        n = float(value)
+    except (TypeError, ValueError):
+        return default
+    if math.isnan(n) or math.isinf(n):
+        return default
+    return int(n) if n.is_integer() else n
+
+
+def _is_finished_gerp_missing(row, line_group):
+    if line_group != '완성품':
+        return False
+    if not str(row.get('err_type', '')).startswith('GERP 품번누락'):
+        return False
+    g_qty = _num(row.get('gerp_day_qty')) + _num(row.get('gerp_ngt_qty'))
+    e_qty = _num(row.get('erp_day_qty')) + _num(row.get('erp_ngt_qty'))
+    return g_qty == 0 and e_qty > 0
+
+
+def is_qty_only_gerp_missing(row, line_group, g_amt=None, e_amt=None):
+    """완성품라인에서 금액 0이어도 구ERP 수량만 있으면 오류리스트 대상으로 유지."""
+    if not _is_finished_gerp_missing(row, line_group):
+        return False
+    if g_amt is None:
+        g_amt = _num(row.get('gerp_total_amt'))
+    if e_amt is None:
+        e_amt = _num(row.get('erp_day_amt')) + _num(row.get('erp_ngt_amt'))
+    return g_amt == 0 and e_amt == 0
+
+
+# ── 벡터 헬퍼 ───────────────────────────────────────────────────
+def _join(keys, pivot):
+    """품번 Series → 피벗 값 (없으면 0) float 배열."""
+    if not pivot:
+        return np.zeros(len(keys))
+    return keys.map(pivot).fillna(0).to_numpy(dtype=float)
+
+
+def _ints(arr):
+    """반올림 완료 배열 → Python int 목록."""
+    return [int(v) for v in arr]
+
+
+def _typed(arr, int_mask):
+    """Usage 환산 수량 → Python 값 목록 (Usage가 정수인 행은 int, 아니면 float)."""
+    return [int(v) if m else float(v) for v, m in zip(arr.tolist(), int_mask)]
+
+
+def _night_amt_erp(lc, price, night_qty, night_price):
+    """구ERP 야간 정산금액 (구ERP에는 GERP 원본 없으므로 기존 방식 유지)
+
+    [deprecated legacy] S8 이동 게이트 미통과로 임시 보존:
+    SP3M3: qty × 야간 고정단가 / SD9A01: qty × 단가 × 1.3 (기본100% + 가산30%) / 그 외: 0
+    """
+    if lc == 'SP3M3':
+        return night_qty * night_price
+    if lc == 'SD9A01':
+        return np.where(night_qty == 0, 0, np.rint(night_qty * price * 1.3))
+    return np.zeros(len(night_qty))
+
+
+# ── 라인 정산 ───────────────────────────────────────────────────
+def settle_line(lc, rows, step2, step3, cfg, price_overrides=None):
+    """1개 라인 정산 → (detail 행 목록, 로그 문자열 목록). 오류유형 분류 전 상태."""
+    has_night = cfg.LINE_INFO[lc]['has_night']
+    night_price = cfg.SP3M3_NIGHT_PRICE
+    gp_d     = step2['day_pivot'].get(lc, {})
+    gp_n     = step2['night_pivot'].get(lc, {})
+    gp_d_amt = step2.get('day_amt_pivot', {}).get(lc, {})
+    gp_n_amt = step2.get('night_amt_pivot', {}).get(lc, {})
+    assy_lookup = step2.get('gerp_assy_lookup', {})
+    # 구ERP 피벗: 전 라인 전체업체 피벗 (SD9A01 지원물량 / SP3M3 모듈품번 집계 / SUB 전 업체 합산)
+    ep_d, ep_n, ep_t = step3['all_day_pivot'], step3['all_night_pivot'], step3['all_total_pivot']
+    support_detail = step3.get('support_detail', {})
+    is_sd9 = lc == 'SD9A01'
+    is_sp3_night = lc == 'SP3M3' and has_night
+    overrides = price_overrides or {}
+
+    # ── 기준정보 행 ──────────────────────────────────────────────
+    pns    = [r['part_no'] for r in rows]
+    prices = [_num(overrides.get((lc, r['part_no']), r.get('price')), 0) for r in rows]
+    usages = [_num(r.get('usage'), 1) for r in rows]
+    pn      = pd.Series(pns, dtype=object)
+    price   = np.array(prices, dtype=float)
+    usage   = np.array(usages, dtype=float)
+    u_int   = [isinstance(u, int) for u in usages]
+    first   = ~pn.duplicated().to_numpy()   # 다중단가: 품번 그룹 첫 행만 GERP 합계에 포함
+
+    # GERP 수량 (Usage 환산)
+    g_day_raw = np.where(first, _join(pn, gp_d), 0)
+    ngt_used = set()
+    if is_sp3_night:
+        # SP3M3 야간: 전체품번 우선 → 10자리 base fallback, 같은 야간키의 첫 행에만 할당
+        ngt_key = pn.where(pn.isin(gp_n.keys()), pn.str[:10])
+        ngt_val = _join(ngt_key, gp_n)
+        key_first = ~ngt_key.duplicated().to_numpy()
+        g_ngt_raw = np.where(ngt_val > 0, np.where(key_first, ngt_val, 0), ngt_val)
+        ngt_used = set(ngt_key[(ngt_val > 0) & key_first])
+    else:
+        g_ngt_raw = np.where(first, _join(pn, gp_n), 0)
+    g_day_qty = g_day_raw * usage
+    g_ngt_qty = g_ngt_raw * usage if has_night else np.zeros(len(rows))
+    g_pure_day = g_day_qty - g_ngt_qty if is_sd9 else g_day_qty
+
+    # GERP 금액: 원본금액 직접 사용 (2026-04-05 변경), 다중단가는 첫 행만
+    g_day_amt = np.where(first, np.rint(_join(pn, gp_d_amt)), 0)
+    if is_sp3_night:
+        amt_key = pn.where(pn.isin(gp_n_amt.keys()), pn.str[:10])
+        g_ngt_amt = np.where(g_ngt_raw > 0, np.rint(_join(amt_key, gp_n_amt)), 0)
+    elif has_night:
+        g_ngt_amt = np.where(first, np.rint(_join(pn, gp_n_amt)), 0)
+    else:
+        g_ngt_amt = np.zeros(len(rows))
+
+    # 구ERP: 기준단가 × 수량 (SD9A01만 LOT B 주야 분리, 그 외 총수량 = 주간수량)
+    e_total_raw = _join(pn, ep_t)
+    e_day_qty = (_join(pn, ep_d) if is_sd9 else e_total_raw) * usage
+    e_day_amt = np.rint(e_day_qty * price)
+    if is_sd9 and has_night:
+        e_ngt_qty = _join(pn, ep_n) * usage
+        e_ngt_amt = _night_amt_erp(lc, price, e_ngt_qty, night_price)
+        e_tot_qty = e_total_raw * usage
+    elif is_sp3_night:
+        # SP3M3: 구ERP 야간 = GERP 야간 동일 적용 (구ERP 서브라인 야간 구분 불가)
+        e_ngt_qty, e_ngt_amt = g_ngt_qty, g_ngt_amt
+        e_tot_qty = e_day_qty + e_ngt_qty
+    else:
+        e_ngt_qty = e_ngt_amt = np.zeros(len(rows))
+        e_tot_qty = e_day_qty
+
+    # [deprecated legacy] SD9A01 단가기준판정 (야간실적 있을 때만)
+    if is_sd9:
+        judgment = [None if q == 0 else ('야간가산' if p <= 500 else '기본') for q, p in zip(g_ngt_qty, price)]
+    else:
+        judgment = [None] * len(rows)
+
+    # 값 타입: Usage 환산 수량은 Usage 타입을 따르고, 야간 없는 라인의 0과 금액(반올림)은 int
+    no_usage = [True] * len(rows)
+    cols = {
+        'gerp_day_qty':  _typed(g_pure_day, u_int),
+        'gerp_day_amt':  _ints(g_day_amt),
+        'gerp_ngt_qty':  _typed(g_ngt_qty, u_int if has_night else no_usage),
+        'gerp_ngt_amt':  _ints(g_ngt_amt),
+        'erp_day_qty':   _typed(e_day_qty, u_int),
+        'erp_day_amt':   _ints(e_day_amt),
+        'erp_ngt_qty':   _typed(e_ngt_qty, u_int if (is_sd9 and has_night) or is_sp3_night else no_usage),
+        'erp_ngt_amt':   _ints(e_ngt_amt),
+        'erp_tot_qty':   _typed(e_tot_qty, u_int),
+    }
+
+    detail = []
+    for i, r in enumerate(rows):
+        p = prices[i]
+        # 조립품번: 기준정보 우선, 없으면 GERP fallback
+        ref_assy = r.get('assy_part', '')
+        assy_part = ref_assy if ref_assy else assy_lookup.get(f"{lc}|{pns[i]}|{p}", '')
+        g_day, g_ngt = cols['gerp_day_amt'][i], cols['gerp_ngt_amt'][i]
+        detail.append({
+            'part_no':          pns[i],
+            'assy_part':        assy_part,
+            'price':            p,
+            'usage':            usages[i],
+            'price_type':       r['price_type'],
+            'vtype':            r['vtype'],
+            'is_first_gerp':    bool(first[i]),
+            'gerp_day_qty':     cols['gerp_day_qty'][i],
+            'gerp_day_amt':     g_day,
+            'gerp_ngt_qty':     cols['gerp_ngt_qty'][i],
+            'gerp_ngt_amt':     g_ngt,
+            'gerp_total_amt':   g_day + g_ngt,
+            'gerp_orig_day_amt': g_day,
+            'gerp_orig_ngt_amt': g_ngt,
+            'erp_day_qty':      cols['erp_day_qty'][i],
+            'erp_day_amt':      cols['erp_day_amt'][i],
+            'erp_ngt_qty':      cols['erp_ngt_qty'][i],
+            'erp_ngt_amt':      cols['erp_ngt_amt'][i],
+            'erp_tot_qty':      cols['erp_tot_qty'][i],   # 주간+야간 합산 총수량 (원본합산 검증용)
+            'price_judgment':   judgment[i],
+            # 지원분 (0109 외 업체) — SD9A01만 해당: [{vendor, line_code, day_qty, night_qty}]
+            'support':          support_detail.get(pns[i], []) if is_sd9 else [],
+        })
+
+    notes = []
+    processed = set(pns)
+
+    # ── SP3M3: 미매칭 RSP (모품번 못 찾음) → GERP 원본금액 그대로 적용 ──
+    if is_sp3_night and gp_n:
+        night = pd.Series(gp_n, dtype=float)
+        rsp = night[night.index.str.startswith('RSP') & (night > 0) & ~night.index.isin(processed)]
+        for rsp_pn in rsp.index:
+            rsp_qty = gp_n[rsp_pn]
+            ngt_amt = round(gp_n_amt.get(rsp_pn, 0))  # GERP 원본 야간금액
+            detail.append({
+                'part_no':          rsp_pn,
+                'price':            round(ngt_amt / rsp_qty) if rsp_qty else 0,
+                'usage':            1,
+                'price_type':       '정단가',
+                'vtype':            '',
+                'gerp_day_qty':     0,
+                'gerp_day_amt':     0,
+                'gerp_ngt_qty':     rsp_qty,
+                'gerp_ngt_amt':     ngt_amt,
+                'gerp_total_amt':   ngt_amt,
+                'gerp_orig_day_amt': 0,
+                'gerp_orig_ngt_amt': ngt_amt,
+                'erp_day_qty':      0,
+                'erp_day_amt':      0,
+                # 구ERP 야간도 GERP 동일 적용 (SP3M3 구ERP 야간 = GERP 야간)
+                'erp_ngt_qty':      rsp_qty,
+                'erp_ngt_amt':      ngt_amt,
+                'erp_tot_qty':      rsp_qty,
+                'price_judgment':   None,
+            })
+            processed.add(rsp_pn)  # fallback 이중계산 방지
+            notes.append(f"    RSP미매칭 {rsp_pn}: {rsp_qty}개, GERP원본 {ngt_amt:,}원 (합계 가산)")
+
+    # ── 미매핑/미처리 품번: GERP 피벗 - 기준정보 품번 → GERP 원본금액 fallback ──
+    # step4 unmatched뿐 아니라, 기준정보 다른 라인에는 있어도 이 라인에 없는 품번도 포함
+    lc_all_parts = set(gp_d) | (set(gp_n) if has_night else set())
+    um = pd.Series(sorted(lc_all_parts - processed), dtype=object)
+    if len(um):
+        um_day_qty = _join(um, gp_d)
+        um_day_amt = np.rint(_join(um, gp_d_amt))
+        if has_night:
+            um_ngt_qty = _join(um, gp_n)
+            um_ngt_amt = np.rint(_join(um, gp_n_amt))
+            if is_sp3_night:
+                # 기준정보 행에서 base_pn(10자리)으로 이미 사용된 야간금액은 제외 (이중 계산 방지)
+                used = um.str[:10].isin(ngt_used).to_numpy()
+                um_ngt_qty = np.where(used, 0, um_ngt_qty)
+                um_ngt_amt = np.where(used, 0, um_ngt_amt)
+        else:
+            um_ngt_qty = um_ngt_amt = np.zeros(len(um))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            um_price = np.where(um_day_qty != 0, np.rint(um_day_amt / um_day_qty), 0)
+
+        # 구ERP 수량 (미매핑이라도 구ERP에 데이터 있으면 가져옴, usage=1)
+        um_e_total = _join(um, ep_t)
+        if is_sd9:
+            um_e_day = _join(um, ep_d)
+            um_e_ngt = _join(um, ep_n) if has_night else np.zeros(len(um))
+        else:
+            um_e_day = um_e_total
+            um_e_ngt = np.zeros(len(um))
+        um_e_day_amt = np.rint(um_e_day * um_price)
+        um_e_ngt_amt = _night_amt_erp(lc, um_price, um_e_ngt, night_price)
+
+        lookup_price = _ints(um_price)
+        for i, pn_i in enumerate(um.tolist()):
+            d_qty, d_amt = int(um_day_qty[i]), int(um_day_amt[i])
+            n_qty, n_amt = int(um_ngt_qty[i]), int(um_ngt_amt[i])
+            e_day, e_day_amt_i = int(um_e_day[i]), int(um_e_day_amt[i])
+            detail.append({
+                'part_no':          pn_i,
+                'assy_part':        assy_lookup.get(f"{lc}|{pn_i}|{lookup_price[i]}", ''),
+                'price':            lookup_price[i],
+                'usage':            1,
+                'price_type':       '기준누락',
+                'vtype':            '',
+                'is_first_gerp':    True,
+                'gerp_day_qty':     d_qty,
+                'gerp_day_amt':     d_amt,
+                'gerp_ngt_qty':     n_qty,
+                'gerp_ngt_amt':     n_amt,
+                'gerp_total_amt':   d_amt + n_amt,
+                'gerp_orig_day_amt': d_amt,
+                'gerp_orig_ngt_amt': n_amt,
+                'erp_day_qty':      e_day,
+                'erp_day_amt':      e_day_amt_i,
+                'erp_ngt_qty':      int(um_e_ngt[i]),
+                'erp_ngt_amt':      int(um_e_ngt_amt[i]),
+                'erp_tot_qty':      int(um_e_total[i]),
+                'price_judgment':   None,
+            })
+            notes.append(f"    미매핑 {pn_i}: GERP={d_qty}개/{d_amt:,}원 구ERP={e_day}개/{e_day_amt_i:,}원")
+
+    return detail, notes
+
+
+def classify_rows(detail, line_group, multi_pns):
+    """행별 오류유형·제외사유·받을금액 부여 (1차 통합 사전, 2026-05-18)."""
+    for row in detail:
+        master_has_pn    = (row.get('price_type') != '기준누락')
+        master_has_price = (row.get('price', 0) > 0)
+        # 다중단가 두 번째+ 행은 GERP금액 0 (중복 방지) → 분류 의미 없음. 정합인정으로 표기
+        is_first_gerp = row.get('is_first_gerp', True)
+        amt_diff = row.get('gerp_total_amt', 0) - (row.get('erp_day_amt', 0) + row.get('erp_ngt_amt', 0))
+        if not is_first_gerp:
+            row['err_type']    = '정상'
+            row['note']        = ''
+            row['excl_reason'] = '정합인정(다중단가분배)'
+            row['recv_amt']    = 0
+            continue
+        err_type, note = classify_error_type(
+            row, line_group,
+            master_has_pn=master_has_pn,
+            master_has_price=master_has_price,
+        )
+        excl = classify_exclusion(row, multi_pns)
+        qty_only_gerp_missing = is_qty_only_gerp_missing(row, line_group)
+        # 차이 0이면 정상 — 제외사유 박지 않음. 단, 수량만 있는 GERP 품번누락은 X2 제외사유를 보존한다.
+        if amt_diff == 0 and not qty_only_gerp_missing:
+            excl = ''
+        row['err_type']    = err_type
+        row['note']        = note
+        row['excl_reason'] = excl
+        row['recv_amt']    = calc_recv_amt(amt_diff, excl)
+        if qty_only_gerp_missing:
+            row['err_type'] = 'GERP 품번누락'
+            row['note'] = MISSING_PRICE_NOTE
+            row['recv_amt'] = 0
+
+
+_TOTAL_FIELDS = [
+    ('total_gerp_day_qty', 'gerp_day_qty'), ('total_gerp_day_amt', 'gerp_day_amt'),
+    ('total_gerp_ngt_qty', 'gerp_ngt_qty'), ('total_gerp_ngt_amt', 'gerp_ngt_amt'),
+    ('total_erp_day_qty',  'erp_day_qty'),  ('total_erp_day_amt',  'erp_day_amt'),
+    ('total_erp_ngt_qty',  'erp_ngt_qty'),  ('total_erp_ngt_amt',  'erp_ngt_amt'),
+]
+
+
+def settle(step2, step3, step4, cfg, price_overrides=None):
+    """전 라인 정산 → (lines_result, summary_rows, {라인: 로그 목록}).
+
+    cfg = RunConfig 또는 _pipeline_config 모듈 (LINE_ORDER / LINE_INFO / LINE_GROUP / SP3M3_NIGHT_PRICE).
+    price_overrides = {(라인, 품번): 단가} — 기준정보 단가 what-if (None이면 기준정보 그대로).
+    """
+    master = step4['master']
+    lines_result, summary_rows, notes = {}, [], {}
+    for lc in cfg.LINE_ORDER:
+        rows = master.get(lc, [])
+        detail, notes[lc] = settle_line(lc, rows, step2, step3, cfg, price_overrides)
+
+        pn = pd.Series([r['part_no'] for r in rows], dtype=object)
+        multi_pns = set(pn[pn.duplicated(keep=False)])   # 라인별 다중단가 품번 (제외사유 판정용)
+        classify_rows(detail, cfg.LINE_GROUP.get(lc, '메인SUB'), multi_pns)
+
+        totals = {name: sum(r[field] for r in detail) for name, field in _TOTAL_FIELDS}
+        gerp_total = totals['total_gerp_day_amt'] + totals['total_gerp_ngt_amt']
+        erp_total  = totals['total_erp_day_amt'] + totals['total_erp_ngt_amt']
+        diff       = gerp_total - erp_total
+
+        lines_result[lc] = {
+            'items':               detail,
+            'total_gerp_day_qty':  totals['total_gerp_day_qty'],
+            'total_gerp_day_amt':  totals['total_gerp_day_amt'],
+            'total_gerp_ngt_qty':  totals['total_gerp_ngt_qty'],
+            'total_gerp_ngt_amt':  totals['total_gerp_ngt_amt'],
+            'total_gerp_amt':      gerp_total,
+            'total_erp_day_qty':   totals['total_erp_day_qty'],
+            'total_erp_day_amt':   totals['total_erp_day_amt'],
+            'total_erp_ngt_qty':   totals['total_erp_ngt_qty'],
+            'total_erp_ngt_amt':   totals['total_erp_ngt_amt'],
+            'total_erp_amt':       erp_total,
+            'diff_amt':            diff,
+        }
+        summary_rows.append({
+            'line': lc,
+            'name': cfg.LINE_INFO[lc]['name'],
+            'gerp_amt': gerp_total,
+            'erp_amt':  erp_total,
+            'diff_amt': diff,
+        })
+    return lines_result, summary_rows, notes
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Step 입력/출력 선언 + 입력 fingerprint
+run_settlement_pipeline.py의 --use-cache 판단에 사용한다.
+
+각 Step이 읽는 입력을 STEP_DEPS에 선언하고 (upstream/after는 실행기 DAG 스케줄 순서로도 사용), 실행 성공 시 입력 fingerprint를
+_cache/_fingerprints.json에 기록한다. 다음 실행에서 fingerprint와 출력 파일이
+그대로면 SKIP, 하나라도 바뀌면 재실행한다.
+
+fingerprint 구성:
+  - files    : 원본 xlsx 내용 해시 (size/mtime이 같으면 기록된 해시 재사용)
+  - config   : 해당 Step이 쓰는 _pipeline_config 값
+  - code     : Step 스크립트 + 룰 모듈(_settlement_rules 등) 내용 해시
+               .bin 캐시를 저장/로드하는 Step(2~8)은 _step_io·_cache_format 포함 — 바이너리 형식이 바뀌면
+               이전 형식 .bin을 최신으로 보지 않고 재생성
+  - upstream : 앞 Step 출력 캐시 파일 해시
+
+사용법:
+    from _step_deps import compute_fingerprint, is_fresh, record_fingerprint
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_NAME = '_fingerprints.json'
+
+# Step 번호 → 입력 선언 (files/config는 _pipeline_config 변수명)
+#   upstream : 출력을 읽는 앞 Step (fingerprint + 실행 순서)
+#   after    : 읽지는 않지만 먼저 통과해야 하는 게이트 Step (실행 순서만, fingerprint 제외)
+STEP_DEPS = {
+    1: {
+        'files':    ['GERP_FILE', 'OLDERP_FILE', 'MASTER_FILE'],
+        'config':   ['GERP_COL', 'OLDERP_COL', 'OLDERP_SHEET', 'LINE_ORDER', 'VENDOR_CODE'],
+        'modules':  ['_ingest.py', '_master_index.py'],
+        'upstream': [],
+    },
+    2: {
+        'files':    ['GERP_FILE', 'SP3M3_MODULE_FILE', 'LINE_ASSIGN_FILE'],
+        'config':   ['GERP_COL', 'LINE_ORDER', 'VENDOR_CODE'],
+        'modules':  ['_ingest.py', '_settlement_rules.py', '_step_io.py', '_cache_format.py'],
+        'upstream': [],
+        'after':    [1],
+    },
+    3: {
+        'files':    ['OLDERP_FILE'],
+        'config':   ['OLDERP_COL', 'OLDERP_SHEET', 'OLD_ERP_LINE_MAP', 'VENDOR_CODE'],
+        'modules':  ['_ingest.py', '_step_io.py', '_cache_format.py'],
+        'upstream': [],
+        'after':    [1],
+    },
+    4: {
+        'files':    ['MASTER_FILE'],
+        'config':   ['MASTER_COL', 'LINE_ORDER', 'VENDOR_CODE'],
+        'modules':  ['_master_index.py', '_step_io.py', '_cache_format.py'],
+        'upstream': [2],
+    },
+    5: {
+        'files':    [],
+        'config':   ['LINE_GROUP', 'LINE_INFO', 'LINE_ORDER', 'MONTH', 'SP3M3_NIGHT_PRICE'],
+        'modules':  ['_settlement_engine.py', '_error_types.py', '_step_io.py', '_cache_format.py'],
+        'upstream': [2, 3, 4],
+    },
+    6: {
+        'files':    [],
+        'config':   [],
+        'modules':  ['_validation_engine.py', '_step_io.py', '_cache_format.py'],
+        'upstream': [5],
+    },
+    7: {
+        'files':    [],
+        'config':   ['LINE_INFO', 'LINE_ORDER', 'MONTH', 'OUTPUT_FILE'],
+        'modules':  ['_ingest.py', '_step_io.py', '_cache_format.py', '_metrics.py', '_xlsx_writer.py'],
+        'upstream': [2, 5, 6],
+    },
+    8: {
+        'files':    [],
+        'config':   ['LINE_ORDER', 'MONTH', 'OUTPUT_FILE', 'VENDOR_CODE'],
+        'modules':  ['_error_types.py', '_xlsx_writer.py', '_step_io.py', '_cache_format.py'],
+        'upstream': [5],
+        'after':    [6],
+    },
+}
+
+
+def step_output(step_no, cfg):
+    """Step 출력 파일 경로 (cfg = _pipeline_config 모듈)."""
+    if step_no == 6:
+        return os.path.join(cfg.CACHE_DIR, 'step6_validation.json')
+    if step_no == 7:
+        return cfg.OUTPUT_FILE
+    if step_no == 8:
+        return os.path.join(os.path.dirname(cfg.OUTPUT_FILE), f'오류리스트_{cfg.MONTH}월.xlsx')
+    return getattr(cfg, f'CACHE_STEP{step_no}')
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _manifest_path(cfg):
+    return os.path.join(cfg.CACHE_DIR, MANIFEST_NAME)
+
+
+def load_manifest(cfg):
+    path = _manifest_path(cfg)
+    if not os.path.exists(path):
+        return {'steps': {}, 'files': {}}
+    try:
+        with open(path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {'steps': {}, 'files': {}}
+    manifest.setdefault('steps', {})
+    manifest.setdefault('files', {})
+    return manifest
+
+
+def save_manifest(cfg, manifest):
+    with open(_manifest_path(cfg), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+
+def file_hash(path, manifest):
+    """파일 내용 해시. size/mtime이 기록과 같으면 재계산 생략 (없는 파일은 None)."""
+    if not path or not os.path.exists(path):
+        return None
+    st = os.stat(path)
+    key = os.path.abspath(path)
+    memo = manifest['files'].get(key)
+    if memo and memo['size'] == st.st_size and memo['mtime_ns'] == st.st_mtime_ns:
+        return memo['sha256']
+    digest = _sha256(path)
+    manifest['files'][key] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': digest}
+    return digest
+
+
+def compute_fingerprint(step_no, script_name, cfg, manifest):
+    """Step 입력 fingerprint 계산 → (fingerprint, 구성요소 dict)."""
+    deps = STEP_DEPS[step_no]
+    parts = {
+        'files': {k: file_hash(getattr(cfg, k, None), manifest) for k in deps['files']},
+        'config': {
+            k: json.dumps(getattr(cfg, k, None), ensure_ascii=False, sort_keys=True, default=str)
+            for k in deps['config']
+        },
+        'code': {
+            name: file_hash(os.path.join(SCRIPT_DIR, name), manifest)
+            for name in [script_name] + deps['modules']
+        },
+        'upstream': {
+            str(n): file_hash(step_output(n, cfg), manifest) for n in deps['upstream']
+        },
+    }
+    blob = json.dumps(parts, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(blob).hexdigest(), parts
+
+
+def changed_inputs(step_no, parts, manifest):
+    """기록된 fingerprint 대비 바뀐 입력 이름 목록 (기록 없으면 ['(기록 없음)'])."""
+    rec = manifest['steps'].get(str(step_no))
+    if not rec:
+        return ['(기록 없음)']
+    changed = []
+    for group, values in parts.items():
+        old = rec.get('parts', {}).get(group, {})
+        changed += [f'Step{k} 출력' if group == 'upstream' else k
+                    for k, v in values.items() if old.get(k) != v]
+    return changed
+
+
+def is_fresh(step_no, fingerprint, cfg, manifest):
+    """fingerprint가 기록과 같고 출력 파일도 기록 당시 그대로면 True."""
+    rec = manifest['steps'].get(str(step_no))
+    if not rec or rec.get('fingerprint') != fingerprint:
+        return False
+    output_sha = file_hash(step_output(step_no, cfg), manifest)
+    return output_sha is not None and output_sha == rec.get('output_sha256')
+
+
+def record_fingerprint(step_no, fingerprint, parts, cfg, manifest):
+    """Step 성공 후 fingerprint + 출력 해시 기록 (manifest 저장은 호출측)."""
+    output = step_output(step_no, cfg)
+    manifest['steps'][str(step_no)] = {
+        'fingerprint': fingerprint,
+        'parts': parts,
+        'output': output,
+        'output_sha256': file_hash(output, manifest),
+        'recorded': datetime.now().isoformat(),
+    }
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Step 간 결과 전달 헬퍼
+모든 step 스크립트의 main(upstream)에서 앞 단계 결과를 읽고 자기 결과를 저장할 때 사용한다.
+
+  - in-process 실행 (run_settlement_pipeline.py 기본): 앞 단계가 반환한 dict를
+    upstream={step번호: 결과}로 그대로 넘겨받아 _cache 재파싱을 생략
+  - 단독 실행 (python stepN_*.py) / --subprocess 모드: _cache에서 로드
+
+캐시 형식은 경로 확장자로 정한다:
+  - .bin  (Step 2~5): _cache_format 바이너리. 환경변수 SETTLEMENT_CACHE_JSON=1 (실행기 --cache-json)이면
+                     같은 이름의 .json도 함께 저장 (검수용 — 로드는 항상 .bin)
+  - .json (Step 1·6 검증 결과 등): 기존 JSON 그대로
+
+사용법:
+    from _step_io import load_result, save_result, read_cache
+    step2 = load_result(2, CACHE_STEP2, upstream)
+    save_result(CACHE_STEP4, result)
+    step5 = read_cache(CACHE_STEP5)      # 보조 스크립트·테스트: 형식 무관 로드
+"""
+
+import json
+import os
+
+import _cache_format
+from _metrics import span
+
+CACHE_JSON_ENV = 'SETTLEMENT_CACHE_JSON'
+
+
+def json_export_enabled():
+    """.bin 캐시 저장 시 검수용 .json도 쓸지 (SETTLEMENT_CACHE_JSON=1)."""
+    return os.environ.get(CACHE_JSON_ENV, '').strip().lower() in ('1', 'true', 'yes')
+
+
+def read_cache(cache_path, use_mmap=False):
+    """캐시 파일 로드 (.bin 바이너리 / .json 자동 판별). 파일이 없으면 None."""
+    if not cache_path or not os.path.exists(cache_path):
+        return None
+    if _cache_format.is_cache_file(cache_path):
+        return _cache_format.load(cache_path, use_mmap=use_mmap)
+    with open(cache_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_result(step_no, cache_path, upstream=None):
+    """앞 단계 결과 반환. upstream에 있으면 그대로, 없으면 캐시 로드 (없으면 None)."""
+    if upstream is not None and step_no in upstream:
+        return upstream[step_no]
+    if not cache_path or not os.path.exists(cache_path):
+        return None
+    with span(f'load_step{step_no}_cache'):
+        return read_cache(cache_path, use_mmap=True)
+
+
+def save_result(cache_path, result):
+    """단계 결과를 _cache에 저장 (단독 재실행·--use-cache·검수용). .bin이면 바이너리 + 선택적 JSON."""
+    with span('save_cache'):
+        if not cache_path.endswith('.bin'):
+            _write_json(cache_path, result)
+            return
+        _cache_format.dump(result, cache_path)
+        json_path = os.path.splitext(cache_path)[0] + '.json'
+        if json_export_enabled():
+            _write_json(json_path, result)
+        elif os.path.exists(json_path):     # 이전 실행의 검수용 JSON — 현재 캐시와 달라지므로 삭제
+            os.remove(json_path)
+
+
+def _write_json(path, result):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
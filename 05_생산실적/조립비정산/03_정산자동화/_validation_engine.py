@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Step 6 검증 규칙 엔진 — 선언형 규칙 + 정산 표(DataFrame) 벡터 판정 + 규칙별 계측
+step6_검증.py가 규칙을 등록하고 evaluate()로 실행한다.
+
+  - Rule      : 번호·이름 + 판정 함수 + 입력 범위 선언
+                  scope='items'   → 정산 items 표의 columns (lines 지정 시 해당 라인 행만)
+                  scope='totals'  → 라인 합계·grand 합계
+                  scope='summary' → 라인별 요약(summary)
+                after=(번호, …)   → 선행 규칙 (없으면 다른 규칙과 동시에 실행)
+  - Context   : Step5 결과 + 모든 라인 items를 합친 표 (행 1개 = items 1건, 'line' 열 추가)
+                ctx.frame(lines)로 판정, ctx.row(i)로 원본 dict (상세 문구는 원본 값으로 작성)
+  - evaluate(): 규칙을 선행관계 단계별로 스레드 풀에서 실행 → 규칙 번호 순 결과 + 규칙별 소요시간·적중 행 수
+                only=(번호, …)   → 일부 규칙만 재평가
+                previous=검증결과 → 입력 지문(input_hash)이 같은 규칙은 이전 결과 재사용
+                                    (기준정보 수정 → Step4·5 재실행 후 바뀐 입력의 규칙만 다시 판정)
+
+입력 지문 = 규칙이 선언한 입력 값 해시 + 판정 함수 코드 해시. 선언 밖의 값을 읽는 규칙은 재사용이 틀릴 수 있으므로
+규칙을 추가할 때 columns / scope를 실제 읽는 범위와 맞춘다.
+
+사용법:
+    from _validation_engine import Rule, Outcome, evaluate
+    RULES = [Rule(5, "GERP 원본금액 정합성", check_orig, columns=('gerp_day_amt', 'gerp_orig_day_amt'))]
+    checks, metrics = evaluate(RULES, s5)
+    checks, metrics = evaluate(RULES, s5_new, previous=vr)     # 입력이 바뀐 규칙만 재판정
+"""
+
+import hashlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+import pandas as pd
+
+SCOPES = ('items', 'totals', 'summary')
+
+
+@dataclass(frozen=True)
+class Outcome:
+    """판정 결과 1건. hits = 규칙에 걸린 행(라인) 수."""
+    status: str                 # 'PASS' | 'FAIL' | 'WARNING' | 'INFO'
+    detail: str = ''
+    hits: int = 0
+    severity: str = 'CRITICAL'  # status='FAIL'일 때만 의미
+
+
+@dataclass(frozen=True)
+class Rule:
+    no: int
+    name: str
+    check: Callable[['Context'], Outcome]
+    scope: str = 'items'
+    columns: tuple = ()
+    lines: tuple = None         # scope='items'에서 대상 라인 (None = 전체)
+    after: tuple = ()
+
+    def __post_init__(self):
+        if self.scope not in SCOPES:
+            raise ValueError(f"규칙 {self.no}: scope는 {SCOPES} 중 하나 ({self.scope})")
+
+
+class Context:
+    """규칙 판정 입력. items 표는 evaluate()가 실행 전에 한 번 만든다 (규칙 스레드는 읽기만)."""
+
+    def __init__(self, s5, columns=()):
+        self.s5 = s5
+        self.lines = s5['lines']
+        self.summary = s5['summary']
+        self._rows = [r for ldata in self.lines.values() for r in ldata.get('items', [])]
+        line_col = [lc for lc, ldata in self.lines.items() for _ in ldata.get('items', [])]
+        data = {'line': line_col}
+        for col in columns:
+            data[col] = [r.get(col) for r in self._rows]
+        self._frame = pd.DataFrame(data)
+
+    @property
+    def n_rows(self):
+        return len(self._rows)
+
+    def frame(self, lines=None):
+        """items 표 (lines 지정 시 해당 라인 행만). index = ctx.row()용 행 번호."""
+        if lines is None:
+            return self._frame
+        return self._frame[self._frame['line'].isin(lines)]
+
+    def row(self, i):
+        return self._rows[i]
+
+    def rows(self, mask):
+        """불리언 mask(표 index 기준)에 걸린 원본 items dict 목록 (행 순서 유지)."""
+        return [self._rows[i] for i in mask[mask].index]
+
+
+# ── 입력 지문 ─────────────────────────────────────────────────
+def _code_hash(fn):
+    code = fn.__code__
+    return hashlib.sha1(code.co_code + repr(code.co_consts).encode('utf-8')).digest()
+
+
+def input_hash(rule, ctx):
+    """규칙 입력 범위의 값 + 판정 코드 → 16자리 해시."""
+    h = hashlib.sha1(_code_hash(rule.check))
+    h.update(rule.name.encode('utf-8'))
+    if rule.scope == 'items':
+        frame = ctx.frame(rule.lines)[['line', *rule.columns]]
+        h.update(pd.util.hash_pandas_object(frame, index=False).values.tobytes())
+    elif rule.scope == 'totals':
+        totals = [(lc, ldata.get('total_gerp_amt'), ldata.get('total_erp_amt')) for lc, ldata in ctx.lines.items()]
+        h.update(json.dumps([totals, ctx.s5.get('grand_gerp_amt'), ctx.s5.get('grand_erp_amt')],
+                            ensure_ascii=False, default=str).encode('utf-8'))
+    else:
+        h.update(json.dumps(ctx.summary, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8'))
+    return h.hexdigest()[:16]
+
+
+# ── 실행 ──────────────────────────────────────────────────────
+def _stages(rules):
+    """선행관계(after)로 규칙을 단계별로 나눈다. 같은 단계 규칙은 서로 독립."""
+    pending = {r.no: r for r in rules}
+    known = set(pending)
+    done, stages = set(), []
+    while pending:
+        ready = [r for r in pending.values() if all(a in done or a not in known for a in r.after)]
+        if not ready:
+            raise ValueError(f"규칙 선행관계 순환: {sorted(pending)}")
+        stages.append(sorted(ready, key=lambda r: r.no))
+        for r in ready:
+            done.add(r.no)
+            del pending[r.no]
+    return stages
+
+
+def _run(rule, ctx):
+    t0 = time.perf_counter()
+    try:
+        out = rule.check(ctx)
+    except Exception as e:     # 규칙 코드 오류는 해당 항목 FAIL로 기록하고 나머지 규칙은 계속
+        out = Outcome('FAIL', f"규칙 실행 오류: {type(e).__name__}: {e}")
+    return out, round((time.perf_counter() - t0) * 1000, 2)
+
+
+def _check_record(rule, out):
+    return {
+        "no": rule.no, "name": rule.name,
+        "status": out.status, "severity": out.severity if out.status == 'FAIL' else out.status,
+        "detail": out.detail,
+    }
+
+
+def evaluate(rules, s5, only=None, previous=None, max_workers=4):
+    """규칙 실행 → (checks, metrics). 둘 다 규칙 번호 순.
+
+    checks : [{no, name, status, severity, detail}] — step6_validation.json 'checks' 형식
+    metrics: [{no, elapsed_ms, hits, input_hash, reused}] — reused=True면 판정 생략 (이전 결과 사용)
+    only     : 재평가할 규칙 번호 — 나머지는 previous 결과를 그대로 쓴다 (previous에 없으면 평가)
+    previous : 이전 검증 결과 dict (checks + rule_metrics)
+    """
+    columns = sorted({c for r in rules if r.scope == 'items' for c in r.columns})
+    ctx = Context(s5, columns)
+
+    prev_checks = {c['no']: c for c in (previous or {}).get('checks', [])}
+    prev_metrics = {m['no']: m for m in (previous or {}).get('rule_metrics', [])}
+    only = None if only is None else set(only)
+
+    checks, metrics, todo = {}, {}, []
+    for rule in rules:
+        digest = input_hash(rule, ctx)
+        pm, pc = prev_metrics.get(rule.no), prev_checks.get(rule.no)
+        keep = pc is not None and pm is not None and (
+            (only is not None and rule.no not in only) or
+            (only is None and pm.get('input_hash') == digest))
+        if keep:
+            checks[rule.no] = pc
+            metrics[rule.no] = {**pm, 'elapsed_ms': 0.0, 'reused': True}
+        else:
+            todo.append((rule, digest))
+    digests = dict((r.no, d) for r, d in todo)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        for stage in _stages([r for r, _ in todo]):
+            for rule, (out, ms) in zip(stage, pool.map(lambda r: _run(r, ctx), stage)):
+                checks[rule.no] = _check_record(rule, out)
+                metrics[rule.no] = {'no': rule.no, 'elapsed_ms': ms, 'hits': out.hits,
+                                    'input_hash': digests[rule.no], 'reused': False}
+
+    order = sorted(checks)
+    return [checks[n] for n in order], [metrics[n] for n in order]
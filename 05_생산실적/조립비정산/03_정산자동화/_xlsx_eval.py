@@ -0,0 +1,743 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+수식 워크북 cached value 계산기 — Excel COM 없이 수식 값을 Python으로 계산
+build_formula_version.py / monthly-pnl-rollup이 openpyxl로 저장한 워크북은 수식만 있고 값(<v>)이 비어 있어,
+data_only 로더가 값을 읽으려면 Excel COM 재계산(CalculateFull)을 한 번 거쳐야 했다.
+이 모듈은 빌더가 쓰는 수식 부분집합을 직접 계산해 수식 셀 옆에 cached value로 기록한다.
+
+지원 범위 (빌더 수식 부분집합):
+  - 참조 : A1 / $A$1 / A1:B9 / A:A / 시트!A1 / '시트 이름'!A1:A9
+  - 연산 : + - * / ^ & = <> < > <= >= 단항 -
+  - 함수 : SUM SUMIF SUMIFS COUNTIF COUNTIFS IF IFERROR AND OR NOT ROUND ABS MIN MAX LEFT
+  - 조건 : 값 일치(대소문자 무시, 숫자 텍스트 = 숫자) / 비교 연산자 / 와일드카드 * ?
+지원하지 않는 함수·구문이 있는 셀(및 그 셀을 참조하는 셀)은 값을 비워 둔다 — 엑셀에서 열면
+fullCalcOnLoad로 다시 계산된다.
+
+SUMIF/SUMIFS/COUNTIF 값 일치 조건은 (시트, 열) 단위 인덱스(값 → 행 목록)로 찾으므로
+전체열 SUMIFS·COUNTIF(A$3:A행) 구조(classic 레이아웃)도 행 수에 비례해 계산된다.
+
+사용법:
+    from _xlsx_eval import fill_cached_values, WorkbookEvaluator
+    stats = fill_cached_values(path)                 # openpyxl로 저장한 xlsx에 cached value 기록
+    ev = WorkbookEvaluator(path); ev.value('정산집계', 'G12')
+"""
+
+import bisect
+import os
+import posixpath
+import re
+import time
+import zipfile
+from datetime import date, datetime, time as dtime
+from decimal import Decimal, ROUND_HALF_UP
+from xml.sax.saxutils import escape
+
+import openpyxl
+from openpyxl.utils import column_index_from_string
+from openpyxl.utils.datetime import to_excel
+
+
+class XLError(Exception):
+    """엑셀 오류값 (#DIV/0! / #VALUE! / #REF! / #N/A). 셀 값으로도 그대로 저장된다."""
+
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+
+class Unsupported(Exception):
+    """부분집합 밖 수식 — 값 비움."""
+
+
+# ── 토크나이저 / 파서 ────────────────────────────────────────────
+_TOKEN = re.compile(r"""
+  (?P<ws>\s+)
+| (?P<str>"(?:[^"]|"")*")
+| (?P<func>[A-Za-z_][A-Za-z0-9_.]*(?=\())
+| (?P<ref>(?:(?:'(?:[^']|'')+'|[^\W\d][\w.]*)!)?
+         (?:\$?[A-Za-z]{1,3}\$?\d+(?::\$?[A-Za-z]{1,3}\$?\d+)?|\$?[A-Za-z]{1,3}:\$?[A-Za-z]{1,3}))
+| (?P<num>(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)
+| (?P<bool>TRUE|FALSE)
+| (?P<err>\#(?:DIV/0!|VALUE!|REF!|N/A|NAME\?|NUM!|NULL!))
+| (?P<op><>|<=|>=|[-+*/^&=<>(),])
+""", re.X)
+
+_PREC = {'=': 1, '<>': 1, '<': 1, '>': 1, '<=': 1, '>=': 1, '&': 2, '+': 3, '-': 3, '*': 4, '/': 4, '^': 5}
+_CELL = re.compile(r'\$?([A-Za-z]{1,3})\$?(\d*)')
+
+
+def _tokenize(text):
+    pos, out = 0, []
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if not m:
+            raise Unsupported(f'토큰 해석 불가: {text[pos:pos + 20]!r}')
+        pos = m.end()
+        if m.lastgroup != 'ws':
+            out.append((m.lastgroup, m.group()))
+    return out
+
+
+def _parse_ref(text):
+    """참조 문자열 → (시트 or None, r1, c1, r2, c2). 열 전체 참조는 r1/r2 = None."""
+    sheet = None
+    if '!' in text:
+        sheet, text = text.rsplit('!', 1)
+        if sheet.startswith("'"):
+            sheet = sheet[1:-1].replace("''", "'")
+    parts = text.split(':')
+    coords = []
+    for p in parts:
+        m = _CELL.fullmatch(p)
+        coords.append((int(m.group(2)) if m.group(2) else None, column_index_from_string(m.group(1).upper())))
+    (r1, c1), (r2, c2) = coords[0], coords[-1]
+    if r1 is not None and r2 is not None:
+        r1, r2 = min(r1, r2), max(r1, r2)
+    return sheet, r1, min(c1, c2), r2, max(c1, c2)
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens, self.i = tokens, 0
+
+    def peek(self):
+        return self.tokens[self.i] if self.i < len(self.tokens) else (None, None)
+
+    def take(self):
+        if self.i >= len(self.tokens):
+            raise Unsupported('수식 끝이 잘림')
+        tok = self.tokens[self.i]
+        self.i += 1
+        return tok
+
+    def expect(self, op):
+        if self.take() != ('op', op):
+            raise Unsupported(f"'{op}' 필요")
+
+    def expr(self, min_prec=1):
+        left = self.unary()
+        while True:
+            kind, val = self.peek()
+            if kind != 'op' or val not in _PREC or _PREC[val] < min_prec:
+                return left
+            self.take()
+            left = ('bin', val, left, self.expr(_PREC[val] + 1))
+
+    def unary(self):
+        kind, val = self.peek()
+        if kind == 'op' and val in ('-', '+'):
+            self.take()
+            operand = self.unary()
+            return ('neg', operand) if val == '-' else operand
+        return self.atom()
+
+    def atom(self):
+        kind, val = self.take()
+        if kind == 'num':
+            return ('lit', float(val))
+        if kind == 'str':
+            return ('lit', val[1:-1].replace('""', '"'))
+        if kind == 'bool':
+            return ('lit', val == 'TRUE')
+        if kind == 'err':
+            return ('err', val)
+        if kind == 'ref':
+            return ('ref',) + _parse_ref(val)
+        if kind == 'func':
+            name = val.upper()
+            if name not in _FUNCS:
+                raise Unsupported(f'미지원 함수 {name}')
+            self.take()   # '('
+            args = []
+            if self.peek() != ('op', ')'):
+                while True:
+                    args.append(self.expr())
+                    if self.peek() == ('op', ','):
+                        self.take()
+                        continue
+                    break
+            self.expect(')')
+            return ('call', name, args)
+        if (kind, val) == ('op', '('):
+            node = self.expr()
+            self.expect(')')
+            return node
+        raise Unsupported(f'해석 불가 토큰 {val!r}')
+
+
+def parse_formula(formula):
+    """'=...' 수식 → AST (미지원 구문이면 Unsupported)."""
+    p = _Parser(_tokenize(formula[1:] if formula.startswith('=') else formula))
+    node = p.expr()
+    if p.i != len(p.tokens):
+        raise Unsupported('수식 뒤에 남은 토큰')
+    return node
+
+
+# ── 값 변환 ─────────────────────────────────────────────────────
+class _Range:
+    __slots__ = ('sheet', 'r1', 'c1', 'r2', 'c2')
+
+    def __init__(self, sheet, r1, c1, r2, c2):
+        self.sheet, self.r1, self.c1, self.r2, self.c2 = sheet, r1, c1, r2, c2
+
+    @property
+    def n_rows(self):
+        return self.r2 - self.r1 + 1
+
+    @property
+    def n_cols(self):
+        return self.c2 - self.c1 + 1
+
+
+def _is_num(v):
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+def _to_num(v):
+    """산술 피연산자 → 숫자 (빈 셀 0, TRUE 1, 숫자 텍스트 허용)."""
+    if v is None:
+        return 0.0
+    if isinstance(v, bool):
+        return float(v)
+    if _is_num(v):
+        return float(v)
+    if isinstance(v, str):
+        try:
+            return float(v.strip()) if v.strip() else 0.0
+        except ValueError:
+            raise XLError('#VALUE!')
+    raise XLError('#VALUE!')
+
+
+def _to_text(v):
+    """& 연결·LEFT 등 텍스트 변환 (숫자는 일반 서식 15자리)."""
+    if v is None:
+        return ''
+    if isinstance(v, bool):
+        return 'TRUE' if v else 'FALSE'
+    if _is_num(v):
+        v = float(v)
+        if v.is_integer() and abs(v) < 1e15:
+            return str(int(v))
+        return f'{v:.15g}'
+    return str(v)
+
+
+def _to_bool(v):
+    if v is None:
+        return False
+    if isinstance(v, bool):
+        return v
+    if _is_num(v):
+        return v != 0
+    if isinstance(v, str) and v.upper() in ('TRUE', 'FALSE'):
+        return v.upper() == 'TRUE'
+    raise XLError('#VALUE!')
+
+
+def _cell_value(v):
+    """셀 원본값 정규화 (날짜 → 엑셀 일련번호)."""
+    if isinstance(v, (datetime, date, dtime)):
+        return float(to_excel(v))
+    return v
+
+
+def _match_key(v):
+    """조건 일치 인덱스 키 (엑셀 SUMIF/COUNTIF 값 일치 기준)."""
+    if v is None or v == '':
+        return ('b',)
+    if isinstance(v, bool):
+        return ('l', v)
+    if _is_num(v):
+        return ('n', float(v))
+    if isinstance(v, str):
+        s = v.strip()
+        try:
+            return ('n', float(s))
+        except ValueError:
+            return ('s', v.casefold())
+    return None   # 오류값 — 어떤 조건과도 일치 안 함
+
+
+def _criterion(crit):
+    """조건값 → (인덱스 키 or None, 판정 함수). 키가 있으면 인덱스 조회, 없으면 행별 판정."""
+    if crit is None:
+        crit = 0.0
+    if _is_num(crit):
+        key = ('n', float(crit))
+        return key, lambda v: _match_key(v) == key
+    if isinstance(crit, bool):
+        key = ('l', crit)
+        return key, lambda v: _match_key(v) == key
+    text = str(crit)
+    op = '='
+    for cand in ('<>', '<=', '>=', '=', '<', '>'):
+        if text.startswith(cand):
+            op, text = cand, text[len(cand):]
+            break
+    try:
+        num = float(text)
+    except ValueError:
+        num = None
+    if op == '=' and text == '':
+        return None, lambda v: v is None or v == ''
+    if op == '<>' and text == '':
+        return None, lambda v: not (v is None or v == '')
+    if num is not None:
+        if op == '=':
+            key = ('n', num)
+            return key, lambda v: _match_key(v) == key
+        cmp = {'<>': lambda x: x != num, '<': lambda x: x < num, '>': lambda x: x > num,
+               '<=': lambda x: x <= num, '>=': lambda x: x >= num}[op]
+        if op == '<>':
+            return None, lambda v: not (_is_num(v) and v == num)
+        return None, lambda v: _is_num(v) and cmp(float(v))
+    folded = text.casefold()
+    if any(ch in text for ch in '*?~'):
+        # ~* / ~? / ~~ = 문자 그대로 (와일드카드 치환보다 먼저 토큰으로 분리)
+        pat = re.compile(''.join(
+            re.escape(tok[1]) if len(tok) == 2 else '.*' if tok == '*' else '.' if tok == '?'
+            else re.escape(tok)
+            for tok in re.findall(r'~[*?~]|.', folded, re.S)
+        ), re.S)
+        hit = lambda v: isinstance(v, str) and pat.fullmatch(v.casefold()) is not None
+    elif op in ('=', '<>'):
+        key = ('s', folded) if op == '=' else None
+        hit = lambda v: isinstance(v, str) and v.casefold() == folded
+        if key:
+            return key, lambda v: _match_key(v) == key
+    else:
+        cmp = {'<': lambda x: x < folded, '>': lambda x: x > folded,
+               '<=': lambda x: x <= folded, '>=': lambda x: x >= folded}[op]
+        return None, lambda v: isinstance(v, str) and cmp(v.casefold())
+    if op == '<>':
+        return None, lambda v: not hit(v)
+    return None, hit
+
+
+def _round_half_up(x, digits):
+    q = Decimal(1).scaleb(-digits)
+    return float(Decimal(f'{x:.15g}').quantize(q, rounding=ROUND_HALF_UP))
+
+
+# ── 평가기 ──────────────────────────────────────────────────────
+_IN_PROGRESS = object()
+
+
+class WorkbookEvaluator:
+    """openpyxl로 읽은 워크북 1개의 수식 평가기 (셀 값 메모이즈, 조건 열 인덱스 공유)."""
+
+    def __init__(self, path):
+        wb = openpyxl.load_workbook(path, read_only=True)
+        self.sheets = {}     # 시트 → {(행, 열): 원본값}
+        self.max_row = {}
+        self.sheet_names = list(wb.sheetnames)
+        try:
+            for ws in wb.worksheets:
+                cells = {}
+                for r, row in enumerate(ws.iter_rows(values_only=True), start=1):
+                    for c, v in enumerate(row, start=1):
+                        if v is not None:
+                            cells[(r, c)] = _cell_value(v)
+                self.sheets[ws.title] = cells
+                self.max_row[ws.title] = max((r for r, _ in cells), default=0)
+        finally:
+            wb.close()
+        self._folded = {name.casefold(): name for name in self.sheet_names}
+        self._memo = {}
+        self._ast = {}
+        self._index = {}     # (시트, 열) → ({키: [행]}, {행: 키})
+
+    # ── 셀 ──
+    def _sheet(self, name, cur):
+        if name is None:
+            return cur
+        real = self._folded.get(name.casefold())
+        if real is None:
+            raise XLError('#REF!')
+        return real
+
+    def value(self, sheet, ref):
+        """단일 셀 값 ('A1' 형식). 오류는 XLError, 미지원은 Unsupported 예외.
+
+        정수값 실수는 int로 반환 — cached value를 data_only로 읽은 값과 같은 타입.
+        """
+        _, r, c, _, _ = _parse_ref(ref)
+        v = self.cell(sheet, r, c)
+        if isinstance(v, XLError):
+            raise v
+        if isinstance(v, float) and v.is_integer() and abs(v) < 1e15:
+            return int(v)
+        return v
+
+    def cell(self, sheet, r, c):
+        key = (sheet, r, c)
+        v = self._memo.get(key)
+        if v is _IN_PROGRESS:
+            raise Unsupported(f'순환 참조 {sheet}!{r},{c}')
+        if v is not None or key in self._memo:
+            return v
+        raw = self.sheets.get(sheet, {}).get((r, c))
+        if not (isinstance(raw, str) and raw.startswith('=')):
+            self._memo[key] = raw
+            return raw
+        self._memo[key] = _IN_PROGRESS
+        try:
+            ast = self._ast.get(raw)
+            if ast is None:
+                ast = self._ast[raw] = parse_formula(raw)
+            try:
+                v = self._scalar(ast, sheet)
+            except XLError as e:
+                v = e
+        except Unsupported:
+            del self._memo[key]
+            raise
+        self._memo[key] = v
+        return v
+
+    def formula_cells(self):
+        for sheet, cells in self.sheets.items():
+            for (r, c), raw in cells.items():
+                if isinstance(raw, str) and raw.startswith('='):
+                    yield sheet, r, c
+
+    # ── 평가 ──
+    def _eval(self, node, sheet):
+        kind = node[0]
+        if kind == 'lit':
+            return node[1]
+        if kind == 'ref':
+            _, sh, r1, c1, r2, c2 = node
+            sh = self._sheet(sh, sheet)
+            if r1 is None:
+                r1, r2 = 1, max(self.max_row.get(sh, 0), 1)
+            return _Range(sh, r1, c1, r2, c2)
+        if kind == 'err':
+            raise XLError(node[1])
+        if kind == 'neg':
+            return -_to_num(self._scalar(node[1], sheet))
+        if kind == 'bin':
+            return self._binary(node[1], self._scalar(node[2], sheet), self._scalar(node[3], sheet))
+        if kind == 'call':
+            return _FUNCS[node[1]](self, node[2], sheet)
+        raise Unsupported(kind)
+
+    def _scalar(self, node, sheet):
+        v = self._eval(node, sheet)
+        if isinstance(v, _Range):
+            if v.r1 != v.r2 or v.c1 != v.c2:
+                raise XLError('#VALUE!')
+            v = self.cell(v.sheet, v.r1, v.c1)
+        if isinstance(v, XLError):
+            raise v
+        return v
+
+    def _range_values(self, rng):
+        """범위 값 (행 우선 평탄화)."""
+        out = []
+        for r in range(rng.r1, rng.r2 + 1):
+            for c in range(rng.c1, rng.c2 + 1):
+                out.append(self.cell(rng.sheet, r, c))
+        return out
+
+    def _args_values(self, args, sheet):
+        """SUM/MIN/MAX 인자 → 숫자 목록 (범위는 숫자만, 직접 인자는 숫자 변환)."""
+        nums = []
+        for a in args:
+            v = self._eval(a, sheet)
+            if isinstance(v, _Range) and (v.n_rows > 1 or v.n_cols > 1 or a[0] == 'ref'):
+                for x in self._range_values(v):
+                    if isinstance(x, XLError):
+                        raise x
+                    if _is_num(x):
+                        nums.append(float(x))
+            else:
+                nums.append(_to_num(self._scalar(a, sheet) if isinstance(v, _Range) else v))
+        return nums
+
+    @staticmethod
+    def _binary(op, a, b):
+        if op == '&':
+            return _to_text(a) + _to_text(b)
+        if op in ('+', '-', '*', '/', '^'):
+            x, y = _to_num(a), _to_num(b)
+            if op == '+':
+                return x + y
+            if op == '-':
+                return x - y
+            if op == '*':
+                return x * y
+            if op == '/':
+                if y == 0:
+                    raise XLError('#DIV/0!')
+                return x / y
+            return x ** y
+        # 비교: 빈 셀은 상대 타입의 기본값, 타입 순서 숫자 < 텍스트 < 논리
+        if a is None:
+            a = '' if isinstance(b, str) else (False if isinstance(b, bool) else 0.0)
+        if b is None:
+            b = '' if isinstance(a, str) else (False if isinstance(a, bool) else 0.0)
+        rank = lambda v: 2 if isinstance(v, bool) else (1 if isinstance(v, str) else 0)
+        ra, rb = rank(a), rank(b)
+        if ra != rb:
+            a, b = ra, rb
+        elif ra == 1:
+            a, b = a.casefold(), b.casefold()
+        return {'=': a == b, '<>': a != b, '<': a < b, '>': a > b, '<=': a <= b, '>=': a >= b}[op]
+
+    # ── 조건 집계 ──
+    def _column_index(self, sheet, col):
+        key = (sheet, col)
+        idx = self._index.get(key)
+        if idx is None:
+            rows_by_key, key_by_row = {}, {}
+            for r in range(1, self.max_row.get(sheet, 0) + 1):
+                if (r, col) not in self.sheets.get(sheet, {}):
+                    continue
+                k = _match_key(self.cell(sheet, r, col))
+                if k is None:
+                    continue
+                rows_by_key.setdefault(k, []).append(r)
+                key_by_row[r] = k
+            idx = self._index[key] = (rows_by_key, key_by_row)
+        return idx
+
+    def _criteria_offsets(self, pairs):
+        """[(범위, 조건값)] → 모든 조건을 만족하는 범위 내 오프셋 목록."""
+        n = pairs[0][0].n_rows * pairs[0][0].n_cols
+        compiled = []
+        for rng, crit in pairs:
+            if rng.n_rows * rng.n_cols != n:
+                raise XLError('#VALUE!')
+            key, hit = _criterion(crit)
+            compiled.append((rng, key, hit))
+        # 값 일치 조건 중 후보가 가장 적은 열로 후보 행 추림 (단일 열 범위만)
+        best = None
+        for rng, key, _ in compiled:
+            if key is None or rng.n_cols != 1:
+                continue
+            try:
+                rows = self._column_index(rng.sheet, rng.c1)[0].get(key, [])
+            except Unsupported:
+                continue   # 조건 열 안에 순환 → 행별 판정
+            lo, hi = bisect.bisect_left(rows, rng.r1), bisect.bisect_right(rows, rng.r2)
+            if best is None or hi - lo < len(best):
+                best = [r - rng.r1 for r in rows[lo:hi]]
+        offsets = best if best is not None else range(n)
+        out = []
+        for off in offsets:
+            ok = True
+            for rng, key, hit in compiled:
+                if rng.n_cols == 1:
+                    r, c = rng.r1 + off, rng.c1
+                else:
+                    r, c = rng.r1 + off // rng.n_cols, rng.c1 + off % rng.n_cols
+                v = self.cell(rng.sheet, r, c)
+                if isinstance(v, XLError) or not hit(v):
+                    ok = False
+                    break
+            if ok:
+                out.append(off)
+        return out
+
+    def _sum_at(self, rng, offsets):
+        total = 0.0
+        for off in offsets:
+            if rng.n_cols == 1:
+                v = self.cell(rng.sheet, rng.r1 + off, rng.c1)
+            else:
+                v = self.cell(rng.sheet, rng.r1 + off // rng.n_cols, rng.c1 + off % rng.n_cols)
+            if isinstance(v, XLError):
+                raise v
+            if _is_num(v):
+                total += v
+        return total
+
+    def _range_arg(self, node, sheet):
+        v = self._eval(node, sheet)
+        if not isinstance(v, _Range):
+            raise XLError('#VALUE!')
+        return v
+
+
+# ── 함수 ────────────────────────────────────────────────────────
+def _f_sum(ev, args, sheet):
+    return sum(ev._args_values(args, sheet))
+
+
+def _f_min(ev, args, sheet):
+    return min(ev._args_values(args, sheet), default=0.0)
+
+
+def _f_max(ev, args, sheet):
+    return max(ev._args_values(args, sheet), default=0.0)
+
+
+def _f_sumif(ev, args, sheet):
+    rng = ev._range_arg(args[0], sheet)
+    crit = ev._scalar(args[1], sheet)
+    if len(args) > 2:
+        s = ev._range_arg(args[2], sheet)   # 합계 범위는 조건 범위 크기로 맞춤 (엑셀 동작)
+        sum_rng = _Range(s.sheet, s.r1, s.c1, s.r1 + rng.n_rows - 1, s.c1 + rng.n_cols - 1)
+    else:
+        sum_rng = rng
+    return ev._sum_at(sum_rng, ev._criteria_offsets([(rng, crit)]))
+
+
+def _f_sumifs(ev, args, sheet):
+    sum_rng = ev._range_arg(args[0], sheet)
+    pairs = [(ev._range_arg(args[i], sheet), ev._scalar(args[i + 1], sheet)) for i in range(1, len(args) - 1, 2)]
+    if any(r.n_rows != sum_rng.n_rows or r.n_cols != sum_rng.n_cols for r, _ in pairs):
+        raise XLError('#VALUE!')
+    return ev._sum_at(sum_rng, ev._criteria_offsets(pairs))
+
+
+def _f_countifs(ev, args, sheet):
+    pairs = [(ev._range_arg(args[i], sheet), ev._scalar(args[i + 1], sheet)) for i in range(0, len(args) - 1, 2)]
+    return float(len(ev._criteria_offsets(pairs)))
+
+
+def _f_if(ev, args, sheet):
+    if _to_bool(ev._scalar(args[0], sheet)):
+        return ev._scalar(args[1], sheet)
+    return ev._scalar(args[2], sheet) if len(args) > 2 else False
+
+
+def _f_iferror(ev, args, sheet):
+    try:
+        return ev._scalar(args[0], sheet)
+    except XLError:
+        return ev._scalar(args[1], sheet)
+
+
+def _f_and(ev, args, sheet):
+    vals = [_to_bool(ev._scalar(a, sheet)) for a in args]   # 엑셀은 단락 평가 안 함 (오류 전파)
+    return all(vals)
+
+
+def _f_or(ev, args, sheet):
+    vals = [_to_bool(ev._scalar(a, sheet)) for a in args]
+    return any(vals)
+
+
+def _f_not(ev, args, sheet):
+    return not _to_bool(ev._scalar(args[0], sheet))
+
+
+def _f_round(ev, args, sheet):
+    return _round_half_up(_to_num(ev._scalar(args[0], sheet)), int(_to_num(ev._scalar(args[1], sheet))))
+
+
+def _f_abs(ev, args, sheet):
+    return abs(_to_num(ev._scalar(args[0], sheet)))
+
+
+def _f_left(ev, args, sheet):
+    n = int(_to_num(ev._scalar(args[1], sheet))) if len(args) > 1 else 1
+    if n < 0:
+        raise XLError('#VALUE!')
+    return _to_text(ev._scalar(args[0], sheet))[:n]
+
+
+_FUNCS = {
+    'SUM': _f_sum, 'MIN': _f_min, 'MAX': _f_max,
+    'SUMIF': _f_sumif, 'SUMIFS': _f_sumifs, 'COUNTIF': _f_countifs, 'COUNTIFS': _f_countifs,
+    'IF': _f_if, 'IFERROR': _f_iferror, 'AND': _f_and, 'OR': _f_or, 'NOT': _f_not,
+    'ROUND': _f_round, 'ABS': _f_abs, 'LEFT': _f_left,
+}
+
+
+# ── cached value 기록 ──────────────────────────────────────────
+_SHEET_REL = re.compile(r'<sheet\b[^>]*?\bname="([^"]*)"[^>]*?\br:id="([^"]*)"')
+_REL = re.compile(r'<Relationship\b[^>]*?\bTarget="([^"]*)"[^>]*?\bId="([^"]*)"|'
+                  r'<Relationship\b[^>]*?\bId="([^"]*)"[^>]*?\bTarget="([^"]*)"')
+_FORMULA_CELL = re.compile(
+    r'<c r="([A-Z]+)(\d+)"([^>]*)><f>([^<]*)</f>(?:<v\s*/>|<v>[^<]*</v>)?</c>')
+_T_ATTR = re.compile(r'\s+t="[^"]*"')
+
+
+def _unescape_attr(s):
+    return s.replace('&quot;', '"').replace('&apos;', "'").replace('&lt;', '<').replace('&gt;', '>').replace('&amp;', '&')
+
+
+def _sheet_parts(zf):
+    """시트 이름 → 워크시트 XML 경로."""
+    wb_xml = zf.read('xl/workbook.xml').decode('utf-8')
+    rels_xml = zf.read('xl/_rels/workbook.xml.rels').decode('utf-8')
+    targets = {}
+    for m in _REL.finditer(rels_xml):
+        target, rid = (m.group(1), m.group(2)) if m.group(1) is not None else (m.group(4), m.group(3))
+        targets[rid] = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+    return {_unescape_attr(name): targets[rid] for name, rid in _SHEET_REL.findall(wb_xml) if rid in targets}
+
+
+def _cached_xml(value):
+    """평가값 → (t 속성, <v> 내용)."""
+    if isinstance(value, XLError):
+        return 'e', value.code
+    if isinstance(value, bool):
+        return 'b', '1' if value else '0'
+    if isinstance(value, str):
+        return 'str', escape(value)
+    if value is None:
+        value = 0.0
+    value = float(value)
+    if value.is_integer() and abs(value) < 1e15:
+        return None, str(int(value))
+    return None, repr(value)
+
+
+def fill_cached_values(path, out_path=None):
+    """수식 셀 전체를 계산해 cached value(<v>)를 기록한 xlsx 저장 → 통계 dict.
+
+    openpyxl로 저장한 워크북 전제 (<f> 평문 수식). 공유/배열 수식 셀은 건너뛴다.
+    통계: formulas / filled / unsupported / errors / seconds / samples(미지원 예시 최대 5개)
+    """
+    t0 = time.perf_counter()
+    out_path = out_path or path
+    ev = WorkbookEvaluator(path)
+    values, unsupported, samples = {}, 0, []
+    for sheet, r, c in ev.formula_cells():
+        try:
+            values[(sheet, r, c)] = ev.cell(sheet, r, c)
+        except (Unsupported, RecursionError) as e:
+            unsupported += 1
+            if len(samples) < 5:
+                samples.append(f'{sheet}!{openpyxl.utils.get_column_letter(c)}{r}: {e}')
+
+    with zipfile.ZipFile(path) as zin:
+        parts = _sheet_parts(zin)
+        by_part = {part: name for name, part in parts.items()}
+        tmp = f'{out_path}.{os.getpid()}.tmp'
+        with zipfile.ZipFile(tmp, 'w', zipfile.ZIP_DEFLATED) as zout:
+            for item in zin.infolist():
+                data = zin.read(item.filename)
+                sheet = by_part.get(item.filename)
+                if sheet is not None:
+                    data = _fill_sheet_xml(data.decode('utf-8'), sheet, values).encode('utf-8')
+                zout.writestr(item, data)
+    os.replace(tmp, out_path)
+
+    return {
+        'formulas': len(values) + unsupported,
+        'filled': len(values),
+        'unsupported': unsupported,
+        'errors': sum(1 for v in values.values() if isinstance(v, XLError)),
+        'seconds': time.perf_counter() - t0,
+        'samples': samples,
+    }
+
+
+def _fill_sheet_xml(xml, sheet, values):
+    def sub(m):
+        col, row, attrs, formula = m.groups()
+        key = (sheet, int(row), column_index_from_string(col))
+        if key not in values:
+            return m.group(0)
+        t, v = _cached_xml(values[key])
+        attrs = _T_ATTR.sub('', attrs) + (f' t="{t}"' if t else '')
+        return f'<c r="{col}{row}"{attrs}><f>{formula}</f><v>{v}</v></c>'
+    return _FORMULA_CELL.sub(sub, xml)
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+보고서용 고속 xlsx 작성기 — 셀 버퍼 + 이름 있는 스타일 + 행 스트리밍
+step7 보고서·step8 오류리스트가 일반 모드 워크북에 셀마다 font/fill/border/number_format을
+따로 지정하던 것을 그대로 두고, 저장 경로만 바꿔 시간·메모리를 줄인다.
+
+  - SheetBuffer  : openpyxl Worksheet 호환 부분집합 (cell / ws['A1'] / merge_cells / unmerge_cells /
+                   row_dimensions / column_dimensions / freeze_panes). 셀은 가벼운 slot 객체로만 보관
+  - StyledWorkbook : 셀 스타일 조합(font·fill·border·alignment·서식)마다 NamedStyle 1개를 등록하고,
+                   시트 골격(열 너비·틀 고정·병합)·스타일·패키지는 openpyxl write-only 워크북이 만든다.
+                   행 데이터(<sheetData>)만 이 모듈이 openpyxl과 같은 규칙으로 직접 직렬화해 임시파일에
+                   스트리밍하고, 저장 시 패키지의 빈 <sheetData>에 끼워 넣는다
+                   (셀 객체 생성·셀별 스타일 해시·et_xmlfile 요소 직렬화 반복 없음)
+  - RowTemplate / write_row : 열별 기본 스타일 묶음 + 조건부 fill/font — 데이터 행 반복 지정 대체
+  - clear_rows   : 기존 워크북(본체) 데이터 영역 값·fill 초기화 (populate_err_list_only)
+
+셀 값: 숫자 / bool / 문자열('=' 시작은 수식, '#DIV/0!' 등은 오류값) / None — 날짜는 지원 안 함 (TypeError).
+시트는 만든 순서대로 완성한다 — 다음 시트를 만들면 앞 시트는 임시파일로 기록되고 더 고칠 수 없다.
+
+사용법:
+    from _xlsx_writer import StyledWorkbook, RowTemplate, write_row
+    wb = StyledWorkbook(style_prefix='정산')
+    ws = wb.create_sheet('00_정산집계')
+    ws.cell(1, 1, '제목').font = TITLE_FONT          # 일반 워크시트와 같은 방식
+    write_row(ws, 5, vals, DATA_ROW, fills={17: NEG_FILL})
+    wb.save(path)
+"""
+
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from xml.sax.saxutils import escape
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ERROR_CODES, ILLEGAL_CHARACTERS_RE, IllegalCharacterError
+from openpyxl.compat.numbers import NUMERIC_TYPES
+from openpyxl.styles import Alignment, NamedStyle, PatternFill
+from openpyxl.styles.borders import DEFAULT_BORDER
+from openpyxl.styles.fills import DEFAULT_EMPTY_FILL
+from openpyxl.styles.fonts import DEFAULT_FONT
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.cell import coordinate_to_tuple, range_boundaries
+
+STYLE_ATTRS = ('font', 'fill', 'border', 'alignment', 'number_format')
+# 지정 안 한 속성 = 일반 워크북 기본 셀 스타일과 같은 값 (NamedStyle 기본값은 테두리·폰트가 다름)
+_DEFAULTS = {'font': DEFAULT_FONT, 'fill': DEFAULT_EMPTY_FILL, 'border': DEFAULT_BORDER,
+             'alignment': Alignment(), 'number_format': 'General'}
+_EMPTY_SHEETDATA = re.compile(rb'<sheetData\s*/>|<sheetData>\s*</sheetData>')
+
+
+class _Cell:
+    """버퍼 셀 — 값 + 스타일 속성 5개 (지정 안 한 속성은 None = 기본값)."""
+    __slots__ = ('value',) + STYLE_ATTRS
+
+    def __init__(self, value=None):
+        self.value = value
+        self.font = self.fill = self.border = self.alignment = self.number_format = None
+
+
+class _Dim:
+    """행/열 치수 (width · height · hidden)."""
+    __slots__ = ('width', 'height', 'hidden')
+
+    def __init__(self):
+        self.width = self.height = None
+        self.hidden = False
+
+
+class _DimHolder(dict):
+    def __missing__(self, key):
+        dim = self[key] = _Dim()
+        return dim
+
+
+class SheetBuffer:
+    """openpyxl Worksheet 호환 부분집합. StyledWorkbook.create_sheet()로 만든다."""
+
+    def __init__(self, title):
+        self.title = title
+        self.freeze_panes = None
+        self.row_dimensions = _DimHolder()
+        self.column_dimensions = _DimHolder()
+        self._cells = {}        # (row, col) → _Cell
+        self._merged = []       # 'A1:H1' (추가 순서)
+        self._closed = False
+
+    def _check_open(self):
+        if self._closed:
+            raise RuntimeError(f"시트 '{self.title}'는 이미 기록됨 — 시트는 만든 순서대로 완성해야 함")
+
+    def cell(self, row, column, value=None):
+        """ws.cell과 같은 규칙: value가 None이 아니면 값 지정, 셀 반환."""
+        self._check_open()
+        c = self._cells.get((row, column))
+        if c is None:
+            c = self._cells[(row, column)] = _Cell()
+        if value is not None:
+            c.value = value
+        return c
+
+    def __getitem__(self, coord):
+        return self.cell(*coordinate_to_tuple(coord))
+
+    def __setitem__(self, coord, value):
+        self.cell(*coordinate_to_tuple(coord)).value = value
+
+    @staticmethod
+    def _range(range_string, start_row, start_column, end_row, end_column):
+        if range_string is None:
+            range_string = (f'{get_column_letter(start_column)}{start_row}:'
+                            f'{get_column_letter(end_column)}{end_row}')
+        min_col, min_row, max_col, max_row = range_boundaries(range_string)
+        ref = f'{get_column_letter(min_col)}{min_row}:{get_column_letter(max_col)}{max_row}'
+        covered = [(r, c) for r in range(min_row, max_row + 1)
+                   for c in range(min_col, max_col + 1)][1:]
+        return ref, covered
+
+    def merge_cells(self, range_string=None, start_row=None, start_column=None,
+                    end_row=None, end_column=None):
+        """병합 — openpyxl과 같이 좌상단 외 셀은 빈 셀로 초기화 (이후 스타일 지정은 유지)."""
+        self._check_open()
+        ref, covered = self._range(range_string, start_row, start_column, end_row, end_column)
+        self._merged.append(ref)
+        for key in covered:
+            self._cells[key] = _Cell()
+
+    def unmerge_cells(self, range_string=None, start_row=None, start_column=None,
+                      end_row=None, end_column=None):
+        """병합 해제 — openpyxl과 같이 좌상단 외 셀 삭제."""
+        self._check_open()
+        ref, covered = self._range(range_string, start_row, start_column, end_row, end_column)
+        if ref not in self._merged:
+            raise ValueError(f"병합 범위 없음: {ref}")
+        self._merged.remove(ref)
+        for key in covered:
+            self._cells.pop(key, None)
+
+    @property
+    def max_row(self):
+        return max((r for r, _ in self._cells), default=0)
+
+
+def _cell_xml(ref, value, sid):
+    """셀 1개 → <c> 요소 (openpyxl cell writer와 같은 형식)."""
+    s = f' s="{sid}"' if sid else ''
+    if value is None:
+        return f'<c r="{ref}"{s}/>'
+    if isinstance(value, bool):
+        return f'<c r="{ref}"{s} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, NUMERIC_TYPES):
+        text = '' if value != value or value in (float('inf'), float('-inf')) else '%.16g' % value
+        return f'<c r="{ref}"{s} t="n"><v>{text}</v></c>'
+    if isinstance(value, str):
+        if ILLEGAL_CHARACTERS_RE.search(value):
+            raise IllegalCharacterError(f"{value!r} cannot be used in worksheets.")
+        if len(value) > 1 and value.startswith('='):
+            return f'<c r="{ref}"{s}><f>{escape(value[1:])}</f><v/></c>'
+        if value in ERROR_CODES:
+            return f'<c r="{ref}"{s} t="e"><v>{value}</v></c>'
+        if value == '':
+            return f'<c r="{ref}"{s} t="inlineStr"/>'
+        stripped = value.strip()
+        space = ' xml:space="preserve"' if stripped and stripped != value else ''
+        return f'<c r="{ref}"{s} t="inlineStr"><is><t{space}>{escape(value)}</t></is></c>'
+    raise TypeError(f"_xlsx_writer: 지원하지 않는 셀 값 형식 {type(value).__name__} ({ref})")
+
+
+class StyledWorkbook:
+    """SheetBuffer 모음 → xlsx 저장. 스타일 조합은 NamedStyle로 1회 등록."""
+
+    def __init__(self, style_prefix='rpt'):
+        self._wb = openpyxl.Workbook(write_only=True)
+        self._prefix = style_prefix
+        self._sheets = []
+        self._parts = []        # (write-only 시트, 행 XML 임시파일)
+        self._by_ids = {}       # 스타일 객체 id 조합 → 셀 스타일 번호
+        self._by_value = {}     # 스타일 값 조합 → 셀 스타일 번호 (인라인 생성 객체 중복 제거)
+        self._keep = []         # id 키 객체 수명 유지
+
+    @property
+    def sheetnames(self):
+        return [s.title for s in self._sheets]
+
+    def create_sheet(self, title):
+        """새 시트. 직전 시트는 이 시점에 임시파일로 기록된다."""
+        if self._sheets and not self._sheets[-1]._closed:
+            self._flush(self._sheets[-1])
+        sheet = SheetBuffer(title)
+        self._sheets.append(sheet)
+        return sheet
+
+    def _style_id(self, ws, c):
+        ids = (id(c.font), id(c.fill), id(c.border), id(c.alignment), c.number_format)
+        sid = self._by_ids.get(ids)
+        if sid is not None:
+            return sid
+        value_key = (c.font, c.fill, c.border, c.alignment, c.number_format)
+        sid = self._by_value.get(value_key)
+        if sid is None:
+            style = NamedStyle(name=f'{self._prefix}_{len(self._by_value) + 1:03d}')
+            for attr in STYLE_ATTRS:
+                v = getattr(c, attr)
+                setattr(style, attr, _DEFAULTS[attr] if v is None else v)
+            self._wb.add_named_style(style)
+            probe = WriteOnlyCell(ws)
+            probe.style = style.name
+            sid = self._by_value[value_key] = probe.style_id    # 셀 xf 번호 (styles.xml cellXfs)
+        self._by_ids[ids] = sid
+        self._keep.append(value_key)
+        return sid
+
+    def _flush(self, sheet):
+        ws = self._wb.create_sheet(sheet.title)
+        for letter, dim in sheet.column_dimensions.items():
+            if dim.width is not None:
+                ws.column_dimensions[letter].width = dim.width
+        if sheet.freeze_panes:
+            ws.freeze_panes = sheet.freeze_panes
+        for ref in sheet._merged:
+            ws.merged_cells.add(ref)
+
+        rows = {}
+        for (r, c), cell in sheet._cells.items():
+            rows.setdefault(r, {})[c] = cell
+        row_dims = sheet.row_dimensions
+        letters = {}
+        out = tempfile.TemporaryFile()
+        for r in sorted(set(rows) | {k for k, d in row_dims.items() if d.height is not None or d.hidden}):
+            attrs = f'r="{r}"'
+            dim = row_dims.get(r)
+            if dim is not None:
+                if dim.height is not None:
+                    attrs += f' customHeight="1" ht="{dim.height:g}"'
+                if dim.hidden:
+                    attrs += ' hidden="1"'
+            parts = [f'<row {attrs}>']
+            for c in sorted(rows.get(r, ())):
+                cell = rows[r][c]
+                letter = letters.get(c) or letters.setdefault(c, get_column_letter(c))
+                styled = not (cell.font is None and cell.fill is None and cell.border is None
+                              and cell.alignment is None and cell.number_format is None)
+                if cell.value is None and not styled:
+                    continue
+                parts.append(_cell_xml(f'{letter}{r}', cell.value,
+                                       self._style_id(ws, cell) if styled else 0))
+            parts.append('</row>')
+            out.write(''.join(parts).encode('utf-8'))
+        self._parts.append((ws, out))
+        sheet._cells = {}
+        sheet._closed = True
+
+    def save(self, path):
+        """패키지 저장 후 시트별 빈 <sheetData>에 행 XML을 끼워 넣는다 (임시파일 → os.replace)."""
+        for sheet in self._sheets:
+            if not sheet._closed:
+                self._flush(sheet)
+        skeleton = path + '.skeleton.tmp'
+        tmp = path + '.tmp'
+        try:
+            self._wb.save(skeleton)
+            # 시트 파일 번호는 저장 시 정해지므로 저장 후 경로로 매핑
+            parts = {ws.path.lstrip('/'): rows for ws, rows in self._parts}
+            with zipfile.ZipFile(skeleton) as zin, \
+                    zipfile.ZipFile(tmp, 'w', zipfile.ZIP_DEFLATED) as zout:
+                for info in zin.infolist():
+                    data = zin.read(info.filename)
+                    rows = parts.get(info.filename)
+                    if rows is None:
+                        zout.writestr(info, data)
+                        continue
+                    m = _EMPTY_SHEETDATA.search(data)
+                    if m is None:
+                        raise RuntimeError(f"{info.filename}: sheetData 위치를 찾지 못함")
+                    with zout.open(info.filename, 'w', force_zip64=True) as dst:
+                        dst.write(data[:m.start()] + b'<sheetData>')
+                        rows.seek(0)
+                        shutil.copyfileobj(rows, dst, 1 << 20)
+                        dst.write(b'</sheetData>' + data[m.end():])
+            os.replace(tmp, path)
+        finally:
+            for f in (skeleton, tmp):
+                if os.path.exists(f):
+                    os.remove(f)
+            for _, rows in self._parts:
+                rows.close()
+            self._parts = []
+
+
+class RowTemplate:
+    """데이터 행 스타일 템플릿 — 열마다 {alignment, number_format, ...}, 공통 font/border.
+
+    columns: 열 순서대로 dict (없는 키는 common 값 사용). 예)
+        DATA_ROW = RowTemplate([{'alignment': LA}, {'alignment': RA, 'number_format': NUM}],
+                               font=DATA, border=BDR)
+    """
+
+    def __init__(self, columns, **common):
+        self.columns = [dict(common, **col) for col in columns]
+
+
+def write_row(ws, row, values, template, fills=None, fonts=None):
+    """values를 row행 1열부터 기록하고 템플릿 스타일 적용.
+
+    fills / fonts: {열번호(1-based): 스타일} — 값 조건에 따른 fill/font (None이면 템플릿 유지).
+    ws: SheetBuffer 또는 일반 openpyxl Worksheet (기존 본체 워크북 갱신).
+    """
+    fills = fills or {}
+    fonts = fonts or {}
+    for ci, (v, spec) in enumerate(zip(values, template.columns), 1):
+        c = ws.cell(row, ci, v)
+        for attr, style in spec.items():
+            setattr(c, attr, style)
+        if fills.get(ci) is not None:
+            c.fill = fills[ci]
+        if fonts.get(ci) is not None:
+            c.font = fonts[ci]
+
+
+def clear_rows(ws, min_row, max_col):
+    """기존 워크시트 min_row 이하 1~max_col열 값·fill 초기화 (테두리·폰트는 유지)."""
+    no_fill = PatternFill(fill_type=None)
+    for cells in ws.iter_rows(min_row=min_row, max_row=ws.max_row, max_col=max_col):
+        for c in cells:
+            if c.value is not None:
+                c.value = None
+            if c.fill.fill_type is not None:
+                c.fill = no_fill
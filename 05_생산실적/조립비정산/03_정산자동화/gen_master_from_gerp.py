@@ -3,7 +3,7 @@
 """
 GERP 실적 데이터에서 기준정보를 역설계하여 기존 양식에 맞게 생성한다.
 
-소스: G-ERP 3월실적.xlsx (대원테크 0109, "정상" 행만)
+소스: G-ERP 3월실적.xlsx (대원테크 0109, "정상" 행만 — _ingest.load_gerp 컬럼 sidecar 경유)
 출력: 01_기준정보/기준정보_GERP역설계_YYYYMMDD.xlsx
 양식: 라인별 시트, Row1=라인명, Row2=빈행, Row3=헤더, Row4+=데이터
 헤더: 품번 | 업체코드 | 라인 | 조립품번 | Usage | 단가구분 | 단가 | 차종
@@ -30,6 +30,7 @@ from _pipeline_config import (
     GERP_FILE, GERP_COL, MASTER_COL, VENDOR_CODE,
     LINE_ORDER, LINE_INFO, BASE_DIR
 )
+from _ingest import load_gerp as ingest_gerp
 
 # ============================================================
 # 설정
@@ -42,11 +43,14 @@ HEADER = ['품번', '업체코드', '라인', '조립품번', 'Usage', '단가
 
 
 def load_gerp():
-    """GERP 실적 로드 → 대원테크 정상 행만 추출"""
-    wb = openpyxl.load_workbook(GERP_FILE, data_only=True)
-    ws = wb.active
-    rows = list(ws.iter_rows(min_row=2, values_only=True))
-    wb.close()
+    """GERP 실적 로드 → 대원테크 정상 행만 추출
+
+    step1~7과 같은 _ingest sidecar를 쓴다 (같은 월 원본이면 엑셀 재파싱 없음).
+    행 = {원본 0-based 열 인덱스: 값}, 빈 셀은 None (openpyxl 행과 같은 판정).
+    """
+    data, _ = ingest_gerp()
+    data = data.astype(object).where(data.notna(), None)
+    rows = data.to_dict('records')
 
     filtered = []
     for r in rows:
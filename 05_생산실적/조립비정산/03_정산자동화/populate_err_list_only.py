@@ -3,13 +3,13 @@
 """본체 오류리스트 시트 정적 박기 단독 진입점 (openpyxl, COM-free).
 
 build_formula_version의 populate_error_list_static이 COM 충돌로 실패할 때,
-step5 캐시(step5_settlement.json)를 source-of-truth로 본체 오류리스트 시트에
+step5 캐시(step5_settlement.bin)를 source-of-truth로 본체 오류리스트 시트에
 직접 22컬럼 데이터를 박는다. Excel COM 의존성 없음.
 
 사용법:
     python populate_err_list_only.py
 """
-import sys, os, json, math
+import sys, os, math
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 sys.stdout.reconfigure(encoding='utf-8')
 sys.stderr.reconfigure(encoding='utf-8')
@@ -20,7 +20,9 @@ from openpyxl.utils import get_column_letter
 from collections import defaultdict, Counter
 
 from _pipeline_config import BASE_DIR, MONTH, LINE_ORDER, VENDOR_CODE, CACHE_STEP5, LINE_GROUP
+from _step_io import read_cache
 from _error_types import TYPE_ORDER, TYPE_COLORS, classify_exclusion
+from _xlsx_writer import RowTemplate, write_row, clear_rows
 
 MISSING_PRICE_NOTE = '단가 미매핑(기준정보 등록필요)'
 GERP_MISSING_SUPPLEMENT_LINES = {'SD9A01'}
@@ -72,8 +74,7 @@ print(f'본체: {output}')
 print(f'step5 캐시: {CACHE_STEP5}')
 
 # ── step5 캐시 → 오류 데이터 수집 ──
-with open(CACHE_STEP5, encoding='utf-8') as f:
-    s5 = json.load(f)
+s5 = read_cache(CACHE_STEP5)
 
 errors = []
 excluded = []
@@ -240,11 +241,8 @@ print(f'[GUARD] 라인시트 S컬럼 load 직후: {_s_before}')
 
 ws = wb['오류리스트']
 
-# row 5 이하 기존 데이터 클리어
-for r in range(5, ws.max_row + 1):
-    for c in range(1, 23):
-        ws.cell(r, c).value = None
-        ws.cell(r, c).fill = PatternFill(fill_type=None)
+# row 5 이하 기존 데이터 클리어 (값·fill만 — 테두리·폰트 유지)
+clear_rows(ws, 5, 22)
 
 # 스타일
 THIN = Side(style='thin', color='D0D0D0')
@@ -258,34 +256,27 @@ NEG_FILL = PatternFill('solid', fgColor='FDE8E8')
 POS_FILL = PatternFill('solid', fgColor='E8F5E8')
 TYPE_FILLS = {t: PatternFill('solid', fgColor=c) for t, c in TYPE_COLORS.items()}
 
+# 행 템플릿 — 오류리스트 22열 (step8과 같은 배치) / 유형별요약 6열
+_L, _C, _R = {'alignment': LA}, {'alignment': CA}, {'alignment': RA, 'number_format': NUM}
+DATA_ROW = RowTemplate([_L, _C, _C, _L, _C, _C, _R, _C,
+                        _R, _R, _R, _R, _R, _R, _R, _R,
+                        _R, _C, _L, _C, _R, _L], font=DATA, border=BDR)
+TYPE_ROW = RowTemplate([_C, _C, _R, _R, _R, _R], font=DATA, border=BDR)
+
 # 데이터 행
 row = 5
 for e in errors:
     vals = [
-        (e['part_no'], LA, None), (VENDOR_CODE, CA, None),
-        (e['line'], CA, None), (e['assy_part'], LA, None),
-        (e['usage'], CA, None), (e['price_type'], CA, None),
-        (e['price'], RA, NUM), (e['vtype'], CA, None),
-        (e['gerp_day_qty'], RA, NUM), (e['gerp_day_amt'], RA, NUM),
-        (e['gerp_ngt_qty'], RA, NUM), (e['gerp_ngt_amt'], RA, NUM),
-        (e['erp_day_qty'], RA, NUM), (e['erp_day_amt'], RA, NUM),
-        (e['erp_ngt_qty'], RA, NUM), (e['erp_ngt_amt'], RA, NUM),
-        (e['diff'], RA, NUM), (e['err_type'], CA, None),
-        (e['note'], LA, None), (e.get('excl_reason', ''), CA, None),
-        (e['recv_amt'], RA, NUM), (e['sup_text'], LA, None),
+        e['part_no'], VENDOR_CODE, e['line'], e['assy_part'],
+        e['usage'], e['price_type'], e['price'], e['vtype'],
+        e['gerp_day_qty'], e['gerp_day_amt'], e['gerp_ngt_qty'], e['gerp_ngt_amt'],
+        e['erp_day_qty'], e['erp_day_amt'], e['erp_ngt_qty'], e['erp_ngt_amt'],
+        e['diff'], e['err_type'], e['note'], e.get('excl_reason', ''),
+        e['recv_amt'], e['sup_text'],
     ]
-    for ci, (v, align, fmt) in enumerate(vals, 1):
-        c = ws.cell(row, ci, v)
-        c.font = DATA; c.alignment = align; c.border = BDR
-        if fmt:
-            c.number_format = fmt
-    tf = TYPE_FILLS.get(e['err_type'])
-    if tf:
-        ws.cell(row, 18).fill = tf
-    if e['diff'] < 0:
-        ws.cell(row, 17).fill = NEG_FILL
-    elif e['diff'] > 0:
-        ws.cell(row, 17).fill = POS_FILL
+    write_row(ws, row, vals, DATA_ROW,
+              fills={17: NEG_FILL if e['diff'] < 0 else (POS_FILL if e['diff'] > 0 else None),
+                     18: TYPE_FILLS.get(e['err_type'])})
     row += 1
 
 # 요약 텍스트 (row 2)
@@ -306,10 +297,7 @@ ws.cell(2, 1).value = '  |  '.join(parts)
 if '유형별요약' in wb.sheetnames:
     ws2 = wb['유형별요약']
     # row 4 이하 클리어
-    for r in range(4, ws2.max_row + 1):
-        for c in range(1, 7):
-            ws2.cell(r, c).value = None
-            ws2.cell(r, c).fill = PatternFill(fill_type=None)
+    clear_rows(ws2, 4, 6)
     BOLD = Font(name='맑은 고딕', size=9, bold=True)
     SUM_FILL = PatternFill('solid', fgColor='E8E8E8')
     r2 = 4
@@ -321,21 +309,10 @@ if '유형별요약' in wb.sheetnames:
         e_sum = sum(e['erp_day_amt']+e['erp_ngt_amt'] for e in items)
         d = g_sum - e_sum
         recv = sum(e['recv_amt'] for e in items)
-        for ci, v in enumerate([t, len(items), g_sum, e_sum, d, recv], 1):
-            c = ws2.cell(r2, ci, v)
-            c.font = DATA; c.border = BDR
-            c.alignment = CA if ci <= 2 else RA
-            if ci >= 3:
-                c.number_format = NUM
-        tf = TYPE_FILLS.get(t)
-        if tf:
-            ws2.cell(r2, 1).fill = tf
-        if d < 0:
-            ws2.cell(r2, 5).fill = NEG_FILL
-        elif d > 0:
-            ws2.cell(r2, 5).fill = POS_FILL
-        if recv > 0:
-            ws2.cell(r2, 6).fill = POS_FILL
+        write_row(ws2, r2, [t, len(items), g_sum, e_sum, d, recv], TYPE_ROW,
+                  fills={1: TYPE_FILLS.get(t),
+                         5: NEG_FILL if d < 0 else (POS_FILL if d > 0 else None),
+                         6: POS_FILL if recv > 0 else None})
         r2 += 1
     # 합계
     for ci in range(1, 7):
@@ -3,8 +3,19 @@
 """
 조립비 정산 파이프라인 단일 실행기
 
-Step 1~7을 순차 실행하며, 실패 시 즉시 중단.
-로그와 요약 JSON을 run_logs/ 폴더에 저장한다.
+Step 1~8을 의존성 그래프(_step_deps.STEP_DEPS) 순서로 실행한다. 선행 Step이 끝난 Step은
+동시에 최대 --jobs개까지 실행 (예: Step 2 GERP ∥ Step 3 구ERP, Step 7 ∥ Step 8).
+실패 시 새 Step은 띄우지 않고 실행 중인 Step만 마저 끝낸 뒤 중단.
+로그와 요약 JSON(Step별 소요시간·CPU·최대 메모리, Step 내부 구간(span) 계측 포함)을
+run_logs/ 폴더에 저장한다. --compare는 최근 실행을 이전 실행들과 비교만 한다 (_metrics.py).
+
+설정은 실행마다 RunConfig(_run_config.py)로 만들어 각 Step main(upstream, cfg)에 넘긴다.
+_pipeline_config.py는 읽기만 하므로 --months로 여러 월을 동시에 돌려도 서로 간섭하지 않는다
+(월마다 {MM+1}월/_cache 캐시·fingerprint 격리, 월 단위 프로세스 풀).
+
+기본은 in-process 실행: 각 step 모듈의 main(upstream)을 호출하고 앞 단계 결과 dict를
+upstream으로 직접 넘긴다 (캐시 재파싱 생략). --jobs 2 이상이면 프로세스 풀 워커에서 실행.
+--subprocess 지정 시 기존처럼 Step마다 별도 python 프로세스로 실행한다 (fallback).
 
 사용법:
     python run_settlement_pipeline.py
@@ -12,33 +23,63 @@ Step 1~7을 순차 실행하며, 실패 시 즉시 중단.
     python run_settlement_pipeline.py --use-cache
     python run_settlement_pipeline.py --month 04
     python run_settlement_pipeline.py --start-from 5 --use-cache --month 03
+    python run_settlement_pipeline.py --months 01-06 --parallel 3
+    python run_settlement_pipeline.py --subprocess
+    python run_settlement_pipeline.py --jobs 1
+    python run_settlement_pipeline.py --compare 5 --month 03
+    python run_settlement_pipeline.py --start-from 4 --use-cache --cache-json
 
 옵션:
     --start-from N   Step N부터 재시작 (1~7, 기본값: 1)
-    --use-cache      이전 _cache/ JSON이 있는 Step은 건너뜀
-    --month MM       대상 월 (두 자리 예: 03). _pipeline_config.py의 MONTH 및
-                     OUTPUT_FILE 월 부분을 실행 전에 임시 교체하고 복원한다.
+    --use-cache      입력 fingerprint(원본 xlsx 해시·config 값·룰 모듈·앞 Step 캐시)가
+                     지난 성공 실행과 같은 Step은 건너뜀. 바뀐 Step과 그 하위 Step만 재실행
+                     (기록: _cache/_fingerprints.json)
+    --month MM       대상 월 (두 자리 예: 03). config MONTH와 다르면 {MM+1}월 폴더의
+                     실적데이터·_cache·정산결과 경로로 실행 (config 파일은 수정하지 않음)
+    --months SPEC    여러 월 일괄 실행 (예: 01-06, 01,03,05). 월마다 별도 프로세스·캐시
+    --parallel N     --months 동시 실행 월 수 (기본값: 월 수와 CPU 수 중 작은 값)
+    --jobs N         동시에 실행할 최대 Step 수 (기본값: 2, 1=순차 실행)
+    --subprocess     Step마다 별도 python 프로세스로 실행 (in-process 문제 시 fallback)
+    --compare [N]    파이프라인은 실행하지 않고 최근 요약을 이전 N회(기본 5) 실행 중앙값과 비교
+                     (--month 지정 시 해당 월 실행만). 구간별 '데이터 증가' / '처리속도 저하' 판정
+    --cache-json     Step 2~5 바이너리 캐시(_cache/*.bin, _cache_format.py) 옆에 검수용 JSON도 저장
 """
 
 import argparse
+import importlib.util
+import io
 import json
 import os
-import re
-import shutil
 import subprocess
 import sys
+import tempfile
+import time
+import traceback
+from concurrent.futures import (
+    FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait,
+)
+from contextlib import redirect_stderr, redirect_stdout
 from datetime import datetime
 
+from _metrics import (
+    SPAN_FILE_ENV, collect, compare_runs, format_compare, load_history, other_span, peak_rss_mb,
+)
+from _run_config import RunConfig, parse_months
+from _step_deps import (
+    STEP_DEPS, changed_inputs, compute_fingerprint, is_fresh, load_manifest,
+    record_fingerprint, save_manifest,
+)
+from _step_io import CACHE_JSON_ENV
+
 # ── 상수 ──────────────────────────────────────────────────────
 PYTHON = r'C:\Users\User\AppData\Local\Programs\Python\Python312\python.exe'
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 LOG_DIR = os.path.join(SCRIPT_DIR, 'run_logs')
-CONFIG_FILE = os.path.join(SCRIPT_DIR, '_pipeline_config.py')
 
 # Step 번호 → 스크립트 파일명
 STEP_SCRIPTS = {
     1: 'step1_파일검증.py',
-    2: 'step2_gerp처리.py',
+    2: 'step2_GERP처리.py',
     3: 'step3_구erp처리.py',
     4: 'step4_기준정보매칭.py',
     5: 'step5_정산계산.py',
@@ -47,18 +88,6 @@ STEP_SCRIPTS = {
     8: 'step8_오류리스트.py',
 }
 
-# Step별 출력 캐시 파일 (--use-cache 판단용)
-STEP_OUTPUTS = {
-    1: os.path.join(SCRIPT_DIR, '_cache', 'step1_validation.json'),
-    2: os.path.join(SCRIPT_DIR, '_cache', 'step2_gerp.json'),
-    3: os.path.join(SCRIPT_DIR, '_cache', 'step3_olderp.json'),
-    4: os.path.join(SCRIPT_DIR, '_cache', 'step4_matched.json'),
-    5: os.path.join(SCRIPT_DIR, '_cache', 'step5_settlement.json'),
-    6: os.path.join(SCRIPT_DIR, '_cache', 'step6_validation.json'),
-    7: None,  # Step 7 출력은 OUTPUT_FILE (설정값 읽기 필요)
-    8: None,  # Step 8 출력은 오류리스트_MM월.xlsx (OUTPUT_FILE과 동일 폴더)
-}
-
 # Step 완료 후 권장 도메인 에이전트 (1·3·5는 해당 없음)
 STEP_AGENT_RECOMMENDATIONS = {
     2: 'gerp-processor 에이전트로 GERP 데이터 품질 점검 권장',
@@ -80,138 +109,204 @@ def parse_args():
     )
     parser.add_argument(
         '--use-cache', action='store_true',
-        help='출력 파일이 이미 있는 Step은 건너뜀',
+        help='입력 fingerprint가 지난 실행과 같은 Step은 건너뜀 (바뀐 Step만 재실행)',
     )
     parser.add_argument(
         '--month', type=str, default=None, metavar='MM',
         help='대상 월 두 자리 (예: 03). 미지정 시 config 기본값 사용.',
     )
+    parser.add_argument(
+        '--months', type=str, default=None, metavar='SPEC',
+        help='여러 월 일괄 실행 (예: 01-06, 01,03,05). 월마다 별도 프로세스·캐시.',
+    )
+    parser.add_argument(
+        '--parallel', type=int, default=None, metavar='N',
+        help='--months 동시 실행 월 수 (기본값: 월 수와 CPU 수 중 작은 값)',
+    )
+    parser.add_argument(
+        '--jobs', type=int, default=2, metavar='N',
+        help='동시에 실행할 최대 Step 수 (기본값: 2, 1=순차 실행)',
+    )
+    parser.add_argument(
+        '--subprocess', action='store_true',
+        help='Step마다 별도 python 프로세스로 실행 (기본: 한 프로세스 안에서 in-process 실행)',
+    )
+    parser.add_argument(
+        '--compare', type=int, nargs='?', const=5, default=None, metavar='N',
+        help='최근 실행 요약을 이전 N회(기본 5) 실행과 비교만 함 (--month 지정 시 해당 월만)',
+    )
+    parser.add_argument(
+        '--cache-json', action='store_true',
+        help='Step 2~5 바이너리 캐시(.bin) 옆에 검수용 JSON도 저장',
+    )
     return parser.parse_args()
 
 
-# ── config 월 교체 ─────────────────────────────────────────────
-class ConfigMonthPatch:
-    """
-    --month 옵션 사용 시 _pipeline_config.py의 MONTH 및 OUTPUT_FILE 월을
-    실행 기간 동안 임시 교체하고, 종료 시 원본을 복원한다.
-    """
+# ── config 로드 ───────────────────────────────────────────────
+def load_config(month=None):
+    """실행 설정 (--month 지정 시 해당 월 경로, 미지정 시 _pipeline_config 기본값)."""
+    return RunConfig.for_month(month) if month else RunConfig.default()
 
-    def __init__(self, month: str):
-        self.month = month
-        self.backup_path = CONFIG_FILE + '.pipeline_bak'
-        self.patched = False
-
-    def patch(self):
-        if not os.path.exists(CONFIG_FILE):
-            raise FileNotFoundError(f"config 파일 없음: {CONFIG_FILE}")
-        shutil.copy2(CONFIG_FILE, self.backup_path)
-
-        with open(CONFIG_FILE, encoding='utf-8') as f:
-            content = f.read()
-
-        # MONTH = '기존값' 교체
-        content = re.sub(
-            r"^(MONTH\s*=\s*')[^']*(')",
-            rf"\g<1>{self.month}\2",
-            content,
-            flags=re.MULTILINE,
-        )
-        # OUTPUT_FILE 안의 월 표기 교체: 정산결과_XX월 → 정산결과_MM월
-        content = re.sub(
-            r"(정산결과_)\d{2}(월\.xlsx)",
-            rf"\g<1>{self.month}\2",
-            content,
-        )
 
-        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-            f.write(content)
+# ── Step 실행 (워커측) ─────────────────────────────────────────
+def load_step_module(script_name: str):
+    """step 스크립트를 모듈로 로드 (파일명이 한글이라 경로 기반 import)."""
+    module_name = os.path.splitext(script_name)[0]
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(
+        module_name, os.path.join(SCRIPT_DIR, script_name))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
 
-        self.patched = True
-        print(f"[config] MONTH → '{self.month}' 임시 적용")
 
-    def restore(self):
-        if self.patched and os.path.exists(self.backup_path):
-            shutil.copy2(self.backup_path, CONFIG_FILE)
-            os.remove(self.backup_path)
-            self.patched = False
-            print(f"[config] _pipeline_config.py 원본 복원 완료")
+def call_step_main(script_name: str, upstream: dict, cfg):
+    """step 모듈 main(upstream, cfg) 호출 → (exit code, 결과 dict).
 
-
-# ── Step 7 출력 경로 읽기 ──────────────────────────────────────
-def get_step7_output() -> str:
-    """_pipeline_config.py에서 OUTPUT_FILE 값을 동적으로 읽는다."""
+    step 내부의 sys.exit(N)은 exit code N으로, 예외는 traceback 출력 후 1로 변환한다.
+    """
     try:
+        module = load_step_module(script_name)
+        result = module.main(upstream, cfg)
+    except SystemExit as e:
+        if e.code is None:
+            return 0, None
+        return (e.code if isinstance(e.code, int) else 1), None
+    except Exception:
+        traceback.print_exc()
+        return 1, None
+    return 0, result
+
+
+def execute_step(step_no: int, script_name: str, upstream: dict = None, cfg=None) -> dict:
+    """Step 1개 실행 (프로세스 풀 워커 또는 스레드에서 호출). 출력은 모아서 반환.
+
+    upstream이 dict면 in-process(main 호출), None이면 별도 python 프로세스로 실행한다.
+    Step 내부 span 기록·CPU 시간·최대 RSS도 함께 반환 (subprocess는 자식이 종료 시 임시파일로 전달).
+    """
+    start = datetime.now()
+    if upstream is not None:
+        buf = io.StringIO()
+        cpu0 = time.thread_time()
+        with redirect_stdout(buf), redirect_stderr(buf), collect() as spans:
+            returncode, result = call_step_main(script_name, upstream, cfg)
+        output = buf.getvalue()
+        cpu_sec, peak = round(time.thread_time() - cpu0, 3), peak_rss_mb()
+    else:
         env = os.environ.copy()
         env['PYTHONUTF8'] = '1'
-        result = subprocess.run(
-            [PYTHON, '-c',
-             'import sys; sys.path.insert(0, r"{}"); '
-             'from _pipeline_config import OUTPUT_FILE; print(OUTPUT_FILE)'.format(SCRIPT_DIR)],
-            capture_output=True, text=True, encoding='utf-8',
+        fd, span_file = tempfile.mkstemp(prefix=f'step{step_no}_spans_', suffix='.json')
+        os.close(fd)
+        env[SPAN_FILE_ENV] = span_file
+        proc = subprocess.run(
+            [PYTHON, os.path.join(SCRIPT_DIR, script_name), '--month', cfg.MONTH],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
             env=env,
         )
-        return result.stdout.strip()
-    except Exception:
-        return ''
+        returncode, result, output = proc.returncode, None, proc.stdout
+        try:
+            with open(span_file, encoding='utf-8') as f:
+                measured = json.load(f)
+        except (OSError, ValueError):   # 자식이 _metrics를 import하기 전에 종료 등
+            measured = {}
+        os.remove(span_file)
+        spans = measured.get('spans', [])
+        cpu_sec, peak = measured.get('cpu_sec'), measured.get('peak_rss_mb')
+    return {
+        'exit_code': returncode,
+        'result': result,
+        'output': output,
+        'start': start,
+        'end': datetime.now(),
+        'pid': os.getpid(),
+        'spans': spans,
+        'cpu_sec': cpu_sec,
+        'peak_rss_mb': peak,
+    }
 
 
-# ── Step 실행 ─────────────────────────────────────────────────
-def run_step(step_no: int, script_name: str, log_file, skipped: bool = False) -> dict:
+# ── Step 결과 기록 (실행기측) ───────────────────────────────────
+def report_skip(step_no: int, script_name: str, log_file) -> dict:
+    """SKIP된 Step 로그 출력 + 요약 항목 반환."""
     start = datetime.now()
     divider = '─' * 60
     recommendation = STEP_AGENT_RECOMMENDATIONS.get(step_no)
 
-    if skipped:
-        msg = f"[{start.strftime('%H:%M:%S')}] Step {step_no}: {script_name}  [SKIP — cache 사용]"
-        print(f"\n{divider}\n{msg}\n{divider}")
-        log_file.write(f"\n{divider}\n{msg}\n{divider}\n")
-        if recommendation:
-            rec_msg = f"[권장 에이전트] {recommendation}\n"
-            print(rec_msg, end='')
-            log_file.write(rec_msg)
-        log_file.flush()
-        return {
-            'step': step_no,
-            'script': script_name,
-            'status': 'SKIPPED',
-            'exit_code': 0,
-            'elapsed_sec': 0.0,
-            'start': start.isoformat(),
-            'end': start.isoformat(),
-            'agent_recommendation': recommendation,
-        }
-
-    header = f"[{start.strftime('%H:%M:%S')}] Step {step_no}: {script_name} 시작"
-    print(f"\n{divider}\n{header}\n{divider}")
-    log_file.write(f"\n{'=' * 60}\nStep {step_no}: {script_name}\n시작: {start.isoformat()}\n{'=' * 60}\n")
+    msg = f"[{start.strftime('%H:%M:%S')}] Step {step_no}: {script_name}  [SKIP — 입력 변경 없음, cache 사용]"
+    print(f"\n{divider}\n{msg}\n{divider}")
+    log_file.write(f"\n{divider}\n{msg}\n{divider}\n")
+    if recommendation:
+        rec_msg = f"[권장 에이전트] {recommendation}\n"
+        print(rec_msg, end='')
+        log_file.write(rec_msg)
     log_file.flush()
+    return {
+        'step': step_no,
+        'script': script_name,
+        'status': 'SKIPPED',
+        'exit_code': 0,
+        'elapsed_sec': 0.0,
+        'start': start.isoformat(),
+        'end': start.isoformat(),
+        'agent_recommendation': recommendation,
+    }
+
+
+def format_span(s: dict) -> str:
+    """span 기록 1개 → 로그 한 줄."""
+    text = f"  {'  ' * s['depth']}· {s['name']:<22} {s['wall_sec']:>8.2f}s"
+    if s.get('cpu_sec') is not None:
+        text += f"  cpu {s['cpu_sec']:.2f}s"
+    if s.get('rows') is not None:
+        text += f"  {s['rows']:,}행"
+        if s.get('rows_per_sec'):
+            text += f" ({s['rows_per_sec']:,.0f}행/s)"
+    if s.get('peak_rss_mb') is not None:
+        text += f"  RSS {s['peak_rss_mb']:,.0f}MB"
+    if s.get('error'):
+        text += f"  [{s['error']}]"
+    return text
 
-    script_path = os.path.join(SCRIPT_DIR, script_name)
-    env = os.environ.copy()
-    env['PYTHONUTF8'] = '1'
-    proc = subprocess.run(
-        [PYTHON, script_path],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True,
-        encoding='utf-8',
-        errors='replace',
-        env=env,
-    )
 
-    end = datetime.now()
+def report_step(step_no: int, script_name: str, job: dict, log_file) -> dict:
+    """완료된 Step 출력을 콘솔·로그에 한 덩어리로 기록 + 요약 항목 반환.
+
+    병렬 실행 시 Step 출력이 섞이지 않도록 완료 순서대로 모아서 쓴다.
+    """
+    start, end = job['start'], job['end']
+    divider = '─' * 60
+    recommendation = STEP_AGENT_RECOMMENDATIONS.get(step_no)
+    returncode = job['exit_code']
     elapsed = (end - start).total_seconds()
 
+    header = f"[{start.strftime('%H:%M:%S')}] Step {step_no}: {script_name} 시작"
+    print(f"\n{divider}\n{header}\n{divider}")
+    log_file.write(f"\n{'=' * 60}\nStep {step_no}: {script_name}\n시작: {start.isoformat()}\n{'=' * 60}\n")
+
     # 콘솔 출력 + 로그 기록
-    print(proc.stdout, end='')
-    log_file.write(proc.stdout)
+    print(job['output'], end='')
+    log_file.write(job['output'])
 
-    status = 'SUCCESS' if proc.returncode == 0 else 'FAILED'
-    footer = f"\nStep {step_no} {status}  (exit={proc.returncode}, {elapsed:.1f}s)\n"
+    status = 'SUCCESS' if returncode == 0 else 'FAILED'
+    footer = f"\nStep {step_no} {status}  (exit={returncode}, {elapsed:.1f}s)\n"
     print(footer)
     log_file.write(footer)
 
-    if recommendation and proc.returncode == 0:
+    # 구간 계측 (span으로 감싸지 않은 시간은 '(구간 외)')
+    spans = list(job.get('spans') or [])
+    if spans:
+        spans.append(other_span(elapsed, spans))
+        lines = '\n'.join(format_span(s) for s in spans) + '\n'
+        print(lines, end='')
+        log_file.write(lines)
+
+    if recommendation and returncode == 0:
         rec_msg = f"[권장 에이전트] {recommendation}\n"
         print(rec_msg, end='')
         log_file.write(rec_msg)
@@ -222,41 +317,124 @@ def run_step(step_no: int, script_name: str, log_file, skipped: bool = False) ->
         'step': step_no,
         'script': script_name,
         'status': status,
-        'exit_code': proc.returncode,
+        'exit_code': returncode,
         'elapsed_sec': round(elapsed, 2),
+        'cpu_sec': job.get('cpu_sec'),
+        'peak_rss_mb': job.get('peak_rss_mb'),
+        'spans': spans,
         'start': start.isoformat(),
         'end': end.isoformat(),
+        'pid': job['pid'],
         'agent_recommendation': recommendation,
     }
 
 
-# ── 캐시 파일 존재 여부 ────────────────────────────────────────
-def has_cache(step_no: int) -> bool:
-    output = STEP_OUTPUTS.get(step_no)
-    if output is None:
-        # Step 7: OUTPUT_FILE 경로를 동적으로 확인
-        output = get_step7_output()
-    if not output:
-        return False
-    return os.path.exists(output)
+# ── DAG 스케줄러 ──────────────────────────────────────────────
+def step_prereqs(step_no: int) -> set:
+    """Step 선행 조건 = 입력으로 읽는 앞 Step(upstream) + 순서 게이트(after)."""
+    deps = STEP_DEPS[step_no]
+    return set(deps['upstream']) | set(deps.get('after', []))
 
 
-# ── 메인 ──────────────────────────────────────────────────────
-def main():
-    args = parse_args()
+def make_executor(in_process: bool, jobs: int):
+    """in-process 병렬은 프로세스 풀, 그 외(jobs=1 또는 --subprocess)는 스레드 풀."""
+    if in_process and jobs > 1:
+        return ProcessPoolExecutor(max_workers=jobs)
+    return ThreadPoolExecutor(max_workers=jobs)
 
-    # start-from 범위 검사
-    if not (1 <= args.start_from <= 8):
-        print(f"[ERROR] --start-from 값은 1~8이어야 합니다. (입력: {args.start_from})")
-        sys.exit(1)
 
-    # 월 패치 객체 (--month 미지정이면 None)
-    month_patch = ConfigMonthPatch(args.month) if args.month else None
+def run_dag(steps_to_run, args, in_process: bool, cfg, manifest, log_file):
+    """준비된 Step(선행 Step 완료)을 동시에 최대 --jobs개 실행.
 
-    os.makedirs(LOG_DIR, exist_ok=True)
-    ts = datetime.now().strftime('%Y-%m-%d_%H%M%S')
-    log_path = os.path.join(LOG_DIR, f'{ts}.log')
-    summary_path = os.path.join(LOG_DIR, f'{ts}_summary.json')
+    --start-from 이전 Step은 완료(캐시 사용)로 간주한다. 실패 시 새 Step은 띄우지 않고
+    실행 중인 Step만 마저 끝낸 뒤 중단한다. 반환: (Step 요약 목록, 실패 Step 또는 None)
+    """
+    pending = dict(steps_to_run)
+    done = {n for n in STEP_SCRIPTS if n < args.start_from}
+    step_results = []
+    failed_step = None
+    running = {}    # future → (step_no, script_name, fingerprint, parts)
+    # in-process: 단계 결과 dict 공유 (SKIP된 단계는 각 step이 캐시에서 로드)
+    upstream = {} if in_process else None
+    pooled = in_process and args.jobs > 1
+
+    def record(step_no, fingerprint, parts, result):
+        result['fingerprint'] = fingerprint[:12]
+        step_results.append(result)
+        if result['status'] in ('SUCCESS', 'SKIPPED'):
+            done.add(step_no)
+            if result['status'] == 'SUCCESS':
+                record_fingerprint(step_no, fingerprint, parts, cfg, manifest)
+                save_manifest(cfg, manifest)
+
+    with make_executor(in_process, args.jobs) as executor:
+        while True:
+            # 준비된 Step 투입 (SKIP 처리로 새로 준비되는 Step이 있으면 반복)
+            launched = True
+            while failed_step is None and launched and len(running) < args.jobs:
+                launched = False
+                for step_no in sorted(pending):
+                    if len(running) >= args.jobs:
+                        break
+                    if not step_prereqs(step_no) <= done:
+                        continue
+                    script_name = pending.pop(step_no)
+                    launched = True
+
+                    # --use-cache: 입력 fingerprint + 출력 파일이 지난 실행 그대로면 건너뜀
+                    fingerprint, parts = compute_fingerprint(step_no, script_name, cfg, manifest)
+                    if args.use_cache and is_fresh(step_no, fingerprint, cfg, manifest):
+                        record(step_no, fingerprint, parts, report_skip(step_no, script_name, log_file))
+                        continue
+                    if args.use_cache:
+                        changed = changed_inputs(step_no, parts, manifest) or ['(출력 파일 변경/없음)']
+                        msg = f"\n[cache] Step {step_no} 재실행 — 변경: {', '.join(changed)}"
+                        print(msg)
+                        log_file.write(msg + '\n')
+
+                    if upstream is None:
+                        step_upstream = None
+                    elif pooled:
+                        # 워커 프로세스로는 읽는 앞 Step 결과만 전달
+                        step_upstream = {n: upstream[n] for n in STEP_DEPS[step_no]['upstream'] if n in upstream}
+                    else:
+                        step_upstream = upstream
+                    future = executor.submit(execute_step, step_no, script_name, step_upstream, cfg)
+                    running[future] = (step_no, script_name, fingerprint, parts)
+
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in sorted(finished, key=lambda f: running[f][0]):
+                step_no, script_name, fingerprint, parts = running.pop(future)
+                try:
+                    job = future.result()
+                except Exception as e:  # 워커 프로세스 비정상 종료 등
+                    now = datetime.now()
+                    job = {'exit_code': 1, 'result': None, 'output': f"[ERROR] 워커 실행 실패: {e!r}\n",
+                           'start': now, 'end': now, 'pid': None}
+                if job['exit_code'] == 0 and upstream is not None and job['result'] is not None:
+                    upstream[step_no] = job['result']
+                record(step_no, fingerprint, parts, report_step(step_no, script_name, job, log_file))
+
+                if job['exit_code'] != 0 and failed_step is None:
+                    failed_step = step_no
+                    msg = f"\n[FAILED] Step {step_no} 실패 — 파이프라인 중단 (실행 중 Step 완료 대기)\n"
+                    print(msg)
+                    log_file.write(msg)
+
+    step_results.sort(key=lambda r: r['step'])
+    return step_results, failed_step
+
+
+# ── 월 1개 실행 ────────────────────────────────────────────────
+def run_month(args, month, log_tag: str) -> dict:
+    """월 1개 파이프라인 실행 → 요약 dict (run_logs/{log_tag}.log / _summary.json 저장)."""
+    in_process = not args.subprocess
+    log_path = os.path.join(LOG_DIR, f'{log_tag}.log')
+    summary_path = os.path.join(LOG_DIR, f'{log_tag}_summary.json')
+    cfg = load_config(month)
 
     pipeline_start = datetime.now()
     banner = (
@@ -265,45 +443,25 @@ def main():
         f"시작: {pipeline_start.isoformat()}\n"
         f"--start-from: {args.start_from}  "
         f"--use-cache: {args.use_cache}  "
-        f"--month: {args.month or '(config 기본값)'}\n"
+        f"--month: {month or '(config 기본값)'}  "
+        f"mode: {'in-process' if in_process else 'subprocess'}  "
+        f"--jobs: {args.jobs}\n"
+        f"정산월: {cfg.MONTH}  캐시: {cfg.CACHE_DIR}\n"
         f"로그: {log_path}\n"
         f"{'=' * 60}"
     )
     print(banner)
 
-    step_results = []
-    failed_step = None
-
-    try:
-        # 월 임시 패치 적용
-        if month_patch:
-            month_patch.patch()
-
-        with open(log_path, 'w', encoding='utf-8') as lf:
-            lf.write(banner + '\n')
+    with open(log_path, 'w', encoding='utf-8') as lf:
+        lf.write(banner + '\n')
 
-            steps_to_run = [
-                (n, s) for n, s in STEP_SCRIPTS.items()
-                if n >= args.start_from
-            ]
+        steps_to_run = [
+            (n, s) for n, s in STEP_SCRIPTS.items()
+            if n >= args.start_from
+        ]
 
-            for step_no, script_name in steps_to_run:
-                # --use-cache: 출력 파일이 이미 존재하면 건너뜀
-                skip = args.use_cache and has_cache(step_no)
-                result = run_step(step_no, script_name, lf, skipped=skip)
-                step_results.append(result)
-
-                if result['exit_code'] != 0:
-                    failed_step = step_no
-                    msg = f"\n[FAILED] Step {step_no} 실패 — 파이프라인 중단\n"
-                    print(msg)
-                    lf.write(msg)
-                    break
-
-    finally:
-        # 월 패치 복원 (실패해도 반드시 복원)
-        if month_patch:
-            month_patch.restore()
+        manifest = load_manifest(cfg)
+        step_results, failed_step = run_dag(steps_to_run, args, in_process, cfg, manifest, lf)
 
     # 결과 집계
     pipeline_end = datetime.now()
@@ -321,11 +479,16 @@ def main():
         'start': pipeline_start.isoformat(),
         'end': pipeline_end.isoformat(),
         'total_elapsed_sec': round(total_elapsed, 2),
-        'month': args.month,
+        'month': cfg.MONTH,
+        'cache_dir': cfg.CACHE_DIR,
         'start_from': args.start_from,
         'use_cache': args.use_cache,
+        'mode': 'in-process' if in_process else 'subprocess',
+        'jobs': args.jobs,
         'failed_step': failed_step,
         'steps': step_results,
+        'step_timings': {str(r['step']): r['elapsed_sec'] for r in step_results},
+        'peak_rss_mb': max((r['peak_rss_mb'] for r in step_results if r.get('peak_rss_mb')), default=None),
         'step_agent_recommendations': step_agent_recommendations,
         'log_file': log_path,
     }
@@ -344,8 +507,129 @@ def main():
         f"{border}\n"
     )
     print(final)
+    summary['summary_file'] = summary_path
+    return summary
+
+
+def run_month_captured(args, month, log_tag: str):
+    """월 단위 프로세스 풀 워커: 콘솔 출력을 모아 (요약, 출력) 반환 (월끼리 출력이 섞이지 않게)."""
+    buf = io.StringIO()
+    with redirect_stdout(buf), redirect_stderr(buf):
+        try:
+            summary = run_month(args, month, log_tag)
+        except Exception:
+            traceback.print_exc()
+            summary = {'pipeline_status': 'FAILED (실행기 오류)', 'month': month, 'failed_step': None,
+                       'total_elapsed_sec': None}
+    return summary, buf.getvalue()
+
+
+def run_months(args, months, ts: str) -> bool:
+    """여러 월 일괄 실행 — 월마다 별도 프로세스·캐시. 반환: 전 월 SUCCESS 여부."""
+    parallel = args.parallel or min(len(months), os.cpu_count() or 1)
+    batch_start = datetime.now()
+    print(f"{'=' * 60}\n조립비 정산 일괄 실행: {', '.join(months)}월 (동시 {parallel}개월)\n{'=' * 60}")
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=parallel) as executor:
+        futures = {executor.submit(run_month_captured, args, mm, f'{ts}_{mm}월'): mm for mm in months}
+        for future in as_completed(futures):
+            mm = futures[future]
+            try:
+                summary, output = future.result()
+            except Exception as e:  # 워커 프로세스 비정상 종료 등
+                summary, output = {'pipeline_status': 'FAILED (워커 종료)', 'month': mm}, f"[ERROR] {e!r}\n"
+            print(f"\n{'#' * 60}\n# {mm}월 — {summary['pipeline_status']}\n{'#' * 60}")
+            print(output, end='')
+            results[mm] = summary
+
+    total_elapsed = (datetime.now() - batch_start).total_seconds()
+    ok = all(results[mm]['pipeline_status'] == 'SUCCESS' for mm in months)
+    batch = {
+        'batch_status': 'SUCCESS' if ok else 'FAILED',
+        'months': months,
+        'parallel': parallel,
+        'start': batch_start.isoformat(),
+        'total_elapsed_sec': round(total_elapsed, 2),
+        'results': {mm: {k: results[mm].get(k) for k in
+                         ('pipeline_status', 'failed_step', 'total_elapsed_sec', 'cache_dir', 'summary_file')}
+                    for mm in months},
+    }
+    batch_path = os.path.join(LOG_DIR, f'{ts}_batch_summary.json')
+    with open(batch_path, 'w', encoding='utf-8') as bf:
+        json.dump(batch, bf, ensure_ascii=False, indent=2)
+
+    border = '=' * 60
+    lines = '\n'.join(f"  {mm}월: {results[mm]['pipeline_status']}" for mm in months)
+    print(f"\n{border}\n일괄 실행 완료 ({total_elapsed:.1f}초)\n{lines}\n요약:  {batch_path}\n{border}\n")
+    return ok
+
+
+# ── 실행 이력 비교 ─────────────────────────────────────────────
+def run_compare(n: int, month=None) -> bool:
+    """최근 요약 vs 직전 SUCCESS 실행 n회 (구간별 중앙값). 반환: 비교 가능 여부."""
+    month = f'{int(month):02d}' if month else None
+    history = load_history(LOG_DIR, month)
+    if not history:
+        print(f"[ERROR] 비교할 실행 요약 없음: {LOG_DIR}" + (f" ({month}월)" if month else ''))
+        return False
+    latest_name, latest = history[-1]
+    baseline = [(name, s) for name, s in history[:-1] if s.get('pipeline_status') == 'SUCCESS'][-n:]
+    if not baseline:
+        print(f"[ERROR] {latest_name}보다 이전의 성공 실행 요약 없음")
+        return False
+    rows = compare_runs(latest, [s for _, s in baseline])
+    print(format_compare(rows, latest_name, [name for name, _ in baseline]))
+    return True
+
+
+# ── 메인 ──────────────────────────────────────────────────────
+def main():
+    args = parse_args()
+    in_process = not args.subprocess
+    if in_process:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+
+    # start-from 범위 검사
+    if not (1 <= args.start_from <= 8):
+        print(f"[ERROR] --start-from 값은 1~8이어야 합니다. (입력: {args.start_from})")
+        sys.exit(1)
+    if args.jobs < 1:
+        print(f"[ERROR] --jobs 값은 1 이상이어야 합니다. (입력: {args.jobs})")
+        sys.exit(1)
+    if args.month and args.months:
+        print("[ERROR] --month와 --months는 함께 쓸 수 없습니다.")
+        sys.exit(1)
+    if args.parallel is not None and args.parallel < 1:
+        print(f"[ERROR] --parallel 값은 1 이상이어야 합니다. (입력: {args.parallel})")
+        sys.exit(1)
+    if args.compare is not None:
+        if args.compare < 1:
+            print(f"[ERROR] --compare 값은 1 이상이어야 합니다. (입력: {args.compare})")
+            sys.exit(1)
+        if not run_compare(args.compare, args.month):
+            sys.exit(1)
+        return
+
+    if args.cache_json:   # Step 워커(스레드·프로세스 풀·subprocess)가 모두 상속
+        os.environ[CACHE_JSON_ENV] = '1'
+
+    os.makedirs(LOG_DIR, exist_ok=True)
+    ts = datetime.now().strftime('%Y-%m-%d_%H%M%S')
 
-    if failed_step is not None:
+    if args.months:
+        try:
+            months = parse_months(args.months)
+        except ValueError as e:
+            print(f"[ERROR] --months: {e}")
+            sys.exit(1)
+        if not run_months(args, months, ts):
+            sys.exit(1)
+        return
+
+    summary = run_month(args, args.month, ts)
+    if summary['failed_step'] is not None:
         sys.exit(1)
 
 
@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 """
 Step 5 — 정산 계산
-라인별 금액 계산 → JSON 저장 (Step7 엑셀 생성용 중간 데이터)
+라인별 금액 계산 → 결과 dict 반환 (upstream handoff — Step7 엑셀 생성용 중간 데이터)
 주의: 이 파일은 run_settlement_pipeline의 보조·교차대조용이다.
 운영 본체 정산은 build_formula_version.py와 정산_수식버전_MM월.xlsx 기준으로 판단한다.
 
@@ -13,26 +13,21 @@ Step 5 — 정산 계산
   - Usage=2 품번: 수량 2배 환산
 
 실행: python step5_정산계산.py
-입력: _cache/step2_gerp.json, _cache/step3_olderp.json, _cache/step4_matched.json
-출력: _cache/step5_settlement.json
+입력: _cache/step2_gerp.bin, _cache/step3_olderp.bin, _cache/step4_matched.bin
+출력: _cache/step5_settlement.bin
 """
 
-import sys, os, json, math
+import sys, os, math
 sys.path.insert(0, os.path.dirname(__file__))
-sys.stdout.reconfigure(encoding='utf-8')
-sys.stderr.reconfigure(encoding='utf-8')
 
 from _pipeline_config import *
-from _error_types import classify_error_type, classify_exclusion, calc_recv_amt
+from _run_config import RunConfig, cli_config
+from _step_io import load_result, save_result
+from _metrics import span
+from _settlement_engine import settle, is_qty_only_gerp_missing, MISSING_PRICE_NOTE
 from collections import Counter
 from datetime import datetime
 
-print("=" * 60)
-print("Step 5: 정산 계산")
-print("=" * 60)
-
-MISSING_PRICE_NOTE = '단가 미매핑(기준정보 등록필요)'
-
 
 def _num(value, default=0):
     try:
@@ -44,486 +39,105 @@ def _num(value, default=0):
     return int(n) if n.is_integer() else n
 
 
-def _is_finished_gerp_missing(row, line_group):
-    if line_group != '완성품':
-        return False
-    if not str(row.get('err_type', '')).startswith('GERP 품번누락'):
-        return False
-    g_qty = _num(row.get('gerp_day_qty')) + _num(row.get('gerp_ngt_qty'))
-    e_qty = _num(row.get('erp_day_qty')) + _num(row.get('erp_ngt_qty'))
-    return g_qty == 0 and e_qty > 0
-
-
-def _is_qty_only_gerp_missing(row, line_group, g_amt=None, e_amt=None):
-    """완성품라인에서 금액 0이어도 구ERP 수량만 있으면 오류리스트 대상으로 유지."""
-    if not _is_finished_gerp_missing(row, line_group):
-        return False
-    if g_amt is None:
-        g_amt = _num(row.get('gerp_total_amt'))
-    if e_amt is None:
-        e_amt = _num(row.get('erp_day_amt')) + _num(row.get('erp_ngt_amt'))
-    return g_amt == 0 and e_amt == 0
-
-# ── 의존 체크 ─────────────────────────────────────────────────
-for fpath, name in [(CACHE_STEP2, 'Step2'), (CACHE_STEP3, 'Step3'), (CACHE_STEP4, 'Step4')]:
-    if not os.path.exists(fpath):
-        print(f"[ERROR] {name} 결과 없음: {fpath}")
-        sys.exit(1)
-
-with open(CACHE_STEP2, encoding='utf-8') as f:
-    step2 = json.load(f)
-with open(CACHE_STEP3, encoding='utf-8') as f:
-    step3 = json.load(f)
-with open(CACHE_STEP4, encoding='utf-8') as f:
-    step4 = json.load(f)
-
-master      = step4['master']
-day_pivot   = step2['day_pivot']
-night_pivot = step2['night_pivot']
-day_amt_pivot   = step2.get('day_amt_pivot', {})
-night_amt_pivot = step2.get('night_amt_pivot', {})
-gerp_assy_lookup = step2.get('gerp_assy_lookup', {})
-# 구ERP 피벗: OUTER/MAIN은 라인별, SUB는 전체업체 합산
-olderp_line_day   = step3['line_day_pivot']
-olderp_line_night = step3['line_night_pivot']
-olderp_line_total = step3.get('line_total_pivot', {})   # 주간+야간 합산 총수량
-olderp_all_day    = step3['all_day_pivot']
-olderp_all_night  = step3['all_night_pivot']
-olderp_all_total  = step3['all_total_pivot']
-# 대원테크 0109 전체 — 라인코드 무시 (SD9A01 집계용)
-olderp_dw_day     = step3.get('dw_day_pivot', {})
-olderp_dw_night   = step3.get('dw_night_pivot', {})
-olderp_dw_total   = step3.get('dw_total_pivot', {})
-support_detail    = step3.get('support_detail', {})
-
-
-def get_olderp_pv(lc):
-    """라인 유형별 구ERP 피벗 반환 — (day, night, total)"""
-    li = LINE_INFO.get(lc, {})
-    if lc == 'SD9A01':
-        # SD9A01: 전체업체 피벗 (다른 업체 지원 물량 포함)
-        return olderp_all_day, olderp_all_night, olderp_all_total
-    elif lc == 'SP3M3':
-        # SP3M3: 구ERP가 모듈품번(MO)으로만 집계 → 전체업체 피벗 사용
-        return olderp_all_day, olderp_all_night, olderp_all_total
-    else:
-        # SUB 라인: 전 업체 합산 피벗 사용
-        return olderp_all_day, olderp_all_night, olderp_all_total
-
-
-def calc_night_price_erp(lc, price, night_qty):
-    """구ERP 야간 정산금액 계산 (구ERP에는 GERP 원본 없으므로 기존 방식 유지)
-
-    [deprecated legacy] S8 이동 게이트 미통과로 임시 보존:
-    SP3M3: qty × 170원 고정단가
-    SD9A01: qty × 단가 × 1.3 (기본100% + 가산30%)
-    기타 야간 없는 라인: 0
-    """
-    if night_qty == 0:
-        return 0
-    if lc == 'SP3M3':
-        return night_qty * SP3M3_NIGHT_PRICE
-    if lc == 'SD9A01':
-        return round(night_qty * price * 1.3)
-    return 0
-
-
-def sd9_price_judgment(lc, price, night_qty):
-    """[deprecated legacy] SD9A01 단가기준판정 반환 (야간실적 없으면 None)"""
-    if lc != 'SD9A01':
-        return None
-    if night_qty == 0:
-        return None
-    return '야간가산' if price <= 500 else '기본'
-
-
-# ── 라인별 다중단가 품번 셋 (오류유형 제외사유 판정용) ──
-multi_pns_by_line = {}
-for _lc, _rows in master.items():
-    _cnt = Counter(r['part_no'] for r in _rows)
-    multi_pns_by_line[_lc] = {pn for pn, c in _cnt.items() if c > 1}
-
-# ── 라인별 계산 ───────────────────────────────────────────────
-print(f"\n라인별 정산 계산...")
-lines_result = {}
-summary_rows = []
-
-for lc in LINE_ORDER:
-    rows  = master.get(lc, [])
-    gp_d  = day_pivot.get(lc, {})
-    gp_n  = night_pivot.get(lc, {})
-    gp_d_amt = day_amt_pivot.get(lc, {})
-    gp_n_amt = night_amt_pivot.get(lc, {})
-    ep_d, ep_n, ep_t = get_olderp_pv(lc)
-    has_night  = LINE_INFO[lc]['has_night']
-
-    # SP3M3 야간: RSP→기본품번(10자리)으로 변환됨
-    # 같은 기본품번의 첫 품번에만 야간수량 할당, 나머지 0
-    _sp3m3_ngt_used = set()  # 이미 할당된 기본품번 추적
-
-    detail = []
-    total_gerp_day_qty = total_gerp_day_amt = 0
-    total_gerp_ngt_qty = total_gerp_ngt_amt = 0
-    total_erp_day_qty  = total_erp_day_amt  = 0
-    total_erp_ngt_qty  = total_erp_ngt_amt  = 0
-    _processed_pns = set()  # 마스터 루프에서 처리된 품번 추적
-    _gerp_amt_used = set()  # GERP 금액 이미 합계에 포함된 품번 (다중단가 중복 방지)
-
-    for r in rows:
-        pn    = r['part_no']
-        price = _num(r.get('price'), 0)
-        usage = _num(r.get('usage'), 1)
-        _processed_pns.add(pn)
-        is_first_gerp = pn not in _gerp_amt_used  # 다중단가: 첫 행만 GERP 합계에 포함
-
-        # GERP 수량 (Usage 환산)
-        g_day_raw = gp_d.get(pn, 0) if is_first_gerp else 0
-        # 야간: SP3M3는 전체품번 우선 → 10자리 base fallback
-        if lc == 'SP3M3' and has_night:
-            ngt_key = pn if pn in gp_n else pn[:10]  # MO품번(12자리) 등 대응
-            if ngt_key not in _sp3m3_ngt_used:
-                g_ngt_raw = gp_n.get(ngt_key, 0)
-                if g_ngt_raw > 0:
-                    _sp3m3_ngt_used.add(ngt_key)
-            else:
-                g_ngt_raw = 0  # 같은 기본품번의 후속 컬러 → 이미 할당됨
-        else:
-            g_ngt_raw = gp_n.get(pn, 0) if is_first_gerp else 0
-        g_day_qty = g_day_raw * usage
-        g_ngt_qty = g_ngt_raw * usage if has_night else 0
-
-        # 구ERP 수량 (Usage 환산)
-        # SD9A01: LOT B 주야 분리 (야간수당 계산 필요)
-        # 그 외 (SP3M3 포함): 총수량 = 주간수량 (야간=0)
-        e_total_raw = ep_t.get(pn, 0)
-        if lc == 'SD9A01':
-            e_day_raw = ep_d.get(pn, 0)
-        else:
-            e_day_raw = e_total_raw
-        e_day_qty = e_day_raw * usage
-
-        # 금액 계산 — GERP 원본금액 기준 (2026-04-05 변경)
-        # GERP 정산: GERP 원본금액 직접 사용 (기준단가 재계산 아님)
-        # 다중단가: GERP 금액은 품번당 1회만 합계에 포함 (is_first_gerp)
-        # 구ERP: 기존 방식 유지 (기준단가 × 수량, 각 행별 개별 계산)
-        if lc == 'SD9A01':
-            g_pure_day = g_day_qty - g_ngt_qty
-        else:
-            g_pure_day = g_day_qty
-        # GERP: 원본금액 직접 사용 (첫 행만)
-        g_day_amt = round(gp_d_amt.get(pn, 0)) if is_first_gerp else 0
-        if lc == 'SP3M3' and has_night:
-            ngt_amt_key = pn if pn in gp_n_amt else pn[:10]
-            if g_ngt_raw > 0:
-                g_ngt_amt = round(gp_n_amt.get(ngt_amt_key, 0))
-            else:
-                g_ngt_amt = 0
-        else:
-            g_ngt_amt = round(gp_n_amt.get(pn, 0)) if (has_night and is_first_gerp) else 0
-        _gerp_amt_used.add(pn)
-        # 구ERP: 기준단가 × 수량 (기준단가 = 기준정보 파일 단가)
-        e_day_amt = round(e_day_qty * price)
-
-        # 구ERP 야간
-        if lc == 'SD9A01' and has_night:
-            # SD9A01: LOT B 기반 주야 분리
-            e_ngt_raw = ep_n.get(pn, 0)
-            e_ngt_qty = e_ngt_raw * usage
-            e_ngt_amt = calc_night_price_erp(lc, price, e_ngt_qty)
-            e_tot_raw = ep_t.get(pn, 0)
-            e_tot_qty = e_tot_raw * usage
-        elif lc == 'SP3M3' and has_night:
-            # SP3M3: 구ERP 야간 = GERP 야간 동일 적용 (구ERP 서브라인 야간 구분 불가)
-            e_ngt_qty = g_ngt_qty
-            e_ngt_amt = g_ngt_amt
-            e_tot_qty = e_day_qty + e_ngt_qty
-        else:
-            e_ngt_qty = 0
-            e_ngt_amt = 0
-            e_tot_qty = e_day_qty
-
-        # 야간 총 정산금액 (GERP 기준): 주간+야간 합산
-        gerp_total_amt = g_day_amt + g_ngt_amt
-
-        # GERP 원본 금액 = 정산금액과 동일 (GERP 기준 전환)
-        gerp_orig_day_amt = g_day_amt
-        gerp_orig_ngt_amt = g_ngt_amt
-
-        price_judgment = sd9_price_judgment(lc, price, g_ngt_qty)
-
-        # 조립품번: 기준정보 우선, 없으면 GERP fallback
-        assy_key = f"{lc}|{pn}|{price}"
-        ref_assy = r.get('assy_part', '')
-        gerp_assy = gerp_assy_lookup.get(assy_key, '')
-        assy_part = ref_assy if ref_assy else gerp_assy
-
-        # 지원분 (0109 외 업체) — SD9A01만 해당
-        sup_info = []
-        if lc == 'SD9A01' and pn in support_detail:
-            sup_info = support_detail[pn]
-
-        row = {
-            'part_no':          pn,
-            'assy_part':        assy_part,
-            'price':            price,
-            'usage':            usage,
-            'price_type':       r['price_type'],
-            'vtype':            r['vtype'],
-            'is_first_gerp':    is_first_gerp,
-            'gerp_day_qty':     g_pure_day,
-            'gerp_day_amt':     g_day_amt,
-            'gerp_ngt_qty':     g_ngt_qty,
-            'gerp_ngt_amt':     g_ngt_amt,
-            'gerp_total_amt':   gerp_total_amt,
-            'gerp_orig_day_amt': gerp_orig_day_amt,
-            'gerp_orig_ngt_amt': gerp_orig_ngt_amt,
-            'erp_day_qty':      e_day_qty,
-            'erp_day_amt':      e_day_amt,
-            'erp_ngt_qty':      e_ngt_qty,
-            'erp_ngt_amt':      e_ngt_amt,
-            'erp_tot_qty':      e_tot_qty,   # 주간+야간 합산 총수량 (원본합산 검증용)
-            'price_judgment':   price_judgment,
-            'support':          sup_info,     # 지원분: [{vendor, line_code, day_qty, night_qty}]
-        }
-        detail.append(row)
-
-        total_gerp_day_qty += g_pure_day
-        total_gerp_day_amt += g_day_amt
-        total_gerp_ngt_qty += g_ngt_qty
-        total_gerp_ngt_amt += g_ngt_amt
-        total_erp_day_qty  += e_day_qty
-        total_erp_day_amt  += e_day_amt
-        total_erp_ngt_qty  += e_ngt_qty
-        total_erp_ngt_amt  += e_ngt_amt
-
-    # SP3M3: 미매칭 RSP (모품번 못 찾음) → GERP 원본금액 그대로 적용
-    if lc == 'SP3M3' and has_night:
-        for rsp_pn, rsp_qty in gp_n.items():
-            if rsp_pn.startswith('RSP') and rsp_qty > 0 and rsp_pn not in _processed_pns:
-                ngt_amt = round(gp_n_amt.get(rsp_pn, 0))  # GERP 원본 야간금액
-                row = {
-                    'part_no':          rsp_pn,
-                    'price':            round(ngt_amt / rsp_qty) if rsp_qty else 0,
-                    'usage':            1,
-                    'price_type':       '정단가',
-                    'vtype':            '',
-                    'gerp_day_qty':     0,
-                    'gerp_day_amt':     0,
-                    'gerp_ngt_qty':     rsp_qty,
-                    'gerp_ngt_amt':     ngt_amt,
-                    'gerp_total_amt':   ngt_amt,
-                    'gerp_orig_day_amt': 0,
-                    'gerp_orig_ngt_amt': ngt_amt,
-                    'erp_day_qty':      0,
-                    'erp_day_amt':      0,
-                    'erp_ngt_qty':      rsp_qty,
-                    'erp_ngt_amt':      ngt_amt,
-                    'erp_tot_qty':      rsp_qty,
-                    'price_judgment':   None,
-                }
-                detail.append(row)
-                _processed_pns.add(rsp_pn)  # fallback 이중계산 방지
-                # GERP 원본금액 기준 전환 — RSP미매칭도 합계에 포함
-                total_gerp_ngt_qty += rsp_qty
-                total_gerp_ngt_amt += ngt_amt
-                # 구ERP 야간도 GERP 동일 적용 (SP3M3 구ERP 야간 = GERP 야간)
-                total_erp_ngt_qty += rsp_qty
-                total_erp_ngt_amt += ngt_amt
-                print(f"    RSP미매칭 {rsp_pn}: {rsp_qty}개, GERP원본 {ngt_amt:,}원 (합계 가산)")
-
-    # 미매핑/미처리 품번: GERP pivot에 있지만 마스터 루프에서 처리 안 된 품번 → GERP 원본금액 fallback
-    # step4 unmatched뿐 아니라, 기준정보 다른 라인에는 있어도 이 라인에 없는 품번도 포함
-    lc_all_parts = set(gp_d.keys())
-    if has_night:
-        lc_all_parts |= set(gp_n.keys())
-    unprocessed = lc_all_parts - _processed_pns
-    for pn in sorted(unprocessed):
-        um_day_qty = gp_d.get(pn, 0)
-        um_day_amt = round(gp_d_amt.get(pn, 0))
-        # SP3M3 야간: 마스터 루프에서 base_pn(10자리)으로 이미 사용된 야간금액은 제외 (이중 계산 방지)
-        if lc == 'SP3M3' and has_night and pn[:10] in _sp3m3_ngt_used:
-            um_ngt_qty = 0
-            um_ngt_amt = 0
-        else:
-            um_ngt_qty = gp_n.get(pn, 0) if has_night else 0
-            um_ngt_amt = round(gp_n_amt.get(pn, 0)) if has_night else 0
-        um_price = round(um_day_amt / um_day_qty) if um_day_qty else 0
-        um_total = um_day_amt + um_ngt_amt
-
-        # 구ERP 수량 조회 (미매핑이라도 구ERP에 데이터 있으면 가져옴)
-        um_e_total_raw = ep_t.get(pn, 0)
-        if lc == 'SD9A01':
-            um_e_day_raw = ep_d.get(pn, 0)
-            um_e_ngt_raw = ep_n.get(pn, 0) if has_night else 0
-        else:
-            um_e_day_raw = um_e_total_raw
-            um_e_ngt_raw = 0
-        um_e_day_qty = um_e_day_raw  # usage=1
-        um_e_ngt_qty = um_e_ngt_raw
-        um_e_day_amt = round(um_e_day_qty * um_price)
-        um_e_ngt_amt = calc_night_price_erp(lc, um_price, um_e_ngt_qty)
-
-        row = {
-            'part_no':          pn,
-            'assy_part':        gerp_assy_lookup.get(f"{lc}|{pn}|{um_price}", ''),
-            'price':            um_price,
-            'usage':            1,
-            'price_type':       '기준누락',
-            'vtype':            '',
-            'is_first_gerp':    True,
-            'gerp_day_qty':     um_day_qty,
-            'gerp_day_amt':     um_day_amt,
-            'gerp_ngt_qty':     um_ngt_qty,
-            'gerp_ngt_amt':     um_ngt_amt,
-            'gerp_total_amt':   um_total,
-            'gerp_orig_day_amt': um_day_amt,
-            'gerp_orig_ngt_amt': um_ngt_amt,
-            'erp_day_qty':      um_e_day_qty,
-            'erp_day_amt':      um_e_day_amt,
-            'erp_ngt_qty':      um_e_ngt_qty,
-            'erp_ngt_amt':      um_e_ngt_amt,
-            'erp_tot_qty':      um_e_total_raw,
-            'price_judgment':   None,
-        }
-        detail.append(row)
-        total_gerp_day_qty += um_day_qty
-        total_gerp_day_amt += um_day_amt
-        total_gerp_ngt_qty += um_ngt_qty
-        total_gerp_ngt_amt += um_ngt_amt
-        total_erp_day_qty  += um_e_day_qty
-        total_erp_day_amt  += um_e_day_amt
-        total_erp_ngt_qty  += um_e_ngt_qty
-        total_erp_ngt_amt  += um_e_ngt_amt
-        print(f"    미매핑 {pn}: GERP={um_day_qty}개/{um_day_amt:,}원 구ERP={um_e_day_qty}개/{um_e_day_amt:,}원")
-
-    # ── 행별 오류유형 분류 (1차 통합 사전, 2026-05-18) ──
-    line_group = LINE_GROUP.get(lc, '메인SUB')
-    multi_pns  = multi_pns_by_line.get(lc, set())
-    for row in detail:
-        master_has_pn    = (row.get('price_type') != '기준누락')
-        master_has_price = (row.get('price', 0) > 0)
-        # 다중단가 두 번째+ 행은 GERP금액 0 (중복 방지) → 분류 의미 없음. 정합인정으로 표기
-        is_first_gerp = row.get('is_first_gerp', True)
-        amt_diff = row.get('gerp_total_amt', 0) - (row.get('erp_day_amt', 0) + row.get('erp_ngt_amt', 0))
-        if not is_first_gerp:
-            row['err_type']    = '정상'
-            row['note']        = ''
-            row['excl_reason'] = '정합인정(다중단가분배)'
-            row['recv_amt']    = 0
-            continue
-        err_type, note = classify_error_type(
-            row, line_group,
-            master_has_pn=master_has_pn,
-            master_has_price=master_has_price,
-        )
-        excl = classify_exclusion(row, multi_pns)
-        qty_only_gerp_missing = _is_qty_only_gerp_missing(row, line_group)
-        # 차이 0이면 정상 — 제외사유 박지 않음. 단, 수량만 있는 GERP 품번누락은 X2 제외사유를 보존한다.
-        if amt_diff == 0 and not qty_only_gerp_missing:
-            excl = ''
-        row['err_type']    = err_type
-        row['note']        = note
-        row['excl_reason'] = excl
-        row['recv_amt']    = calc_recv_amt(amt_diff, excl)
-        if qty_only_gerp_missing:
-            row['err_type'] = 'GERP 품번누락'
-            row['note'] = MISSING_PRICE_NOTE
-            row['recv_amt'] = 0
-
-    gerp_total = total_gerp_day_amt + total_gerp_ngt_amt
-    erp_total  = total_erp_day_amt  + total_erp_ngt_amt
-    diff       = gerp_total - erp_total
-
-    lines_result[lc] = {
-        'items':               detail,
-        'total_gerp_day_qty':  total_gerp_day_qty,
-        'total_gerp_day_amt':  total_gerp_day_amt,
-        'total_gerp_ngt_qty':  total_gerp_ngt_qty,
-        'total_gerp_ngt_amt':  total_gerp_ngt_amt,
-        'total_gerp_amt':      gerp_total,
-        'total_erp_day_qty':   total_erp_day_qty,
-        'total_erp_day_amt':   total_erp_day_amt,
-        'total_erp_ngt_qty':   total_erp_ngt_qty,
-        'total_erp_ngt_amt':   total_erp_ngt_amt,
-        'total_erp_amt':       erp_total,
-        'diff_amt':            diff,
+def main(upstream=None, cfg=None):
+    """Step 5 실행. upstream[2/3/4] 또는 캐시 사용, 정산 결과 dict 반환."""
+    cfg = cfg or RunConfig.default()
+    print("=" * 60)
+    print("Step 5: 정산 계산")
+    print("=" * 60)
+
+    # ── 의존 체크 ─────────────────────────────────────────────────
+    loaded = {}
+    for no, fpath, name in [(2, cfg.CACHE_STEP2, 'Step2'), (3, cfg.CACHE_STEP3, 'Step3'), (4, cfg.CACHE_STEP4, 'Step4')]:
+        loaded[no] = load_result(no, fpath, upstream)
+        if loaded[no] is None:
+            print(f"[ERROR] {name} 결과 없음: {fpath}")
+            sys.exit(1)
+    step2, step3, step4 = loaded[2], loaded[3], loaded[4]
+
+    # ── 라인별 계산 (_settlement_engine — 기준정보 행 DataFrame + 피벗 join) ──
+    print(f"\n라인별 정산 계산...")
+    with span('settle') as sp:
+        lines_result, summary_rows, notes = settle(step2, step3, step4, cfg)
+        sp.rows = sum(len(r['items']) for r in lines_result.values())
+    for row in summary_rows:
+        for msg in notes[row['line']]:
+            print(msg)
+        diff = row['diff_amt']
+        mark = '✓' if diff == 0 else '△'
+        print(f"  {mark} {row['line']:10s}: GERP {row['gerp_amt']:>12,}  구ERP {row['erp_amt']:>12,}  차이 {diff:>+12,}")
+
+    # 전체 합계
+    grand_gerp = sum(r['gerp_amt'] for r in summary_rows)
+    grand_erp  = sum(r['erp_amt']  for r in summary_rows)
+    grand_diff = grand_gerp - grand_erp
+    print(f"\n  합계: GERP {grand_gerp:>12,}  구ERP {grand_erp:>12,}  차이 {grand_diff:>+12,}")
+
+    # ── 오류 리스트 (1차 통합 사전 — 행별 err_type 그대로 활용, 2026-05-18) ──
+    from _error_types import TYPE_ORDER
+    error_list = []
+    for lc in LINE_ORDER:
+        ld = lines_result.get(lc, {})
+        line_group = LINE_GROUP.get(lc, '메인SUB')
+        for r in ld.get('items', []):
+            # 다중단가 2번째+ 행: GERP금액이 의도적 0 (중복방지) → 비교 대상 아님
+            if not r.get('is_first_gerp', True):
+                continue
+            g_amt = _num(r.get('gerp_total_amt'))
+            e_amt = _num(r.get('erp_day_amt')) + _num(r.get('erp_ngt_amt'))
+            qty_only_gerp_missing = is_qty_only_gerp_missing(r, line_group, g_amt, e_amt)
+            if g_amt == e_amt and not qty_only_gerp_missing:
+                continue
+            # 제외사유 있으면 정상 처리. 단, 0원 GERP 품번누락 보강 행은 통합 리스트에 노출한다.
+            if r.get('excl_reason') and not qty_only_gerp_missing:
+                continue
+            g_qty = _num(r.get('gerp_day_qty')) + _num(r.get('gerp_ngt_qty'))
+            e_qty = _num(r.get('erp_day_qty')) + _num(r.get('erp_ngt_qty'))
+            error_list.append({
+                'line': lc, 'part_no': r['part_no'],
+                'type': 'GERP 품번누락' if qty_only_gerp_missing else r.get('err_type', '정산차이'),
+                'note': MISSING_PRICE_NOTE if qty_only_gerp_missing else r.get('note', ''),
+                'excl_reason': r.get('excl_reason', ''),
+                'recv_amt': 0 if qty_only_gerp_missing else r.get('recv_amt', 0),
+                'price_type': r['price_type'],
+                'gerp_qty': g_qty, 'erp_qty': e_qty,
+                'gerp_amt': g_amt, 'erp_amt': e_amt,
+                'diff_amt': g_amt - e_amt,
+            })
+
+    # 요약 출력
+    type_cnt = Counter(e['type'] for e in error_list)
+    type_amt = {}
+    for e in error_list:
+        type_amt[e['type']] = type_amt.get(e['type'], 0) + e['diff_amt']
+    print(f"\n오류 리스트: {len(error_list)}건")
+    for t in TYPE_ORDER:
+        if t in type_cnt:
+            print(f"  {t}: {type_cnt[t]}건, {type_amt[t]:+,}원")
+
+    # ── 결과 dict 반환 (upstream handoff) ─────────────────────────
+    result = {
+        "step": 5,
+        "timestamp": datetime.now().isoformat(),
+        "month": cfg.MONTH,
+        "lines": lines_result,
+        "summary": summary_rows,
+        "grand_gerp_amt": grand_gerp,
+        "grand_erp_amt":  grand_erp,
+        "grand_diff_amt": grand_diff,
+        "unmatched_gerp": [],  # GERP 단가 fallback 적용 완료
+        "error_list": error_list,
     }
 
-    summary_rows.append({
-        'line': lc,
-        'name': LINE_INFO[lc]['name'],
-        'gerp_amt': gerp_total,
-        'erp_amt':  erp_total,
-        'diff_amt': diff,
-    })
-
-    mark = '✓' if diff == 0 else '△'
-    print(f"  {mark} {lc:10s}: GERP {gerp_total:>12,}  구ERP {erp_total:>12,}  차이 {diff:>+12,}")
-
-# 전체 합계
-grand_gerp = sum(r['gerp_amt'] for r in summary_rows)
-grand_erp  = sum(r['erp_amt']  for r in summary_rows)
-grand_diff = grand_gerp - grand_erp
-print(f"\n  합계: GERP {grand_gerp:>12,}  구ERP {grand_erp:>12,}  차이 {grand_diff:>+12,}")
-
-# ── 오류 리스트 (1차 통합 사전 — 행별 err_type 그대로 활용, 2026-05-18) ──
-from _error_types import TYPE_ORDER
-error_list = []
-for lc in LINE_ORDER:
-    ld = lines_result.get(lc, {})
-    line_group = LINE_GROUP.get(lc, '메인SUB')
-    for r in ld.get('items', []):
-        # 다중단가 2번째+ 행: GERP금액이 의도적 0 (중복방지) → 비교 대상 아님
-        if not r.get('is_first_gerp', True):
-            continue
-        g_amt = _num(r.get('gerp_total_amt'))
-        e_amt = _num(r.get('erp_day_amt')) + _num(r.get('erp_ngt_amt'))
-        qty_only_gerp_missing = _is_qty_only_gerp_missing(r, line_group, g_amt, e_amt)
-        if g_amt == e_amt and not qty_only_gerp_missing:
-            continue
-        # 제외사유 있으면 정상 처리. 단, 0원 GERP 품번누락 보강 행은 통합 리스트에 노출한다.
-        if r.get('excl_reason') and not qty_only_gerp_missing:
-            continue
-        g_qty = _num(r.get('gerp_day_qty')) + _num(r.get('gerp_ngt_qty'))
-        e_qty = _num(r.get('erp_day_qty')) + _num(r.get('erp_ngt_qty'))
-        error_list.append({
-            'line': lc, 'part_no': r['part_no'],
-            'type': 'GERP 품번누락' if qty_only_gerp_missing else r.get('err_type', '정산차이'),
-            'note': MISSING_PRICE_NOTE if qty_only_gerp_missing else r.get('note', ''),
-            'excl_reason': r.get('excl_reason', ''),
-            'recv_amt': 0 if qty_only_gerp_missing else r.get('recv_amt', 0),
-            'price_type': r['price_type'],
-            'gerp_qty': g_qty, 'erp_qty': e_qty,
-            'gerp_amt': g_amt, 'erp_amt': e_amt,
-            'diff_amt': g_amt - e_amt,
-        })
+    save_result(cfg.CACHE_STEP5, result)
 
-# 요약 출력
-type_cnt = Counter(e['type'] for e in error_list)
-type_amt = {}
-for e in error_list:
-    type_amt[e['type']] = type_amt.get(e['type'], 0) + e['diff_amt']
-print(f"\n오류 리스트: {len(error_list)}건")
-for t in TYPE_ORDER:
-    if t in type_cnt:
-        print(f"  {t}: {type_cnt[t]}건, {type_amt[t]:+,}원")
+    print(f"\n저장: {cfg.CACHE_STEP5}")
+    print("Step 5 완료")
 
-# ── JSON 저장 ─────────────────────────────────────────────────
-result = {
-    "step": 5,
-    "timestamp": datetime.now().isoformat(),
-    "month": MONTH,
-    "lines": lines_result,
-    "summary": summary_rows,
-    "grand_gerp_amt": grand_gerp,
-    "grand_erp_amt":  grand_erp,
-    "grand_diff_amt": grand_diff,
-    "unmatched_gerp": [],  # GERP 단가 fallback 적용 완료
-    "error_list": error_list,
-}
+    return result
 
-with open(CACHE_STEP5, 'w', encoding='utf-8') as f:
-    json.dump(result, f, ensure_ascii=False, indent=2)
 
-print(f"\n저장: {CACHE_STEP5}")
-print("Step 5 완료")
+if __name__ == '__main__':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+    main(cfg=cli_config())
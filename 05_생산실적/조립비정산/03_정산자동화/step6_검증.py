@@ -2,12 +2,12 @@
 # -*- coding: utf-8 -*-
 """
 Step 6 — 검증
-기존 검증_정산결과.py 기반 자동 검증 (Step5 JSON → 항목별 PASS/FAIL/WARNING/INFO)
+기존 검증_정산결과.py 기반 자동 검증 (Step5 결과 dict → 항목별 PASS/FAIL/WARNING/INFO)
 주의: 이 파일은 run_settlement_pipeline의 보조·교차대조용이다.
 운영 본체 검증은 build_formula_version.py 산출 본체와 후속 검증 스킬 기준으로 판단한다.
 
 검증 항목:
-  1. 라인합계 vs 00_정산집계 일치 여부 (엑셀 파일 생성 전: Step5 JSON 내부 일관성)
+  1. 라인합계 vs 00_정산집계 일치 여부 (엑셀 파일 생성 전: Step5 결과 dict 내부 일관성)
   2. [deprecated legacy] SD9A01 단가기준판정 규칙 (단가≤500→야간가산, >500→기본)
   3. WABAS01 단가=0 품번 건수 및 실적 유무 (INFO)
   4. Usage=2 수량 2배 환산 적용 확인
@@ -19,16 +19,26 @@ overall 판정: FAIL (CRITICAL 존재) | WARNING (CRITICAL 없고 WARNING 존재
 
 엑셀 파일 생성 후 실행 시: step7이 생성한 xlsx도 추가 검증 가능
 
-실행: python step6_검증.py
-입력: _cache/step5_settlement.json
+검증 항목은 RULES에 선언형 규칙으로 등록한다 (_validation_engine 참고):
+  규칙 1개 = 판정 함수(정산 items 표 벡터 연산) + 입력 범위(scope / columns / lines)
+  서로 독립인 규칙은 동시에 실행하고, 규칙별 소요시간·적중 행 수를 rule_metrics에 남긴다.
+
+실행:
+    python step6_검증.py                 # 전체 규칙
+    python step6_검증.py --rules 2,5     # 지정 규칙만 재평가 (나머지는 기존 step6_validation.json 결과 유지)
+    python step6_검증.py --watch         # step5 캐시가 바뀔 때마다 입력이 바뀐 규칙만 재평가 (Ctrl+C 종료)
+입력: _cache/step5_settlement.bin
 """
 
-import sys, os, json
+import argparse
+import sys, os, time
 sys.path.insert(0, os.path.dirname(__file__))
-sys.stdout.reconfigure(encoding='utf-8')
-sys.stderr.reconfigure(encoding='utf-8')
 
 from _pipeline_config import *
+from _metrics import span
+from _run_config import RunConfig, cli_config
+from _step_io import load_result, save_result, read_cache
+from _validation_engine import Outcome, Rule, evaluate
 from datetime import datetime
 
 # ── Known Exception 레지스트리 ────────────────────────────────
@@ -56,169 +66,227 @@ def _known_part_set(group_key):
     return {item["part_no"] for item in grp.get("items", [])}
 
 
-print("=" * 60)
-print("Step 6: 정산 검증")
-print("=" * 60)
-
-if not os.path.exists(CACHE_STEP5):
-    print(f"[ERROR] Step5 결과 없음. step5_정산계산.py 먼저 실행하세요.")
-    sys.exit(1)
+# ── 검증 규칙 ─────────────────────────────────────────────────
+def check_grand_total(ctx):
+    """항목 1: 라인합산 == grand."""
+    lines = ctx.lines
+    calc_gerp = sum(lines[lc]['total_gerp_amt'] for lc in lines)
+    calc_erp  = sum(lines[lc]['total_erp_amt']  for lc in lines)
+    grand_gerp = ctx.s5['grand_gerp_amt']
+    grand_erp  = ctx.s5['grand_erp_amt']
+
+    gerp_ok = abs(calc_gerp - grand_gerp) == 0
+    erp_ok  = abs(calc_erp  - grand_erp)  == 0
+    return Outcome('PASS' if (gerp_ok and erp_ok) else 'FAIL',
+                   f"GERP: {calc_gerp:,} vs {grand_gerp:,}  구ERP: {calc_erp:,} vs {grand_erp:,}",
+                   hits=int(not gerp_ok) + int(not erp_ok))
+
+
+def check_sd9_judgment(ctx):
+    """항목 2 [deprecated legacy]: 야간실적 없으면 판정 없음, 있으면 단가≤500→야간가산, >500→기본."""
+    f = ctx.frame(('SD9A01',))
+    judged = f['price_judgment'].notna()
+    no_night = f['gerp_ngt_qty'] == 0
+    expected = f['price'].le(500).map({True: '야간가산', False: '기본'})
+    bad = (no_night & judged) | (~no_night & (f['price_judgment'] != expected))
+    sd9_fail = []
+    for r in ctx.rows(bad)[:5]:
+        if r['gerp_ngt_qty'] == 0:
+            sd9_fail.append(f"{r['part_no']}(야간없는데 판정={r['price_judgment']})")
+        else:
+            exp = '야간가산' if r['price'] <= 500 else '기본'
+            sd9_fail.append(f"{r['part_no']}(단가={r['price']},판정={r['price_judgment']},기대={exp})")
+    return Outcome('PASS' if not sd9_fail else 'FAIL',
+                   f"오류: {sd9_fail}" if sd9_fail else "전체 정상", hits=int(bad.sum()))
+
+
+def check_waba_zero_price(ctx):
+    """항목 3: WABAS01 단가=0 품번 건수 및 실적 유무."""
+    f = ctx.frame(('WABAS01',))
+    zero_price = f['price'] == 0
+    has_real = zero_price & ((f['gerp_day_qty'] > 0) | (f['gerp_ngt_qty'] > 0))
+    return Outcome('INFO',
+                   f"단가=0: {int(zero_price.sum())}건  (실적있음: {int(has_real.sum())}건) → 단가 확인 필요",
+                   hits=int(zero_price.sum()))
+
+
+def check_usage2_even(ctx):
+    """항목 4: Usage=2 수량 2배 환산 — 원천수량은 저장 안 했으므로 계산된 qty 기반으로 홀수 체크."""
+    f = ctx.frame()
+    odd = (f['usage'] == 2) & (f['gerp_day_qty'] % 2 != 0) & (f['gerp_day_qty'] != 0)
+    usage2_issues = [f"{f.at[i, 'line']}/{ctx.row(i)['part_no']}(qty={ctx.row(i)['gerp_day_qty']})"
+                     for i in odd[odd].index[:5]]
+    return Outcome('PASS' if not usage2_issues else 'INFO',
+                   f"홀수 수량 품번(비정상 가능): {usage2_issues}" if usage2_issues else "전체 정상(짝수)",
+                   hits=int(odd.sum()))
+
+
+def check_gerp_orig_amt(ctx):
+    """항목 5: 정산금액 = GERP 원본금액.
+    2026-04-05: SP3M3 야간 170원 고정 → GERP 원본금액 직접 사용으로 변경"""
+    f = ctx.frame()
+    bad = (f['gerp_day_amt'] != f['gerp_orig_day_amt']) | (f['gerp_ngt_amt'] != f['gerp_orig_ngt_amt'])
+    orig_mismatch = [f"{f.at[i, 'line']}/{ctx.row(i)['part_no']}" for i in bad[bad].index[:5]]
+    return Outcome('PASS' if not orig_mismatch else 'FAIL',
+                   f"불일치: {orig_mismatch}" if orig_mismatch else "전체 정상", hits=int(bad.sum()))
+
+
+# 항목 6: (삭제됨 — 미매핑 품번은 GERP 단가 fallback 적용)
+
+
+def check_line_diff(ctx):
+    """항목 7: GERP vs 구ERP 라인별 차이 요약."""
+    diff_lines = [r for r in ctx.summary if r['diff_amt'] != 0]
+    return Outcome('INFO' if diff_lines else 'PASS',
+                   "; ".join(f"{r['line']}:{r['diff_amt']:+,}" for r in diff_lines) if diff_lines else "전 라인 일치",
+                   hits=len(diff_lines))
+
+
+RULES = [
+    Rule(1, "전체합계 일관성 (라인합산 == grand)", check_grand_total, scope='totals'),
+    Rule(2, "[deprecated legacy] SD9A01 단가기준판정 규칙 (단가≤500→야간가산, >500→기본)", check_sd9_judgment,
+         columns=('part_no', 'price', 'price_judgment', 'gerp_ngt_qty'), lines=('SD9A01',)),
+    Rule(3, "WABAS01 단가=0 품번 현황", check_waba_zero_price,
+         columns=('price', 'gerp_day_qty', 'gerp_ngt_qty'), lines=('WABAS01',)),
+    Rule(4, "Usage=2 품번 수량 짝수 여부 (2배 환산 확인)", check_usage2_even,
+         columns=('part_no', 'usage', 'gerp_day_qty')),
+    Rule(5, "GERP 원본금액 정합성 (정산=원본)", check_gerp_orig_amt,
+         columns=('part_no', 'gerp_day_amt', 'gerp_orig_day_amt', 'gerp_ngt_amt', 'gerp_orig_ngt_amt')),
+    Rule(7, "GERP vs 구ERP 라인별 차이", check_line_diff, scope='summary'),
+]
+
+
+def _print_check(c):
+    label_map = {'PASS': '✓ PASS', 'FAIL': f"✗ FAIL[{c['severity']}]", 'WARNING': '△ WARNING', 'INFO': 'i INFO'}
+    print(f"  [{label_map.get(c['status'], c['status'])}] {c['no']}. {c['name']}")
+    if c['detail']:
+        print(f"       {c['detail']}")
+
+
+def judge(results):
+    """항목 목록 → 건수 + overall 판정.
+    overall 3단계: CRITICAL FAIL 존재 → FAIL, WARNING만 존재 → WARNING, 그 외 → PASS"""
+    n = {s: sum(1 for c in results if c['status'] == s) for s in ('PASS', 'FAIL', 'WARNING')}
+    info_n = len(results) - sum(n.values())
+    critical_n = sum(
+        1 for c in results
+        if c['status'] == 'FAIL' and c.get('severity') == 'CRITICAL'
+    )
+    if critical_n > 0:
+        overall = 'FAIL'
+    elif n['WARNING'] > 0:
+        overall = 'WARNING'
+    else:
+        overall = 'PASS'
+    return {
+        "overall": overall,
+        "critical_fail": critical_n,
+        "warning": n['WARNING'],
+        "pass": n['PASS'],
+        "info": info_n,
+        "fail": n['FAIL'],          # FAIL 상태 총 건수 (backward compat)
+    }
 
-with open(CACHE_STEP5, encoding='utf-8') as f:
-    s5 = json.load(f)
 
-lines   = s5['lines']
-summary = s5['summary']
-results = []
-pass_n = fail_n = warning_n = info_n = 0
+def _load_previous(vpath):
+    if not os.path.exists(vpath):
+        return None
+    return read_cache(vpath)
 
 
-def chk(no, name, status, detail='', severity='CRITICAL'):
-    """검증 항목 기록 및 카운터 갱신.
+def main(upstream=None, cfg=None, only=None, previous=None):
+    """Step 6 실행. upstream[5] 또는 step5 캐시 사용, 검증 결과 dict 반환.
 
-    status : 'PASS' | 'FAIL' | 'WARNING' | 'INFO'
-    severity: 'CRITICAL' | 'WARNING' | 'INFO'
-              status='FAIL'인 경우에만 의미 있음.
-              status='WARNING'이면 severity는 자동으로 'WARNING'으로 취급.
+    only    : 재평가할 규칙 번호 (나머지는 previous 결과 유지)
+    previous: 이전 검증 결과 — 입력 지문이 같은 규칙은 재판정하지 않음
     """
-    global pass_n, fail_n, warning_n, info_n
-    label_map = {'PASS': '✓ PASS', 'FAIL': f'✗ FAIL[{severity}]', 'WARNING': '△ WARNING', 'INFO': 'i INFO'}
-    label = label_map.get(status, status)
-    print(f"  [{label}] {no}. {name}")
-    if detail:
-        print(f"       {detail}")
-    results.append({
-        "no": no, "name": name,
-        "status": status, "severity": severity if status == 'FAIL' else status,
-        "detail": detail
-    })
-    if status == 'PASS':
-        pass_n += 1
-    elif status == 'FAIL':
-        fail_n += 1
-    elif status == 'WARNING':
-        warning_n += 1
-    else:
-        info_n += 1
-
-
-print()
-
-# ── 항목 1: 전체 합계 일관성 ──────────────────────────────────
-calc_gerp = sum(lines[lc]['total_gerp_amt'] for lc in lines)
-calc_erp  = sum(lines[lc]['total_erp_amt']  for lc in lines)
-grand_gerp = s5['grand_gerp_amt']
-grand_erp  = s5['grand_erp_amt']
-
-gerp_ok = abs(calc_gerp - grand_gerp) == 0
-erp_ok  = abs(calc_erp  - grand_erp)  == 0
-chk(1, "전체합계 일관성 (라인합산 == grand)",
-    'PASS' if (gerp_ok and erp_ok) else 'FAIL',
-    f"GERP: {calc_gerp:,} vs {grand_gerp:,}  구ERP: {calc_erp:,} vs {grand_erp:,}")
-
-# ── 항목 2: SD9A01 단가기준판정 [deprecated legacy] ─────────────
-sd9_items = lines.get('SD9A01', {}).get('items', [])
-sd9_fail  = []
-for r in sd9_items:
-    if r['gerp_ngt_qty'] == 0:
-        # 야간실적 없으면 판정 없음 OK
-        if r['price_judgment'] is not None:
-            sd9_fail.append(f"{r['part_no']}(야간없는데 판정={r['price_judgment']})")
+    cfg = cfg or RunConfig.default()
+    print("=" * 60)
+    print("Step 6: 정산 검증")
+    print("=" * 60)
+
+    s5 = load_result(5, cfg.CACHE_STEP5, upstream)
+    if s5 is None:
+        print(f"[ERROR] Step5 결과 없음. step5_정산계산.py 먼저 실행하세요.")
+        sys.exit(1)
+
+    print()
+    with span('rules') as sp:
+        results, rule_metrics = evaluate(RULES, s5, only=only, previous=previous)
+        sp.rows = sum(len(ldata.get('items', [])) for ldata in s5['lines'].values())
+    for c in results:
+        _print_check(c)
+
+    # ── 결과 ─────────────────────────────────────────────────────
+    verdict = judge(results)
+    print(f"\n{'='*60}")
+    print(f"종합: PASS {verdict['pass']} / FAIL(CRITICAL) {verdict['fail']} / WARNING {verdict['warning']} / INFO {verdict['info']}")
+    print(f"최종 판정: {verdict['overall']}")
+    ran = [m for m in rule_metrics if not m['reused']]
+    print("규칙별 소요: " + "  ".join(
+        f"{m['no']}:{'재사용' if m['reused'] else str(m['elapsed_ms']) + 'ms'}(적중 {m['hits']})" for m in rule_metrics))
+
+    if verdict['fail'] > 0:
+        print("\n[CRITICAL FAIL 항목] — STATUS.md 미해결 이슈에 기록 권장")
+        for r in results:
+            if r['status'] == 'FAIL':
+                print(f"  - {r['no']}. {r['name']}: {r['detail']}")
+
+    if verdict['warning'] > 0:
+        print("\n[WARNING 항목] — Known Exception 또는 주의 필요 사항")
+        for r in results:
+            if r['status'] == 'WARNING':
+                print(f"  - {r['no']}. {r['name']}: {r['detail']}")
+
+    # 결과 JSON 저장
+    vr = {
+        "step": 6,
+        "timestamp": datetime.now().isoformat(),
+        **verdict,
+        "checks": results,
+        "rule_metrics": rule_metrics,
+    }
+    vpath = os.path.join(cfg.CACHE_DIR, 'step6_validation.json')
+    save_result(vpath, vr)
+
+    print(f"\n저장: {vpath}")
+    print(f"Step 6 완료 (재평가 {len(ran)} / 재사용 {len(rule_metrics) - len(ran)})")
+
+    return vr
+
+
+def watch(cfg, interval=2.0):
+    """step5 캐시 변경 감시 → 입력이 바뀐 규칙만 재평가 (Ctrl+C 종료)."""
+    vpath = os.path.join(cfg.CACHE_DIR, 'step6_validation.json')
+    previous, seen = _load_previous(vpath), None
+    print(f"[감시] {cfg.CACHE_STEP5} (간격 {interval}초, 종료: Ctrl+C)")
+    try:
+        while True:
+            try:
+                mtime = os.stat(cfg.CACHE_STEP5).st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+            if mtime is not None and mtime != seen:
+                seen = mtime
+                previous = main(cfg=cfg, previous=previous)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\n[감시] 종료")
+
+
+if __name__ == '__main__':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+    ap = argparse.ArgumentParser(description='Step 6 정산 검증')
+    ap.add_argument('--rules', default=None, help='재평가할 규칙 번호 (쉼표 구분, 예: 2,5)')
+    ap.add_argument('--watch', nargs='?', type=float, const=2.0, default=None, metavar='SEC',
+                    help='step5 캐시 변경 감시 (기본 간격 2초)')
+    args, _ = ap.parse_known_args()
+    cfg = cli_config()
+    if args.watch is not None:
+        watch(cfg, args.watch)
+    elif args.rules:
+        only = [int(n) for n in args.rules.split(',') if n.strip()]
+        main(cfg=cfg, only=only, previous=_load_previous(os.path.join(cfg.CACHE_DIR, 'step6_validation.json')))
     else:
-        expected = '야간가산' if r['price'] <= 500 else '기본'
-        if r['price_judgment'] != expected:
-            sd9_fail.append(f"{r['part_no']}(단가={r['price']},판정={r['price_judgment']},기대={expected})")
-
-chk(2, "[deprecated legacy] SD9A01 단가기준판정 규칙 (단가≤500→야간가산, >500→기본)",
-    'PASS' if not sd9_fail else 'FAIL',
-    f"오류: {sd9_fail[:5]}" if sd9_fail else "전체 정상")
-
-# ── 항목 3: WABAS01 단가=0 품번 ──────────────────────────────
-waba_items = lines.get('WABAS01', {}).get('items', [])
-zero_price = [r for r in waba_items if r['price'] == 0]
-has_real   = [r for r in zero_price if r['gerp_day_qty'] > 0 or r['gerp_ngt_qty'] > 0]
-chk(3, f"WABAS01 단가=0 품번 현황",
-    'INFO',
-    f"단가=0: {len(zero_price)}건  (실적있음: {len(has_real)}건) → 단가 확인 필요")
-
-# ── 항목 4: Usage=2 수량 2배 환산 ────────────────────────────
-usage2_ok = True
-usage2_issues = []
-for lc, ldata in lines.items():
-    for r in ldata['items']:
-        if r['usage'] == 2:
-            # 원천수량은 저장 안 했으므로 계산된 qty 기반으로 홀수 체크
-            if r['gerp_day_qty'] % 2 != 0 and r['gerp_day_qty'] != 0:
-                usage2_issues.append(f"{lc}/{r['part_no']}(qty={r['gerp_day_qty']})")
-
-chk(4, "Usage=2 품번 수량 짝수 여부 (2배 환산 확인)",
-    'PASS' if not usage2_issues else 'INFO',
-    f"홀수 수량 품번(비정상 가능): {usage2_issues[:5]}" if usage2_issues else "전체 정상(짝수)")
-
-# ── 항목 5: GERP 원본금액 정합성 (정산금액 = GERP 원본) ──
-# 2026-04-05: SP3M3 야간 170원 고정 → GERP 원본금액 직접 사용으로 변경
-# 정산금액과 원본금액이 동일한지 확인
-orig_mismatch = []
-for lc_chk in lines:
-    for r in lines[lc_chk].get('items', []):
-        if r['gerp_day_amt'] != r['gerp_orig_day_amt'] or r['gerp_ngt_amt'] != r['gerp_orig_ngt_amt']:
-            orig_mismatch.append(f"{lc_chk}/{r['part_no']}")
-chk(5, "GERP 원본금액 정합성 (정산=원본)",
-    'PASS' if not orig_mismatch else 'FAIL',
-    f"불일치: {orig_mismatch[:5]}" if orig_mismatch else "전체 정상")
-
-# ── 항목 6: (삭제됨 — 미매핑 품번은 GERP 단가 fallback 적용) ──
-
-# ── 항목 7: 라인별 차이 요약 (INFO) ──────────────────────────
-diff_lines = [r for r in summary if r['diff_amt'] != 0]
-chk(7, "GERP vs 구ERP 라인별 차이",
-    'INFO' if diff_lines else 'PASS',
-    "; ".join(f"{r['line']}:{r['diff_amt']:+,}" for r in diff_lines) if diff_lines else "전 라인 일치")
-
-# ── 결과 ─────────────────────────────────────────────────────
-# overall 판정 3단계: CRITICAL FAIL 존재 → FAIL, WARNING만 존재 → WARNING, 그 외 → PASS
-critical_n = sum(
-    1 for c in results
-    if c['status'] == 'FAIL' and c.get('severity') == 'CRITICAL'
-)
-if critical_n > 0:
-    overall = 'FAIL'
-elif warning_n > 0:
-    overall = 'WARNING'
-else:
-    overall = 'PASS'
-
-print(f"\n{'='*60}")
-print(f"종합: PASS {pass_n} / FAIL(CRITICAL) {fail_n} / WARNING {warning_n} / INFO {info_n}")
-print(f"최종 판정: {overall}")
-
-if fail_n > 0:
-    print("\n[CRITICAL FAIL 항목] — STATUS.md 미해결 이슈에 기록 권장")
-    for r in results:
-        if r['status'] == 'FAIL':
-            print(f"  - {r['no']}. {r['name']}: {r['detail']}")
-
-if warning_n > 0:
-    print("\n[WARNING 항목] — Known Exception 또는 주의 필요 사항")
-    for r in results:
-        if r['status'] == 'WARNING':
-            print(f"  - {r['no']}. {r['name']}: {r['detail']}")
-
-# 결과 JSON 저장
-vr = {
-    "step": 6,
-    "timestamp": datetime.now().isoformat(),
-    "overall": overall,
-    "critical_fail": critical_n,
-    "warning": warning_n,
-    "pass": pass_n,
-    "info": info_n,
-    "fail": fail_n,          # FAIL 상태 총 건수 (backward compat)
-    "checks": results,
-}
-vpath = os.path.join(CACHE_DIR, 'step6_validation.json')
-with open(vpath, 'w', encoding='utf-8') as f:
-    json.dump(vr, f, ensure_ascii=False, indent=2)
-
-print(f"\n저장: {vpath}")
-print("Step 6 완료")
+        main(cfg=cfg)
@@ -6,7 +6,7 @@ Step 7 — HTML 대시보드 생성 + PNG 변환
 
 입력:  _cache/step7_visualization_input.json  (step7_시각화입력생성.py 출력)
 출력:  _cache/월간_조립비_대시보드.html
-       _cache/월간_조립비_대시보드.png   (Playwright)
+       _cache/월간_조립비_대시보드.png   (Playwright — 90_공통기준/렌더서비스)
 
 실행:
     python step7_대시보드.py            # HTML + PNG
@@ -84,29 +84,25 @@ with open(HTML_OUT, 'w', encoding='utf-8') as f:
 
 print(f"[완료] HTML: {HTML_OUT}")
 
-# ── Playwright PNG 변환 ───────────────────────────────────────
+# ── Playwright PNG 변환 (공용 렌더 서비스) ────────────────────
 def generate_png(html_path: str, png_path: str) -> bool:
+    sys.path.insert(0, str(Path(__file__).resolve().parents[3] / '90_공통기준' / '렌더서비스'))
+    from render_service import RenderJob, RenderUnavailable, get_service
+
     try:
-        from playwright.sync_api import sync_playwright
-    except ImportError:
-        print("[SKIP] playwright 미설치: pip install playwright && python -m playwright install chromium")
+        service = get_service()
+    except RenderUnavailable as e:
+        print(f"[SKIP] {e}")
         return False
 
-    abs_html = Path(html_path).resolve()
-    try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch()
-            page = browser.new_page(viewport={"width": 1280, "height": 900})
-            page.goto(f"file:///{abs_html.as_posix()}")
-            # Chart.js 렌더 완료 대기
-            page.wait_for_timeout(1200)
-            page.screenshot(path=png_path, full_page=True)
-            browser.close()
-        print(f"[완료] PNG:  {png_path}")
-        return True
-    except Exception as e:
-        print(f"[ERROR] PNG 생성 실패: {e}")
+    # Chart.js 렌더 완료 대기 1.2초
+    result = service.render(RenderJob(html_path, png_path, viewport=(1280, 900), wait_ms=1200))
+    if not result.ok:
+        print(f"[ERROR] PNG 생성 실패: {result.error}")
         return False
+    how = "렌더 서버 연결" if service.connected else f"브라우저 기동 {service.startup_sec}초"
+    print(f"[완료] PNG:  {png_path}  ({how}, 렌더 {result.elapsed_sec}초)")
+    return True
 
 # ── 실행 분기 ─────────────────────────────────────────────────
 parser = argparse.ArgumentParser()
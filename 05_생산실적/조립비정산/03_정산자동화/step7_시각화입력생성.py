@@ -5,7 +5,7 @@ Step 7 — 시각화 입력 JSON 생성
 # v1: 현재월 단독 대시보드용. 전월 비교 기능 제외.
 
 목적:
-    step5_settlement.json + step6_validation.json 을 읽어
+    step5_settlement.bin + step6_validation.json 을 읽어
     HTML 대시보드 생성용 step7_visualization_input.json 을 출력한다.
 
 데이터 구조 (검증 완료 2026-03-30):
@@ -34,6 +34,7 @@ sys.stdout.reconfigure(encoding='utf-8')
 sys.stderr.reconfigure(encoding='utf-8')
 
 from _pipeline_config import CACHE_DIR, CACHE_STEP5, MONTH, LINE_INFO
+from _step_io import read_cache
 
 CACHE_STEP6  = os.path.join(CACHE_DIR, 'step6_validation.json')
 OUTPUT_FILE  = os.path.join(CACHE_DIR, 'step7_visualization_input.json')
@@ -47,8 +48,7 @@ if not os.path.exists(CACHE_STEP5):
     print(f"[ERROR] step5 결과 없음: {CACHE_STEP5}")
     sys.exit(1)
 
-with open(CACHE_STEP5, encoding='utf-8') as f:
-    s5 = json.load(f)
+s5 = read_cache(CACHE_STEP5)
 
 s6 = None
 if os.path.exists(CACHE_STEP6):
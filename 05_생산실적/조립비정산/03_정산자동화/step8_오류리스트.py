@@ -2,345 +2,336 @@
 # -*- coding: utf-8 -*-
 """
 Step 8 — 오류 리스트 생성
-step5_settlement.json에서 GERP vs 구ERP 차이 항목을 추출하여
+step5_settlement.bin에서 GERP vs 구ERP 차이 항목을 추출하여
 DB 양식 기반 오류리스트_MM월.xlsx를 생성한다.
 
 실행: python step8_오류리스트.py
 출력: {월별폴더}/오류리스트_MM월.xlsx
 """
 
-import sys, os, json
+import sys, os
 sys.path.insert(0, os.path.dirname(__file__))
-sys.stdout.reconfigure(encoding='utf-8')
-sys.stderr.reconfigure(encoding='utf-8')
 
 from _pipeline_config import *
+from _run_config import RunConfig, cli_config
+from _step_io import load_result
+from _metrics import span
 from _error_types import TYPE_ORDER, TYPE_COLORS
-from openpyxl import Workbook
+from _xlsx_writer import StyledWorkbook, RowTemplate, write_row
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
 from collections import Counter
 from datetime import datetime
 
-print("=" * 60)
-print("Step 8: 오류 리스트 생성")
-print("=" * 60)
 
-# ── 데이터 로드 ──
-if not os.path.exists(CACHE_STEP5):
-    print(f"[ERROR] step5 캐시 없음: {CACHE_STEP5}")
-    sys.exit(1)
-
-with open(CACHE_STEP5, 'r', encoding='utf-8') as f:
-    s5 = json.load(f)
-
-print(f"\n[1/3] 오류 항목 수집 (1차 통합 사전, 2026-05-18)...")
-
-# ── 오류 항목 수집 — step5 행별 err_type/excl_reason/recv_amt 그대로 사용 ──
-errors = []
-excluded = []   # 제외사유 있는 행 (이관품번/웨빙재작업/정합인정)
-for lc in LINE_ORDER:
-    ld = s5['lines'].get(lc, {})
-    for r in ld.get('items', []):
-        # 다중단가 두 번째+ 행 (is_first_gerp=False): 비교 대상 아님
-        if not r.get('is_first_gerp', True):
-            continue
-        g_amt = r['gerp_day_amt'] + r['gerp_ngt_amt']
-        e_amt = r['erp_day_amt'] + r['erp_ngt_amt']
-        diff = g_amt - e_amt
-
-        if g_amt == e_amt:
-            continue
-
-        excl = r.get('excl_reason', '')
-        if excl:
-            excluded.append({'line': lc, 'part_no': r['part_no'], 'diff': diff, 'excl': excl})
-            continue
-
-        sup_text = ''
-        if r.get('support'):
-            parts = []
-            for s in r['support']:
-                v = s['vendor']
-                if '[' in v:
-                    v = v.split('[')[1].rstrip(']')
-                parts.append(f"{v}({s['day_qty']+s['night_qty']})")
-            sup_text = ', '.join(parts)
-
-        errors.append({
-            'line': lc,
-            'part_no': r['part_no'],
-            'assy_part': r.get('assy_part', ''),
-            'usage': r.get('usage', 1),
-            'price_type': r['price_type'],
-            'price': r['price'],
-            'vtype': r.get('vtype', ''),
-            'gerp_day_qty': r['gerp_day_qty'],
-            'gerp_day_amt': r['gerp_day_amt'],
-            'gerp_ngt_qty': r['gerp_ngt_qty'],
-            'gerp_ngt_amt': r['gerp_ngt_amt'],
-            'erp_day_qty': r['erp_day_qty'],
-            'erp_day_amt': r['erp_day_amt'],
-            'erp_ngt_qty': r['erp_ngt_qty'],
-            'erp_ngt_amt': r['erp_ngt_amt'],
-            'diff': diff,
-            'err_type': r.get('err_type', '정산차이'),
-            'note': r.get('note', ''),
-            'excl_reason': '',
-            'recv_amt': r.get('recv_amt', abs(diff)),
-            'sup_text': sup_text,
-        })
-
-type_order = {t: i for i, t in enumerate(TYPE_ORDER)}
-errors.sort(key=lambda x: (LINE_ORDER.index(x['line']),
-                           type_order.get(x['err_type'], 99),
-                           -abs(x['diff'])))
-
-print(f"  오류 {len(errors)}건 추출")
-if excluded:
-    exc_amt = sum(e['diff'] for e in excluded)
-    exc_by  = Counter(e['excl'] for e in excluded)
-    print(f"  제외사유 {len(excluded)}건 / {exc_amt:+,}원")
-    for k, c in exc_by.most_common():
-        print(f"    {k}: {c}건")
-
-# ── 유형별 요약 출력 ──
-tcnt = Counter(e['err_type'] for e in errors)
-tamt = {}
-for e in errors:
-    tamt[e['err_type']] = tamt.get(e['err_type'], 0) + e['diff']
-for t in TYPE_ORDER:
-    if t in tcnt:
-        print(f"    {t}: {tcnt[t]}건 ({tamt[t]:+,}원)")
-
-# ── 받을금액 집계 ──
-recv_total = sum(e.get('recv_amt', abs(e['diff'])) for e in errors)
-print(f"  받을금액 합계: {recv_total:,}원")
-
-# ── 스타일 ──
-print(f"\n[2/3] 엑셀 생성...")
-
-THIN = Side(style='thin', color='D0D0D0')
-BDR = Border(left=THIN, right=THIN, top=THIN, bottom=THIN)
-CA = Alignment(horizontal='center', vertical='center', wrap_text=True)
-RA = Alignment(horizontal='right', vertical='center')
-LA = Alignment(horizontal='left', vertical='center')
-NUM = '#,##0'
-
-DB_FILL = PatternFill('solid', fgColor='1C2B4A')
-DB_FONT = Font(name='DejaVu Sans', size=9, bold=True, color='FFFFFF')
-G_FILL = PatternFill('solid', fgColor='2B579A')
-G_FONT = Font(name='맑은 고딕', size=9, bold=True, color='FFFFFF')
-E_FILL = PatternFill('solid', fgColor='2D7D46')
-E_FONT = Font(name='맑은 고딕', size=9, bold=True, color='FFFFFF')
-RES_FILL = PatternFill('solid', fgColor='4A4A4A')
-RES_FONT = Font(name='맑은 고딕', size=9, bold=True, color='FFFFFF')
-
-DATA = Font(name='맑은 고딕', size=9)
-BOLD = Font(name='맑은 고딕', size=9, bold=True)
-SUM_FILL = PatternFill('solid', fgColor='E8E8E8')
-NEG_FILL = PatternFill('solid', fgColor='FDE8E8')
-POS_FILL = PatternFill('solid', fgColor='E8F5E8')
-
-TYPE_FILLS = {t: PatternFill('solid', fgColor=c) for t, c in TYPE_COLORS.items()}
-
-# ── 워크북 ──
-wb = Workbook()
-ws = wb.active
-ws.title = '오류리스트'
-
-month_int = int(MONTH)
-
-# 컬럼 총 폭: 기본정보 8 + GERP 4 + 구ERP 4 + 결과 6 = 22 (기존 20 → +2: 받을금액, 제외사유)
-TOTAL_COLS = 22
-LAST_COL_LETTER = get_column_letter(TOTAL_COLS)
-
-# Row 1: 타이틀
-ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=TOTAL_COLS)
-ws['A1'] = f'{month_int}월 조립비 정산 오류 리스트'
-ws['A1'].font = Font(name='맑은 고딕', bold=True, size=12, color='1B2A4A')
-ws['A1'].alignment = LA
-
-# Row 2: 요약
-summary = []
-for t in TYPE_ORDER:
-    if t in tcnt:
-        summary.append(f"{t} {tcnt[t]}건({tamt[t]:+,}원)")
-ws.merge_cells(start_row=2, start_column=1, end_row=2, end_column=TOTAL_COLS)
-exc_info = ''
-if excluded:
-    exc_by = Counter(e['excl'] for e in excluded)
-    exc_parts = [f"{k} {c}건" for k, c in exc_by.most_common()]
-    exc_info = f"  |  제외사유: {', '.join(exc_parts)} (합계 {sum(e['diff'] for e in excluded):+,}원)"
-ws['A2'] = f"총 {len(errors)}건  |  " + '  |  '.join(summary) + f"  |  받을금액 {recv_total:,}원" + exc_info
-ws['A2'].font = Font(name='맑은 고딕', size=9, color='555555')
-
-# Row 3: 그룹 헤더 (결과 4→6: 차이금액/오류유형/비고/제외사유/받을금액/지원업체)
-groups = [
-    ('기본정보', 8, DB_FILL, DB_FONT),
-    ('GERP', 4, G_FILL, G_FONT),
-    ('구ERP', 4, E_FILL, E_FONT),
-    ('결과', 6, RES_FILL, RES_FONT),
-]
-col = 1
-for name, span, fill, font in groups:
-    ws.merge_cells(start_row=3, start_column=col, end_row=3, end_column=col+span-1)
-    c = ws.cell(3, col, name)
-    c.font = font; c.fill = fill; c.alignment = CA; c.border = BDR
-    for ci in range(col+1, col+span):
-        cc = ws.cell(3, ci)
-        cc.fill = fill; cc.border = BDR
-    col += span
-
-# Row 4: 세부 헤더 — 1차 통합 사전 적용 (결과 그룹 6컬럼: 차이금액/오류유형/비고/제외사유/받을금액/지원업체)
-headers = [
-    ('품번', 18, DB_FILL, DB_FONT), ('업체코드', 8, DB_FILL, DB_FONT),
-    ('라인코드', 10, DB_FILL, DB_FONT), ('조립품번', 16, DB_FILL, DB_FONT),
-    ('Usage', 7, DB_FILL, DB_FONT), ('단가구분', 8, DB_FILL, DB_FONT),
-    ('단가', 10, DB_FILL, DB_FONT), ('차종', 8, DB_FILL, DB_FONT),
-    ('주간수량', 10, G_FILL, G_FONT), ('주간금액', 13, G_FILL, G_FONT),
-    ('야간수량', 10, G_FILL, G_FONT), ('야간금액', 13, G_FILL, G_FONT),
-    ('주간수량', 10, E_FILL, E_FONT), ('주간금액', 13, E_FILL, E_FONT),
-    ('야간수량', 10, E_FILL, E_FONT), ('야간금액', 13, E_FILL, E_FONT),
-    ('차이금액', 13, RES_FILL, RES_FONT), ('오류유형', 12, RES_FILL, RES_FONT),
-    ('비고', 18, RES_FILL, RES_FONT), ('제외사유', 14, RES_FILL, RES_FONT),
-    ('받을금액', 13, RES_FILL, RES_FONT), ('지원업체', 12, RES_FILL, RES_FONT),
-]
-for ci, (name, width, fill, font) in enumerate(headers, 1):
-    c = ws.cell(4, ci, name)
-    c.font = font; c.fill = fill; c.alignment = CA; c.border = BDR
-    ws.column_dimensions[get_column_letter(ci)].width = width
-
-# ── 데이터 행 ──
-row = 5
-for e in errors:
-    vals = [
-        (e['part_no'], LA, None), (VENDOR_CODE, CA, None),
-        (e['line'], CA, None), (e['assy_part'], LA, None),
-        (e['usage'], CA, None), (e['price_type'], CA, None),
-        (e['price'], RA, NUM), (e['vtype'], CA, None),
-        (e['gerp_day_qty'], RA, NUM), (e['gerp_day_amt'], RA, NUM),
-        (e['gerp_ngt_qty'], RA, NUM), (e['gerp_ngt_amt'], RA, NUM),
-        (e['erp_day_qty'], RA, NUM), (e['erp_day_amt'], RA, NUM),
-        (e['erp_ngt_qty'], RA, NUM), (e['erp_ngt_amt'], RA, NUM),
-        (e['diff'], RA, NUM), (e['err_type'], CA, None),
-        (e.get('note', ''), LA, None), (e.get('excl_reason', ''), CA, None),
-        (e.get('recv_amt', abs(e['diff'])), RA, NUM), (e['sup_text'], LA, None),
+def main(upstream=None, cfg=None):
+    """Step 8 실행. upstream[5] 또는 step5 캐시 사용, 오류리스트 경로 dict 반환."""
+    cfg = cfg or RunConfig.default()
+    print("=" * 60)
+    print("Step 8: 오류 리스트 생성")
+    print("=" * 60)
+
+    # ── 데이터 로드 ──
+    s5 = load_result(5, cfg.CACHE_STEP5, upstream)
+    if s5 is None:
+        print(f"[ERROR] step5 캐시 없음: {cfg.CACHE_STEP5}")
+        sys.exit(1)
+
+    print(f"\n[1/3] 오류 항목 수집 (1차 통합 사전, 2026-05-18)...")
+
+    # ── 오류 항목 수집 — step5 행별 err_type/excl_reason/recv_amt 그대로 사용 ──
+    errors = []
+    excluded = []   # 제외사유 있는 행 (이관품번/웨빙재작업/정합인정)
+    for lc in LINE_ORDER:
+        ld = s5['lines'].get(lc, {})
+        for r in ld.get('items', []):
+            # 다중단가 두 번째+ 행 (is_first_gerp=False): 비교 대상 아님
+            if not r.get('is_first_gerp', True):
+                continue
+            g_amt = r['gerp_day_amt'] + r['gerp_ngt_amt']
+            e_amt = r['erp_day_amt'] + r['erp_ngt_amt']
+            diff = g_amt - e_amt
+
+            if g_amt == e_amt:
+                continue
+
+            excl = r.get('excl_reason', '')
+            if excl:
+                excluded.append({'line': lc, 'part_no': r['part_no'], 'diff': diff, 'excl': excl})
+                continue
+
+            sup_text = ''
+            if r.get('support'):
+                parts = []
+                for s in r['support']:
+                    v = s['vendor']
+                    if '[' in v:
+                        v = v.split('[')[1].rstrip(']')
+                    parts.append(f"{v}({s['day_qty']+s['night_qty']})")
+                sup_text = ', '.join(parts)
+
+            errors.append({
+                'line': lc,
+                'part_no': r['part_no'],
+                'assy_part': r.get('assy_part', ''),
+                'usage': r.get('usage', 1),
+                'price_type': r['price_type'],
+                'price': r['price'],
+                'vtype': r.get('vtype', ''),
+                'gerp_day_qty': r['gerp_day_qty'],
+                'gerp_day_amt': r['gerp_day_amt'],
+                'gerp_ngt_qty': r['gerp_ngt_qty'],
+                'gerp_ngt_amt': r['gerp_ngt_amt'],
+                'erp_day_qty': r['erp_day_qty'],
+                'erp_day_amt': r['erp_day_amt'],
+                'erp_ngt_qty': r['erp_ngt_qty'],
+                'erp_ngt_amt': r['erp_ngt_amt'],
+                'diff': diff,
+                'err_type': r.get('err_type', '정산차이'),
+                'note': r.get('note', ''),
+                'excl_reason': '',
+                'recv_amt': r.get('recv_amt', abs(diff)),
+                'sup_text': sup_text,
+            })
+
+    type_order = {t: i for i, t in enumerate(TYPE_ORDER)}
+    errors.sort(key=lambda x: (LINE_ORDER.index(x['line']),
+                               type_order.get(x['err_type'], 99),
+                               -abs(x['diff'])))
+
+    print(f"  오류 {len(errors)}건 추출")
+    if excluded:
+        exc_amt = sum(e['diff'] for e in excluded)
+        exc_by  = Counter(e['excl'] for e in excluded)
+        print(f"  제외사유 {len(excluded)}건 / {exc_amt:+,}원")
+        for k, c in exc_by.most_common():
+            print(f"    {k}: {c}건")
+
+    # ── 유형별 요약 출력 ──
+    tcnt = Counter(e['err_type'] for e in errors)
+    tamt = {}
+    for e in errors:
+        tamt[e['err_type']] = tamt.get(e['err_type'], 0) + e['diff']
+    for t in TYPE_ORDER:
+        if t in tcnt:
+            print(f"    {t}: {tcnt[t]}건 ({tamt[t]:+,}원)")
+
+    # ── 받을금액 집계 ──
+    recv_total = sum(e.get('recv_amt', abs(e['diff'])) for e in errors)
+    print(f"  받을금액 합계: {recv_total:,}원")
+
+    # ── 스타일 ──
+    print(f"\n[2/3] 엑셀 생성...")
+
+    THIN = Side(style='thin', color='D0D0D0')
+    BDR = Border(left=THIN, right=THIN, top=THIN, bottom=THIN)
+    CA = Alignment(horizontal='center', vertical='center', wrap_text=True)
+    RA = Alignment(horizontal='right', vertical='center')
+    LA = Alignment(horizontal='left', vertical='center')
+    NUM = '#,##0'
+
+    DB_FILL = PatternFill('solid', fgColor='1C2B4A')
+    DB_FONT = Font(name='DejaVu Sans', size=9, bold=True, color='FFFFFF')
+    G_FILL = PatternFill('solid', fgColor='2B579A')
+    G_FONT = Font(name='맑은 고딕', size=9, bold=True, color='FFFFFF')
+    E_FILL = PatternFill('solid', fgColor='2D7D46')
+    E_FONT = Font(name='맑은 고딕', size=9, bold=True, color='FFFFFF')
+    RES_FILL = PatternFill('solid', fgColor='4A4A4A')
+    RES_FONT = Font(name='맑은 고딕', size=9, bold=True, color='FFFFFF')
+
+    DATA = Font(name='맑은 고딕', size=9)
+    BOLD = Font(name='맑은 고딕', size=9, bold=True)
+    SUM_FILL = PatternFill('solid', fgColor='E8E8E8')
+    NEG_FILL = PatternFill('solid', fgColor='FDE8E8')
+    POS_FILL = PatternFill('solid', fgColor='E8F5E8')
+
+    TYPE_FILLS = {t: PatternFill('solid', fgColor=c) for t, c in TYPE_COLORS.items()}
+    NEG_FONT = Font(name='맑은 고딕', size=9, color='CC0000')
+    POS_FONT = Font(name='맑은 고딕', size=9, color='006600')
+
+    # 행 템플릿 — 오류리스트 데이터 22열 / 유형별요약 6열 (차이금액·오류유형 등은 값 조건부 fill/font)
+    _L, _C, _R = {'alignment': LA}, {'alignment': CA}, {'alignment': RA, 'number_format': NUM}
+    DATA_ROW = RowTemplate([_L, _C, _C, _L, _C, _C, _R, _C,
+                            _R, _R, _R, _R, _R, _R, _R, _R,
+                            _R, _C, _L, _C, _R, _L], font=DATA, border=BDR)
+    TYPE_ROW = RowTemplate([{'alignment': CA}, {'alignment': CA}]
+                          + [{'alignment': RA, 'number_format': NUM}] * 4, font=DATA, border=BDR)
+
+    # ── 워크북 (셀 버퍼 → NamedStyle + write-only 저장) ──
+    wb = StyledWorkbook(style_prefix='오류리스트')
+    ws = wb.create_sheet('오류리스트')
+
+    month_int = int(cfg.MONTH)
+
+    # 컬럼 총 폭: 기본정보 8 + GERP 4 + 구ERP 4 + 결과 6 = 22 (기존 20 → +2: 받을금액, 제외사유)
+    TOTAL_COLS = 22
+    LAST_COL_LETTER = get_column_letter(TOTAL_COLS)
+
+    # Row 1: 타이틀
+    ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=TOTAL_COLS)
+    ws['A1'] = f'{month_int}월 조립비 정산 오류 리스트'
+    ws['A1'].font = Font(name='맑은 고딕', bold=True, size=12, color='1B2A4A')
+    ws['A1'].alignment = LA
+
+    # Row 2: 요약
+    summary = []
+    for t in TYPE_ORDER:
+        if t in tcnt:
+            summary.append(f"{t} {tcnt[t]}건({tamt[t]:+,}원)")
+    ws.merge_cells(start_row=2, start_column=1, end_row=2, end_column=TOTAL_COLS)
+    exc_info = ''
+    if excluded:
+        exc_by = Counter(e['excl'] for e in excluded)
+        exc_parts = [f"{k} {c}건" for k, c in exc_by.most_common()]
+        exc_info = f"  |  제외사유: {', '.join(exc_parts)} (합계 {sum(e['diff'] for e in excluded):+,}원)"
+    ws['A2'] = f"총 {len(errors)}건  |  " + '  |  '.join(summary) + f"  |  받을금액 {recv_total:,}원" + exc_info
+    ws['A2'].font = Font(name='맑은 고딕', size=9, color='555555')
+
+    # Row 3: 그룹 헤더 (결과 4→6: 차이금액/오류유형/비고/제외사유/받을금액/지원업체)
+    groups = [
+        ('기본정보', 8, DB_FILL, DB_FONT),
+        ('GERP', 4, G_FILL, G_FONT),
+        ('구ERP', 4, E_FILL, E_FONT),
+        ('결과', 6, RES_FILL, RES_FONT),
     ]
-    for ci, (v, align, fmt) in enumerate(vals, 1):
-        c = ws.cell(row, ci, v)
-        c.font = DATA; c.alignment = align; c.border = BDR
-        if fmt:
-            c.number_format = fmt
-
-    tf = TYPE_FILLS.get(e['err_type'])
-    if tf:
-        ws.cell(row, 18).fill = tf
-
-    if e['diff'] < 0:
-        ws.cell(row, 17).fill = NEG_FILL
-        ws.cell(row, 17).font = Font(name='맑은 고딕', size=9, color='CC0000')
-    elif e['diff'] > 0:
-        ws.cell(row, 17).fill = POS_FILL
-        ws.cell(row, 17).font = Font(name='맑은 고딕', size=9, color='006600')
-    row += 1
-
-# ── 합계행 ──
-for ci in range(1, TOTAL_COLS + 1):
-    c = ws.cell(row, ci)
-    c.fill = SUM_FILL; c.border = BDR; c.font = BOLD
-ws.cell(row, 1, '합계').alignment = CA
-
-for ci, key in [(9,'gerp_day_qty'),(10,'gerp_day_amt'),
-                (11,'gerp_ngt_qty'),(12,'gerp_ngt_amt')]:
-    c = ws.cell(row, ci, sum(e[key] for e in errors))
+    col = 1
+    for name, grp_span, fill, font in groups:
+        ws.merge_cells(start_row=3, start_column=col, end_row=3, end_column=col+grp_span-1)
+        c = ws.cell(3, col, name)
+        c.font = font; c.fill = fill; c.alignment = CA; c.border = BDR
+        for ci in range(col+1, col+grp_span):
+            cc = ws.cell(3, ci)
+            cc.fill = fill; cc.border = BDR
+        col += grp_span
+
+    # Row 4: 세부 헤더 — 1차 통합 사전 적용 (결과 그룹 6컬럼: 차이금액/오류유형/비고/제외사유/받을금액/지원업체)
+    headers = [
+        ('품번', 18, DB_FILL, DB_FONT), ('업체코드', 8, DB_FILL, DB_FONT),
+        ('라인코드', 10, DB_FILL, DB_FONT), ('조립품번', 16, DB_FILL, DB_FONT),
+        ('Usage', 7, DB_FILL, DB_FONT), ('단가구분', 8, DB_FILL, DB_FONT),
+        ('단가', 10, DB_FILL, DB_FONT), ('차종', 8, DB_FILL, DB_FONT),
+        ('주간수량', 10, G_FILL, G_FONT), ('주간금액', 13, G_FILL, G_FONT),
+        ('야간수량', 10, G_FILL, G_FONT), ('야간금액', 13, G_FILL, G_FONT),
+        ('주간수량', 10, E_FILL, E_FONT), ('주간금액', 13, E_FILL, E_FONT),
+        ('야간수량', 10, E_FILL, E_FONT), ('야간금액', 13, E_FILL, E_FONT),
+        ('차이금액', 13, RES_FILL, RES_FONT), ('오류유형', 12, RES_FILL, RES_FONT),
+        ('비고', 18, RES_FILL, RES_FONT), ('제외사유', 14, RES_FILL, RES_FONT),
+        ('받을금액', 13, RES_FILL, RES_FONT), ('지원업체', 12, RES_FILL, RES_FONT),
+    ]
+    for ci, (name, width, fill, font) in enumerate(headers, 1):
+        c = ws.cell(4, ci, name)
+        c.font = font; c.fill = fill; c.alignment = CA; c.border = BDR
+        ws.column_dimensions[get_column_letter(ci)].width = width
+
+    # ── 데이터 행 ──
+    row = 5
+    for e in errors:
+        vals = [
+            e['part_no'], VENDOR_CODE, e['line'], e['assy_part'],
+            e['usage'], e['price_type'], e['price'], e['vtype'],
+            e['gerp_day_qty'], e['gerp_day_amt'], e['gerp_ngt_qty'], e['gerp_ngt_amt'],
+            e['erp_day_qty'], e['erp_day_amt'], e['erp_ngt_qty'], e['erp_ngt_amt'],
+            e['diff'], e['err_type'], e.get('note', ''), e.get('excl_reason', ''),
+            e.get('recv_amt', abs(e['diff'])), e['sup_text'],
+        ]
+        sign = (e['diff'] > 0) - (e['diff'] < 0)
+        write_row(ws, row, vals, DATA_ROW,
+                  fills={17: {-1: NEG_FILL, 1: POS_FILL}.get(sign), 18: TYPE_FILLS.get(e['err_type'])},
+                  fonts={17: {-1: NEG_FONT, 1: POS_FONT}.get(sign)})
+        row += 1
+
+    # ── 합계행 ──
+    for ci in range(1, TOTAL_COLS + 1):
+        c = ws.cell(row, ci)
+        c.fill = SUM_FILL; c.border = BDR; c.font = BOLD
+    ws.cell(row, 1, '합계').alignment = CA
+
+    for ci, key in [(9,'gerp_day_qty'),(10,'gerp_day_amt'),
+                    (11,'gerp_ngt_qty'),(12,'gerp_ngt_amt')]:
+        c = ws.cell(row, ci, sum(e[key] for e in errors))
+        c.number_format = NUM; c.font = BOLD; c.alignment = RA
+        c.fill = SUM_FILL; c.border = BDR
+
+    for ci, key in [(13,'erp_day_qty'),(14,'erp_day_amt'),
+                    (15,'erp_ngt_qty'),(16,'erp_ngt_amt')]:
+        c = ws.cell(row, ci, sum(e[key] for e in errors))
+        c.number_format = NUM; c.font = BOLD; c.alignment = RA
+        c.fill = SUM_FILL; c.border = BDR
+
+    total_diff = sum(e['diff'] for e in errors)
+    c = ws.cell(row, 17, total_diff)
     c.number_format = NUM; c.font = BOLD; c.alignment = RA
-    c.fill = SUM_FILL; c.border = BDR
+    c.fill = NEG_FILL if total_diff < 0 else POS_FILL; c.border = BDR
+
+    ws.cell(row, 18, f"{len(errors)}건").font = BOLD
+    ws.cell(row, 18).alignment = CA; ws.cell(row, 18).fill = SUM_FILL; ws.cell(row, 18).border = BDR
 
-for ci, key in [(13,'erp_day_qty'),(14,'erp_day_amt'),
-                (15,'erp_ngt_qty'),(16,'erp_ngt_amt')]:
-    c = ws.cell(row, ci, sum(e[key] for e in errors))
+    # 받을금액 합계 (컬럼 21)
+    c = ws.cell(row, 21, recv_total)
     c.number_format = NUM; c.font = BOLD; c.alignment = RA
-    c.fill = SUM_FILL; c.border = BDR
-
-total_diff = sum(e['diff'] for e in errors)
-c = ws.cell(row, 17, total_diff)
-c.number_format = NUM; c.font = BOLD; c.alignment = RA
-c.fill = NEG_FILL if total_diff < 0 else POS_FILL; c.border = BDR
-
-ws.cell(row, 18, f"{len(errors)}건").font = BOLD
-ws.cell(row, 18).alignment = CA; ws.cell(row, 18).fill = SUM_FILL; ws.cell(row, 18).border = BDR
-
-# 받을금액 합계 (컬럼 21)
-c = ws.cell(row, 21, recv_total)
-c.number_format = NUM; c.font = BOLD; c.alignment = RA
-c.fill = POS_FILL; c.border = BDR
-
-# ── 유형별 요약 시트 ──
-ws2 = wb.create_sheet('유형별요약')
-ws2['A1'] = '오류 유형별 요약'
-ws2['A1'].font = Font(name='맑은 고딕', bold=True, size=11, color='1B2A4A')
-
-sum_hdrs = ['오류유형', '건수', 'GERP 합계', '구ERP 합계', '차이금액', '받을금액']
-for ci, h in enumerate(sum_hdrs, 1):
-    c = ws2.cell(3, ci, h)
-    c.font = RES_FONT; c.fill = RES_FILL; c.alignment = CA; c.border = BDR
-ws2.column_dimensions['A'].width = 14
-ws2.column_dimensions['B'].width = 8
-ws2.column_dimensions['C'].width = 15
-ws2.column_dimensions['D'].width = 15
-ws2.column_dimensions['E'].width = 15
-ws2.column_dimensions['F'].width = 15
-
-r = 4
-for t in TYPE_ORDER:
-    items = [e for e in errors if e['err_type'] == t]
-    if not items:
-        continue
-    g_sum = sum(e['gerp_day_amt']+e['gerp_ngt_amt'] for e in items)
-    e_sum = sum(e['erp_day_amt']+e['erp_ngt_amt'] for e in items)
-    d = g_sum - e_sum
-    recv = sum(e.get('recv_amt', abs(e['diff'])) for e in items)
-    vals2 = [t, len(items), g_sum, e_sum, d, recv]
-    for ci, v in enumerate(vals2, 1):
-        c = ws2.cell(r, ci, v)
-        c.font = DATA; c.border = BDR
-        c.alignment = CA if ci <= 2 else RA
-        if isinstance(v, (int, float)) and ci >= 3:
-            c.number_format = NUM
-    tf = TYPE_FILLS.get(t)
-    if tf:
-        ws2.cell(r, 1).fill = tf
-    if d < 0:
-        ws2.cell(r, 5).fill = NEG_FILL
-    elif d > 0:
-        ws2.cell(r, 5).fill = POS_FILL
-    if recv > 0:
-        ws2.cell(r, 6).fill = POS_FILL
-    r += 1
-
-for ci in range(1, 7):
-    ws2.cell(r, ci).fill = SUM_FILL; ws2.cell(r, ci).border = BDR; ws2.cell(r, ci).font = BOLD
-ws2.cell(r, 1, '합계').alignment = CA
-ws2.cell(r, 2, len(errors)).alignment = CA; ws2.cell(r, 2).number_format = NUM
-g_all = sum(e['gerp_day_amt']+e['gerp_ngt_amt'] for e in errors)
-e_all = sum(e['erp_day_amt']+e['erp_ngt_amt'] for e in errors)
-ws2.cell(r, 3, g_all).alignment = RA; ws2.cell(r, 3).number_format = NUM
-ws2.cell(r, 4, e_all).alignment = RA; ws2.cell(r, 4).number_format = NUM
-ws2.cell(r, 5, total_diff).alignment = RA; ws2.cell(r, 5).number_format = NUM
-ws2.cell(r, 5).fill = NEG_FILL if total_diff < 0 else POS_FILL
-ws2.cell(r, 6, recv_total).alignment = RA; ws2.cell(r, 6).number_format = NUM
-ws2.cell(r, 6).fill = POS_FILL
-
-ws.freeze_panes = 'A5'
-ws2.freeze_panes = 'A4'
-
-# ── 저장 ──
-print(f"\n[3/3] 저장...")
-output_dir = os.path.dirname(OUTPUT_FILE)
-error_file = os.path.join(output_dir, f'오류리스트_{MONTH}월.xlsx')
-wb.save(error_file)
-
-print(f"\n저장: {error_file}")
-print(f"오류 {len(errors)}건 | 차이합계: {total_diff:+,}원")
-print("Step 8 완료")
+    c.fill = POS_FILL; c.border = BDR
+    ws.freeze_panes = 'A5'
+
+    # ── 유형별 요약 시트 ──
+    ws2 = wb.create_sheet('유형별요약')
+    ws2['A1'] = '오류 유형별 요약'
+    ws2['A1'].font = Font(name='맑은 고딕', bold=True, size=11, color='1B2A4A')
+
+    sum_hdrs = ['오류유형', '건수', 'GERP 합계', '구ERP 합계', '차이금액', '받을금액']
+    for ci, h in enumerate(sum_hdrs, 1):
+        c = ws2.cell(3, ci, h)
+        c.font = RES_FONT; c.fill = RES_FILL; c.alignment = CA; c.border = BDR
+    ws2.column_dimensions['A'].width = 14
+    ws2.column_dimensions['B'].width = 8
+    ws2.column_dimensions['C'].width = 15
+    ws2.column_dimensions['D'].width = 15
+    ws2.column_dimensions['E'].width = 15
+    ws2.column_dimensions['F'].width = 15
+
+    r = 4
+    for t in TYPE_ORDER:
+        items = [e for e in errors if e['err_type'] == t]
+        if not items:
+            continue
+        g_sum = sum(e['gerp_day_amt']+e['gerp_ngt_amt'] for e in items)
+        e_sum = sum(e['erp_day_amt']+e['erp_ngt_amt'] for e in items)
+        d = g_sum - e_sum
+        recv = sum(e.get('recv_amt', abs(e['diff'])) for e in items)
+        write_row(ws2, r, [t, len(items), g_sum, e_sum, d, recv], TYPE_ROW,
+                  fills={1: TYPE_FILLS.get(t),
+                         5: NEG_FILL if d < 0 else (POS_FILL if d > 0 else None),
+                         6: POS_FILL if recv > 0 else None})
+        r += 1
+
+    for ci in range(1, 7):
+        ws2.cell(r, ci).fill = SUM_FILL; ws2.cell(r, ci).border = BDR; ws2.cell(r, ci).font = BOLD
+    ws2.cell(r, 1, '합계').alignment = CA
+    ws2.cell(r, 2, len(errors)).alignment = CA; ws2.cell(r, 2).number_format = NUM
+    g_all = sum(e['gerp_day_amt']+e['gerp_ngt_amt'] for e in errors)
+    e_all = sum(e['erp_day_amt']+e['erp_ngt_amt'] for e in errors)
+    ws2.cell(r, 3, g_all).alignment = RA; ws2.cell(r, 3).number_format = NUM
+    ws2.cell(r, 4, e_all).alignment = RA; ws2.cell(r, 4).number_format = NUM
+    ws2.cell(r, 5, total_diff).alignment = RA; ws2.cell(r, 5).number_format = NUM
+    ws2.cell(r, 5).fill = NEG_FILL if total_diff < 0 else POS_FILL
+    ws2.cell(r, 6, recv_total).alignment = RA; ws2.cell(r, 6).number_format = NUM
+    ws2.cell(r, 6).fill = POS_FILL
+
+    ws2.freeze_panes = 'A4'
+
+    # ── 저장 ──
+    print(f"\n[3/3] 저장...")
+    output_dir = os.path.dirname(cfg.OUTPUT_FILE)
+    error_file = os.path.join(output_dir, f'오류리스트_{cfg.MONTH}월.xlsx')
+    with span('save_xlsx', rows=len(errors)):
+        wb.save(error_file)
+
+    print(f"\n저장: {error_file}")
+    print(f"오류 {len(errors)}건 | 차이합계: {total_diff:+,}원")
+    print("Step 8 완료")
+    return {"step": 8, "output_file": error_file, "error_count": len(errors)}
+
+
+if __name__ == '__main__':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+    main(cfg=cli_config())
@@ -2,12 +2,12 @@
 # -*- coding: utf-8 -*-
 """
 테스트 공통 헬퍼
-- 더미 Excel 파일 생성 (GERP, 구ERP, 기준정보)
+- 더미 Excel 파일 생성 (GERP, 구ERP, 기준정보) — write-only 스트리밍, rows는 list·generator 모두 가능
+  (bench_pipeline.py가 100만 행 규모 월 데이터 생성에 그대로 사용)
 - _pipeline_config.py 임시 교체/복원 (ConfigPatch 컨텍스트 매니저)
-- Step 실행 + JSON 결과 반환
+- Step 실행 + 캐시 결과 반환 (.bin 바이너리·.json 모두 _step_io.read_cache로 로드)
 """
 
-import json
 import os
 import shutil
 import subprocess
@@ -21,6 +21,7 @@ import openpyxl
 TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
 PIPELINE_DIR = os.path.abspath(os.path.join(TESTS_DIR, '..'))
 CONFIG_FILE = os.path.join(PIPELINE_DIR, '_pipeline_config.py')
+sys.path.insert(0, PIPELINE_DIR)
 PYTHON = r'C:\Users\User\AppData\Local\Programs\Python\Python312\python.exe'
 
 LINE_ORDER = [
@@ -72,6 +73,10 @@ OUTPUT_FILE  = r'{os.path.join(tmp_dir, f"output_{month}월.xlsx")}'
 MONTH        = '{month}'
 VENDOR_CODE  = '0109'
 SP3M3_NIGHT_PRICE = 170
+OLDERP_SHEET = 'Sheet1'
+
+SP3M3_MODULE_FILE = r'{os.path.join(tmp_dir, "sp3m3_module.xlsx")}'
+LINE_ASSIGN_FILE  = r'{os.path.join(tmp_dir, "line_assign.xlsx")}'
 
 LINE_ORDER = [
     'SD9A01', 'SP3M3', 'WAMAS01', 'WABAS01',
@@ -91,6 +96,12 @@ LINE_INFO = {{
     'ISAMS03': {{'name': '\uc774\ub108\uc13c\uc2a4 ASSY', 'type': 'SUB',   'has_night': False}},
 }}
 
+LINE_GROUP = {{
+    'SD9A01': '완성품', 'ANAAS04': '완성품', 'DRAAS11': '완성품',
+    'SP3M3': '메인SUB', 'HASMS02': '메인SUB', 'HCAMS02': '메인SUB', 'ISAMS03': '메인SUB',
+    'WAMAS01': '웨빙SUB', 'WABAS01': '웨빙SUB', 'WASAS01': '웨빙SUB',
+}}
+
 OLD_ERP_LINE_MAP = {{
     'TD9':    'SD9A01',
     'D9N6':   'SD9A01',
@@ -101,6 +112,7 @@ GERP_COL = {{
     'line':       2,
     'product_no': 6,
     'usage':      10,
+    'assy_part':  11,
     'shift':      13,
     'qty':        14,
     'unit_price': 15,
@@ -130,10 +142,10 @@ MASTER_COL = {{
 }}
 
 CACHE_STEP1 = os.path.join(CACHE_DIR, 'step1_validation.json')
-CACHE_STEP2 = os.path.join(CACHE_DIR, 'step2_gerp.json')
-CACHE_STEP3 = os.path.join(CACHE_DIR, 'step3_olderp.json')
-CACHE_STEP4 = os.path.join(CACHE_DIR, 'step4_matched.json')
-CACHE_STEP5 = os.path.join(CACHE_DIR, 'step5_settlement.json')
+CACHE_STEP2 = os.path.join(CACHE_DIR, 'step2_gerp.bin')
+CACHE_STEP3 = os.path.join(CACHE_DIR, 'step3_olderp.bin')
+CACHE_STEP4 = os.path.join(CACHE_DIR, 'step4_matched.bin')
+CACHE_STEP5 = os.path.join(CACHE_DIR, 'step5_settlement.bin')
 
 os.makedirs(CACHE_DIR, exist_ok=True)
 """
@@ -146,7 +158,9 @@ def make_gerp(path: str, rows: list = None, ncols: int = 21):
     """
     GERP 더미 파일 생성.
     rows: 각 요소가 딕셔너리 {line, product_no, usage, shift, qty, unit_price, amount, vendor_cd}
+          (선택: vtype, assy_part) — iterable
     ncols: 총 컬럼 수 (기본 21 = 최소 요구)
+    반환: 데이터 행 수
     """
     if rows is None:
         rows = [
@@ -158,22 +172,25 @@ def make_gerp(path: str, rows: list = None, ncols: int = 21):
                  shift='정상', qty=200, unit_price=120, amount=24000, vendor_cd='0109'),
         ]
 
-    wb = openpyxl.Workbook()
-    ws = wb.active
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet('Sheet')
 
     # 헤더 2행
     for _ in range(2):
         ws.append(['HEADER'] * ncols)
 
     col = {
-        'line': 2, 'product_no': 6, 'usage': 10,
+        'line': 2, 'vtype': 5, 'product_no': 6, 'usage': 10, 'assy_part': 11,
         'shift': 13, 'qty': 14, 'unit_price': 15,
         'amount': 16, 'vendor_cd': 20,
     }
 
+    n = 0
     for r in rows:
         row_data = [None] * ncols
         row_data[col['line']]       = r.get('line', '')
+        row_data[col['vtype']]      = r.get('vtype')
+        row_data[col['assy_part']]  = r.get('assy_part')
         row_data[col['product_no']] = r.get('product_no', '')
         row_data[col['usage']]      = r.get('usage', 1)
         row_data[col['shift']]      = r.get('shift', '정상')
@@ -182,14 +199,17 @@ def make_gerp(path: str, rows: list = None, ncols: int = 21):
         row_data[col['amount']]     = r.get('amount', 0)
         row_data[col['vendor_cd']]  = r.get('vendor_cd', '0109')
         ws.append(row_data)
+        n += 1
 
     wb.save(path)
+    return n
 
 
 def make_olderp(path: str, rows: list = None, ncols: int = 13):
     """
     구ERP 더미 파일 생성 (Sheet1).
-    rows: {vendor, part_no, qty, line_code, lot_no, unit_cost, amount}
+    rows: {vendor, part_no, qty, line_code, lot_no, unit_cost, amount} — iterable
+    반환: 데이터 행 수
     """
     if rows is None:
         rows = [
@@ -201,9 +221,8 @@ def make_olderp(path: str, rows: list = None, ncols: int = 13):
                  line_code='SP3S03', lot_no='2026-03A', unit_cost=120, amount=23400),
         ]
 
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = 'Sheet1'
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet('Sheet1')
 
     for _ in range(2):
         ws.append(['HEADER'] * ncols)
@@ -213,6 +232,7 @@ def make_olderp(path: str, rows: list = None, ncols: int = 13):
         'line_code': 7, 'lot_no': 10, 'unit_cost': 11, 'amount': 12,
     }
 
+    n = 0
     for r in rows:
         row_data = [None] * ncols
         row_data[col['vendor']]    = r.get('vendor', '0109')
@@ -223,8 +243,10 @@ def make_olderp(path: str, rows: list = None, ncols: int = 13):
         row_data[col['unit_cost']] = r.get('unit_cost', 0)
         row_data[col['amount']]    = r.get('amount', 0)
         ws.append(row_data)
+        n += 1
 
     wb.save(path)
+    return n
 
 
 def make_master(path: str, rows_per_line: dict = None, ncols: int = 8):
@@ -253,8 +275,7 @@ def make_master(path: str, rows_per_line: dict = None, ncols: int = 8):
             if lc not in rows_per_line:
                 rows_per_line[lc] = DEFAULT_PARTS.get(lc, [])
 
-    wb = openpyxl.Workbook()
-    wb.remove(wb.active)
+    wb = openpyxl.Workbook(write_only=True)
 
     col_order = ['part_no', 'vendor_cd', 'line_code', 'assy_part',
                  'usage', 'price_type', 'price', 'vtype']
@@ -271,10 +292,23 @@ def make_master(path: str, rows_per_line: dict = None, ncols: int = 8):
     wb.save(path)
 
 
-# ── Step 실행 + 결과 JSON 로드 ─────────────────────────────────
+def make_sp3m3_module(path: str, mapping: dict):
+    """
+    SP3M3 모듈품번 매핑 더미 파일 생성 (B=기본품번, D=모듈품번).
+    mapping: {RSP 모듈품번: 기본품번}
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet('Sheet')
+    ws.append(['No', '기본품번', '품명', '모듈품번'])
+    for i, (rsp, base) in enumerate(mapping.items(), 1):
+        ws.append([i, base, '', rsp])
+    wb.save(path)
+
+
+# ── Step 실행 + 결과 캐시 로드 ─────────────────────────────────
 def run_step(step_name: str, cache_path: str) -> dict:
     """
-    파이프라인 스크립트를 subprocess로 실행하고, cache_path의 JSON을 반환.
+    파이프라인 스크립트를 subprocess로 실행하고, cache_path 캐시(.bin / .json)를 반환.
     반환값: {'exit_code': int, 'stdout': str, 'result': dict or None}
     """
     script = os.path.join(PIPELINE_DIR, step_name)
@@ -287,10 +321,8 @@ def run_step(step_name: str, cache_path: str) -> dict:
         errors='replace',
     )
 
-    result = None
-    if os.path.exists(cache_path):
-        with open(cache_path, encoding='utf-8') as f:
-            result = json.load(f)
+    from _step_io import read_cache
+    result = read_cache(cache_path)
 
     return {
         'exit_code': proc.returncode,
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+수식버전 레이아웃 재계산 비교 — classic(전체열 SUMIFS/COUNTIF) vs indexed(GERP_집계 키 시트 + 보조열)
+
+같은 월 입력으로 build_formula_version.py --layout classic / indexed 를 차례로 실행하고 레이아웃별로 측정한다.
+
+측정 항목:
+  - build_sec     : 빌더 전체 소요시간 (8-1 cached value 계산 포함)
+  - formulas      : 수식 셀 수
+  - whole_col     : 전체열 참조(A:A 등) 개수
+  - criteria_cells: SUMIF/SUMIFS/COUNTIF(S) 조건 범위 스캔 셀 수 합 (전체열은 시트 사용 행까지)
+                    — 엑셀 재계산 비용의 대부분. 엑셀 없는 PC에서의 비교 지표
+  - pyeval_sec    : _xlsx_eval 전체 재계산 시간 (fill_cached_values — 조건 열 해시 인덱스라 엑셀보다 차이가 작게 나온다)
+  - excel_sec     : Excel COM CalculateFull 시간 (pywin32 + Excel 있는 PC만, --excel-repeat회 중앙값)
+값 확인: 두 레이아웃 계산값이 공통 시트(사용법·GERP_입력·GERP_집계 제외) A~S 열에서 같아야 한다 — 다르면 exit 1.
+
+실행:
+  PYTHONUTF8=1 python tests/bench_formula_layout.py                 # 합성 10k 월 (bench_pipeline 생성기, seed 고정)
+  PYTHONUTF8=1 python tests/bench_formula_layout.py --size 100k
+  PYTHONUTF8=1 python tests/bench_formula_layout.py --real          # _pipeline_config 실제 월 (운영 PC)
+
+--real 주의: 빌더를 두 번 실제 실행한다 — 마스터 V2 자동 갱신·백업, 본체 저장이 평소처럼 일어난다.
+classic → indexed 순서로 실행하므로 마지막에 남는 본체는 기본 레이아웃(indexed).
+
+결과: tests/bench_results/{시각}_formula_layout_{규모|real}/ (레이아웃별 xlsx + bench.json)
+종료 코드: 0 = 값 일치, 1 = 값 불일치, 2 = 실행 실패
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import openpyxl
+import _test_helpers as H
+import bench_pipeline as BP
+from _xlsx_eval import WorkbookEvaluator, Unsupported, fill_cached_values, parse_formula
+
+LAYOUTS = ('classic', 'indexed')
+CRITERIA_FUNCS = {'SUMIF', 'SUMIFS', 'COUNTIF', 'COUNTIFS'}
+SKIP_SHEETS = {'사용법', 'GERP_입력', 'GERP_집계'}   # 레이아웃별 구성이 다른 시트
+COMPARE_COLS = 19                                   # 라인 시트 A~S (T/U 보조열은 indexed 전용)
+
+
+# ── 빌드 ──────────────────────────────────────────────────────
+def output_path(base_dir, month):
+    """build_formula_version.py 본체 저장 경로 (빌더와 같은 규칙)."""
+    folder = f'{int(month) % 12 + 1:02d}월'
+    return os.path.join(base_dir, folder, f'정산_수식버전_{month}월.xlsx')
+
+
+def run_build(layout):
+    env = dict(os.environ, PYTHONUTF8='1')
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, os.path.join(H.PIPELINE_DIR, 'build_formula_version.py'), '--layout', layout],
+        cwd=H.PIPELINE_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        text=True, encoding='utf-8', errors='replace',
+    )
+    elapsed = time.perf_counter() - t0
+    if proc.returncode:
+        print(proc.stdout[-3000:])
+        raise RuntimeError(f"build_formula_version --layout {layout} 실패 (exit={proc.returncode})")
+    return round(elapsed, 2), proc.stdout
+
+
+# ── 측정 ──────────────────────────────────────────────────────
+def _walk(node):
+    yield node
+    if node[0] == 'call':
+        for a in node[2]:
+            yield from _walk(a)
+    elif node[0] == 'bin':
+        yield from _walk(node[2])
+        yield from _walk(node[3])
+    elif node[0] == 'neg':
+        yield from _walk(node[1])
+
+
+def _criteria_ranges(node):
+    """조건 함수 호출의 조건 범위 인자 (SUMIF: 1번째, SUMIFS: 2·4·…번째, COUNTIF(S): 1·3·…번째)."""
+    name, args = node[1], node[2]
+    if name == 'SUMIF':
+        idx = [0]
+    elif name == 'SUMIFS':
+        idx = range(1, len(args) - 1, 2)
+    else:
+        idx = range(0, len(args) - 1, 2)
+    return [args[i] for i in idx if args[i][0] == 'ref']
+
+
+def formula_cost(path):
+    """수식 셀 수 / 전체열 참조 수 / 조건 범위 스캔 셀 수."""
+    ev = WorkbookEvaluator(path)
+    formulas = whole_col = criteria_cells = unparsed = 0
+    for sheet, r, c in ev.formula_cells():
+        formulas += 1
+        try:
+            ast = parse_formula(ev.sheets[sheet][(r, c)])
+        except Unsupported:
+            unparsed += 1
+            continue
+        for node in _walk(ast):
+            if node[0] == 'ref' and node[2] is None:
+                whole_col += 1
+            if node[0] == 'call' and node[1] in CRITERIA_FUNCS:
+                for ref in _criteria_ranges(node):
+                    _, sh, r1, c1, r2, c2 = ref
+                    sh = ev._sheet(sh, sheet)
+                    used = ev.max_row.get(sh, 0)
+                    top, bottom = (1, used) if r1 is None else (r1, min(r2, used))
+                    criteria_cells += max(0, bottom - top + 1) * (c2 - c1 + 1)
+    return {'formulas': formulas, 'whole_col': whole_col, 'criteria_cells': criteria_cells,
+            'unparsed': unparsed}
+
+
+def excel_recalc(path, repeat):
+    """Excel COM CalculateFull 중앙값(초). pywin32/Excel 없으면 None."""
+    try:
+        import win32com.client as w32
+        import pythoncom
+    except ImportError:
+        return None
+    pythoncom.CoInitialize()
+    excel = wb = None
+    try:
+        excel = w32.DispatchEx('Excel.Application')
+        excel.Visible = False
+        excel.DisplayAlerts = False
+        excel.ScreenUpdating = False
+        wb = excel.Workbooks.Open(os.path.abspath(path), UpdateLinks=0, ReadOnly=True)
+        secs = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            excel.CalculateFull()
+            secs.append(time.perf_counter() - t0)
+        return round(statistics.median(secs), 2)
+    finally:
+        try:
+            if wb is not None:
+                wb.Close(SaveChanges=False)
+            if excel is not None:
+                excel.Quit()
+        finally:
+            pythoncom.CoUninitialize()
+
+
+def measure(layout, src, result_dir, excel_repeat):
+    """빌더 출력 사본 → 측정 dict + 계산값 사본 경로."""
+    kept = os.path.join(result_dir, f'{layout}.xlsx')
+    shutil.copy2(src, kept)
+    row = formula_cost(kept)
+    evaluated = os.path.join(result_dir, f'{layout}_values.xlsx')
+    ev = fill_cached_values(kept, evaluated)
+    row['pyeval_sec'] = round(ev['seconds'], 2)
+    row['pyeval_unsupported'] = ev['unsupported']
+    row['excel_sec'] = excel_recalc(kept, excel_repeat)
+    return row, evaluated
+
+
+# ── 값 비교 ───────────────────────────────────────────────────
+def _same(a, b):
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return abs(a - b) <= 1e-6 * max(1.0, abs(a), abs(b))
+    return a == b
+
+
+def compare_values(path_a, path_b, limit=10):
+    """공통 시트 A~S 계산값 비교 → (비교 셀 수, 불일치 목록)."""
+    wa = openpyxl.load_workbook(path_a, data_only=True, read_only=True)
+    wb = openpyxl.load_workbook(path_b, data_only=True, read_only=True)
+    try:
+        cells, diffs = 0, []
+        for name in wa.sheetnames:
+            if name in SKIP_SHEETS or name not in wb.sheetnames:
+                continue
+            rows_a = list(wa[name].iter_rows(max_col=COMPARE_COLS, values_only=True))
+            rows_b = list(wb[name].iter_rows(max_col=COMPARE_COLS, values_only=True))
+            for r in range(max(len(rows_a), len(rows_b))):
+                ra = rows_a[r] if r < len(rows_a) else ()
+                rb = rows_b[r] if r < len(rows_b) else ()
+                for c in range(COMPARE_COLS):
+                    va = ra[c] if c < len(ra) else None
+                    vb = rb[c] if c < len(rb) else None
+                    cells += 1
+                    if not _same(va, vb) and len(diffs) < limit:
+                        diffs.append(f'{name}!{openpyxl.utils.get_column_letter(c + 1)}{r + 1}: {va!r} ≠ {vb!r}')
+        return cells, diffs
+    finally:
+        wa.close()
+        wb.close()
+
+
+# ── 실행 ──────────────────────────────────────────────────────
+def bench_layouts(base_dir, month, result_dir, excel_repeat, restore=None):
+    """레이아웃별 빌드 + 측정. restore = 실행 전 되돌릴 {경로: 원본 사본} (합성 월 마스터 자동 갱신 격리)."""
+    out = output_path(base_dir, month)
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    rows, evaluated = {}, {}
+    for layout in LAYOUTS:
+        for path, orig in (restore or {}).items():
+            shutil.copy2(orig, path)
+        print(f"[{layout}] build_formula_version --layout {layout} ...")
+        build_sec, log = run_build(layout)
+        with open(os.path.join(result_dir, f'{layout}_build.log'), 'w', encoding='utf-8') as f:
+            f.write(log)
+        print(f"[{layout}] 측정 (수식 비용 · Python 재계산 · Excel CalculateFull) ...")
+        row, evaluated[layout] = measure(layout, out, result_dir, excel_repeat)
+        rows[layout] = dict(row, build_sec=build_sec)
+    return rows, evaluated
+
+
+def print_table(rows):
+    keys = ('build_sec', 'formulas', 'whole_col', 'criteria_cells', 'pyeval_sec', 'excel_sec')
+    print(f"\n  {'항목':<16} {'classic':>14} {'indexed':>14} {'indexed/classic':>16}")
+    for k in keys:
+        a, b = rows['classic'].get(k), rows['indexed'].get(k)
+        ratio = f'{b / a:.3f}' if isinstance(a, (int, float)) and isinstance(b, (int, float)) and a else '-'
+        fa = '-' if a is None else f'{a:,}'
+        fb = '-' if b is None else f'{b:,}'
+        print(f"  {k:<16} {fa:>14} {fb:>14} {ratio:>16}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description='수식버전 classic/indexed 레이아웃 재계산 비교')
+    ap.add_argument('--size', choices=list(BP.SIZES), default='10k', help='합성 월 GERP 행 규모 (default 10k)')
+    ap.add_argument('--real', action='store_true', help='_pipeline_config 실제 월로 측정 (운영 PC)')
+    ap.add_argument('--excel-repeat', type=int, default=3, help='Excel CalculateFull 반복 횟수 (중앙값)')
+    ap.add_argument('--keep', action='store_true', help='합성 데이터 폴더 보존')
+    args = ap.parse_args()
+
+    tag = 'real' if args.real else args.size
+    stamp = datetime.now().strftime('%Y-%m-%d_%H%M%S')
+    result_dir = os.path.join(BP.RESULT_DIR, f'{stamp}_formula_layout_{tag}')
+    os.makedirs(result_dir, exist_ok=True)
+
+    data = None
+    try:
+        if args.real:
+            import _pipeline_config as cfg
+            month = cfg.MONTH
+            rows, evaluated = bench_layouts(cfg.BASE_DIR, month, result_dir, args.excel_repeat)
+        else:
+            month = BP.MONTH
+            data_dir = tempfile.mkdtemp(prefix=f'bench_layout_{tag}_')
+            print(f"[{tag}] 합성 월 생성 (GERP {BP.SIZES[args.size]:,}행) → {data_dir}")
+            data = BP.generate_month(data_dir, BP.SIZES[args.size])
+            master = os.path.join(data_dir, 'master.xlsx')
+            master_orig = os.path.join(data_dir, 'master_orig.xlsx')
+            shutil.copy2(master, master_orig)
+            with H.patch_config(data_dir, month=month):
+                rows, evaluated = bench_layouts(data_dir, month, result_dir, args.excel_repeat,
+                                                restore={master: master_orig})
+            if args.keep:
+                print(f"  데이터 보존: {data_dir}")
+            else:
+                shutil.rmtree(data_dir, ignore_errors=True)
+    except RuntimeError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(2)
+
+    cells, diffs = compare_values(evaluated['classic'], evaluated['indexed'])
+    print_table(rows)
+    print(f"\n  값 비교: {cells:,}셀 (공통 시트 A~S) — {'일치' if not diffs else f'불일치 {len(diffs)}건+'}")
+    for d in diffs:
+        print(f"    {d}")
+
+    result = {
+        'target': tag, 'month': month, 'timestamp': stamp,
+        'machine': {'platform': platform.platform(), 'processor': platform.processor(),
+                    'python': platform.python_version(), 'cpus': os.cpu_count()},
+        'data': data, 'layouts': rows, 'compared_cells': cells, 'diffs': diffs,
+    }
+    with open(os.path.join(result_dir, 'bench.json'), 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"  결과: {result_dir}")
+    sys.exit(1 if diffs else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+정산 파이프라인 합성 데이터 벤치마크 — 10k / 100k / 1M GERP 행
+
+_test_helpers의 make_gerp / make_olderp / make_master로 재현 가능한 월 데이터를 만들고
+(전 LINE_ORDER 라인, 라인별 비중은 02월 실적 상세 행 수 기준), Step 1~8과 수식버전 빌드
+(build_formula_version.py)를 실행해 소요시간을 측정한다. 결과는 JSON으로 남기고 기준선과 비교한다.
+
+생성 데이터 (seed 고정 — 같은 규모면 같은 파일):
+  - 기준정보 : 품번 = GERP 행 / 3, 7번째마다 다중단가 · 9번째마다 동일단가 중복 · 11번째마다 Usage 2 · ASSY 품번
+  - GERP     : 대원테크 97% (+타업체), SD9A01·SP3M3 야간(추가) 30%, 다중단가 품번은 단가 교대,
+               SVM/OVK 이관 차종 1%, SP3M3 야간 RSP 모듈품번 5% (모듈품번 파일 매핑 + 미매핑 일부)
+  - 구ERP    : GERP 행 × 1.05, 대원테크 SD9A01(TD9·D9N6)·SP3M3(SP3S03) + 타업체 SUB 라인, LOTNO A/B/C/S
+
+측정 (Step은 실행기 --jobs 1 in-process 순차 — 겹침 없는 Step별 시간):
+  - Step 1~8 소요시간 · CPU · 최대 RSS · 구간(span) 계측 (run_settlement_pipeline _summary.json 그대로)
+  - build_formula_version.py 전체 소요시간 (--skip-build로 생략)
+  - 첫 실행 기준 (ingest sidecar·기준정보 인덱스 없음 = 월초 첫 실행과 같은 조건)
+
+기준선: tests/bench_baselines/bench_{규모}.json (PC별 — 다른 PC 결과와 비교하지 않는다)
+  - 항목별 최근/기준 비율 ≥ ratio 이고 차이 ≥ min_sec 이면 회귀 (기준선 파일의 thresholds, 기본 1.25배 / 1초)
+
+실행:
+  python tests/bench_pipeline.py                        # 10k 측정 + 기준선 비교
+  python tests/bench_pipeline.py --size 10k 100k --save-baseline
+  python tests/bench_pipeline.py --size 1m --skip-build --keep
+
+종료 코드: 0 = 회귀 없음(또는 기준선 없음), 1 = 회귀 있음, 2 = 실행 실패
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import _test_helpers as H
+from _settlement_rules import OVK_TRANSFER_LINES, SVM_TRANSFER_LINES
+
+SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+BASELINE_DIR = os.path.join(H.TESTS_DIR, 'bench_baselines')
+RESULT_DIR = os.path.join(H.TESTS_DIR, 'bench_results')
+LOG_DIR = os.path.join(H.PIPELINE_DIR, 'run_logs')
+DEFAULT_THRESHOLDS = {'ratio': 1.25, 'min_sec': 1.0}
+MONTH = '01'
+
+# 라인별 비중 — 02월 실적 상세 행 수 (README 시트 구성)
+LINE_WEIGHT = {
+    'SD9A01': 629, 'SP3M3': 1455, 'WAMAS01': 10318, 'WABAS01': 1349, 'ANAAS04': 614,
+    'DRAAS11': 398, 'WASAS01': 245, 'HCAMS02': 1282, 'HASMS02': 40, 'ISAMS03': 225,
+}
+NIGHT_LINES = ('SD9A01', 'SP3M3')
+OLD_LINE_CODE = {'SD9A01': ('TD9', 'D9N6'), 'SP3M3': ('SP3S03',)}
+PRICES = (120, 300, 450, 600, 900, 1500)
+
+
+# ── 합성 월 데이터 ─────────────────────────────────────────────
+def _parts(n_gerp, rnd):
+    """라인별 품번 목록 [(품번, 단가 목록)] — 라인 비중대로 배분 (라인당 최소 10개)."""
+    n_parts = max(len(LINE_WEIGHT) * 10, n_gerp // 3)
+    total = sum(LINE_WEIGHT.values())
+    parts = {}
+    for lc in H.LINE_ORDER:
+        n = max(10, n_parts * LINE_WEIGHT[lc] // total)
+        items = []
+        for i in range(n):
+            price = float(rnd.choice(PRICES))
+            prices = [price, price + 50] if i % 7 == 0 else [price]
+            items.append((f'{lc[:3]}{i:06d}', prices))
+        parts[lc] = items
+    return parts
+
+
+def _master_rows(parts):
+    rows = {}
+    for lc, items in parts.items():
+        out = []
+        for i, (pn, prices) in enumerate(items):
+            for price in prices:
+                out.append(dict(part_no=pn, vendor_cd=H.VENDOR_CODE, line_code=lc,
+                                assy_part=f'AS{pn}' if i % 3 == 0 else '', usage=2 if i % 11 == 0 else 1,
+                                price_type='기준', price=price, vtype=lc))
+            if i % 9 == 0:   # 같은 단가 중복 등록
+                out.append(dict(out[-1]))
+        rows[lc] = out
+    return rows
+
+
+def _line_plan(n_rows, rnd):
+    """GERP 행마다 라인 — 비중대로 섞은 순서 (생성기 소비용)."""
+    total = sum(LINE_WEIGHT.values())
+    plan = []
+    for lc in H.LINE_ORDER:
+        plan += [lc] * (n_rows * LINE_WEIGHT[lc] // total)
+    plan += [H.LINE_ORDER[0]] * (n_rows - len(plan))
+    rnd.shuffle(plan)
+    return plan
+
+
+def _gerp_rows(n_rows, parts, rsp_map, seed):
+    rnd = random.Random(seed)
+    rsp_of = {base: rsp for rsp, base in rsp_map.items()}
+    for k, lc in enumerate(_line_plan(n_rows, rnd)):
+        pn, prices = rnd.choice(parts[lc])
+        price = prices[k % len(prices)]
+        night = lc in NIGHT_LINES and rnd.random() < 0.3
+        qty = rnd.randint(1, 400)
+        vtype = lc
+        r = rnd.random()
+        if r < 0.01 and lc in SVM_TRANSFER_LINES:
+            vtype = 'SVM'
+        elif r < 0.01 and lc in OVK_TRANSFER_LINES:
+            vtype = 'OVK'
+        if night and lc == 'SP3M3' and rnd.random() < 0.05:
+            pn = rsp_of.get(pn, f'RSP{pn}X')     # 매핑 없는 RSP = 미매핑 경고 경로
+        yield dict(line=lc, product_no=pn, usage=1, shift='추가' if night else '정상', qty=qty,
+                   unit_price=price, amount=qty * price, vtype=vtype,
+                   vendor_cd=H.VENDOR_CODE if rnd.random() < 0.97 else '0200')
+
+
+def _olderp_rows(n_rows, parts, seed):
+    rnd = random.Random(seed + 1)
+    lines = list(parts)
+    for _ in range(n_rows):
+        lc = rnd.choice(lines)
+        pn, prices = rnd.choice(parts[lc])
+        qty = rnd.randint(1, 400)
+        if lc in OLD_LINE_CODE:
+            vendor, line_code = H.VENDOR_CODE, rnd.choice(OLD_LINE_CODE[lc])
+        else:
+            vendor, line_code = '0200[타사]', 'ZZ'
+        yield dict(vendor=vendor, part_no=pn, qty=qty, line_code=line_code,
+                   lot_no='260301' + rnd.choice('AABCS'), unit_cost=prices[0], amount=qty * prices[0])
+
+
+def generate_month(data_dir, n_gerp, seed=2026):
+    """data_dir에 master/gerp/olderp/sp3m3_module.xlsx 생성 → 행 수 dict."""
+    rnd = random.Random(seed)
+    parts = _parts(n_gerp, rnd)
+    master = _master_rows(parts)
+    sp3 = parts['SP3M3']
+    rsp_map = {f'RSP{pn}': pn for pn, _ in sp3[::2]}    # SP3M3 절반만 모듈품번 매핑
+    H.make_master(os.path.join(data_dir, 'master.xlsx'), master)
+    H.make_sp3m3_module(os.path.join(data_dir, 'sp3m3_module.xlsx'), rsp_map)
+    n_g = H.make_gerp(os.path.join(data_dir, 'gerp.xlsx'), _gerp_rows(n_gerp, parts, rsp_map, seed))
+    n_o = H.make_olderp(os.path.join(data_dir, 'olderp.xlsx'),
+                        _olderp_rows(int(n_gerp * 1.05), parts, seed))
+    return {'gerp_rows': n_g, 'olderp_rows': n_o, 'master_rows': sum(len(v) for v in master.values()),
+            'parts': sum(len(v) for v in parts.values())}
+
+
+# ── 실행 ──────────────────────────────────────────────────────
+def run_pipeline(result_dir, tag):
+    """실행기 --jobs 1 실행 → _summary.json dict. 로그·요약은 run_logs/에서 결과 폴더로 옮긴다."""
+    before = set(os.listdir(LOG_DIR)) if os.path.isdir(LOG_DIR) else set()
+    env = dict(os.environ, PYTHONUTF8='1')
+    proc = subprocess.run(
+        [sys.executable, os.path.join(H.PIPELINE_DIR, 'run_settlement_pipeline.py'), '--jobs', '1'],
+        cwd=H.PIPELINE_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        text=True, encoding='utf-8', errors='replace',
+    )
+    summary = None
+    for name in sorted(set(os.listdir(LOG_DIR)) - before):
+        dest = os.path.join(result_dir, f'{tag}_{name}')
+        shutil.move(os.path.join(LOG_DIR, name), dest)
+        if name.endswith('_summary.json'):
+            with open(dest, encoding='utf-8') as f:
+                summary = json.load(f)
+    if proc.returncode or summary is None:
+        print(proc.stdout[-3000:])
+        raise RuntimeError(f"파이프라인 실패 (exit={proc.returncode})")
+    return summary
+
+
+def run_build(data_dir):
+    """build_formula_version.py 실행 → 소요시간(초)."""
+    os.makedirs(os.path.join(data_dir, f'{int(MONTH) % 12 + 1:02d}월'), exist_ok=True)
+    env = dict(os.environ, PYTHONUTF8='1')
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, os.path.join(H.PIPELINE_DIR, 'build_formula_version.py')],
+        cwd=H.PIPELINE_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        text=True, encoding='utf-8', errors='replace',
+    )
+    elapsed = time.perf_counter() - t0
+    if proc.returncode:
+        print(proc.stdout[-3000:])
+        raise RuntimeError(f"build_formula_version 실패 (exit={proc.returncode})")
+    return round(elapsed, 2)
+
+
+def bench(size, skip_build=False, keep=False):
+    """규모 1개 측정 → 결과 dict (metrics = {항목: 초})."""
+    n_gerp = SIZES[size]
+    stamp = datetime.now().strftime('%Y-%m-%d_%H%M%S')
+    result_dir = os.path.join(RESULT_DIR, f'{stamp}_{size}')
+    os.makedirs(result_dir, exist_ok=True)
+    data_dir = tempfile.mkdtemp(prefix=f'bench_{size}_')
+    try:
+        print(f"\n[{size}] 데이터 생성 (GERP {n_gerp:,}행) → {data_dir}")
+        t0 = time.perf_counter()
+        counts = generate_month(data_dir, n_gerp)
+        gen_sec = round(time.perf_counter() - t0, 2)
+        print(f"  {counts}  ({gen_sec}초)")
+
+        with H.patch_config(data_dir, month=MONTH):
+            print(f"[{size}] 파이프라인 실행 (--jobs 1)...")
+            summary = run_pipeline(result_dir, size)
+            build_sec = None
+            if not skip_build:
+                print(f"[{size}] build_formula_version 실행...")
+                build_sec = run_build(data_dir)
+    finally:
+        if keep:
+            print(f"  데이터 보존: {data_dir}")
+        else:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    metrics = {f"step{s['step']}": s['elapsed_sec'] for s in summary['steps']}
+    spans = {}
+    for s in summary['steps']:
+        for sp in s.get('spans', []):
+            key = f"step{s['step']}.{sp['name']}"
+            spans[key] = round(spans.get(key, 0.0) + sp['wall_sec'], 3)
+    metrics['pipeline_total'] = summary['total_elapsed_sec']
+    if build_sec is not None:
+        metrics['build_formula'] = build_sec
+    result = {
+        'size': size,
+        'timestamp': stamp,
+        'machine': {'platform': platform.platform(), 'processor': platform.processor(),
+                    'python': platform.python_version(), 'cpus': os.cpu_count()},
+        'data': counts,
+        'generate_sec': gen_sec,
+        'metrics': metrics,
+        'spans': spans,
+        'peak_rss_mb': {f"step{s['step']}": s.get('peak_rss_mb') for s in summary['steps']},
+    }
+    with open(os.path.join(result_dir, 'bench.json'), 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    return result
+
+
+# ── 기준선 ────────────────────────────────────────────────────
+def baseline_path(size):
+    return os.path.join(BASELINE_DIR, f'bench_{size}.json')
+
+
+def save_baseline(result):
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    path = baseline_path(result['size'])
+    thresholds = DEFAULT_THRESHOLDS
+    if os.path.exists(path):     # 기존 임계값(수동 조정분) 유지
+        with open(path, encoding='utf-8') as f:
+            thresholds = json.load(f).get('thresholds', DEFAULT_THRESHOLDS)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(dict(result, thresholds=thresholds), f, ensure_ascii=False, indent=2)
+    print(f"  기준선 저장: {path}")
+
+
+def compare(result, base):
+    """결과 vs 기준선 → 회귀 항목 수 (표 출력)."""
+    th = dict(DEFAULT_THRESHOLDS, **base.get('thresholds', {}))
+    if base.get('machine', {}).get('platform') != result['machine']['platform']:
+        print(f"  [WARN] 기준선 PC 다름: {base.get('machine', {}).get('platform')} — 비교 참고용")
+    if base.get('data') != result['data']:
+        print(f"  [WARN] 생성 데이터 다름 (생성기 변경?): 기준 {base.get('data')} / 최근 {result['data']}")
+    print(f"  {'항목':<16} {'기준(s)':>9} {'최근(s)':>9} {'비율':>6}  (회귀: ≥{th['ratio']}배 & ≥{th['min_sec']}초)")
+    regressions = 0
+    for key, cur in result['metrics'].items():
+        ref = base.get('metrics', {}).get(key)
+        if ref is None:
+            print(f"  {key:<16} {'-':>9} {cur:>9.2f}")
+            continue
+        ratio = cur / ref if ref > 0 else float('inf')
+        bad = ratio >= th['ratio'] and cur - ref >= th['min_sec']
+        regressions += bad
+        print(f"  {key:<16} {ref:>9.2f} {cur:>9.2f} {ratio:>6.2f}  {'← 회귀' if bad else ''}")
+        if bad:   # 원인 구간
+            prefix = f'{key}.'
+            for sk, sv in result['spans'].items():
+                sref = base.get('spans', {}).get(sk)
+                if sk.startswith(prefix) and sref and sv - sref >= th['min_sec']:
+                    print(f"    · {sk[len(prefix):]}: {sref:.2f}s → {sv:.2f}s")
+    return regressions
+
+
+# ── 메인 ──────────────────────────────────────────────────────
+def main():
+    ap = argparse.ArgumentParser(description='정산 파이프라인 합성 데이터 벤치마크')
+    ap.add_argument('--size', nargs='+', choices=list(SIZES), default=['10k'],
+                    help='GERP 행 규모 (10k / 100k / 1m, 여러 개 가능)')
+    ap.add_argument('--save-baseline', action='store_true', help='측정 결과를 기준선으로 저장')
+    ap.add_argument('--skip-build', action='store_true', help='build_formula_version 측정 생략')
+    ap.add_argument('--keep', action='store_true', help='생성 데이터 폴더 보존')
+    args = ap.parse_args()
+
+    regressions = 0
+    for size in args.size:
+        try:
+            result = bench(size, args.skip_build, args.keep)
+        except RuntimeError as e:
+            print(f"[ERROR] {size}: {e}")
+            sys.exit(2)
+        print(f"\n[{size}] 결과 (총 {result['metrics']['pipeline_total']:.1f}초)")
+        path = baseline_path(size)
+        if args.save_baseline:
+            save_baseline(result)
+        elif os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                regressions += compare(result, json.load(f))
+        else:
+            for key, sec in result['metrics'].items():
+                print(f"  {key:<16} {sec:>9.2f}")
+            print(f"  기준선 없음 — --save-baseline으로 저장: {path}")
+
+    print(f"\n{'회귀 ' + str(regressions) + '건' if regressions else '회귀 없음'}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Step 5 행 단위 diff 하네스 — 정산 엔진 재계산 결과 vs 기록된 step5_settlement.bin
+
+월 캐시 폴더(_cache)의 step2/3/4 캐시로 _settlement_engine.settle()을 다시 돌리고,
+같은 폴더(또는 --ref)의 step5_settlement.bin과 라인·행 단위로 비교한다.
+엑셀/파일 출력 없음 — 과거 월 parity 확인, 엔진 수정 전후 비교용.
+
+비교 기준:
+  - 라인별 행 수 / 행 순서 / 행 dict 키 순서
+  - 필드 값 (JSON 직렬화 기준 — 300과 300.0도 다르게 본다)
+  - 라인 합계 필드, summary 행
+
+실행:
+  python tests/diff_step5.py ../06월/_cache
+  python tests/diff_step5.py ../05월/_cache ../06월/_cache --show 20
+  python tests/diff_step5.py ../06월/_cache --ref /path/step5_settlement.json
+
+종료 코드: 0 = 전 월 일치, 1 = 차이 있음, 2 = 입력 없음
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import _pipeline_config
+from _settlement_engine import settle
+from _step_io import read_cache
+
+STEP_FILES = {2: 'step2_gerp.bin', 3: 'step3_olderp.bin', 4: 'step4_matched.bin'}
+
+
+def _dump(v):
+    return json.dumps(v, ensure_ascii=False, sort_keys=True)
+
+
+def _load(path):
+    return read_cache(path)
+
+
+def diff_rows(lc, new_items, ref_items):
+    """라인 1개 행 비교 → 차이 설명 문자열 목록."""
+    out = []
+    if len(new_items) != len(ref_items):
+        out.append(f"[{lc}] 행 수 {len(new_items)} ≠ 기록 {len(ref_items)}")
+    for i, (a, b) in enumerate(zip(new_items, ref_items)):
+        if list(a) != list(b):
+            out.append(f"[{lc}] #{i} {b.get('part_no')}: 키 구성/순서 다름 {list(a)} ≠ {list(b)}")
+            continue
+        for k in b:
+            if _dump(a[k]) != _dump(b[k]):
+                out.append(f"[{lc}] #{i} {b.get('part_no')}.{k}: {_dump(a[k])} ≠ 기록 {_dump(b[k])}")
+    return out
+
+
+def diff_month(cache_dir, ref_path=None):
+    """월 1개 비교 → (차이 목록, 행 수, 엔진 소요초). 입력 없으면 None."""
+    paths = {no: os.path.join(cache_dir, name) for no, name in STEP_FILES.items()}
+    ref_path = ref_path or os.path.join(cache_dir, 'step5_settlement.bin')
+    missing = [p for p in list(paths.values()) + [ref_path] if not os.path.exists(p)]
+    if missing:
+        print(f"  [SKIP] 입력 없음: {missing}")
+        return None
+
+    steps = {no: _load(p) for no, p in paths.items()}
+    ref = _load(ref_path)
+    t0 = time.perf_counter()
+    lines_result, summary_rows, _ = settle(steps[2], steps[3], steps[4], _pipeline_config)
+    elapsed = time.perf_counter() - t0
+
+    diffs, n_rows = [], 0
+    ref_lines = ref.get('lines', {})
+    if list(lines_result) != list(ref_lines):
+        diffs.append(f"라인 구성 {list(lines_result)} ≠ 기록 {list(ref_lines)}")
+    for lc, ld in lines_result.items():
+        rd = ref_lines.get(lc, {})
+        n_rows += len(ld['items'])
+        diffs += diff_rows(lc, ld['items'], rd.get('items', []))
+        for k, v in ld.items():
+            if k != 'items' and _dump(v) != _dump(rd.get(k)):
+                diffs.append(f"[{lc}] {k}: {_dump(v)} ≠ 기록 {_dump(rd.get(k))}")
+    if _dump(summary_rows) != _dump(ref.get('summary')):
+        diffs.append("summary 행 다름")
+    return diffs, n_rows, elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Step 5 정산 엔진 행 단위 diff')
+    ap.add_argument('cache_dirs', nargs='+', help='월 _cache 폴더 (step2/3/4/5 JSON 포함)')
+    ap.add_argument('--ref', help='비교 기준 step5 캐시 (.bin 또는 이전 .json, 단일 월일 때만, 기본: 폴더 안 step5_settlement.bin)')
+    ap.add_argument('--show', type=int, default=10, help='월별 출력할 차이 건수 (기본 10)')
+    args = ap.parse_args()
+
+    any_diff, any_run = False, False
+    for cache_dir in args.cache_dirs:
+        print(f"\n== {cache_dir}")
+        res = diff_month(cache_dir, args.ref if len(args.cache_dirs) == 1 else None)
+        if res is None:
+            continue
+        any_run = True
+        diffs, n_rows, elapsed = res
+        if diffs:
+            any_diff = True
+            print(f"  ✗ 차이 {len(diffs)}건 (행 {n_rows:,}개, 엔진 {elapsed:.2f}초)")
+            for d in diffs[:args.show]:
+                print(f"    {d}")
+        else:
+            print(f"  ✓ 일치 (행 {n_rows:,}개, 엔진 {elapsed:.2f}초)")
+
+    if not any_run:
+        sys.exit(2)
+    sys.exit(1 if any_diff else 0)
+
+
+if __name__ == '__main__':
+    sys.stdout.reconfigure(encoding='utf-8')
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+회귀 테스트: _cache_format 바이너리 캐시 ↔ JSON 동등성 + _step_io 저장 옵션
+
+입력 구성:
+  - step4·step5 모양 표 (master 행 / 정산 items: None 섞인 열, support list 열, 300 vs 300.0)
+  - 피벗 (품번 → 수량), 'SP3M3|PN|1234.0' 복합키 lookup, (라인|품번) → 단가 목록
+  - 경계값: int64 초과 정수, 음수, NaN, 빈 문자열·'|'만 다른 키, tuple, 정수 dict 키, 빈 list/dict
+
+기대 결과:
+  - load(dump(x)) == json.loads(json.dumps(x)) (키 순서·int/float 구분 포함), mmap 로드도 같음
+  - JSON 대비 크기 감소
+  - MAGIC 불일치·형식 버전 불일치는 CacheFormatError
+  - save_result: .bin만 저장 (이전 검수용 .json 삭제), SETTLEMENT_CACHE_JSON=1이면 .json 함께 저장
+"""
+
+import json
+import math
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+from _test_helpers import assert_or_fail, section
+import _cache_format
+from _step_io import CACHE_JSON_ENV, read_cache, save_result
+
+print("=" * 55)
+print("test_cache_format: 바이너리 캐시 동등성")
+print("=" * 55)
+
+
+def sample():
+    master = {lc: [dict(part_no=f'{lc}-{i:04d}', assy_part='' if i % 3 else f'AS{i}', price=300 if i % 2 else 300.0,
+                        usage=1, price_type='기준', vtype=lc) for i in range(40)] for lc in ('SD9A01', 'SP3M3')}
+    items = [dict(part_no=f'P{i}', price=float(i) + 0.5, price_judgment=None if i % 4 else '기준가',
+                  support=[] if i % 5 else [{'line': 'TD9', 'qty': i}], is_first_gerp=bool(i % 2),
+                  err_type='수량차이' if i % 2 else '', recv_amt=-i * 1000) for i in range(30)]
+    return {
+        'step': 5,
+        'master': master,
+        'lines': {'SD9A01': {'items': items, 'total': 123}},
+        'day_pivot': {'SD9A01': {f'PN{i:05d}': i * 7 for i in range(50)}},
+        'gerp_assy_lookup': {f'SP3M3|PN{i}|{1234.0 + i}': f'AS{i}' for i in range(20)},
+        'gerp_price_set': {f'SD9A01|PN{i}': [300.0, 350.0][: 1 + i % 2] for i in range(20)},
+        'edge': {
+            'big': [2 ** 70, -2 ** 63, 0],
+            'nan': float('nan'),
+            'keys': {'': 1, '|': 2, 'a|b': 3, 'a||b': 4, **{f'k{i}': i for i in range(16)}},
+            'tuple': (1, 'a', None),
+            1: 'int key',
+            'empty': [[], {}, ''],
+            'mixed_rows': [{'a': 1}, {'a': 2, 'b': 3}, {'b': 4, 'a': 5}],
+        },
+    }
+
+
+def same_as_json(actual, value):
+    """NaN 포함 비교: json 왕복 결과와 직렬화 문자열이 같은지."""
+    expected = json.loads(json.dumps(value, ensure_ascii=False))
+    return json.dumps(actual, ensure_ascii=False) == json.dumps(expected, ensure_ascii=False)
+
+
+with tempfile.TemporaryDirectory() as tmp_dir:
+    section("왕복 동등성")
+    value = sample()
+    path = os.path.join(tmp_dir, 'step5_settlement.bin')
+    _cache_format.dump(value, path)
+    loaded = _cache_format.load(path)
+    assert_or_fail(same_as_json(loaded, value), "load 결과 = JSON 왕복 결과 (키 순서·타입)")
+    assert_or_fail(same_as_json(_cache_format.load(path, use_mmap=True), value), "mmap 로드 결과 동일")
+    assert_or_fail(type(loaded['master']['SD9A01'][0]['price']) is float
+                   and type(loaded['master']['SD9A01'][1]['price']) is int, "300.0 / 300 타입 구분")
+    assert_or_fail(math.isnan(loaded['edge']['nan']), "NaN 유지")
+    assert_or_fail(loaded['edge']['big'][0] == 2 ** 70, "int64 초과 정수 유지")
+    assert_or_fail(list(loaded['edge']['keys'])[:4] == ['', '|', 'a|b', 'a||b'], "'|' 포함 키 유지")
+
+    section("크기")
+    json_size = len(json.dumps(value, ensure_ascii=False, indent=2).encode('utf-8'))
+    bin_size = os.path.getsize(path)
+    print(f"  JSON {json_size:,} B → bin {bin_size:,} B")
+    assert_or_fail(bin_size * 5 < json_size, f"bin 크기 {bin_size:,} B (JSON의 1/5 미만)")
+
+    section("형식 오류")
+    bad = os.path.join(tmp_dir, 'old.bin')
+    with open(bad, 'w', encoding='utf-8') as f:
+        json.dump({'step': 2}, f)
+    for data, label in ((None, 'JSON 파일'), (_cache_format.MAGIC + bytes((99, 0)), '형식 버전 99')):
+        if data is not None:
+            with open(bad, 'wb') as f:
+                f.write(data)
+        try:
+            _cache_format.load(bad)
+            assert_or_fail(False, f"{label} 로드가 허용됨")
+        except _cache_format.CacheFormatError as e:
+            print(f"  {label}: CacheFormatError ({e})")
+
+    section("save_result 검수용 JSON 옵션")
+    json_path = os.path.join(tmp_dir, 'step5_settlement.json')
+    with open(json_path, 'w', encoding='utf-8') as f:
+        f.write('{"stale": true}')
+    os.environ.pop(CACHE_JSON_ENV, None)
+    save_result(path, value)
+    assert_or_fail(not os.path.exists(json_path), "옵션 없이 저장 시 이전 .json 삭제")
+    os.environ[CACHE_JSON_ENV] = '1'
+    try:
+        save_result(path, value)
+    finally:
+        os.environ.pop(CACHE_JSON_ENV)
+    assert_or_fail(same_as_json(read_cache(json_path), value), "SETTLEMENT_CACHE_JSON=1 → .json 함께 저장")
+    assert_or_fail(same_as_json(read_cache(path), value), "read_cache(.bin) 동일")
+    out = _cache_format.export_json(path, os.path.join(tmp_dir, 'export.json'))
+    assert_or_fail(same_as_json(read_cache(out), value), "export_json 결과 동일")
+
+print("\n" + "=" * 55)
+print("test_cache_format: ALL PASS")
+print("=" * 55)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+회귀 테스트: _metrics span 계측 + 실행 이력 비교 (--compare)
+
+입력 구성:
+  - span 중첩 (load > parse) + 행 수 지정, 수집기 밖 span
+  - 가짜 run_logs: 이전 성공 실행 3회 + 실패 실행 1회 + 일괄 요약 + 최근 실행
+    최근 실행은 load_gerp 행 수 2배·시간 2배 (데이터 증가), settle 행 수 같고 시간 3배 (처리속도 저하)
+
+기대 결과:
+  - span 기록: 이름·깊이·행 수·행/초, 수집기 밖 span은 기록 없음
+  - load_history: 일괄 요약 제외, 오래된 순
+  - compare_runs: load_gerp '데이터 증가', settle '처리속도 저하', 변화 없는 구간 판정 없음
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+from _test_helpers import assert_or_fail, section
+from _metrics import collect, compare_runs, format_compare, load_history, other_span, span
+
+print("=" * 55)
+print("test_metrics: span 계측 + 실행 이력 비교")
+print("=" * 55)
+
+section("span 수집")
+with span('outside'):
+    pass
+with collect() as spans:
+    with span('load', rows=1000):
+        with span('parse') as sp:
+            time.sleep(0.02)
+            sp.rows = 500
+with span('after'):
+    pass
+names = [(s['name'], s['depth'], s['rows']) for s in spans]
+assert_or_fail(names == [('parse', 1, 500), ('load', 0, 1000)], f"기록 {names}")
+assert_or_fail(spans[0]['wall_sec'] >= 0.015 and spans[0]['rows_per_sec'] > 0,
+               f"parse 시간 {spans[0]['wall_sec']}s / {spans[0]['rows_per_sec']}행/s")
+other = other_span(spans[1]['wall_sec'] + 1.0, spans)
+assert_or_fail(abs(other['wall_sec'] - 1.0) < 0.01, f"구간 외 {other['wall_sec']}s (기대 1.0)")
+
+
+def summary(status, load=(1.0, 10000), settle=(2.0, 300), report=0.8):
+    spans = [{'name': 'load_gerp', 'depth': 0, 'wall_sec': load[0], 'rows': load[1]},
+             {'name': 'settle', 'depth': 0, 'wall_sec': settle[0], 'rows': settle[1]}]
+    return {'pipeline_status': status, 'month': '03', 'steps': [
+        {'step': 2, 'status': 'SUCCESS', 'elapsed_sec': load[0] + settle[0], 'spans': spans},
+        {'step': 7, 'status': 'SUCCESS', 'elapsed_sec': report},   # span 기록 없는 이전 형식
+    ]}
+
+
+with tempfile.TemporaryDirectory() as log_dir:
+    runs = {
+        '2026-03-01_090000': summary('SUCCESS'),
+        '2026-03-02_090000': summary('SUCCESS', load=(1.1, 10000)),
+        '2026-03-03_090000': summary('FAILED at Step 5', settle=(9.0, 300)),
+        '2026-03-04_090000': summary('SUCCESS', load=(0.9, 10000)),
+        '2026-03-05_090000': summary('SUCCESS', load=(2.0, 20000), settle=(6.0, 300)),
+    }
+    for tag, s in runs.items():
+        with open(os.path.join(log_dir, f'{tag}_summary.json'), 'w', encoding='utf-8') as f:
+            json.dump(s, f)
+    with open(os.path.join(log_dir, '2026-03-06_090000_batch_summary.json'), 'w', encoding='utf-8') as f:
+        json.dump({'batch_status': 'SUCCESS'}, f)
+
+    section("실행 이력 로드")
+    history = load_history(log_dir, month='03')
+    assert_or_fail([n[:10] for n, _ in history] == [t[:10] for t in runs], f"이력 {[n for n, _ in history]}")
+    assert_or_fail(load_history(log_dir, month='04') == [], "다른 월 필터")
+
+    section("구간별 비교")
+    latest = history[-1][1]
+    baseline = [s for _, s in history[:-1] if s['pipeline_status'] == 'SUCCESS']
+    rows = compare_runs(latest, baseline)
+    verdict = {(r['step'], r['span']): r['verdict'] for r in rows}
+    print(format_compare(rows, history[-1][0], [n for n, _ in history[:-1]]))
+    assert_or_fail(verdict[(2, 'load_gerp')] == '데이터 증가', f"load_gerp 판정 {verdict[(2, 'load_gerp')]!r}")
+    assert_or_fail(verdict[(2, 'settle')] == '처리속도 저하', f"settle 판정 {verdict[(2, 'settle')]!r}")
+    assert_or_fail(verdict[(2, '(Step 전체)')] == '느려짐', f"Step 2 전체 판정 {verdict[(2, '(Step 전체)')]!r}")
+    assert_or_fail(verdict[(7, '(Step 전체)')] == '', f"Step 7 판정 {verdict[(7, '(Step 전체)')]!r} (변화 없음)")
+    base_settle = next(r for r in rows if r['span'] == 'settle')['base_wall_sec']
+    assert_or_fail(base_settle == 2.0, f"settle 기준 {base_settle}s (실패 실행 9.0s 제외 중앙값 2.0)")
+
+print("\n" + "=" * 55)
+print("test_metrics: ALL PASS")
+print("=" * 55)
@@ -6,7 +6,7 @@
 기대 결과:
   - Step 1~7 전체 exit code = 0
   - step1_validation.json → status = "OK"
-  - step5_settlement.json 존재 + SD9A01 계산값 검증
+  - step5_settlement.bin 존재 + SD9A01 계산값 검증
   - step6_validation.json → overall = "PASS"
   - step7 출력 xlsx 파일 생성 확인
 """
@@ -23,10 +23,10 @@ from _test_helpers import (
 
 STEP_SCRIPTS = [
     ('step1_파일검증.py',       'step1_validation.json'),
-    ('step2_gerp처리.py',       'step2_gerp.json'),
-    ('step3_구erp처리.py',      'step3_olderp.json'),
-    ('step4_기준정보매칭.py',   'step4_matched.json'),
-    ('step5_정산계산.py',       'step5_settlement.json'),
+    ('step2_gerp처리.py',       'step2_gerp.bin'),
+    ('step3_구erp처리.py',      'step3_olderp.bin'),
+    ('step4_기준정보매칭.py',   'step4_matched.bin'),
+    ('step5_정산계산.py',       'step5_settlement.bin'),
     ('step6_검증.py',           'step6_validation.json'),
     ('step7_보고서.py',         None),  # 출력은 xlsx
 ]
@@ -130,8 +130,8 @@ with tempfile.TemporaryDirectory() as tmp_dir:
                        f"Step1 status={s1['status']} (기대: OK)")
 
         # 2. Step 5 SD9A01 계산 검증
-        with open(os.path.join(cache_dir, 'step5_settlement.json'), encoding='utf-8') as f:
-            s5 = json.load(f)
+        from _step_io import read_cache
+        s5 = read_cache(os.path.join(cache_dir, 'step5_settlement.bin'))
 
         sd9 = s5['lines'].get('SD9A01', {})
         assert_or_fail('items' in sd9 and len(sd9['items']) > 0,
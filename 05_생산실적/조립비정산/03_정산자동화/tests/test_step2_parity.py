@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+회귀 테스트: Step 2 GERP 처리 출력 parity
+
+고정 GERP 입력으로 step2를 실행해 step2_gerp.bin 캐시가 기록된 기대 JSON
+(tests/expected/step2_gerp.json — 행 단위 루프 구현 당시 출력)과 같은지 확인한다.
+
+입력 구성:
+  - 타사 업체코드 행 (필터 대상)
+  - SVM/OVK/88820X 이관 제외 행
+  - SP3M3 야간 RSP 모듈품번 (매핑 있음 / 매핑 없음)
+  - 같은 (라인, 품번, 단가)에 조립품번이 여러 번 나오는 행 (마지막 값 유지)
+  - 조립품번 빈칸 행 (빈 셀 / 공백 문자열 — lookup 제외, 같은 키의 앞선 값 유지)
+  - 소수 단가·금액 행, GERP 데이터 없는 라인
+
+기대 결과:
+  - step2 exit code = 0
+  - timestamp 제외 JSON 전체 일치 (키 순서 포함)
+
+기대 JSON 갱신 (출력 변경이 의도된 경우만):
+  python test_step2_parity.py --update
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+from _test_helpers import (
+    patch_config, make_gerp, make_sp3m3_module,
+    run_step, assert_or_fail, section,
+)
+
+EXPECTED = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'expected', 'step2_gerp.json')
+
+
+def gerp_rows():
+    rows = []
+    for i in range(12):
+        pn = f'TST-{i:03d}'
+        price = 300 if i % 2 else 612.5
+        for shift, qty in (('정상', 10 + i), ('추가', 3 + i % 4), ('정상', 7)):
+            rows.append(dict(line='SD9A01', product_no=pn, usage=1, shift=shift, qty=qty,
+                             unit_price=price, amount=qty * price, vendor_cd='0109',
+                             assy_part=f'AS-{i:03d}' if i % 3 else None))
+    # 같은 키에 조립품번 재등장 — 마지막 값이 남아야 함
+    rows.append(dict(line='SD9A01', product_no='TST-001', usage=1, shift='정상', qty=1,
+                     unit_price=300, amount=300, vendor_cd='0109', assy_part='AS-LAST'))
+    # 조립품번 빈칸 — 빈 셀(NaN)·공백 문자열 모두 lookup 제외, 앞서 기록된 같은 키 값은 유지
+    rows.append(dict(line='SD9A01', product_no='TST-002', usage=1, shift='정상', qty=2,
+                     unit_price=612.5, amount=1225, vendor_cd='0109', assy_part=None))
+    rows.append(dict(line='SD9A01', product_no='TST-BLANK', usage=1, shift='정상', qty=2,
+                     unit_price=50, amount=100, vendor_cd='0109', assy_part='   '))
+    # 단가만 다른 같은 품번 (다중단가)
+    rows.append(dict(line='SD9A01', product_no='TST-001', usage=1, shift='정상', qty=4,
+                     unit_price=333.3, amount=1333.2, vendor_cd='0109', assy_part='AS-MULTI'))
+    # 타사 / 이관 제외
+    rows.append(dict(line='SD9A01', product_no='TST-001', usage=1, shift='정상', qty=999,
+                     unit_price=300, amount=299700, vendor_cd='9999'))
+    rows.append(dict(line='SD9A01', product_no='TST-OVK', usage=1, shift='정상', qty=5,
+                     unit_price=100, amount=500, vendor_cd='0109', vtype='OVK'))
+    rows.append(dict(line='SD9A01', product_no='89880X0001', usage=1, shift='정상', qty=6,
+                     unit_price=100, amount=600, vendor_cd='0109', vtype='OVK'))
+    rows.append(dict(line='ANAAS04', product_no='88820X0001', usage=1, shift='정상', qty=8,
+                     unit_price=100, amount=800, vendor_cd='0109'))
+    rows.append(dict(line='HCAMS02', product_no='TST-SVM', usage=1, shift='정상', qty=9,
+                     unit_price=100, amount=900, vendor_cd='0109', vtype='SVM'))
+    # SP3M3 주간 + 야간 RSP
+    for i in range(5):
+        rows.append(dict(line='SP3M3', product_no=f'SP3-{i:03d}', usage=1, shift='정상',
+                         qty=100 + i, unit_price=120, amount=(100 + i) * 120, vendor_cd='0109',
+                         assy_part=f'SA-{i}'))
+        rows.append(dict(line='SP3M3', product_no=f'RSP3SC{i:04d}', usage=1, shift='추가',
+                         qty=20 + i, unit_price=170, amount=(20 + i) * 170, vendor_cd='0109'))
+    rows.append(dict(line='SP3M3', product_no='RSP3SC9999', usage=1, shift='추가', qty=2,
+                     unit_price=170, amount=340, vendor_cd='0109'))
+    rows.append(dict(line='SP3M3', product_no='SP3-000', usage=1, shift='추가', qty=3,
+                     unit_price=170, amount=510, vendor_cd='0109'))
+    # SUB 라인 주간만
+    for i, lc in enumerate(['WAMAS01', 'WABAS01', 'HASMS02']):
+        rows.append(dict(line=lc, product_no=f'SUB-{i}', usage=2, shift='정상', qty=50 * (i + 1),
+                         unit_price=45.25, amount=50 * (i + 1) * 45.25, vendor_cd='0109'))
+    return rows
+
+
+print("=" * 55)
+print("test_step2_parity: Step 2 출력 = 기대 JSON")
+print("=" * 55)
+
+update = '--update' in sys.argv
+
+with tempfile.TemporaryDirectory() as tmp_dir:
+    cache_dir = os.path.join(tmp_dir, '_cache')
+    os.makedirs(cache_dir, exist_ok=True)
+
+    section("더미 입력 파일 생성")
+    make_gerp(os.path.join(tmp_dir, 'gerp.xlsx'), rows=gerp_rows())
+    make_sp3m3_module(os.path.join(tmp_dir, 'sp3m3_module.xlsx'),
+                      {f'RSP3SC{i:04d}': f'SP3-{i % 3:03d}' for i in range(5)})
+
+    with patch_config(tmp_dir, month='01'):
+        section("Step 2 실행")
+        cache_path = os.path.join(cache_dir, 'step2_gerp.bin')
+        ret = run_step('step2_GERP처리.py', cache_path)
+        print(ret['stdout'][-600:])
+        assert_or_fail(ret['exit_code'] == 0,
+                       f"step2 exit code = {ret['exit_code']} (기대: 0)")
+
+        actual = ret['result']
+        actual.pop('timestamp', None)
+
+        if update:
+            os.makedirs(os.path.dirname(EXPECTED), exist_ok=True)
+            with open(EXPECTED, 'w', encoding='utf-8') as f:
+                json.dump(actual, f, ensure_ascii=False, indent=2)
+            print(f"\n기대 JSON 갱신: {EXPECTED}")
+            sys.exit(0)
+
+        section("기대 JSON 비교")
+        with open(EXPECTED, encoding='utf-8') as f:
+            expected = json.load(f)
+
+        for key in expected:
+            assert_or_fail(actual.get(key) == expected[key], f"{key} 일치")
+        assert_or_fail(sorted(actual) == sorted(expected), "출력 키 구성 일치")
+        assert_or_fail(json.dumps(actual, ensure_ascii=False) == json.dumps(expected, ensure_ascii=False),
+                       "키 순서 포함 전체 일치")
+
+print("\n" + "=" * 55)
+print("test_step2_parity: ALL PASS")
+print("=" * 55)
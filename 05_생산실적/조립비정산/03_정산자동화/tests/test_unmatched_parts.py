@@ -83,13 +83,13 @@ with tempfile.TemporaryDirectory() as tmp_dir:
         # ── Step 2 실행 ─────────────────────────────────────────
         section("Step 2: GERP 처리")
 
-        cache2 = os.path.join(cache_dir, 'step2_gerp.json')
+        cache2 = os.path.join(cache_dir, 'step2_gerp.bin')
         ret2 = run_step('step2_gerp처리.py', cache2)
         print(ret2['stdout'])
         assert_or_fail(ret2['exit_code'] == 0, "Step2 exit code = 0")
 
         s2 = ret2['result']
-        assert_or_fail(s2 is not None, "step2_gerp.json 생성")
+        assert_or_fail(s2 is not None, "step2_gerp.bin 생성")
 
         # GERP 피벗에 UNKNOWN 품번 포함 확인
         sd9_day = s2.get('day_pivot', {}).get('SD9A01', {})
@@ -105,20 +105,20 @@ with tempfile.TemporaryDirectory() as tmp_dir:
         # ── Step 3 실행 ─────────────────────────────────────────
         section("Step 3: 구ERP 처리")
 
-        cache3 = os.path.join(cache_dir, 'step3_olderp.json')
+        cache3 = os.path.join(cache_dir, 'step3_olderp.bin')
         ret3 = run_step('step3_구erp처리.py', cache3)
         assert_or_fail(ret3['exit_code'] == 0, "Step3 exit code = 0")
 
         # ── Step 4 실행 ─────────────────────────────────────────
         section("Step 4: 기준정보 매칭")
 
-        cache4 = os.path.join(cache_dir, 'step4_matched.json')
+        cache4 = os.path.join(cache_dir, 'step4_matched.bin')
         ret4 = run_step('step4_기준정보매칭.py', cache4)
         print(ret4['stdout'])
         assert_or_fail(ret4['exit_code'] == 0, "Step4 exit code = 0")
 
         s4 = ret4['result']
-        assert_or_fail(s4 is not None, "step4_matched.json 생성")
+        assert_or_fail(s4 is not None, "step4_matched.bin 생성")
 
         # unmatched_gerp에 UNKNOWN 품번 포함 확인
         unmatched = s4.get('unmatched_gerp', [])
@@ -147,7 +147,7 @@ with tempfile.TemporaryDirectory() as tmp_dir:
         # ── Step 5 실행 ─────────────────────────────────────────
         section("Step 5: 정산 계산")
 
-        cache5 = os.path.join(cache_dir, 'step5_settlement.json')
+        cache5 = os.path.join(cache_dir, 'step5_settlement.bin')
         ret5 = run_step('step5_정산계산.py', cache5)
         assert_or_fail(ret5['exit_code'] == 0, "Step5 exit code = 0")
 
@@ -155,7 +155,7 @@ with tempfile.TemporaryDirectory() as tmp_dir:
         # unmatched_gerp는 Step5 JSON에도 전달됨
         assert_or_fail(
             UNKNOWN_PART in s5.get('unmatched_gerp', []),
-            f"step5_settlement.json의 unmatched_gerp에 '{UNKNOWN_PART}' 포함",
+            f"step5_settlement.bin의 unmatched_gerp에 '{UNKNOWN_PART}' 포함",
         )
 
         # UNKNOWN 품번은 기준정보 없으므로 items에 없어야 함
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+회귀 테스트: Step 6 검증 규칙 엔진 (_validation_engine + step6_검증.RULES)
+
+입력 구성:
+  - 3라인 Step5 결과 (SD9A01 / WABAS01 / SP3M3), 행마다 규칙 위반을 섞음
+      SD9A01: 야간없는데 판정 있음, 판정 불일치 (단가 int/float 혼재), 정상 행
+      WABAS01: 단가 0 (실적 있음 / 없음)
+      SP3M3: Usage=2 홀수 수량 6건 (상세는 앞 5건), 원본금액 불일치
+  - grand 합계 불일치, summary 차이 라인
+  - 기존 명령형 루프(step6 이전 구현)를 이 파일의 reference()로 보관해 상세 문구까지 비교
+
+기대 결과:
+  - checks = reference 결과 (번호·이름·status·severity·detail)
+  - rule_metrics: 규칙별 적중 행 수, 소요시간
+  - previous 전달: 입력이 같은 규칙은 재사용, SP3M3 금액만 바꾸면 항목 5만 재평가
+  - only 지정: 지정 규칙만 재평가 / 규칙 코드 오류는 해당 항목 FAIL, 선행관계 순환은 ValueError
+"""
+
+import copy
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+from _test_helpers import assert_or_fail, section
+from _validation_engine import Outcome, Rule, evaluate
+import step6_검증 as step6
+
+print("=" * 55)
+print("test_validation_rules: Step 6 검증 규칙 엔진")
+print("=" * 55)
+
+
+def item(pn, price, judgment=None, day=0, ngt=0, usage=1, amt=(0, 0), orig=None):
+    return dict(part_no=pn, price=price, price_judgment=judgment, usage=usage,
+                gerp_day_qty=day, gerp_ngt_qty=ngt, gerp_day_amt=amt[0], gerp_ngt_amt=amt[1],
+                gerp_orig_day_amt=(orig or amt)[0], gerp_orig_ngt_amt=(orig or amt)[1])
+
+
+def sample():
+    lines = {
+        'SD9A01': {'items': [
+            item('SD-A', 300, '기본', day=5),                    # 야간없는데 판정
+            item('SD-B', 300.0, '기본', ngt=4),                  # 기대 야간가산
+            item('SD-C', 800, '기본', ngt=2),                    # 정상
+            item('SD-D', 501, '야간가산', ngt=1),                 # 기대 기본
+        ]},
+        'WABAS01': {'items': [item('WB-A', 0, day=3), item('WB-B', 0), item('WB-C', 120, day=1)]},
+        'SP3M3': {'items': [item(f'SP-{i}', 100, day=2 * i + 1, usage=2) for i in range(6)]
+                  + [item('SP-X', 170, amt=(1000, 500), orig=(1000, 340))]},
+    }
+    for lc, ldata in lines.items():
+        ldata['total_gerp_amt'] = 1000 if lc == 'SP3M3' else 0
+        ldata['total_erp_amt'] = 0
+    return {'lines': lines, 'grand_gerp_amt': 1001, 'grand_erp_amt': 0,
+            'summary': [{'line': 'SD9A01', 'diff_amt': 0}, {'line': 'SP3M3', 'diff_amt': -1500}]}
+
+
+def reference(s5):
+    """step6 이전 명령형 구현 (항목별 루프) — 상세 문구 비교 기준."""
+    lines, summary, out = s5['lines'], s5['summary'], []
+
+    def chk(no, name, status, detail=''):
+        out.append({"no": no, "name": name, "status": status,
+                    "severity": 'CRITICAL' if status == 'FAIL' else status, "detail": detail})
+
+    calc_gerp = sum(lines[lc]['total_gerp_amt'] for lc in lines)
+    calc_erp = sum(lines[lc]['total_erp_amt'] for lc in lines)
+    ok = calc_gerp == s5['grand_gerp_amt'] and calc_erp == s5['grand_erp_amt']
+    chk(1, "전체합계 일관성 (라인합산 == grand)", 'PASS' if ok else 'FAIL',
+        f"GERP: {calc_gerp:,} vs {s5['grand_gerp_amt']:,}  구ERP: {calc_erp:,} vs {s5['grand_erp_amt']:,}")
+    sd9_fail = []
+    for r in lines.get('SD9A01', {}).get('items', []):
+        if r['gerp_ngt_qty'] == 0:
+            if r['price_judgment'] is not None:
+                sd9_fail.append(f"{r['part_no']}(야간없는데 판정={r['price_judgment']})")
+        else:
+            expected = '야간가산' if r['price'] <= 500 else '기본'
+            if r['price_judgment'] != expected:
+                sd9_fail.append(f"{r['part_no']}(단가={r['price']},판정={r['price_judgment']},기대={expected})")
+    chk(2, "[deprecated legacy] SD9A01 단가기준판정 규칙 (단가≤500→야간가산, >500→기본)",
+        'PASS' if not sd9_fail else 'FAIL', f"오류: {sd9_fail[:5]}" if sd9_fail else "전체 정상")
+    zero = [r for r in lines.get('WABAS01', {}).get('items', []) if r['price'] == 0]
+    real = [r for r in zero if r['gerp_day_qty'] > 0 or r['gerp_ngt_qty'] > 0]
+    chk(3, "WABAS01 단가=0 품번 현황", 'INFO', f"단가=0: {len(zero)}건  (실적있음: {len(real)}건) → 단가 확인 필요")
+    issues = [f"{lc}/{r['part_no']}(qty={r['gerp_day_qty']})" for lc, ld in lines.items() for r in ld['items']
+              if r['usage'] == 2 and r['gerp_day_qty'] % 2 != 0 and r['gerp_day_qty'] != 0]
+    chk(4, "Usage=2 품번 수량 짝수 여부 (2배 환산 확인)", 'PASS' if not issues else 'INFO',
+        f"홀수 수량 품번(비정상 가능): {issues[:5]}" if issues else "전체 정상(짝수)")
+    mism = [f"{lc}/{r['part_no']}" for lc, ld in lines.items() for r in ld['items']
+            if r['gerp_day_amt'] != r['gerp_orig_day_amt'] or r['gerp_ngt_amt'] != r['gerp_orig_ngt_amt']]
+    chk(5, "GERP 원본금액 정합성 (정산=원본)", 'PASS' if not mism else 'FAIL',
+        f"불일치: {mism[:5]}" if mism else "전체 정상")
+    diff = [r for r in summary if r['diff_amt'] != 0]
+    chk(7, "GERP vs 구ERP 라인별 차이", 'INFO' if diff else 'PASS',
+        "; ".join(f"{r['line']}:{r['diff_amt']:+,}" for r in diff) if diff else "전 라인 일치")
+    return out
+
+
+section("기존 구현과 동일 판정")
+s5 = sample()
+checks, metrics = evaluate(step6.RULES, s5)
+expected = reference(s5)
+for got, exp in zip(checks, expected):
+    assert_or_fail(got == exp, f"항목 {exp['no']}: {got['status']} / {got['detail'][:60]}")
+assert_or_fail(len(checks) == len(expected), f"항목 수 {len(checks)}")
+hits = {m['no']: m['hits'] for m in metrics}
+assert_or_fail(hits == {1: 1, 2: 3, 3: 2, 4: 6, 5: 1, 7: 1}, f"규칙별 적중 {hits}")
+assert_or_fail(all(m['elapsed_ms'] >= 0 and not m['reused'] for m in metrics), "규칙별 소요시간 기록")
+clean = sample()
+for lc in clean['lines']:
+    clean['lines'][lc]['items'] = [r for r in clean['lines'][lc]['items'] if r['part_no'] == 'SD-C']
+clean['summary'] = []
+assert_or_fail(evaluate(step6.RULES, clean)[0] == reference(clean), "위반 없는 입력도 동일")
+
+section("입력 지문 기반 재평가")
+previous = {'checks': checks, 'rule_metrics': metrics}
+_, again = evaluate(step6.RULES, copy.deepcopy(s5), previous=previous)
+assert_or_fail(all(m['reused'] for m in again), "입력 그대로 → 전 규칙 재사용")
+changed = copy.deepcopy(s5)
+changed['lines']['SP3M3']['items'][-1]['gerp_ngt_amt'] = 340
+checks2, metrics2 = evaluate(step6.RULES, changed, previous=previous)
+ran = [m['no'] for m in metrics2 if not m['reused']]
+assert_or_fail(ran == [5], f"SP3M3 야간금액 수정 → 재평가 {ran}")
+assert_or_fail(checks2 == reference(changed), "재평가 결과 = 전체 평가 결과")
+
+section("일부 규칙 지정 / 오류 처리")
+checks3, metrics3 = evaluate(step6.RULES, changed, only=[2], previous=previous)
+ran = [m['no'] for m in metrics3 if not m['reused']]
+assert_or_fail(ran == [2], f"only=[2] → 재평가 {ran}")
+assert_or_fail(checks3[4]['status'] == 'FAIL', "지정 밖 항목 5는 이전 결과 유지")
+
+
+def broken(ctx):
+    raise KeyError('missing')
+
+
+checks4, _ = evaluate([Rule(9, "깨진 규칙", broken, scope='summary'),
+                       Rule(10, "후행 규칙", lambda ctx: Outcome('PASS'), scope='summary', after=(9,))], s5)
+assert_or_fail(checks4[0]['status'] == 'FAIL' and 'KeyError' in checks4[0]['detail'], "규칙 오류 → 해당 항목 FAIL")
+assert_or_fail(checks4[1]['status'] == 'PASS', "나머지 규칙은 계속 실행")
+try:
+    evaluate([Rule(1, "a", broken, scope='summary', after=(2,)), Rule(2, "b", broken, scope='summary', after=(1,))], s5)
+    assert_or_fail(False, "선행관계 순환이 허용됨")
+except ValueError as e:
+    print(f"  선행관계 순환: ValueError ({e})")
+
+print("\n" + "=" * 55)
+print("test_validation_rules: ALL PASS")
+print("=" * 55)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+회귀 테스트: _xlsx_eval cached value 기록
+
+빌더가 쓰는 수식 부분집합(전체열 SUMIFS·COUNTIF·SUMIF 집계 조회·IF/IFERROR·ROUND·& 연결·
+시트 간 참조)으로 작은 워크북을 만들고 fill_cached_values() 후 data_only 값이 기대값과 같은지 확인한다.
+
+입력 구성:
+  - GERP_입력 : 라인/품번/주야/수량/금액 (숫자 텍스트 품번, 대소문자 다른 품번 포함)
+  - 집계      : 키 연결 보조열 + SUMIF 집계 (indexed 레이아웃 구조)
+  - 라인      : 전체열 SUMIFS / COUNTIF(A$3:A행) / IF·IFERROR·ROUND / 0 나누기 / 미지원 함수
+  - 조건 (별도 워크북) : COUNTIF/SUMIF 와일드카드 * ? 와 ~ 이스케이프 (~* / ~? / ~~ = 문자 그대로)
+
+기대 결과:
+  - 수식 수식문자열 보존 + cached value 일치 (숫자 / 문자열 / 논리 / 오류값)
+  - 미지원 함수 셀과 그 셀 참조 셀은 값 비움 (unsupported 집계)
+"""
+
+import os
+import sys
+import tempfile
+
+import openpyxl
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+from _test_helpers import assert_or_fail, section
+from _xlsx_eval import fill_cached_values
+
+print("=" * 55)
+print("test_xlsx_eval: 수식 cached value 기록")
+print("=" * 55)
+
+with tempfile.TemporaryDirectory() as tmp_dir:
+    path = os.path.join(tmp_dir, 'book.xlsx')
+
+    section("더미 워크북 생성")
+    wb = openpyxl.Workbook()
+    g = wb.active
+    g.title = 'GERP_입력'
+    g.append(['라인', '품번', '주야', '수량', '금액', '집계키'])
+    data = [
+        ('SD9A01', 'P-1', '정상', 10, 3000),
+        ('SD9A01', 'p-1', '추가', 4, 1200),
+        ('SD9A01', 'P-1', '정상', 5, 1500),
+        ('SD9A01', '12345', '정상', 7, 700),
+        ('ANAAS04', 'P-1', '정상', 100, 9999),
+    ]
+    for i, row in enumerate(data, start=2):
+        g.append(list(row) + [f'=A{i}&"|"&B{i}&"|"&C{i}'])
+
+    a = wb.create_sheet('집계')
+    a.append(['키', '수량'])
+    a.append(['SD9A01|P-1|정상', "=SUMIF('GERP_입력'!$F$2:$F$6,A2,'GERP_입력'!$D$2:$D$6)"])
+
+    s = wb.create_sheet('라인 시트')
+    s['A1'] = '라인'
+    s['A3'], s['A4'], s['A5'] = 'P-1', 12345, 'P-1'
+    for r in (3, 4, 5):
+        s[f'B{r}'] = f'=SUMIFS(GERP_입력!D:D,GERP_입력!A:A,"SD9A01",GERP_입력!B:B,A{r},GERP_입력!C:C,"정상")'
+        s[f'C{r}'] = f'=IF(COUNTIF(A$3:A{r},A{r})=1,B{r},0)'
+    s['D3'] = '=ROUND(B3/3,1)'
+    s['D4'] = '=IFERROR(B4/0,"없음")'
+    s['D5'] = '=B5/0'
+    s['E3'] = '=AND(B3>0,LEFT(A3,1)="p")'
+    s['F3'] = '=집계!B2-SUM(C3:C5)'
+    s['G3'] = '=NOSUCHFUNC(1)'
+    s['G4'] = '=G3+1'
+    wb.save(path)
+
+    section("cached value 기록")
+    stats = fill_cached_values(path)
+    print(f"  {stats}")
+    assert_or_fail(stats['formulas'] == 19, f"수식 {stats['formulas']}셀 (기대 19)")
+    assert_or_fail(stats['unsupported'] == 2, f"미지원 {stats['unsupported']}셀 (기대 2: G3, G4)")
+    assert_or_fail(stats['errors'] == 1, f"오류값 {stats['errors']}셀 (기대 1: D5)")
+
+    section("data_only 값 확인")
+    v = openpyxl.load_workbook(path, data_only=True)
+    f = openpyxl.load_workbook(path)
+    expect = {
+        ('GERP_입력', 'F3'): 'SD9A01|p-1|추가',
+        ('집계', 'B2'): 15,
+        ('라인 시트', 'B3'): 15,
+        ('라인 시트', 'B4'): 7,
+        ('라인 시트', 'C3'): 15,
+        ('라인 시트', 'C5'): 0,
+        ('라인 시트', 'D3'): 5,
+        ('라인 시트', 'D4'): '없음',
+        ('라인 시트', 'D5'): '#DIV/0!',
+        ('라인 시트', 'E3'): True,
+        ('라인 시트', 'F3'): -7,
+        ('라인 시트', 'G3'): None,
+        ('라인 시트', 'G4'): None,
+    }
+    for (sheet, ref), want in expect.items():
+        got = v[sheet][ref].value
+        assert_or_fail(got == want and type(got) is type(want), f"{sheet}!{ref} = {got!r} (기대 {want!r})")
+    assert_or_fail(f['라인 시트']['C4'].value == '=IF(COUNTIF(A$3:A4,A4)=1,B4,0)', "수식 문자열 보존")
+
+    section("와일드카드 / ~ 이스케이프")
+    path2 = os.path.join(tmp_dir, 'wildcard.xlsx')
+    wb = openpyxl.Workbook()
+    w = wb.active
+    w.title = '조건'
+    for i, (text, qty) in enumerate([('a*b', 1), ('axxb', 2), ('ab', 4), ('a..b', 8),
+                                     ('a?b', 16), ('axb', 32), ('a~b', 64)], start=1):
+        w[f'A{i}'], w[f'B{i}'] = text, qty
+    crits = {'D1': 'a~*b', 'D2': 'a~?b', 'D3': 'a~~b', 'D4': 'a*b', 'D5': 'a?b', 'D6': '<>a~*b'}
+    for ref, crit in crits.items():
+        w[ref] = f'=COUNTIF(A1:A7,"{crit}")'
+        w[ref.replace('D', 'E')] = f'=SUMIF(A1:A7,"{crit}",B1:B7)'
+    wb.save(path2)
+    fill_cached_values(path2)
+    w = openpyxl.load_workbook(path2, data_only=True)['조건']
+    expect = {
+        'D1': 1, 'E1': 1,      # ~* → '*' 문자만 (axxb / ab / a..b 제외)
+        'D2': 1, 'E2': 16,     # ~? → '?' 문자만 (axb 제외)
+        'D3': 1, 'E3': 64,     # ~~ → '~' 문자
+        'D4': 7, 'E4': 127,    # * → 0글자 이상
+        'D5': 4, 'E5': 113,    # ? → 정확히 1글자 (a*b, a?b, axb, a~b)
+        'D6': 6, 'E6': 126,    # <> + 이스케이프
+    }
+    for ref, want in expect.items():
+        got = w[ref].value
+        crit = crits[ref.replace('E', 'D')]
+        assert_or_fail(got == want, f"조건!{ref} {crit!r} = {got!r} (기대 {want!r})")
+
+print("\n" + "=" * 55)
+print("test_xlsx_eval: ALL PASS")
+print("=" * 55)
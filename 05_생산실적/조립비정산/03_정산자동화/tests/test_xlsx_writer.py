@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+회귀 테스트: _xlsx_writer 고속 작성기 ↔ 일반 openpyxl 워크북 동등성
+
+같은 셀 지정(값·font·fill·border·alignment·number_format·병합·행 높이/숨김·열 너비·틀 고정)을
+일반 Workbook과 StyledWorkbook에 각각 적용하고, 저장 후 다시 읽은 결과가 같은지 확인한다.
+
+입력 구성:
+  - 시트 2개 (첫 시트는 두 번째 시트 생성 시점에 기록됨)
+  - 값: 문자열(공백 앞뒤·XML 특수문자) / 정수·실수·NaN / bool / 수식 / 오류값 / 빈 문자열
+  - RowTemplate + write_row 조건부 fill·font
+
+기대 결과:
+  - 값·스타일·병합·치수 전부 일치
+  - 기록된 시트 수정 시 RuntimeError
+"""
+
+import os
+import sys
+import tempfile
+
+import openpyxl
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+from _test_helpers import assert_or_fail, section
+from _xlsx_writer import RowTemplate, StyledWorkbook, write_row
+
+print("=" * 55)
+print("test_xlsx_writer: 고속 작성기 동등성")
+print("=" * 55)
+
+TITLE = Font(name='맑은 고딕', size=13, bold=True, color='1B2A4A')
+HDR_FILL = PatternFill('solid', fgColor='D9E1F2')
+NEG_FILL = PatternFill('solid', fgColor='FFC7CE')
+BDR = Border(*(Side(style='thin'),) * 4)
+ROW = RowTemplate([{}, {'alignment': Alignment(horizontal='center')},
+                   {'number_format': '#,##0'}], border=BDR)
+VALUES = ['  앞뒤 공백 ', 'A&B <C>', 1234567, -0.125, float('nan'), True,
+          '=SUM(C5:C6)', '#N/A', '']
+
+
+def fill(wb_sheet):
+    ws = wb_sheet('요약')
+    ws.cell(1, 1, '제목').font = TITLE
+    ws.merge_cells('A1:C1')
+    ws.row_dimensions[1].height = 28
+    ws.column_dimensions['A'].width = 18
+    for col, v in enumerate(VALUES, 1):
+        c = ws.cell(3, col, v)
+        c.fill = HDR_FILL
+    for r in (5, 6):
+        write_row(ws, r, [f'품번{r}', '정상', r * -100 if r == 6 else r * 100], ROW,
+                  fills={3: NEG_FILL} if r == 6 else None)
+    ws.row_dimensions[7].hidden = True
+    ws.freeze_panes = 'A4'
+    ws2 = wb_sheet('상세')
+    ws2['B2'] = '상세'
+    ws2['B2'].number_format = '@'
+    return ws
+
+
+def snapshot(path):
+    wb = openpyxl.load_workbook(path)
+    out = {}
+    for ws in wb.worksheets:
+        cells = {}
+        for row in ws.iter_rows():
+            for c in row:
+                if c.value is None and not c.has_style:
+                    continue
+                cells[c.coordinate] = (repr(c.value), c.number_format, c.font.name, c.font.sz,
+                                       c.font.b, c.fill.fgColor.rgb, c.fill.fill_type,
+                                       c.border.left.style, c.alignment.horizontal)
+        out[ws.title] = dict(cells=cells, merged=sorted(str(m) for m in ws.merged_cells.ranges),
+                             freeze=ws.freeze_panes,
+                             heights={k: d.height for k, d in ws.row_dimensions.items() if d.height},
+                             hidden=[k for k, d in ws.row_dimensions.items() if d.hidden],
+                             widths={k: d.width for k, d in ws.column_dimensions.items() if d.width})
+    return out
+
+
+with tempfile.TemporaryDirectory() as tmp_dir:
+    section("일반 워크북 vs StyledWorkbook 저장")
+    ref = openpyxl.Workbook()
+    ref.remove(ref.active)
+    fill(ref.create_sheet)
+    ref_path = os.path.join(tmp_dir, 'ref.xlsx')
+    ref.save(ref_path)
+
+    fast = StyledWorkbook(style_prefix='테스트')
+    first = fill(fast.create_sheet)
+    fast_path = os.path.join(tmp_dir, 'fast.xlsx')
+    fast.save(fast_path)
+    assert_or_fail(fast.sheetnames == ['요약', '상세'], f"시트 순서 {fast.sheetnames}")
+
+    section("재로드 비교")
+    a, b = snapshot(ref_path), snapshot(fast_path)
+    for title in a:
+        for key in a[title]:
+            same = a[title][key] == b[title][key]
+            detail = '' if same else f"\n    일반: {a[title][key]}\n    고속: {b[title][key]}"
+            assert_or_fail(same, f"{title}.{key} 일치{detail}")
+    print(f"  셀 {sum(len(s['cells']) for s in a.values())}개")
+
+    section("기록된 시트 수정 차단")
+    try:
+        first.cell(9, 9, 'late')
+        assert_or_fail(False, "기록된 시트에 셀 추가가 허용됨")
+    except RuntimeError:
+        print("  RuntimeError OK")
+
+print("\n" + "=" * 55)
+print("test_xlsx_writer: ALL PASS")
+print("=" * 55)
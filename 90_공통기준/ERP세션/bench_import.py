@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+bench_import.py — ERP 세션 import 비용 측정 (새 인터프리터 cold import, 반복 중앙값)
+
+비교 대상:
+  d0_run        : 기존 방식 — d0-production-plan/run.py 통째 import (openpyxl·playwright 최상단 + 설정 초기화)
+  erp_session   : line-stoppage / night-scan-compare 가 쓰는 이름만 erp_session 에서 import
+  erp_lookup    : gerp-unregistered-check/erp_lookup.py (websocket + erp_session)
+
+각 대상마다 무거운 모듈(openpyxl, playwright, pyautogui, requests)이 실제로 로드됐는지도 표시한다.
+
+사용:
+  python bench_import.py
+  python bench_import.py --repeat 7 --json bench_import.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+SKILLS = HERE.parent / "스킬"
+HEAVY = ("openpyxl", "playwright", "pyautogui", "requests", "websocket")
+
+TARGETS = {
+    "d0_run": (SKILLS / "d0-production-plan",
+               "from run import ensure_chrome_cdp, erp_login_via_http, ensure_erp_login, CDP_URL"),
+    "erp_session": (HERE,
+                    "from erp_session import ensure_chrome_cdp, erp_login_via_http, inject_cookies_to_playwright, "
+                    "ensure_erp_login, is_blackout_window, CDP_URL"),
+    "erp_lookup": (SKILLS / "gerp-unregistered-check",
+                   "import erp_lookup"),
+}
+
+PROBE = """
+import sys, time
+sys.path.insert(0, {path!r})
+t0 = time.perf_counter()
+{stmt}
+dt = time.perf_counter() - t0
+import json
+print("@@" + json.dumps({{"sec": dt, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(name, repeat):
+    path, stmt = TARGETS[name]
+    code = PROBE.format(path=str(path), stmt=stmt, heavy=HEAVY)
+    env = dict(os.environ, PYTHONIOENCODING="utf-8", PYTHONDONTWRITEBYTECODE="1")
+    secs, heavy, err = [], [], None
+    for _ in range(repeat):
+        r = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                           encoding="utf-8", errors="replace", env=env, cwd=str(path))
+        line = next((ln for ln in r.stdout.splitlines() if ln.startswith("@@")), None)
+        if r.returncode != 0 or line is None:
+            err = (r.stderr.strip().splitlines() or ["(출력 없음)"])[-1]
+            break
+        out = json.loads(line[2:])
+        secs.append(out["sec"])
+        heavy = out["heavy"]
+    return {"target": name, "ok": err is None, "error": err, "runs": len(secs),
+            "median_ms": round(statistics.median(secs) * 1000, 1) if secs else None,
+            "min_ms": round(min(secs) * 1000, 1) if secs else None, "heavy": heavy}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="ERP 세션 import 비용 측정 (d0 run.py vs erp_session)")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--only", choices=sorted(TARGETS), action="append", help="대상 제한 (반복 지정 가능)")
+    ap.add_argument("--json", help="결과 JSON 저장 경로")
+    args = ap.parse_args()
+
+    results = [measure(name, args.repeat) for name in (args.only or TARGETS)]
+    for r in results:
+        if r["ok"]:
+            print(f"[bench] {r['target']:<12} median {r['median_ms']:>8.1f} ms  min {r['min_ms']:>8.1f} ms  "
+                  f"heavy={r['heavy'] or '-'}")
+        else:
+            print(f"[bench] {r['target']:<12} FAIL {r['error']}")
+    if args.json:
+        Path(args.json).write_text(json.dumps({"repeat": args.repeat, "results": results},
+                                              ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"[bench] json: {args.json}")
+    sys.exit(0 if all(r["ok"] for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
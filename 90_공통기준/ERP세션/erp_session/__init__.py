@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+ERP 세션 공용 패키지 — CDP Chrome 기동 · OAuth HTTP 로그인 · 쿠키/XSRF · 동기화 금지구간
+
+d0-production-plan/run.py(2,700줄 + openpyxl/playwright 최상단 import)를 통째로 import하던
+line-stoppage · night-scan-compare · gerp-unregistered-check 가 이 패키지만 쓰도록 분리했다.
+
+  - config   : ERP/OAuth 주소, Chrome 경로·프로필, .oauth.json 위치 (표준 라이브러리만)
+  - chrome   : ensure_chrome_cdp / suppress_chrome_crash_restore / kill_zombie_chrome
+  - oauth    : load_oauth_cred / erp_login_via_http / inject_cookies_to_playwright /
+               ensure_erp_login / wait_oauth_complete
+  - cookies  : build_session_from_page / refresh_xsrf_from_cookies
+  - blackout : is_blackout_window / wait_sync_clear
+
+지연 import: `from erp_session import erp_login_via_http` 는 oauth 모듈만 읽고,
+requests / playwright 는 함수 안에서 처음 호출될 때 import 한다.
+
+사용 예:
+    sys.path.insert(0, str(REPO_ROOT / "90_공통기준" / "ERP세션"))
+    from erp_session import ensure_chrome_cdp, erp_login_via_http, CDP_URL
+"""
+import importlib
+
+# 공개 이름 → 하위 모듈
+_EXPORTS = {
+    # config
+    "ERP_BASE": "config", "AUTH_BASE": "config", "ERP_LAYOUT": "config", "OAUTH_LOGIN": "config",
+    "CDP_PORT": "config", "CDP_URL": "config", "CHROME_PATH": "config", "CHROME_PROFILE": "config",
+    "OAUTH_CRED_PATH": "config", "USER_AGENT": "config", "cdp_url": "config",
+    # chrome
+    "ensure_chrome_cdp": "chrome", "suppress_chrome_crash_restore": "chrome",
+    "kill_zombie_chrome": "chrome",
+    # oauth
+    "load_oauth_cred": "oauth", "erp_login_via_http": "oauth",
+    "inject_cookies_to_playwright": "oauth", "ensure_erp_login": "oauth",
+    "wait_oauth_complete": "oauth",
+    # cookies
+    "build_session_from_page": "cookies", "refresh_xsrf_from_cookies": "cookies",
+    # blackout
+    "is_blackout_window": "blackout", "wait_sync_clear": "blackout",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    mod = _EXPORTS.get(name)
+    if mod is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{mod}", __name__), name)
+    globals()[name] = value  # 두 번째 접근부터는 모듈 dict에서 바로
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""G-ERP 동기화 금지구간 — 매시 x0:10~13 / 20~23 / 30~33 / 40~43 / 50~53 (정시 :00~03 제외 — 라인배치 지침 권위)."""
+import time
+from datetime import datetime
+
+
+def is_blackout_window(now: datetime = None) -> bool:
+    """금지구간이면 True. now 생략 시 현재 시각."""
+    m = (now or datetime.now()).minute
+    return m >= 10 and m % 10 <= 3
+
+
+def wait_sync_clear(max_sleep: int = 60):
+    """금지구간이면 빠져나갈 때까지 대기 (1회 최대 max_sleep초)."""
+    while is_blackout_window():
+        now = datetime.now()
+        nxt = (now.minute // 10) * 10 + 4
+        wait_sec = max(1, min(max_sleep, (nxt - now.minute) * 60 - now.second))
+        print(f"  [동기화 금지] {now.strftime('%H:%M:%S')} 대기 {wait_sec}s")
+        time.sleep(wait_sec)
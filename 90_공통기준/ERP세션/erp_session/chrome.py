@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""CDP Chrome 기동 — d0-production-plan run.py Phase 0에서 이동 (세션105/110/151 보강 포함).
+
+subprocess / urllib.request(http.client·ssl 동반)는 함수 안에서 import — 패키지 import 비용에서 제외.
+"""
+import json
+import time
+from pathlib import Path
+
+from .config import CDP_PORT, CHROME_PATH, CHROME_PROFILE, ERP_LAYOUT, cdp_url
+
+
+def suppress_chrome_crash_restore(profile_dir: str):
+    """Chrome 비정상 종료 후 "페이지 복원" 알림 차단.
+
+    세션110 보강: taskkill로 강제 종료된 Chrome을 다시 launch하면 Preferences의
+    exit_type이 "Crashed"로 남아 자동 복원 다이얼로그 표시 → 무인 트리거에서 화면 거슬림.
+    Preferences 파일의 exit_type / exited_cleanly 정리로 복원 알림 차단.
+    """
+    prefs_path = Path(profile_dir) / "Default" / "Preferences"
+    if not prefs_path.exists():
+        return
+    try:
+        data = json.loads(prefs_path.read_text(encoding="utf-8"))
+        prof = data.setdefault("profile", {})
+        prof["exit_type"] = "Normal"
+        prof["exited_cleanly"] = True
+        prefs_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    except Exception as e:
+        print(f"[phase0] Preferences 정리 실패 (무시): {e}")
+
+
+def kill_zombie_chrome(profile_dir: str):
+    """자동화 프로필 Chrome 좀비만 선별 종료 + 잠금파일 정리.
+
+    세션151 보강: 5/9(토) morning 실패 분석 결과.
+    같은 user-data-dir로 Chrome 좀비가 살아있으면 새 launch가 single-instance 규칙으로
+    좀비에 URL만 위임 → 9223 listen은 부활 안 함 → 화면엔 ERP 로그인 페이지만 뜨고 Python timeout.
+
+    프로필 디렉토리 매칭(`--user-data-dir=...`)으로 자동화 Chrome만 식별하여
+    사용자 일상 Chrome(다른 프로필)은 건드리지 않는다.
+    """
+    import subprocess
+    try:
+        # CommandLine에 user-data-dir 매칭. profile_dir의 백슬래시는 PowerShell -like 패턴에서
+        # 그대로 사용 가능 (와일드카드 *로 둘러싸므로 escape 불필요).
+        ps_cmd = (
+            "Get-CimInstance Win32_Process -Filter \"Name='chrome.exe'\" | "
+            f"Where-Object {{ $_.CommandLine -like '*--user-data-dir={profile_dir}*' }} | "
+            "Select-Object -ExpandProperty ProcessId"
+        )
+        result = subprocess.run(
+            ["powershell", "-NoProfile", "-Command", ps_cmd],
+            capture_output=True, text=True, timeout=10
+        )
+        pids = [p.strip() for p in result.stdout.splitlines() if p.strip().isdigit()]
+        if pids:
+            print(f"[phase0] zombie chrome 발견 (프로필 매칭): pids={pids} — 종료")
+            for pid in pids:
+                subprocess.run(["taskkill", "/F", "/PID", pid], capture_output=True, timeout=5)
+            time.sleep(1.5)  # 종료 안정화 + 파일 핸들 release
+        else:
+            print("[phase0] zombie chrome 없음")
+        # 잠금파일 잔재 정리 (Chrome 비정상 종료 후 SingletonLock 잔존 시 신규 인스턴스 차단됨)
+        for lock_name in ("SingletonLock", "SingletonCookie", "SingletonSocket"):
+            lock_path = Path(profile_dir) / lock_name
+            try:
+                if lock_path.exists() or lock_path.is_symlink():
+                    lock_path.unlink()
+                    print(f"[phase0] {lock_name} 정리")
+            except Exception:
+                pass
+    except Exception as e:
+        print(f"[phase0] zombie chrome 정리 실패 (무시): {e}")
+
+
+def ensure_chrome_cdp(port: int = CDP_PORT, profile_dir: str = CHROME_PROFILE, start_url: str = ERP_LAYOUT,
+                      kill_zombie: bool = True, tries: int = 10):
+    """CDP 포트 기동 확인. 죽어 있으면 자동화 프로필로 Chrome launch 후 tries × 1.5s 대기.
+
+    kill_zombie=False: 같은 프로필을 다른 스킬(d0 9223)이 쓰는 중일 수 있는 호출자 (gerp 9224) —
+    좀비 정리 없이 launch만 한다.
+    """
+    import subprocess
+    import urllib.request
+    url = cdp_url(port)
+    try:
+        urllib.request.urlopen(f"{url}/json/version", timeout=3)
+        print(f"[phase0] CDP {port} alive")
+        return True
+    except Exception:
+        print(f"[phase0] CDP dead — launching Chrome (port={port})")
+
+    if kill_zombie:
+        # 세션151: single-instance 위임 함정 차단 — 같은 프로필 좀비 정리 후 fresh launch
+        kill_zombie_chrome(profile_dir)
+    # Chrome 비정상 종료 잔재 정리 (세션110 — 복원 알림 차단)
+    suppress_chrome_crash_restore(profile_dir)
+
+    subprocess.Popen([
+        CHROME_PATH,
+        f"--remote-debugging-port={port}",
+        "--remote-debugging-address=127.0.0.1",  # 세션105 — IPv6 기본 바인딩 회피
+        f"--user-data-dir={profile_dir}",
+        "--no-first-run", "--no-default-browser-check",
+        "--disable-session-crashed-bubble",  # 세션110 — 복원 다이얼로그 차단
+        "--hide-crash-restore-bubble",
+        start_url,
+    ])
+    for i in range(tries):
+        time.sleep(1.5)
+        try:
+            urllib.request.urlopen(f"{url}/json/version", timeout=2)
+            print(f"[phase0] CDP up (try={i+1})")
+            return True
+        except Exception:
+            continue
+    raise RuntimeError(f"CDP {port} 기동 실패")
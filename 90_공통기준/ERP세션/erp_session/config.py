@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""ERP 세션 공용 설정 — 표준 라이브러리만 사용.
+
+ERP/OAuth 주소는 환경변수로 교체 가능 (d0-production-plan mock_erp_server.py 로컬 대역 서버 부하 측정용).
+  D0_ERP_BASE / D0_AUTH_BASE — 변수명은 d0 벤치마크(bench_http_only.py)와 공유
+"""
+import os
+from pathlib import Path
+
+ERP_BASE = os.environ.get("D0_ERP_BASE", "http://erp-dev.samsong.com:19100")
+AUTH_BASE = os.environ.get("D0_AUTH_BASE", "http://auth-dev.samsong.com:18100")
+ERP_LAYOUT = ERP_BASE + "/layout/layout.do"
+OAUTH_LOGIN = AUTH_BASE + "/login"
+
+# d0 자동화 Chrome — 프로필(자격증명·쿠키)은 모든 ERP 스킬 공유, CDP 포트만 스킬별 분리 (d0 9223 / gerp 9224)
+CDP_PORT = 9223
+CHROME_PATH = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
+CHROME_PROFILE = r"C:\Users\User\.flow-chrome-debug"
+
+# OAuth ID/PW 원본 — d0-production-plan/.oauth.json (gitignore). 위치는 세션153 이후 그대로.
+OAUTH_CRED_PATH = Path(__file__).resolve().parents[2] / "스킬" / "d0-production-plan" / ".oauth.json"
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+
+def cdp_url(port: int = CDP_PORT) -> str:
+    return f"http://localhost:{port}"
+
+
+CDP_URL = cdp_url()
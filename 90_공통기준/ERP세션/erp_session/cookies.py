@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""브라우저 쿠키 → requests.Session 변환 + XSRF 토큰 회전 대응."""
+from .config import ERP_BASE
+
+
+def build_session_from_page(page, referer: str):
+    """Playwright page의 cookie + XSRF로 requests Session 구성.
+
+    P2/P3/P4 검증된 헤더 레시피 (d0-production-plan):
+      - ajax: true (jQuery prefilter 자동 헤더 — 누락 시 multiList 500 / 8ms 즉시 거부)
+      - X-XSRF-TOKEN (매 write 호출 직전 cookie에서 다시 읽어 갱신 필수 — Spring Security 회전)
+      - Referer: 호출 화면 URL (d0는 D0_URL)
+    """
+    import requests as _req
+    cookies = page.context.cookies()
+    sess = _req.Session()
+    xsrf = None
+    for c in cookies:
+        sess.cookies.set(c["name"], c["value"], domain=c["domain"].lstrip("."), path=c.get("path", "/"))
+        if c["name"].upper() in ("XSRF-TOKEN", "X-XSRF-TOKEN"):
+            xsrf = c["value"]
+    sess.headers.update({
+        "ajax": "true",
+        "X-Requested-With": "XMLHttpRequest",
+        "Referer": referer,
+        "Origin": ERP_BASE,
+        "Accept": "application/json, text/javascript, */*; q=0.01",
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/147.0.0.0 Safari/537.36",
+        "Accept-Language": "ko-KR,ko;q=0.9",
+    })
+    if xsrf:
+        sess.headers["X-XSRF-TOKEN"] = xsrf
+    return sess
+
+
+def refresh_xsrf_from_cookies(sess):
+    """매 write 호출 직전 cookie에서 X-XSRF-TOKEN 갱신 (Spring Security 회전 대응)."""
+    for c in sess.cookies:
+        if c.name.upper() in ("XSRF-TOKEN", "X-XSRF-TOKEN"):
+            sess.headers["X-XSRF-TOKEN"] = c.value
+            return c.value
+    return None
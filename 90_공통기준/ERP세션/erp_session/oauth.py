@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""ERP OAuth 로그인 — HTTP(requests) 경로 + 브라우저(page.fill) 경로.
+
+requests 는 erp_login_via_http 호출 시점에 import — 브라우저 경로만 쓰는 호출자는 로드하지 않는다.
+"""
+import json
+import re
+import time
+
+from .config import ERP_BASE, ERP_LAYOUT, OAUTH_CRED_PATH, OAUTH_LOGIN, USER_AGENT
+
+
+def load_oauth_cred():
+    """OAuth ID/PW 로컬 credential 파일 로드.
+
+    세션153: pyautogui typewrite + Chrome 자동완성 의존 폐기. ID/PW를 .oauth.json에
+    저장하고 page.fill()로 DOM 직접 입력 — OS focus 가로채기 위험 0%.
+    """
+    cred_path = OAUTH_CRED_PATH
+    if not cred_path.exists():
+        raise RuntimeError(f".oauth.json 미존재: {cred_path} — ID/PW 파일 저장 후 재실행")
+    cfg = json.loads(cred_path.read_text(encoding="utf-8"))
+    if not cfg.get("id") or not cfg.get("pw"):
+        raise RuntimeError(f".oauth.json id/pw 누락: {cred_path}")
+    return cfg["id"], cfg["pw"]
+
+
+def erp_login_via_http():
+    """ERP OAuth SSO를 requests로 직접 처리 — 브라우저·CDP·pyautogui 의존 0.
+
+    세션153 (2026-05-13) — A안 점진 전환 1단계.
+    daily-routine mes_login() 패턴의 ERP 버전. 실측 캡처 PASS:
+      r1 = GET erp-dev/oauth2/sso → ssoUrl 변수 추출
+      r2 = GET ssoUrl (auth-dev/oauth/authorize, JSESSIONID 발급)
+      r3 = POST auth-dev/login (userId/password/clientId=ERP/ssoUrl)
+           → redirect layout.do?statusCode=200+OK
+      r4 = GET erp-dev/layout/layout.do → XSRF-TOKEN 발급
+
+    반환: requests.Session (cookies + X-XSRF-TOKEN header 세팅 완료). 실패 시 None.
+    """
+    import requests as _req
+    user_id, password = load_oauth_cred()
+    s = _req.Session()
+    s.headers["User-Agent"] = USER_AGENT
+    try:
+        r1 = s.get(ERP_BASE + "/oauth2/sso", timeout=10)
+        m = re.search(r"ssoUrl\s*=\s*'([^']+)'", r1.text)
+        if not m:
+            print("[phase0:http] FAIL ssoUrl 파싱 실패")
+            return None
+        sso_url = m.group(1)
+        s.get(sso_url, allow_redirects=True, timeout=10)
+        r3 = s.post(OAUTH_LOGIN, data={
+            "userId": user_id, "password": password,
+            "clientId": "ERP", "ssoUrl": sso_url, "clientName": "", "lang": "ko"
+        }, allow_redirects=True, timeout=15)
+        if "layout.do" not in r3.url:
+            print(f"[phase0:http] FAIL 로그인 후 URL={r3.url}")
+            return None
+        s.get(ERP_LAYOUT, timeout=10)
+        s.headers["X-XSRF-TOKEN"] = s.cookies.get("XSRF-TOKEN", "")
+        print(f"[phase0:http] OAuth PASS (cookies: {list(s.cookies.keys())})")
+        return s
+    except Exception as e:
+        print(f"[phase0:http] FAIL {e}")
+        return None
+
+
+def inject_cookies_to_playwright(context, sess):
+    """requests.Session cookie를 playwright context에 주입.
+
+    HTTP OAuth로 받은 SESSION/XSRF-TOKEN/JSESSIONID cookie를 playwright context에
+    추가해서, page.goto 시 OAuth 페이지 안 거치고 즉시 통과되게 함.
+    """
+    cookies_for_pw = []
+    for c in sess.cookies:
+        cookies_for_pw.append({
+            "name": c.name,
+            "value": c.value,
+            "domain": c.domain or "erp-dev.samsong.com",
+            "path": c.path or "/",
+        })
+    if cookies_for_pw:
+        context.add_cookies(cookies_for_pw)
+        print(f"[phase0:http] playwright cookie 주입 {len(cookies_for_pw)}건 ({[c['name'] for c in cookies_for_pw]})")
+
+
+def ensure_erp_login(page):
+    """auth-dev 로그인 페이지면 자동 로그인 — DOM 직접 입력 (page.fill).
+
+    세션153 (2026-05-13): pyautogui 키보드 입력 + Chrome 비번관리자 자동완성 의존 폐기.
+    실측 사고 — 다른 창이 Chrome 위에 떠 있으면 pyautogui 키가 가로채여 빈 form submit
+    → /login?error 반복 (5/13 07:11~07:42 morning 자동화 51min 한계 도달 실패).
+    page.fill()은 DOM API라 OS focus 무관 → 가로채기 불가능.
+
+    /login?error 는 raise 안 함 — 호출자(d0 navigate_to_d0 등)의 재시도 분기에서 처리.
+    """
+    if "auth-dev.samsong.com" in page.url and "/login" in page.url:
+        print("[phase0] OAuth 로그인 수행 (DOM 직접 입력)")
+        user_id, password = load_oauth_cred()
+        page.bring_to_front()
+        page.wait_for_selector('#userId', timeout=10000)
+        page.fill('#userId', user_id)
+        page.fill('#password', password)
+        page.click('#loginBtn')
+        time.sleep(3)
+        if "/login?error" in page.url:
+            print(f"[phase0] ⚠ submit 직후 /login?error — .oauth.json id/pw 검증 필요. URL: {page.url}")
+
+
+def wait_oauth_complete(page, timeout_sec: float = 10.0):
+    """OAuth 완료 대기 — auth-dev 떠나고 erp-dev 본 페이지(oauth2/sso 콜백 제외) 도달까지.
+
+    세션110 보강: `"erp-dev.samsong.com" in url` 조건만으로는 OAuth 콜백 중간 단계
+    `oauth2/sso` URL도 매칭되어 미완료 상태에서 break → 콜백/로그인 URL 명시 제외.
+    세션152: d0 기본 10s (빠른 fallback 우선). gerp 조회는 60s 로 호출.
+    """
+    deadline = time.time() + timeout_sec
+    while time.time() < deadline:
+        url = page.url
+        if ("erp-dev.samsong.com" in url
+                and "auth-dev" not in url
+                and "oauth2/sso" not in url
+                and "/login" not in url):
+            return True
+        time.sleep(0.5)
+    return False
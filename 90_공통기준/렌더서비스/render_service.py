@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+"""
+공용 HTML 렌더 서비스 — headless Chromium 1개 + 페이지 풀로 HTML → PNG/PDF 변환
+
+보고서 스크립트마다 sync_playwright() → chromium.launch()를 반복하면 산출물 1개당 브라우저 기동(수 초)을
+매번 치른다. 이 모듈은 프로세스당 브라우저 1개를 띄워 두고(또는 상주 서버에 CDP로 붙고) 페이지를 재사용한다.
+
+  - RenderService      : 브라우저 1개 + 페이지 풀(max_pages). 전용 스레드의 asyncio 루프에서 실행 —
+                         어느 스레드에서 submit해도 되고, 여러 작업은 페이지 수만큼 동시에 렌더
+  - get_service()      : 프로세스 공용 인스턴스 (첫 사용 시 기동, 종료 시 자동 정리)
+  - render_png / render_pdf / render_many : 공용 인스턴스로 바로 렌더
+  - 상주 서버 (월말 일괄 등 여러 스크립트가 연달아 렌더할 때):
+        python render_service.py serve            # 브라우저를 띄워 두고 대기 (CDP 127.0.0.1:9333)
+    서버가 떠 있으면 각 스크립트는 브라우저를 새로 띄우지 않고 연결만 한다 (없으면 자체 기동).
+
+playwright 미설치 / chromium 미설치는 RenderUnavailable — 호출자는 기존처럼 [SKIP] 처리.
+  pip install playwright && python -m playwright install chromium
+
+사용 예:
+    import sys; sys.path.insert(0, str(REPO_ROOT / "90_공통기준" / "렌더서비스"))
+    from render_service import RenderJob, RenderUnavailable, render_many, render_png
+    render_png("dash.html", "dash.png", viewport=(1280, 900), wait_ms=1200)
+    results = render_many([RenderJob("a.html", "a.png"), RenderJob("b.html", "b.pdf", media="screen")])
+
+    python render_service.py render a.html a.png b.html b.pdf      # 입력/출력 쌍 일괄 렌더
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import atexit
+import os
+import socket
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import urlparse
+
+DEFAULT_CDP_URL = "http://127.0.0.1:9333"
+CDP_ENV = "RENDER_SERVICE_CDP"          # 상주 서버 주소 변경 / "off"면 서버 연결 시도 안 함
+DEFAULT_VIEWPORT = (1280, 900)
+INSTALL_HINT = "pip install playwright && python -m playwright install chromium"
+
+
+class RenderUnavailable(RuntimeError):
+    """playwright 또는 chromium이 없어 렌더 불가."""
+
+
+@dataclass
+class RenderJob:
+    """렌더 작업 1건. 출력 확장자로 PNG/PDF 구분 (.pdf 외에는 PNG 스크린샷).
+
+    source    : HTML 파일 경로 (html 지정 시 무시 가능 — 상대경로 리소스는 source 기준으로 해석되므로 파일 권장)
+    html      : HTML 문자열 직접 렌더 (source 없이)
+    wait_until: goto 대기 기준 ('load' / 'networkidle' …)
+    wait_ms   : 로드 후 추가 대기 (Chart.js 애니메이션 등)
+    media     : 'screen' / 'print' 강제 (None = 기본)
+    pdf_options: page.pdf 추가 인자 (print_background, prefer_css_page_size 등)
+    """
+    source: str | Path | None
+    output: str | Path
+    html: str | None = None
+    viewport: tuple[int, int] = DEFAULT_VIEWPORT
+    full_page: bool = True
+    wait_until: str = "load"
+    wait_ms: int = 0
+    media: str | None = None
+    pdf_options: dict = field(default_factory=dict)
+
+    @property
+    def is_pdf(self) -> bool:
+        return str(self.output).lower().endswith(".pdf")
+
+
+@dataclass
+class RenderResult:
+    job: RenderJob
+    ok: bool
+    elapsed_sec: float
+    error: str | None = None
+
+
+def _cdp_url() -> str | None:
+    url = os.environ.get(CDP_ENV, DEFAULT_CDP_URL).strip()
+    return None if url.lower() in ("", "off", "0") else url
+
+
+def _port_open(url: str, timeout: float = 0.2) -> bool:
+    """상주 서버 포트가 열려 있는지 (닫혀 있으면 즉시 실패 — 자체 기동 판단용)."""
+    parsed = urlparse(url)
+    try:
+        with socket.create_connection((parsed.hostname or "127.0.0.1", parsed.port or 80), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+# ── 렌더 서비스 ───────────────────────────────────────────────
+class RenderService:
+    """브라우저 1개 + 페이지 풀. with 블록 또는 start()/close()로 수명 관리."""
+
+    def __init__(self, max_pages: int = 4, cdp_url: str | None = None, launch_args: list[str] | None = None):
+        self.max_pages = max(1, max_pages)
+        self.cdp_url = cdp_url if cdp_url is not None else _cdp_url()
+        self.launch_args = launch_args or []
+        self.connected = False          # True = 상주 서버에 CDP 연결 (브라우저 기동 생략)
+        self.startup_sec = None
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._pw = self._browser = self._context = None
+        self._idle = None               # asyncio.Queue[Page]
+        self._n_pages = 0
+
+    # ── 수명 ──
+    def start(self) -> "RenderService":
+        with self._lock:
+            if self._loop is not None:
+                return self
+            try:
+                from playwright.async_api import async_playwright  # noqa: F401
+            except ImportError:
+                raise RenderUnavailable(f"playwright 미설치: {INSTALL_HINT}") from None
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="render-service", daemon=True)
+            thread.start()
+            t0 = time.perf_counter()
+            try:
+                asyncio.run_coroutine_threadsafe(self._astart(), loop).result()
+            except Exception as e:
+                loop.call_soon_threadsafe(loop.stop)
+                thread.join()
+                loop.close()
+                if isinstance(e, RenderUnavailable):
+                    raise
+                raise RenderUnavailable(f"chromium 기동 실패 ({str(e).splitlines()[0]}) — {INSTALL_HINT}") from e
+            self.startup_sec = round(time.perf_counter() - t0, 2)
+            self._loop, self._thread = loop, thread
+        return self
+
+    async def _astart(self):
+        from playwright.async_api import async_playwright
+        self._pw = await async_playwright().start()
+        try:
+            if self.cdp_url and _port_open(self.cdp_url):
+                self._browser = await self._pw.chromium.connect_over_cdp(self.cdp_url)
+                self.connected = True
+            else:
+                self._browser = await self._pw.chromium.launch(args=self.launch_args)
+            self._context = await self._browser.new_context()
+        except Exception:
+            await self._pw.stop()
+            raise
+        self._idle = asyncio.Queue()
+
+    def close(self):
+        with self._lock:
+            loop, self._loop = self._loop, None
+            if loop is None:
+                return
+            try:
+                asyncio.run_coroutine_threadsafe(self._aclose(), loop).result(timeout=30)
+            except Exception:
+                pass
+            loop.call_soon_threadsafe(loop.stop)
+            self._thread.join()
+            loop.close()
+
+    async def _aclose(self):
+        try:
+            await self._context.close()
+            await self._browser.close()     # CDP 연결이면 연결만 끊음 (상주 브라우저 유지)
+        finally:
+            await self._pw.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ── 페이지 풀 ──
+    async def _acquire(self):
+        if self._idle.empty() and self._n_pages < self.max_pages:
+            self._n_pages += 1
+            try:
+                return await self._context.new_page()
+            except Exception:
+                self._n_pages -= 1
+                raise
+        return await self._idle.get()
+
+    async def _discard(self, page):
+        self._n_pages -= 1
+        try:
+            await page.close()
+        except Exception:
+            pass
+
+    async def _arender(self, job: RenderJob) -> RenderResult:
+        t0 = time.perf_counter()
+        page = await self._acquire()
+        try:
+            await page.set_viewport_size({"width": job.viewport[0], "height": job.viewport[1]})
+            if job.html is not None:
+                await page.set_content(job.html, wait_until=job.wait_until)
+            else:
+                await page.goto(Path(job.source).resolve().as_uri(), wait_until=job.wait_until)
+            await page.emulate_media(media=job.media or "null")    # 이전 작업 설정 초기화 겸
+            if job.wait_ms:
+                await page.wait_for_timeout(job.wait_ms)
+            out = Path(job.output).resolve()
+            out.parent.mkdir(parents=True, exist_ok=True)
+            if job.is_pdf:
+                await page.pdf(path=str(out), **job.pdf_options)
+            else:
+                await page.screenshot(path=str(out), full_page=job.full_page)
+        except Exception as e:
+            await self._discard(page)       # 상태를 알 수 없는 페이지는 재사용하지 않음
+            return RenderResult(job, False, round(time.perf_counter() - t0, 3), f"{type(e).__name__}: {e}")
+        self._idle.put_nowait(page)
+        return RenderResult(job, True, round(time.perf_counter() - t0, 3))
+
+    # ── 작업 제출 ──
+    def submit(self, job: RenderJob):
+        """작업 1건 비동기 제출 → concurrent.futures.Future[RenderResult]."""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(self._arender(job), self._loop)
+
+    def render(self, job: RenderJob) -> RenderResult:
+        return self.submit(job).result()
+
+    def render_many(self, jobs) -> list[RenderResult]:
+        """여러 작업을 페이지 풀로 동시 렌더 (입력 순서대로 결과)."""
+        futures = [self.submit(job) for job in jobs]
+        return [f.result() for f in futures]
+
+
+# ── 프로세스 공용 인스턴스 ─────────────────────────────────────
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_service(max_pages: int = 4) -> RenderService:
+    """프로세스 공용 RenderService (첫 호출 시 기동, 인터프리터 종료 시 정리)."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            service = RenderService(max_pages=max_pages).start()
+            atexit.register(service.close)
+            _shared = service
+        return _shared
+
+
+def render_png(source, output, **options) -> RenderResult:
+    return get_service().render(RenderJob(source, output, **options))
+
+
+def render_pdf(source, output, **options) -> RenderResult:
+    if not str(output).lower().endswith(".pdf"):
+        raise ValueError(f"PDF 출력 경로는 .pdf: {output}")
+    return get_service().render(RenderJob(source, output, **options))
+
+
+def render_many(jobs) -> list[RenderResult]:
+    return get_service().render_many(jobs)
+
+
+# ── 상주 서버 ─────────────────────────────────────────────────
+def serve(cdp_url: str = DEFAULT_CDP_URL):
+    """headless chromium을 CDP 포트로 띄워 두고 Ctrl+C까지 대기 (클라이언트는 connect_over_cdp)."""
+    try:
+        from playwright.sync_api import sync_playwright
+    except ImportError:
+        raise RenderUnavailable(f"playwright 미설치: {INSTALL_HINT}") from None
+    if _port_open(cdp_url):
+        print(f"[렌더 서버] 이미 실행 중: {cdp_url}")
+        return
+    parsed = urlparse(cdp_url)
+    with sync_playwright() as p:
+        t0 = time.perf_counter()
+        browser = p.chromium.launch(args=[f"--remote-debugging-port={parsed.port}",
+                                          f"--remote-debugging-address={parsed.hostname}"])
+        print(f"[렌더 서버] chromium 기동 {time.perf_counter() - t0:.1f}초 — {cdp_url} (종료: Ctrl+C)")
+        try:
+            while browser.is_connected():
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        browser.close()
+
+
+def _main():
+    ap = argparse.ArgumentParser(description="공용 HTML 렌더 서비스")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sp = sub.add_parser("serve", help="상주 브라우저 서버 실행")
+    sp.add_argument("--cdp", default=_cdp_url() or DEFAULT_CDP_URL, help=f"CDP 주소 (기본: {DEFAULT_CDP_URL})")
+    rp = sub.add_parser("render", help="HTML → PNG/PDF 일괄 렌더 (입력 출력 쌍 나열)")
+    rp.add_argument("pairs", nargs="+", metavar="HTML OUT")
+    rp.add_argument("--width", type=int, default=DEFAULT_VIEWPORT[0])
+    rp.add_argument("--height", type=int, default=DEFAULT_VIEWPORT[1])
+    rp.add_argument("--wait-ms", type=int, default=0)
+    rp.add_argument("--media", choices=["screen", "print"], default=None)
+    rp.add_argument("--pages", type=int, default=4, help="동시 렌더 페이지 수")
+    args = ap.parse_args()
+
+    try:
+        if args.cmd == "serve":
+            serve(args.cdp)
+            return 0
+        if len(args.pairs) % 2:
+            ap.error("HTML OUT 쌍으로 지정")
+        jobs = [RenderJob(src, out, viewport=(args.width, args.height), wait_ms=args.wait_ms, media=args.media,
+                          pdf_options={"print_background": True, "prefer_css_page_size": True})
+                for src, out in zip(args.pairs[::2], args.pairs[1::2])]
+        with RenderService(max_pages=args.pages) as service:
+            how = "상주 서버 연결" if service.connected else "chromium 기동"
+            print(f"[렌더] {how} {service.startup_sec}초, 작업 {len(jobs)}건")
+            results = service.render_many(jobs)
+    except RenderUnavailable as e:
+        print(f"[SKIP] {e}")
+        return 2
+    for r in results:
+        print(f"  {'OK ' if r.ok else 'ERR'} {r.elapsed_sec:6.2f}s  {r.job.output}" + (f"  ({r.error})" if r.error else ""))
+    return 0 if all(r.ok for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
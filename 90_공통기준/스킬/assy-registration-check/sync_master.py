@@ -19,6 +19,10 @@ import openpyxl
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 from _xlsx_style import format_workbook
 
+# 기준정보 컴파일 인덱스 (정산 파이프라인 공용 — 라인마다 워크북 재파싱하지 않음)
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "05_생산실적" / "조립비정산" / "03_정산자동화"))
+from _master_index import load_master_index
+
 try:
     sys.stdout.reconfigure(encoding='utf-8')
     sys.stderr.reconfigure(encoding='utf-8')
@@ -37,11 +41,12 @@ LINES = ["SP3M3", "HCAMS02"]
 
 def load_master_rows(line):
     """마스터 시트 데이터 → {PROD_NO: row}."""
-    wb = openpyxl.load_workbook(MASTER, data_only=True, read_only=True)
-    ws = wb[line]
+    idx = load_master_index(MASTER)
+    if line not in idx:
+        raise KeyError(f"Worksheet {line} does not exist.")
     out = {}
-    for r in ws.iter_rows(min_row=4, values_only=True):
-        if not r or not r[0]:
+    for _, r in idx.rows(line):
+        if not r[0]:
             continue
         pn = str(r[0]).strip()
         if pn in out:
@@ -36,7 +36,6 @@ except Exception:
 try:
     from playwright.sync_api import sync_playwright
     import requests
-    import openpyxl
 except Exception as e:
     print(f"[FAIL] dependency import: {e}", file=sys.stderr)
     sys.exit(2)
@@ -44,7 +43,7 @@ except Exception as e:
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from run import (
     ensure_chrome_cdp, navigate_to_d0, D0_URL,
-    process_one_row, find_plan_file, extract_sp3m3_day, DAY_CUT_THRESHOLD,
+    process_one_row, find_plan_file, load_plan_snapshot, extract_sp3m3_day, DAY_CUT_THRESHOLD,
     LINE_CONFIG, d0_upload,
 )
 
@@ -158,7 +157,7 @@ def main():
 
         # 후보 식별
         plan_file = find_plan_file(today_dt)
-        wb = openpyxl.load_workbook(plan_file, data_only=True, keep_vba=True)
+        wb = load_plan_snapshot(plan_file)
         day_items = extract_sp3m3_day(wb, DAY_CUT_THRESHOLD)
         registered = page.evaluate("""(today) => {
             try {
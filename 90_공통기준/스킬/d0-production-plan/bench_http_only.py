@@ -0,0 +1,167 @@
+"""bench_http_only.py — run.py --http-only 흐름을 로컬 대역 서버(mock_erp_server.py)로 측정
+
+erp-dev·SmartMES 접속 0. 대역 서버를 프로세스 안에서 띄우고 `_main_http_only`(--xlsx 직접 모드)를
+그대로 돌려 Phase 3(업로드) → 4(서열) → 5(최종저장 + P-BOM guard) → 6(SmartMES 대조)을 측정한다.
+Phase 0 OAuth는 측정 대상 아님 — 대역 서버 layout.do에서 XSRF 쿠키만 받아 세션 구성.
+
+결과가 정상이 아니면 exit 1 (Phase 4 실패/누락, SmartMES 서열 불일치, 예외) — 회귀 확인용.
+
+사용:
+  python bench_http_only.py --items 60
+  python bench_http_only.py --items 60 --latency-ms 40 --save-latency-ms 300 --repeat 3
+  python bench_http_only.py --items 60 --reject-multi-row              # 단건 저장 ERP (Phase 4 단건 재시도 경로)
+  python bench_http_only.py --items 20 --pbom-missing BENCH0003        # Phase 5 P-BOM guard 경로
+  python bench_http_only.py --items 60 --p4-chunk 10 --json state/bench.json
+
+업로드 엑셀: run.py 기본 경로(upload_xlsx OOXML 직접 작성) 그대로 — 대역 서버는 POI 방식 리더(read_upload_rows)로 파싱.
+"""
+import sys, os, io, json, time, tempfile, argparse, contextlib, statistics
+from datetime import datetime, timedelta
+from pathlib import Path
+
+try:
+    sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+    sys.stderr.reconfigure(encoding="utf-8", errors="replace")
+except Exception:
+    pass
+
+import openpyxl
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import mock_erp_server as mock_erp
+
+PHASES = (("phase3", "d0_upload_via_http"), ("phase4", "api_rank_batch_via_http"),
+          ("phase5", "final_save_via_http_with_pbom_guard"), ("phase6", "verify_smartmes"))
+
+
+def write_items_xlsx(path: Path, items, prod_date: datetime):
+    """--xlsx 직접 모드 입력 (A=생산일, B=제품번호, C=생산량)."""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["생산일", "제품번호", "생산량"])
+    for it in items:
+        ws.append([prod_date.strftime("%Y-%m-%d"), it["PROD_NO"], it["QTY"]])
+    wb.save(path)
+
+
+def timed(fn, rec, phase):
+    def wrapper(*a, **kw):
+        t0 = time.perf_counter()
+        try:
+            out = fn(*a, **kw)
+            rec[phase + "_result"] = out
+            return out
+        finally:
+            rec[phase] = rec.get(phase, 0.0) + time.perf_counter() - t0
+    return wrapper
+
+
+def run_once(d0, mock, base, args, work_dir: Path, n):
+    import requests
+    mock.reset()
+    d0.PHASE6_FAILED.clear()
+    prod_date = datetime.strptime(args.prod_date, "%Y-%m-%d")
+    items = [{"PROD_NO": f"BENCH{i:04d}", "QTY": 100 + (i * 37) % 400} for i in range(args.items)]
+    xlsx = work_dir / f"bench_items_{n}.xlsx"
+    write_items_xlsx(xlsx, items, prod_date)
+
+    sess = requests.Session()
+    sess.get(base + "/layout/layout.do", timeout=10)
+    sess.headers["X-XSRF-TOKEN"] = sess.cookies.get("XSRF-TOKEN", "")
+    d0._HTTP_ONLY_SESS = sess
+
+    cli = ["--session", "morning", "--line", args.line, "--http-only", "--xlsx", str(xlsx),
+           "--prod-date", args.prod_date, "--no-jobsetup", "--p4-chunk", str(args.p4_chunk)]
+    run_args = d0.build_arg_parser().parse_args(cli)
+    d0.P4_SAVE_CHUNK = run_args.p4_chunk
+    d0.UPLOAD_WRITER = run_args.upload_writer
+
+    rec, log = {}, io.StringIO()
+    originals = {name: getattr(d0, name) for _, name in PHASES}
+    for phase, name in PHASES:
+        setattr(d0, name, timed(originals[name], rec, phase))
+    err = None
+    t0 = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else log):
+            d0._main_http_only(run_args, sess, "morning", prod_date)
+    except SystemExit as e:
+        err = f"SystemExit({e.code})"
+    except Exception as e:
+        err = repr(e)
+    finally:
+        for name, fn in originals.items():
+            setattr(d0, name, fn)
+    rec["total"] = time.perf_counter() - t0
+
+    batch = rec.get("phase4_result") or {}
+    ok = (err is None and not d0.PHASE6_FAILED and rec.get("phase6_result") is True
+          and batch.get("failed") == 0 and batch.get("missing") == 0)
+    stats = {k: dict(v) for k, v in mock.stats.items()}
+    result = {
+        "run": n, "ok": ok, "error": err, "items": args.items,
+        "seconds": {k: round(rec.get(k, 0.0), 3) for k in ("total", "phase3", "phase4", "phase5", "phase6")},
+        "phase4": {k: batch.get(k) for k in ("done", "failed", "missing")},
+        "requests": {k: v["count"] for k, v in stats.items()},
+        "errors": {k: v["errors"] for k, v in stats.items() if v["errors"]},
+        "server_ms": {k: round(v["ms"], 1) for k, v in stats.items()},
+        "save_rows": list(mock.save_rows),
+    }
+    if not ok and not args.verbose:
+        print(log.getvalue()[-4000:])
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser(description="run.py --http-only Phase 3~6 로컬 벤치마크")
+    ap.add_argument("--items", type=int, default=60, help="등록 품번 수 (default 60 = 야간 1세션 규모)")
+    ap.add_argument("--line", choices=["SP3M3", "SD9A01"], default="SP3M3")
+    ap.add_argument("--prod-date", default=(datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d"))
+    ap.add_argument("--p4-chunk", type=int, default=0, help="run.py --p4-chunk 그대로 전달")
+    ap.add_argument("--repeat", type=int, default=1)
+    ap.add_argument("--json", help="결과 JSON 저장 경로")
+    ap.add_argument("-v", "--verbose", action="store_true", help="run.py 로그 그대로 출력")
+    mock_erp.add_mock_args(ap)
+    args = ap.parse_args()
+
+    mock = mock_erp.mock_from_args(args)
+    server, base = mock_erp.serve(mock)
+    # run.py는 import 시점에 주소를 읽는다 — 대역 서버 기동 후 import
+    for key in ("D0_ERP_BASE", "D0_AUTH_BASE", "D0_SMARTMES_BASE"):
+        os.environ[key] = base
+    import run as d0
+
+    print(f"[bench] mock={base} items={args.items} line={args.line} p4_chunk={args.p4_chunk} "
+          f"latency={args.latency_ms}ms save={args.save_latency_ms}ms+{args.row_latency_ms}ms/row "
+          f"fail={mock.fail} reject_multi_row={args.reject_multi_row}")
+    results = []
+    with tempfile.TemporaryDirectory(prefix="d0_bench_") as tmp:
+        d0.UPLOAD_DIR = Path(tmp)
+        for n in range(1, args.repeat + 1):
+            r = run_once(d0, mock, base, args, Path(tmp), n)
+            results.append(r)
+            sec = r["seconds"]
+            print(f"[bench] run {n}/{args.repeat} {'OK' if r['ok'] else 'FAIL'} total {sec['total']:.2f}s | "
+                  f"P3 {sec['phase3']:.2f}s P4 {sec['phase4']:.2f}s P5 {sec['phase5']:.2f}s P6 {sec['phase6']:.2f}s | "
+                  f"P4 done={r['phase4']['done']} failed={r['phase4']['failed']} missing={r['phase4']['missing']} | "
+                  f"requests {r['requests']} save_rows={r['save_rows']}"
+                  + (f" | errors {r['errors']}" if r["errors"] else "")
+                  + (f" | {r['error']}" if r["error"] else ""))
+    server.shutdown()
+
+    totals = [r["seconds"]["total"] for r in results]
+    p4 = [r["seconds"]["phase4"] for r in results]
+    summary = {"runs": len(results), "ok": all(r["ok"] for r in results),
+               "total_median_s": round(statistics.median(totals), 3),
+               "phase4_median_s": round(statistics.median(p4), 3),
+               "phase4_ms_per_item": round(statistics.median(p4) * 1000 / max(args.items, 1), 1)}
+    print(f"[bench] summary {summary}")
+    if args.json:
+        Path(args.json).write_text(json.dumps({"args": vars(args), "summary": summary, "runs": results},
+                                              ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"[bench] json: {args.json}")
+    sys.exit(0 if summary["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""check_upload_xlsx.py — upload_xlsx.write_upload_xlsx 템플릿 일치·파싱 검증 (Excel / ERP 접속 불필요)
+
+확인 항목 (하나라도 어긋나면 exit 1):
+  1. 재현      : 템플릿 데이터(R2~R6)를 그대로 다시 쓰면 모든 part가 템플릿과 바이트 동일
+  2. 구조      : 임의 데이터(1건 / N건 / 중복 품번 / XML 특수문자 / 소수 수량)에서
+                 zip 엔트리 순서·이름·압축방식·시각·속성 동일, sheet1·sharedStrings 외 part 바이트 동일,
+                 sheet1 머리(네임스페이스·cols)·꼬리, 데이터 셀 속성(s / t="s")이 템플릿 R2와 동일
+  3. 파싱      : POI 방식 리더(read_upload_rows)로 A/B = 문자열 셀, C = 숫자 셀, 값 일치
+                 openpyxl 로드 결과와도 값 일치 (교차 확인)
+  4. 속도      : N건 작성 반복 중앙값 표시
+
+zip 압축 스트림 자체(deflate 구현)는 Excel과 다를 수 있다 — 비교는 압축 해제한 part 바이트 기준.
+
+사용:
+  python check_upload_xlsx.py
+  python check_upload_xlsx.py --items 60 --repeat 50
+"""
+import sys, os, re, time, zipfile, argparse, statistics, tempfile
+from pathlib import Path
+
+try:
+    sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+    sys.stderr.reconfigure(encoding="utf-8", errors="replace")
+except Exception:
+    pass
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import upload_xlsx  # noqa: E402
+
+META = ("filename", "date_time", "compress_type", "create_system", "create_version",
+        "extract_version", "external_attr")
+FAILS = []
+
+
+def check(cond, msg):
+    if not cond:
+        FAILS.append(msg)
+        print(f"  FAIL {msg}")
+    return cond
+
+
+def template_items():
+    rows = upload_xlsx.read_upload_rows(str(upload_xlsx.TEMPLATE))
+    date_str = rows[1][1][0]
+    return date_str, [{"PROD_NO": v[1], "QTY": v[2]} for _, v in rows[1:]]
+
+
+def cases(n):
+    return {
+        "1건": [{"PROD_NO": "RSP3SC0246", "QTY": 120}],
+        f"{n}건": [{"PROD_NO": f"RSP3SC{i:04d}", "QTY": 100 + (i * 37) % 400} for i in range(n)],
+        "중복 품번": [{"PROD_NO": p, "QTY": q} for p, q in (("MOSPLL0017", 10), ("MOSPLL0018", 20), ("MOSPLL0017", 30))],
+        "특수문자": [{"PROD_NO": "A&B<1>", "QTY": 5}, {"PROD_NO": " 88890F2000KK1 ", "QTY": 7}],
+        "소수 수량": [{"PROD_NO": "5NA857819A", "QTY": 12.5}, {"PROD_NO": "MW88830R6000", "QTY": 300.0}],
+    }
+
+
+def _sheet_frame(xml: bytes):
+    m = re.search(rb"<sheetData>(.*)</sheetData>", xml, re.S)
+    head = re.sub(rb'<dimension ref="[^"]*"/>', b"", xml[:m.start(1)])
+    return head, xml[m.end(1):], m.group(1)
+
+
+def check_reproduce(tmp: Path):
+    print("[1] 템플릿 재현")
+    date_str, items = template_items()
+    out = upload_xlsx.write_upload_xlsx(items, date_str, tmp / "reproduce.xlsx")
+    with zipfile.ZipFile(upload_xlsx.TEMPLATE) as zt, zipfile.ZipFile(out) as zo:
+        ti, oi = zt.infolist(), zo.infolist()
+        check([i.filename for i in ti] == [i.filename for i in oi], "엔트리 순서/이름")
+        for a, b in zip(ti, oi):
+            check(all(getattr(a, k) == getattr(b, k) for k in META), f"엔트리 메타 {a.filename}")
+            check(zt.read(a.filename) == zo.read(b.filename), f"part 바이트 {a.filename}")
+
+
+def check_case(tmp: Path, name, items, date_str="2026-10-19"):
+    print(f"[2/3] {name}")
+    out = upload_xlsx.write_upload_xlsx(items, date_str, tmp / f"case_{len(FAILS)}_{len(items)}.xlsx")
+    patched = (upload_xlsx.SHEET_PART, upload_xlsx.SST_PART)
+    with zipfile.ZipFile(upload_xlsx.TEMPLATE) as zt, zipfile.ZipFile(out) as zo:
+        ti, oi = zt.infolist(), zo.infolist()
+        check([tuple(getattr(i, k) for k in META) for i in ti] == [tuple(getattr(i, k) for k in META) for i in oi],
+              f"{name}: 엔트리 메타")
+        for a in ti:
+            if a.filename not in patched:
+                check(zt.read(a.filename) == zo.read(a.filename), f"{name}: part 바이트 {a.filename}")
+        t_head, t_tail, t_body = _sheet_frame(zt.read(upload_xlsx.SHEET_PART))
+        o_xml = zo.read(upload_xlsx.SHEET_PART)
+        o_head, o_tail, o_body = _sheet_frame(o_xml)
+        check((o_head, o_tail) == (t_head, t_tail), f"{name}: sheet1 머리/꼬리")
+        check(f'<dimension ref="A1:C{len(items) + 1}"/>'.encode() in o_xml, f"{name}: dimension")
+        t_attrs = {c: a for c, r, a in re.findall(rb'<c r="([A-Z]+)(\d+)"([^>]*)>', t_body) if r == b"2"}
+        o_attrs = re.findall(rb'<c r="([A-Z]+)(\d+)"([^>]*)>', o_body)
+        check(all(a == t_attrs[c] for c, r, a in o_attrs if r != b"1"), f"{name}: 데이터 셀 속성")
+        sst = zo.read(upload_xlsx.SST_PART)
+        n_si = len(re.findall(rb"<si>", sst))
+        check(f'uniqueCount="{n_si}"'.encode() in sst, f"{name}: uniqueCount")
+        check(f'count="{3 + 2 * len(items)}"'.encode() in sst, f"{name}: count")
+
+    rows = upload_xlsx.read_upload_rows(str(out))
+    check(rows[0][1] == ["생산일", "제품번호", "생산량"], f"{name}: 헤더 {rows[0][1]}")
+    body = rows[1:]
+    check([r for r, _ in body] == list(range(2, len(items) + 2)), f"{name}: 행 번호")
+    for it, (r, (da, pno, qty)) in zip(items, body):
+        ok = (isinstance(da, str) and isinstance(pno, str) and isinstance(qty, float)
+              and da == date_str and pno == str(it["PROD_NO"]).strip() and qty == float(it["QTY"]))
+        if not check(ok, f"{name}: R{r} POI 방식 파싱 {da!r} {pno!r} {qty!r}"):
+            break
+
+    try:
+        import openpyxl
+    except ImportError:
+        print("  (openpyxl 없음 — 교차 확인 생략)")
+        return
+    ws = openpyxl.load_workbook(out).worksheets[0]
+    got = [list(r) for r in ws.iter_rows(min_row=2, max_col=3, values_only=True)]
+    want = [[date_str, str(it["PROD_NO"]).strip(), it["QTY"]] for it in items]
+    check(got == want, f"{name}: openpyxl 교차 확인")
+
+
+def bench(tmp: Path, n, repeat):
+    items = cases(n)[f"{n}건"]
+    out = tmp / "bench.xlsx"
+    upload_xlsx.write_upload_xlsx(items, "2026-10-19", out)  # 템플릿 분해 캐시 채움
+    secs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        upload_xlsx.write_upload_xlsx(items, "2026-10-19", out)
+        secs.append(time.perf_counter() - t0)
+    print(f"[4] 속도 {n}건 × {repeat}회: median {statistics.median(secs) * 1000:.2f} ms  "
+          f"max {max(secs) * 1000:.2f} ms  ({out.stat().st_size:,} bytes)")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="업로드 엑셀 OOXML 작성 템플릿 일치·파싱 검증")
+    ap.add_argument("--items", type=int, default=60, help="N건 케이스 / 속도 측정 품번 수 (default 60)")
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="d0_upload_check_") as tmp:
+        tmp = Path(tmp)
+        check_reproduce(tmp)
+        for name, items in cases(args.items).items():
+            check_case(tmp, name, items)
+        bench(tmp, args.items, args.repeat)
+
+    print(f"[check] {'OK' if not FAILS else f'FAIL {len(FAILS)}건'}")
+    sys.exit(1 if FAILS else 0)
+
+
+if __name__ == "__main__":
+    main()
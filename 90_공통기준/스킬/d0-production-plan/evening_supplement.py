@@ -8,37 +8,21 @@ import sys
 from datetime import datetime
 from pathlib import Path
 
-from openpyxl import load_workbook
-
 import run as d0
 
 
 LINE = "SP3M3"
 
 
-def extract_night_items_from_sheet(ws):
-    """B열 주간계획 경계 전까지 I=신MES 품번, K=지시 수량을 읽는다."""
-    night_end = None
-    for r in range(2, ws.max_row + 1):
-        v = ws.cell(r, 2).value
-        if v and "주간계획" in str(v):
-            night_end = r - 1
-            break
-    if night_end is None:
-        raise RuntimeError(f"{ws.title} 시트 주간계획 경계 미발견")
+def extract_night_items_from_sheet(plan, sheet_name):
+    """B열 주간계획 경계 전까지 I=신MES 품번, K=지시 수량을 읽는다 (생산지시서 스냅샷 기준)."""
+    sec = plan["sheets"][sheet_name]
+    if not sec["night_boundary"]:
+        raise RuntimeError(f"{sheet_name} 시트 주간계획 경계 미발견")
 
     items = []
     skipped_korean = []
-    for r in range(3, night_end + 1):
-        prod_no = ws.cell(r, 9).value
-        qty = ws.cell(r, 11).value
-        if not (prod_no and qty):
-            continue
-        try:
-            qty_int = int(qty)
-        except (ValueError, TypeError):
-            continue
-        pno = str(prod_no).strip()
+    for r, pno, qty_int in sec["night_rows"]:
         if any("가" <= ch <= "힣" for ch in pno):
             skipped_korean.append({"row": r, "PROD_NO": pno, "QTY": qty_int})
             continue
@@ -47,18 +31,12 @@ def extract_night_items_from_sheet(ws):
 
 
 def load_items(plan_path: Path, source_sheet: str):
-    wb = load_workbook(plan_path, data_only=True)
-    try:
-        if source_sheet not in wb.sheetnames:
-            raise RuntimeError(f"{plan_path.name}에 {source_sheet!r} 시트 없음")
-        if source_sheet == "출력용":
-            items = d0.extract_sp3m3_night(wb, allow_stale_output=True)
-            skipped = []
-        else:
-            items, skipped = extract_night_items_from_sheet(wb[source_sheet])
-        return items, skipped
-    finally:
-        wb.close()
+    plan = d0.load_plan_snapshot(plan_path)
+    if source_sheet not in plan["sheetnames"]:
+        raise RuntimeError(f"{plan_path.name}에 {source_sheet!r} 시트 없음")
+    if source_sheet == "출력용":
+        return d0.extract_sp3m3_night(plan, allow_stale_output=True), []
+    return extract_night_items_from_sheet(plan, source_sheet)
 
 
 def main():
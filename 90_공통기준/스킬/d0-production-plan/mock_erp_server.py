@@ -0,0 +1,423 @@
+"""mock_erp_server.py — D0 HTTP 흐름 로컬 대역 서버 (ERP + OAuth + SmartMES)
+
+api_p4_capture.py 캡처(state/p4_capture_*.json)를 원형으로 run.py --http-only가 부르는
+ERP/SmartMES 엔드포인트를 흉내낸다. erp-dev·SmartMES 접속 없이 Phase 3~6 처리량 측정 / 회귀 확인용.
+
+엔드포인트 (run.py http 경로가 호출하는 것만):
+  OAuth   GET /oauth2/sso · GET /oauth/authorize · POST /login · GET /layout/layout.do (XSRF-TOKEN 발급)
+  Phase3  GET popupPmD0AddnUpload.do · POST selectListPmD0AddnUpload.do (xlsx 파싱 — upload_xlsx.read_upload_rows, POI 방식 셀 타입)
+          POST multiListPmD0AddnUpload.do (REG_NO 발급)
+  Phase4  GET totGrid / mGrid / sGrid · POST multiList{MainSub,Outer}PrdtPlanRankDecideMng.do (서열 저장)
+  Phase6  POST /v2/prdt/schdl/list.api
+  관리    GET /__mock/stats · POST /__mock/reset
+
+상태 (메모리, 재기동/reset 시 초기화):
+  - totGrid: 업로드 행마다 REG_NO 발급 (REG_DT = SHIPTDA = 엑셀 생산일)
+  - sGrid: (LINE_CD, PLAN_DA)별 서열. 첫 조회 시 캡처 dataList 기존 행(WORK_STATUS_CD != 'A')을
+    요청 일자로 옮겨 채운다 (캡처 라인만, 다른 라인은 빈 서열)
+  - 서열 저장: 받은 dataList가 그대로 새 서열. sendMesFlag='Y'면 SmartMES 일정 갱신
+  - 실 ERP 재현: POST X-XSRF-TOKEN ≠ 쿠키 → 500 / sendMesFlag='Y'인데 PRDT_RANK·BEGIN_TIME 불일치 → -9999
+
+지연 / 장애 주입:
+  --latency-ms N        모든 요청 기본 지연
+  --save-latency-ms N   서열 저장 1회당 추가 지연
+  --row-latency-ms N    서열 저장 dataList 행당 추가 지연
+  --fail KIND:RATE      KIND(auth/upload/tot/m/s/save/mes) 요청을 RATE 확률로 500 (반복 지정, --seed 고정)
+  --reject-multi-row    서열 저장 신규 행 2건 이상이면 500 (단건 저장만 받는 ERP 재현)
+  --pbom-missing P1,P2  P-BOM 미등록 품번 → mesMsg "P-BOM 등록 안 됨. [라인, 품번]" (Phase5 guard 경로)
+
+사용:
+  python mock_erp_server.py --port 19100 --latency-ms 30
+  D0_ERP_BASE / D0_AUTH_BASE / D0_SMARTMES_BASE = http://127.0.0.1:19100 지정 후
+  python run.py --session morning --line SP3M3 --http-only --xlsx <엑셀> --prod-date YYYY-MM-DD --no-jobsetup
+  처리량 측정은 bench_http_only.py (이 서버를 프로세스 안에서 띄운다)
+"""
+import sys, re, json, time, uuid, copy, random, argparse, threading
+import email.parser, email.policy
+from datetime import datetime, timedelta
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import upload_xlsx  # noqa: E402  — 같은 폴더 (POI 방식 업로드 엑셀 리더)
+
+try:
+    sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+    sys.stderr.reconfigure(encoding="utf-8", errors="replace")
+except Exception:
+    pass
+
+STATE_DIR = Path(__file__).resolve().parent / "state"
+
+# run.py LINE_CONFIG와 같은 라인 구분
+LINES = {
+    "SP3M3": {"LINE_DIV_CD": "02", "LINE_DIV_NM": "MAIN", "LINE_NM": "SP3 MAIN #03"},
+    "SD9A01": {"LINE_DIV_CD": "01", "LINE_DIV_NM": "OUTER", "LINE_NM": "SD9 OUTER #01"},
+}
+# mGrid 행에는 없는 서열 전용 필드 (setBeginTime / grid 렌더링 산출)
+RANK_FIELDS = ("PRDT_RANK", "BEGIN_TIME", "END_TIME", "PLAN_DA_S", "PLAN_DA_E")
+FAIL_KINDS = ("auth", "upload", "tot", "m", "s", "save", "mes")
+DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+EXCEL_EPOCH = datetime(1899, 12, 30)  # 1900 날짜 체계 serial 0
+
+P = "/prdtPlanMng/"
+ROUTES = {
+    ("GET", "/oauth2/sso"): ("auth", "_sso"),
+    ("GET", "/oauth/authorize"): ("auth", "_authorize"),
+    ("POST", "/login"): ("auth", "_login"),
+    ("GET", "/layout/layout.do"): ("auth", "_layout"),
+    ("GET", P + "viewListDoAddnPrdtPlanInstrMngNew.do"): ("auth", "_layout"),
+    ("GET", P + "popupPmD0AddnUpload.do"): ("upload", "_popup"),
+    ("POST", P + "selectListPmD0AddnUpload.do"): ("upload", "_upload_parse"),
+    ("POST", P + "multiListPmD0AddnUpload.do"): ("upload", "_upload_save"),
+    ("GET", P + "selectListDoAddnPrdtPlanInstrMngNew.do"): ("tot", "_tot_grid"),
+    ("GET", P + "selectListDoAddnPrdtConctLineNew.do"): ("m", "_m_grid"),
+    ("GET", P + "selectListDoAddnPrdtConctLineDetailNew.do"): ("s", "_s_grid"),
+    ("POST", P + "multiListMainSubPrdtPlanRankDecideMng.do"): ("save", "_rank_save"),
+    ("POST", P + "multiListOuterPrdtPlanRankDecideMng.do"): ("save", "_rank_save"),
+    ("POST", "/v2/prdt/schdl/list.api"): ("mes", "_mes_schedule"),
+    ("GET", "/__mock/stats"): (None, "_stats"),
+    ("POST", "/__mock/reset"): (None, "_reset"),
+}
+
+
+def latest_capture():
+    caps = sorted(STATE_DIR.glob("p4_capture_*.json"))
+    if not caps:
+        raise FileNotFoundError(f"캡처 없음: {STATE_DIR}/p4_capture_*.json — api_p4_capture.py 선행")
+    return caps[-1]
+
+
+def _strip_grid(row):
+    return {k: v for k, v in row.items() if not k.startswith("pq_")}
+
+
+def _row_key(row):
+    """sGrid 행 식별 — run.py _s_row_key와 동일 (PROD_NO, EXT_PLAN_REG_NO→REG_NO)."""
+    ext = row.get("EXT_PLAN_REG_NO") or row.get("REG_NO")
+    return (row.get("PROD_NO"), str(ext) if ext is not None else "")
+
+
+def _shift_dates(row, days):
+    """row의 YYYY-MM-DD 문자열 필드를 days만큼 이동 (캡처 기존 서열을 요청 일자로 옮김)."""
+    out = dict(row)
+    for k, v in row.items():
+        if isinstance(v, str) and DATE_RE.match(v):
+            out[k] = (datetime.strptime(v, "%Y-%m-%d") + timedelta(days=days)).strftime("%Y-%m-%d")
+    return out
+
+
+def _json(status, obj, headers=()):
+    return status, [("Content-Type", "application/json;charset=UTF-8"), *headers], \
+        json.dumps(obj, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def _text(status, text, headers=()):
+    return status, [("Content-Type", "text/html;charset=UTF-8"), *headers], text.encode("utf-8")
+
+
+def parse_fail_specs(specs):
+    """["save:0.1", "tot:0.05"] → {"save": 0.1, "tot": 0.05}"""
+    out = {}
+    for spec in specs or []:
+        kind, _, rate = spec.partition(":")
+        if kind not in FAIL_KINDS:
+            raise ValueError(f"--fail KIND는 {FAIL_KINDS} 중 하나: {spec}")
+        out[kind] = float(rate or 1.0)
+    return out
+
+
+class MockERP:
+    """ERP/SmartMES 상태 + 요청 처리. HTTP 없이 handle()로도 호출 가능."""
+
+    def __init__(self, fixture=None, latency_ms=0, save_latency_ms=0, row_latency_ms=0,
+                 fail=None, reject_multi_row=False, pbom_missing=(), seed=0):
+        cap = json.loads(Path(fixture or latest_capture()).read_text(encoding="utf-8"))
+        rows = [_strip_grid(r) for r in cap["dataList"]]
+        self.fixture_line = rows[0]["LINE_CD"]
+        self.fixture_plan_da = rows[0]["PLAN_DA"]
+        self.seed_rows = [r for r in rows if r.get("WORK_STATUS_CD") != "A"]
+        self.m_template = {k: v for k, v in rows[0].items() if k not in RANK_FIELDS}
+        self.latency = latency_ms / 1000.0
+        self.save_latency = save_latency_ms / 1000.0
+        self.row_latency = row_latency_ms / 1000.0
+        self.fail = dict(fail or {})
+        self.reject_multi_row = reject_multi_row
+        self.pbom_missing = set(pbom_missing or ())
+        self.seed = seed
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.rng = random.Random(self.seed)
+            self.xsrf = str(uuid.uuid4())
+            self.next_reg_no = 900001
+            self.tot = []            # totGrid 행
+            self.s_grids = {}        # (LINE_CD, PLAN_DA) -> 서열 행
+            self.schedules = {}      # (lineCd, prdtDa YYYYMMDD) -> SmartMES items
+            self.stats = {}          # kind -> {count, errors, ms}
+            self.save_rows = []      # 서열 저장 1회당 dataList 행 수
+
+    # ── 요청 진입점 ──────────────────────────────────────────
+    def handle(self, method, path, query, headers, body):
+        kind, name = ROUTES.get((method, path), (None, None))
+        if name is None:
+            return _text(404, f"mock: no route {method} {path}")
+        if kind is None:  # 관리 엔드포인트 — 지연/장애/통계 제외, lock은 각자 처리
+            return getattr(self, name)(query, headers, body)
+        t0 = time.perf_counter()
+        delay = self.latency
+        if kind == "save":
+            try:
+                n_rows = len(json.loads(body or b"{}").get("dataList") or [])
+            except ValueError:
+                n_rows = 0
+            delay += self.save_latency + self.row_latency * n_rows
+        if delay:
+            time.sleep(delay)
+        with self.lock:
+            if kind in self.fail and self.rng.random() < self.fail[kind]:
+                res = _text(500, f"mock injected failure ({kind})")
+            else:
+                try:
+                    res = getattr(self, name)(query, headers, body)
+                except Exception as e:
+                    res = _text(500, f"mock error: {e!r}")
+            st = self.stats.setdefault(kind, {"count": 0, "errors": 0, "ms": 0.0})
+            st["count"] += 1
+            st["errors"] += res[0] not in (200, 302)
+            st["ms"] += (time.perf_counter() - t0) * 1000
+        return res
+
+    def _xsrf_ok(self, headers):
+        cookie = SimpleCookie(headers.get("Cookie") or "")
+        token = cookie["XSRF-TOKEN"].value if "XSRF-TOKEN" in cookie else ""
+        return token == self.xsrf and headers.get("X-XSRF-TOKEN") == self.xsrf
+
+    # ── OAuth ────────────────────────────────────────────────
+    def _sso(self, query, headers, body):
+        host = headers.get("Host")
+        return _text(200, f"<script>var ssoUrl = 'http://{host}/oauth/authorize?client_id=ERP';</script>")
+
+    def _authorize(self, query, headers, body):
+        return _text(200, "<html>login</html>", [("Set-Cookie", "JSESSIONID=mock; Path=/")])
+
+    def _login(self, query, headers, body):
+        return 302, [("Location", f"http://{headers.get('Host')}/layout/layout.do?statusCode=200+OK"),
+                     ("Content-Type", "text/html")], b""
+
+    def _layout(self, query, headers, body):
+        return _text(200, "<html>layout</html>", [("Set-Cookie", f"XSRF-TOKEN={self.xsrf}; Path=/"),
+                                                  ("Set-Cookie", "SESSION=mock; Path=/")])
+
+    # ── Phase 3 업로드 ───────────────────────────────────────
+    def _popup(self, query, headers, body):
+        return _text(200, "<html>popup</html>")
+
+    def _upload_parse(self, query, headers, body):
+        if not self._xsrf_ok(headers):
+            return _text(500, "XSRF token mismatch")
+        msg = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+            f"Content-Type: {headers.get('Content-Type')}\r\n\r\n".encode() + body)
+        part = next((p for p in msg.iter_parts() if p.get_param("name", header="content-disposition") == "files"), None)
+        if part is None:
+            return _json(200, {"statusCode": 500, "statusTxt": "files 없음"})
+        # 실 ERP 파서(POI 계열)처럼 셀 타입 그대로 읽는다 — 날짜 숫자 셀(serial)은 일자로 환산
+        out = []
+        for r, row in upload_xlsx.read_upload_rows(part.get_payload(decode=True)):
+            if r < 2 or not any(v not in (None, "") for v in row):
+                continue
+            da, pno, qty = row
+            if isinstance(da, float):
+                da = (EXCEL_EPOCH + timedelta(days=da)).strftime("%Y-%m-%d")
+            ok = bool(pno) and isinstance(qty, (int, float)) and DATE_RE.match(str(da or ""))
+            out.append({"PRDT_DA": str(da), "PROD_NO": str(pno or "").strip(), "PRDT_QTY": int(qty or 0) if ok else qty,
+                        "ERROR_FLAG": "" if ok else "Y"})
+        return _json(200, {"statusCode": 200, "data": {"list": out}})
+
+    def _upload_save(self, query, headers, body):
+        if not self._xsrf_ok(headers):
+            return _text(500, "XSRF token mismatch")
+        for r in json.loads(body)["excelList"]:
+            reg_no = self.next_reg_no
+            self.next_reg_no += 1
+            self.tot.append({"PROD_NO": r["PROD_NO"], "PROD_ID": f"{r['PROD_NO']}_A", "REG_NO": reg_no,
+                             "REG_DT": r["PRDT_DA"], "SHIPTDA": r["PRDT_DA"], "PRDT_QTY": r["PRDT_QTY"],
+                             "ADD_PRDT_QTY": r["PRDT_QTY"], "REG_USR_NM": "대원테크"})
+        return _json(200, {"statusCode": 200, "statusTxt": "OK"})
+
+    # ── Phase 4 그리드 / 서열 저장 ───────────────────────────
+    def _tot_grid(self, query, headers, body):
+        ship = query.get("searchShipDa", [""])[0]
+        return _json(200, {"data": {"list": [dict(t) for t in self.tot if t["SHIPTDA"] == ship]}})
+
+    def _m_grid(self, query, headers, body):
+        reg = query.get("EXT_PLAN_REG_NO", [""])[0]
+        tot = next((t for t in self.tot if str(t["REG_NO"]) == reg), None)
+        if tot is None:
+            return _json(200, {"data": {"list": []}})
+        plan = datetime.strptime(tot["REG_DT"], "%Y-%m-%d")
+        rows = []
+        for line_cd, line in LINES.items():
+            row = dict(self.m_template)
+            row.update(line)
+            row.update({"LINE_CD": line_cd, "PROD_NO": tot["PROD_NO"], "PROD_ID": tot["PROD_ID"],
+                        "EXT_PLAN_REG_NO": tot["REG_NO"], "REG_NO": tot["REG_NO"], "ADD_PRDT_QTY": tot["PRDT_QTY"],
+                        "PLAN_DA": tot["REG_DT"], "STD_DA": (plan - timedelta(days=1)).strftime("%Y-%m-%d"),
+                        "PLAN_STD_DA": (plan - timedelta(days=1)).strftime("%Y-%m-%d"),
+                        "NEXT_PLAN_DA": (plan + timedelta(days=1)).strftime("%Y-%m-%d")})
+            rows.append(row)
+        return _json(200, {"data": {"list": rows}})
+
+    def _grid_for(self, line_cd, plan_da):
+        key = (line_cd, plan_da)
+        if key not in self.s_grids:
+            seed = []
+            if line_cd == self.fixture_line:
+                days = (datetime.strptime(plan_da, "%Y-%m-%d") - datetime.strptime(self.fixture_plan_da, "%Y-%m-%d")).days
+                seed = [_shift_dates(r, days) for r in self.seed_rows]
+            self.s_grids[key] = seed
+        return self.s_grids[key]
+
+    def _s_grid(self, query, headers, body):
+        grid = self._grid_for(query.get("LINE_CD", [""])[0], query.get("PLAN_DA", [""])[0])
+        return _json(200, {"data": {"list": copy.deepcopy(grid)}})
+
+    def _rank_save(self, query, headers, body):
+        if not self._xsrf_ok(headers):
+            return _text(500, "XSRF token mismatch")
+        param = json.loads(body)
+        rows = [_strip_grid(r) for r in param.get("dataList") or []]
+        if not rows:
+            return _json(200, {"statusCode": -9999, "statusTxt": "dataList 없음"})
+        line_cd, plan_da = rows[0]["LINE_CD"], rows[0]["PLAN_DA"]
+        current = {}
+        for r in self._grid_for(line_cd, plan_da):
+            current[_row_key(r)] = current.get(_row_key(r), 0) + 1
+        new_rows = 0
+        for r in rows:
+            k = _row_key(r)
+            if current.get(k):
+                current[k] -= 1
+            else:
+                new_rows += 1
+        if self.reject_multi_row and new_rows > 1:
+            return _text(500, "Transaction rolled back (mock: 신규 행 2건 이상)")
+        send_mes = param.get("sendMesFlag") == "Y"
+        if send_mes and any(r.get("PRDT_RANK") != i + 1 or not r.get("BEGIN_TIME") for i, r in enumerate(rows)):
+            return _json(200, {"statusCode": -9999, "statusTxt": "Transaction rolled back"})
+        self.s_grids[(line_cd, plan_da)] = rows
+        self.save_rows.append(len(rows))
+
+        missing = [r["PROD_NO"] for r in rows if r.get("PROD_NO") in self.pbom_missing]
+        if missing:
+            msg = " ".join(f"P-BOM 등록 안 됨. [{line_cd}, {p}]" for p in missing)
+            return _json(200, {"statusCode": 200, "statusTxt": "OK",
+                               "mesMsg": json.dumps({"statusCode": 500, "msg": msg}, ensure_ascii=False)})
+        if not send_mes:
+            return _json(200, {"statusCode": 200, "statusTxt": "OK", "mesMsg": ""})
+        self.schedules[(line_cd, plan_da.replace("-", ""))] = [
+            {"pno": r["PROD_NO"], "prdtRank": r["PRDT_RANK"], "workStatusCd": "R",
+             "prdtQty": r.get("PRDT_PLAN_QTY")} for r in rows]
+        return _json(200, {"statusCode": 200, "statusTxt": "OK", "mesMsg": json.dumps({"statusCode": 200})})
+
+    # ── Phase 6 SmartMES ─────────────────────────────────────
+    def _mes_schedule(self, query, headers, body):
+        req = json.loads(body or b"{}")
+        items = self.schedules.get((req.get("lineCd"), req.get("prdtDa")), [])
+        return _json(200, {"rslt": {"items": copy.deepcopy(items)}})
+
+    # ── 관리 ─────────────────────────────────────────────────
+    def _stats(self, query, headers, body):
+        with self.lock:
+            return _json(200, {"stats": self.stats, "save_rows": self.save_rows, "tot_rows": len(self.tot),
+                               "s_grids": {f"{k[0]}/{k[1]}": len(v) for k, v in self.s_grids.items()}})
+
+    def _reset(self, query, headers, body):
+        self.reset()
+        return _json(200, {"statusCode": 200})
+
+
+def make_handler(mock, verbose=False):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True  # 헤더/본문 분할 전송 시 delayed-ACK 40ms 대기 방지
+
+        def _serve(self, method):
+            u = urlparse(self.path)
+            n = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(n) if n else b""
+            status, headers, payload = mock.handle(method, u.path, parse_qs(u.query), self.headers, body)
+            self.send_response(status)
+            for k, v in headers:
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            self._serve("GET")
+
+        def do_POST(self):
+            self._serve("POST")
+
+        def log_message(self, fmt, *args):
+            if verbose:
+                sys.stderr.write("[mock] " + fmt % args + "\n")
+
+    return Handler
+
+
+def serve(mock, host="127.0.0.1", port=0, verbose=False):
+    """백그라운드 스레드로 서버 기동. Returns (server, base_url)."""
+    server = ThreadingHTTPServer((host, port), make_handler(mock, verbose))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def add_mock_args(ap):
+    """대역 서버 옵션 — bench_http_only.py와 공용."""
+    ap.add_argument("--fixture", help="캡처 파일 (default: state/p4_capture_*.json 최신)")
+    ap.add_argument("--latency-ms", type=float, default=0, help="모든 요청 기본 지연")
+    ap.add_argument("--save-latency-ms", type=float, default=0, help="서열 저장 1회당 추가 지연")
+    ap.add_argument("--row-latency-ms", type=float, default=0, help="서열 저장 dataList 행당 추가 지연")
+    ap.add_argument("--fail", action="append", default=[], metavar="KIND:RATE",
+                    help=f"장애 주입 KIND={'/'.join(FAIL_KINDS)} RATE=0~1 (반복 지정 가능)")
+    ap.add_argument("--reject-multi-row", action="store_true", help="서열 저장 신규 행 2건 이상이면 500")
+    ap.add_argument("--pbom-missing", default="", help="P-BOM 미등록으로 응답할 PROD_NO 콤마구분")
+    ap.add_argument("--seed", type=int, default=0, help="장애 주입 난수 seed")
+
+
+def mock_from_args(args):
+    return MockERP(fixture=args.fixture, latency_ms=args.latency_ms, save_latency_ms=args.save_latency_ms,
+                   row_latency_ms=args.row_latency_ms, fail=parse_fail_specs(args.fail),
+                   reject_multi_row=args.reject_multi_row,
+                   pbom_missing=[p.strip() for p in args.pbom_missing.split(",") if p.strip()], seed=args.seed)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="D0 ERP/SmartMES 로컬 대역 서버")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=19100)
+    ap.add_argument("-v", "--verbose", action="store_true", help="요청 로그 출력")
+    add_mock_args(ap)
+    args = ap.parse_args()
+
+    mock = mock_from_args(args)
+    server, base = serve(mock, args.host, args.port, args.verbose)
+    print(f"[mock] {base} — 기존 서열 {len(mock.seed_rows)}행 ({mock.fixture_line}) / fail={mock.fail} "
+          f"reject_multi_row={mock.reject_multi_row} pbom_missing={sorted(mock.pbom_missing)}")
+    print(f"[mock] D0_ERP_BASE={base} D0_AUTH_BASE={base} D0_SMARTMES_BASE={base}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
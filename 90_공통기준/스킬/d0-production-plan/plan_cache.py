@@ -0,0 +1,205 @@
+"""plan_cache.py — SP3M3 생산지시서(xlsm) 추출 캐시.
+
+생산지시서는 매크로 포함 대형 통합문서라 openpyxl 로드가 D0 Phase 1 시간 대부분을 차지한다.
+morning/evening 본 실행 → verify_run 재실행 → recover 가 같은 파일을 반복 파싱하므로,
+시트를 한 번만 훑어 추출에 필요한 행만 작은 JSON 스냅샷으로 남기고 파일 내용 해시(sha256)로 재사용한다.
+
+스냅샷 (state/plan_cache/{sha256[:20]}_v{PARSER_VERSION}.json):
+  sheetnames                     : 시트 목록
+  sheets["출력용" | "생산계획"]   : night_end / night_boundary / night_rows [[r, PROD_NO, QTY], ...]
+                                   day_start / day_header_row / day_header("section"|"fallback"|None)
+                                   day_rows [[r, PROD_NO, QTY], ...]  — 주간 컷은 적용 전 (--day-cut 가변)
+  sheets["OUTER 생산계획"]        : rows [[r, 라인, 품번, 수량], ...]  — 수량은 원본값 (int 변환은 추출 시)
+  stale                          : 출력용/생산계획 야간 PROD_NO 비교 지표 (guard_sp3m3_output_stale 입력)
+
+행 필터(품번·수량 둘 다 있고 수량이 정수 변환 가능)까지만 여기서 하고, 한글 품번 skip·누적 컷·라인 필터는
+run.py extract_* 가 스냅샷 위에서 그대로 수행한다 — 로그 문구·판정 동일.
+
+파서 규칙이 바뀌면 PARSER_VERSION 을 올린다 (기존 캐시 자동 무효).
+"""
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+PARSER_VERSION = 1
+KEEP_FILES = 30  # 최근 캐시만 유지 (하루 1~2파일)
+
+NIGHT_SHEETS = ("출력용", "생산계획")
+OUTER_SHEET = "OUTER 생산계획"
+NIGHT_END_DEFAULT = 34  # 주간계획 경계 미발견 시 보수적 default (기존 extract_sp3m3_night 동일)
+
+COL_B, COL_D, COL_E, COL_I, COL_K = 1, 3, 4, 8, 10  # values_only 튜플 인덱스
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _col(row, idx):
+    return row[idx] if row is not None and len(row) > idx else None
+
+
+def _int_or_none(v):
+    try:
+        return int(v)
+    except (ValueError, TypeError):
+        return None
+
+
+def _part_qty_rows(rows, start, end):
+    """[start, end] 행 중 품번(I)·수량(K) 둘 다 있고 수량 정수 변환 가능한 행 → [[r, PROD_NO, QTY], ...]."""
+    out = []
+    for r in range(start, min(end, len(rows)) + 1):
+        row = rows[r - 1]
+        part, qty = _col(row, COL_I), _col(row, COL_K)
+        if not (part and qty):
+            continue
+        qty_int = _int_or_none(qty)
+        if qty_int is None:
+            continue
+        out.append([r, str(part).strip(), qty_int])
+    return out
+
+
+def _parse_section_sheet(rows):
+    """출력용/생산계획 시트 — 야간(R3~주간계획 경계-1) + 주간(경계+2~끝) 후보 행."""
+    boundary = None
+    fallback = None
+    for r in range(2, len(rows) + 1):
+        b = _col(rows[r - 1], COL_B)
+        if not b:
+            continue
+        if boundary is None and "주간계획" in str(b):
+            boundary = r
+            break
+        if fallback is None and str(b).strip() == "순서":
+            fallback = r
+    night_end = boundary - 1 if boundary else NIGHT_END_DEFAULT
+    if boundary:
+        day_start, day_header, header_row = boundary + 2, "section", boundary
+    elif fallback:
+        # 6월 이후 신규 양식 — "주간계획" 섹션헤더 없이 "순서" 컬럼헤더 직접 등장
+        day_start, day_header, header_row = fallback + 1, "fallback", fallback
+    else:
+        day_start, day_header, header_row = None, None, None
+    return {
+        "night_end": night_end,
+        "night_boundary": boundary is not None,
+        "night_rows": _part_qty_rows(rows, 3, night_end),
+        "day_start": day_start,
+        "day_header": day_header,
+        "day_header_row": header_row,
+        "day_rows": _part_qty_rows(rows, day_start, len(rows)) if day_start else [],
+    }
+
+
+def _parse_outer_sheet(rows):
+    out = []
+    for r in range(2, len(rows) + 1):
+        row = rows[r - 1]
+        b, d, e = _col(row, COL_B), _col(row, COL_D), _col(row, COL_E)
+        if b and d and e:
+            if not isinstance(e, (int, float, str)):
+                e = str(e)
+            out.append([r, str(b).strip(), str(d).strip(), e])
+    return out
+
+
+def _has_korean(pno):
+    return any("가" <= ch <= "힣" for ch in pno)
+
+
+def stale_metrics(sheets):
+    """출력용/생산계획 야간 PROD_NO set 비교 (한글 자리표시 제외). 시트 없으면 None."""
+    if not all(name in sheets for name in NIGHT_SHEETS):
+        return None
+    out_set, plan_set = (
+        {pno for _, pno, _ in sheets[name]["night_rows"] if pno and not _has_korean(pno)}
+        for name in NIGHT_SHEETS
+    )
+    overlap = len(out_set & plan_set)
+    return {
+        "out": len(out_set), "plan": len(plan_set), "overlap": overlap,
+        "ratio": overlap / max(len(out_set), len(plan_set), 1),
+        "only_out": sorted(out_set - plan_set), "only_plan": sorted(plan_set - out_set),
+    }
+
+
+def parse_plan_workbook(wb, source: str = "", sha256: str = "") -> dict:
+    """openpyxl Workbook(일반/read_only 모두) → 스냅샷 dict. 시트당 iter_rows 1회."""
+    sheets = {}
+    for name in NIGHT_SHEETS:
+        if name in wb.sheetnames:
+            sheets[name] = _parse_section_sheet(list(wb[name].iter_rows(values_only=True)))
+    if OUTER_SHEET in wb.sheetnames:
+        sheets[OUTER_SHEET] = {"rows": _parse_outer_sheet(list(wb[OUTER_SHEET].iter_rows(values_only=True)))}
+    return {
+        "version": PARSER_VERSION,
+        "source": source,
+        "sha256": sha256,
+        "sheetnames": list(wb.sheetnames),
+        "sheets": sheets,
+        "stale": stale_metrics(sheets),
+    }
+
+
+def is_snapshot(obj) -> bool:
+    return isinstance(obj, dict) and "sheets" in obj and "sheetnames" in obj
+
+
+def _cache_path(cache_dir: Path, sha256: str) -> Path:
+    return Path(cache_dir) / f"{sha256[:20]}_v{PARSER_VERSION}.json"
+
+
+def _prune(cache_dir: Path, keep: int = KEEP_FILES):
+    files = sorted(Path(cache_dir).glob("*_v*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for p in files[keep:]:
+        try:
+            p.unlink()
+        except OSError:
+            pass
+
+
+def load_plan(plan_path: Path, cache_dir: Path, use_cache: bool = True) -> dict:
+    """생산지시서 스냅샷 반환 — 같은 내용 해시의 캐시가 있으면 통합문서를 열지 않는다.
+
+    use_cache=False: 캐시 무시하고 다시 파싱 (결과는 캐시에 덮어씀).
+    캐시 읽기/쓰기 실패는 경고만 — 파싱 결과로 그대로 진행.
+    """
+    plan_path = Path(plan_path)
+    t0 = time.perf_counter()
+    sha = file_sha256(plan_path)
+    cache_file = _cache_path(cache_dir, sha)
+    if use_cache and cache_file.exists():
+        try:
+            snap = json.loads(cache_file.read_text(encoding="utf-8"))
+            if snap.get("version") == PARSER_VERSION and snap.get("sha256") == sha:
+                os.utime(cache_file)  # prune 기준 mtime 갱신
+                print(f"[phase1] 생산지시서 캐시 사용: {cache_file.name} ({time.perf_counter() - t0:.2f}s, 통합문서 로드 생략)")
+                return snap
+        except (OSError, ValueError) as e:
+            print(f"[phase1] 캐시 읽기 실패 — 재파싱: {e}")
+
+    import openpyxl
+    wb = openpyxl.load_workbook(plan_path, read_only=True, data_only=True, keep_links=False)
+    try:
+        snap = parse_plan_workbook(wb, source=plan_path.name, sha256=sha)
+    finally:
+        wb.close()
+    print(f"[phase1] 생산지시서 파싱: {plan_path.name} ({time.perf_counter() - t0:.2f}s)")
+
+    try:
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_suffix(".tmp")
+        tmp.write_text(json.dumps(snap, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, cache_file)
+        _prune(cache_dir)
+    except OSError as e:
+        print(f"[phase1] 캐시 저장 실패 (무시): {e}")
+    return snap
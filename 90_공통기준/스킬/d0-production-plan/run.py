@@ -11,6 +11,7 @@
   python run.py --session evening --line SP3M3
 """
 import sys, io, os, re, json, time, base64, argparse, subprocess
+from collections import Counter
 from datetime import datetime, timedelta
 from pathlib import Path
 
@@ -19,26 +20,44 @@ sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding="utf-8", errors="repla
 
 import openpyxl
 from playwright.sync_api import sync_playwright
-import pyautogui
+
+# ERP 세션 공용 패키지 (CDP 기동 · OAuth · 쿠키/XSRF) — 90_공통기준/ERP세션/
+# 아래 이름은 기존 `from run import ...` 호출자(api_p4_*, auth_extract 등)용으로 그대로 노출한다.
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "ERP세션"))
+from erp_session.config import (  # noqa: E402
+    CDP_URL, CHROME_PATH, CHROME_PROFILE, ERP_BASE, AUTH_BASE, ERP_LAYOUT, OAUTH_LOGIN,
+)
+from erp_session.chrome import (  # noqa: E402
+    ensure_chrome_cdp,
+    kill_zombie_chrome as _kill_zombie_chrome,
+    suppress_chrome_crash_restore as _suppress_chrome_crash_restore,
+)
+from erp_session.oauth import (  # noqa: E402
+    erp_login_via_http, ensure_erp_login,
+    inject_cookies_to_playwright as _inject_cookies_to_playwright,
+    load_oauth_cred as _load_oauth_cred,
+    wait_oauth_complete as _wait_oauth_complete,
+)
+from erp_session.cookies import build_session_from_page, refresh_xsrf_from_cookies  # noqa: E402
+
+import plan_cache  # noqa: E402  — 같은 폴더 (생산지시서 추출 캐시)
+import upload_xlsx  # noqa: E402  — 같은 폴더 (업로드 엑셀 OOXML 직접 작성)
 
 # ============================================================
 # 설정
 # ============================================================
-CDP_URL = "http://localhost:9223"
-CHROME_PATH = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
-CHROME_PROFILE = r"C:\Users\User\.flow-chrome-debug"
-ERP_LAYOUT = "http://erp-dev.samsong.com:19100/layout/layout.do"
-D0_URL = "http://erp-dev.samsong.com:19100/prdtPlanMng/viewListDoAddnPrdtPlanInstrMngNew.do"
-OAUTH_LOGIN = "http://auth-dev.samsong.com:18100/login"
+# ERP/OAuth 주소는 erp_session.config (환경변수 D0_ERP_BASE / D0_AUTH_BASE). SmartMES는 아래.
+D0_URL = ERP_BASE + "/prdtPlanMng/viewListDoAddnPrdtPlanInstrMngNew.do"
 PLAN_ROOT = r"Z:\15. SP3 메인 CAPA점검\SP3M3\생산지시서"
 REPO_ROOT = Path(__file__).parent.parent.parent.parent
 SKILL_DIR = Path(__file__).resolve().parent
 STATE_DIR = SKILL_DIR / "state"
+PLAN_CACHE_DIR = STATE_DIR / "plan_cache"  # 생산지시서 추출 캐시 (plan_cache.py)
 OUTER_LOCK_FILE = STATE_DIR / "sd9a01_outer.lock"
 UPLOAD_DIR = REPO_ROOT / "06_생산관리" / "D0_업로드"
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 SMARTMES_TOKEN = "bfee3f3d-caf9-434d-abbb-2cb015ec2469"
-SMARTMES_BASE = "http://lmes-dev.samsong.com:19220"
+SMARTMES_BASE = os.environ.get("D0_SMARTMES_BASE", "http://lmes-dev.samsong.com:19220")
 DAY_CUT_THRESHOLD = 3600
 
 # 세션151: phase6 SmartMES 검증 실패 누적. main 종료 시 0이 아니면 exit 코드 2 (verify_run에서 자동복구 진입).
@@ -65,6 +84,13 @@ LINE_CONFIG = {
 }
 
 PBOM_GUARD_MAX_ITER = 20
+
+# phase4 HTTP 서열 임시저장 묶음 크기 (--p4-chunk). 0 = 신규 행 전체를 POST 1회로 저장.
+# 묶음 저장 후 sGrid 재조회로 반영 확인 — 미반영 행만 단건 저장으로 재시도.
+P4_SAVE_CHUNK = 0
+# phase2 업로드 엑셀 작성 방식 (--upload-writer). "ooxml" = 템플릿 part 복제 + 데이터 행만 교체 (Excel 불필요),
+# "com" = Excel COM 편집·저장 (회귀 fallback)
+UPLOAD_WRITER = "ooxml"
 PBOM_MISSING_RE = re.compile(
     r"P-?BOM\s*등록\s*안\s*됨\.\s*\[\s*([^,\]]+)\s*,\s*([A-Z0-9_./-]+)\s*\]"
 )
@@ -211,109 +237,7 @@ def assert_mes_msg_ok(res, context):
 # ============================================================
 # Phase 0: 환경 준비
 # ============================================================
-def _suppress_chrome_crash_restore(profile_dir: str):
-    """Chrome 비정상 종료 후 "페이지 복원" 알림 차단.
-
-    세션110 보강: taskkill로 강제 종료된 Chrome을 다시 launch하면 Preferences의
-    exit_type이 "Crashed"로 남아 자동 복원 다이얼로그 표시 → 무인 트리거에서 화면 거슬림.
-    Preferences 파일의 exit_type / exited_cleanly 정리로 복원 알림 차단.
-    """
-    import json as _json
-    from pathlib import Path as _Path
-    prefs_path = _Path(profile_dir) / "Default" / "Preferences"
-    if not prefs_path.exists():
-        return
-    try:
-        data = _json.loads(prefs_path.read_text(encoding="utf-8"))
-        prof = data.setdefault("profile", {})
-        prof["exit_type"] = "Normal"
-        prof["exited_cleanly"] = True
-        prefs_path.write_text(_json.dumps(data, ensure_ascii=False), encoding="utf-8")
-    except Exception as e:
-        print(f"[phase0] Preferences 정리 실패 (무시): {e}")
-
-
-def _kill_zombie_chrome(profile_dir: str):
-    """자동화 프로필 Chrome 좀비만 선별 종료 + 잠금파일 정리.
-
-    세션151 보강: 5/9(토) morning 실패 분석 결과.
-    같은 user-data-dir로 Chrome 좀비가 살아있으면 새 launch가 single-instance 규칙으로
-    좀비에 URL만 위임 → 9223 listen은 부활 안 함 → 화면엔 ERP 로그인 페이지만 뜨고 Python timeout.
-
-    프로필 디렉토리 매칭(`--user-data-dir=...`)으로 자동화 Chrome만 식별하여
-    사용자 일상 Chrome(다른 프로필)은 건드리지 않는다.
-    """
-    try:
-        # CommandLine에 user-data-dir 매칭. profile_dir의 백슬래시는 PowerShell -like 패턴에서
-        # 그대로 사용 가능 (와일드카드 *로 둘러싸므로 escape 불필요).
-        ps_cmd = (
-            "Get-CimInstance Win32_Process -Filter \"Name='chrome.exe'\" | "
-            f"Where-Object {{ $_.CommandLine -like '*--user-data-dir={profile_dir}*' }} | "
-            "Select-Object -ExpandProperty ProcessId"
-        )
-        result = subprocess.run(
-            ["powershell", "-NoProfile", "-Command", ps_cmd],
-            capture_output=True, text=True, timeout=10
-        )
-        pids = [p.strip() for p in result.stdout.splitlines() if p.strip().isdigit()]
-        if pids:
-            print(f"[phase0] zombie chrome 발견 (프로필 매칭): pids={pids} — 종료")
-            for pid in pids:
-                subprocess.run(["taskkill", "/F", "/PID", pid], capture_output=True, timeout=5)
-            time.sleep(1.5)  # 종료 안정화 + 파일 핸들 release
-        else:
-            print("[phase0] zombie chrome 없음")
-        # 잠금파일 잔재 정리 (Chrome 비정상 종료 후 SingletonLock 잔존 시 신규 인스턴스 차단됨)
-        from pathlib import Path as _Path
-        for lock_name in ("SingletonLock", "SingletonCookie", "SingletonSocket"):
-            lock_path = _Path(profile_dir) / lock_name
-            try:
-                if lock_path.exists() or lock_path.is_symlink():
-                    lock_path.unlink()
-                    print(f"[phase0] {lock_name} 정리")
-            except Exception:
-                pass
-    except Exception as e:
-        print(f"[phase0] zombie chrome 정리 실패 (무시): {e}")
-
-
-def ensure_chrome_cdp():
-    """CDP 9223 기동 확인."""
-    import urllib.request
-    try:
-        urllib.request.urlopen(f"{CDP_URL}/json/version", timeout=3)
-        print("[phase0] CDP 9223 alive")
-        return True
-    except Exception:
-        print("[phase0] CDP dead — launching Chrome")
-
-    # 세션151: single-instance 위임 함정 차단 — 같은 프로필 좀비 정리 후 fresh launch
-    _kill_zombie_chrome(CHROME_PROFILE)
-    # Chrome 비정상 종료 잔재 정리 (세션110 — 복원 알림 차단)
-    _suppress_chrome_crash_restore(CHROME_PROFILE)
-
-    subprocess.Popen([
-        CHROME_PATH,
-        f"--remote-debugging-port=9223",
-        f"--remote-debugging-address=127.0.0.1",  # 세션105 — IPv6 기본 바인딩 회피
-        f"--user-data-dir={CHROME_PROFILE}",
-        "--no-first-run", "--no-default-browser-check",
-        "--disable-session-crashed-bubble",  # 세션110 — 복원 다이얼로그 차단
-        "--hide-crash-restore-bubble",
-        "--no-default-browser-check",
-        ERP_LAYOUT,
-    ])
-    for i in range(10):
-        time.sleep(1.5)
-        try:
-            urllib.request.urlopen(f"{CDP_URL}/json/version", timeout=2)
-            print(f"[phase0] CDP up (try={i+1})")
-            return True
-        except Exception:
-            continue
-    raise RuntimeError("CDP 9223 기동 실패")
-
-
+# ensure_chrome_cdp / erp_login_via_http / ensure_erp_login 등은 erp_session (상단 import).
 def _force_chrome_foreground():
     """Chrome window 강제 OS-foreground (pyautogui 입력 가로채기 방지).
 
@@ -402,135 +326,6 @@ def _force_chrome_foreground():
         return False
 
 
-def _load_oauth_cred():
-    """OAuth ID/PW 로컬 credential 파일 로드.
-
-    세션153: pyautogui typewrite + Chrome 자동완성 의존 폐기. ID/PW를 .oauth.json에
-    저장하고 page.fill()로 DOM 직접 입력 — OS focus 가로채기 위험 0%.
-    """
-    cred_path = Path(__file__).parent / ".oauth.json"
-    if not cred_path.exists():
-        raise RuntimeError(f".oauth.json 미존재: {cred_path} — ID/PW 파일 저장 후 재실행")
-    cfg = json.loads(cred_path.read_text(encoding="utf-8"))
-    if not cfg.get("id") or not cfg.get("pw"):
-        raise RuntimeError(f".oauth.json id/pw 누락: {cred_path}")
-    return cfg["id"], cfg["pw"]
-
-
-def erp_login_via_http():
-    """ERP OAuth SSO를 requests로 직접 처리 — 브라우저·CDP·pyautogui 의존 0.
-
-    세션153 (2026-05-13) — A안 점진 전환 1단계.
-    daily-routine mes_login() 패턴의 ERP 버전. 실측 캡처 PASS:
-      r1 = GET erp-dev/oauth2/sso → ssoUrl 변수 추출
-      r2 = GET ssoUrl (auth-dev/oauth/authorize, JSESSIONID 발급)
-      r3 = POST auth-dev/login (userId/password/clientId=ERP/ssoUrl)
-           → redirect layout.do?statusCode=200+OK
-      r4 = GET erp-dev/layout/layout.do → XSRF-TOKEN 발급
-
-    반환: requests.Session (cookies + X-XSRF-TOKEN header 세팅 완료). 실패 시 None.
-    가로채기 시나리오 자체 0%. 가장 견고.
-    """
-    import requests as _req
-    user_id, password = _load_oauth_cred()
-    s = _req.Session()
-    s.headers["User-Agent"] = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-    try:
-        r1 = s.get("http://erp-dev.samsong.com:19100/oauth2/sso", timeout=10)
-        m = re.search(r"ssoUrl\s*=\s*'([^']+)'", r1.text)
-        if not m:
-            print("[phase0:http] FAIL ssoUrl 파싱 실패")
-            return None
-        sso_url = m.group(1)
-        s.get(sso_url, allow_redirects=True, timeout=10)
-        r3 = s.post("http://auth-dev.samsong.com:18100/login", data={
-            "userId": user_id, "password": password,
-            "clientId": "ERP", "ssoUrl": sso_url, "clientName": "", "lang": "ko"
-        }, allow_redirects=True, timeout=15)
-        if "layout.do" not in r3.url:
-            print(f"[phase0:http] FAIL 로그인 후 URL={r3.url}")
-            return None
-        s.get("http://erp-dev.samsong.com:19100/layout/layout.do", timeout=10)
-        s.headers["X-XSRF-TOKEN"] = s.cookies.get("XSRF-TOKEN", "")
-        print(f"[phase0:http] OAuth PASS (cookies: {list(s.cookies.keys())})")
-        return s
-    except Exception as e:
-        print(f"[phase0:http] FAIL {e}")
-        return None
-
-
-def _inject_cookies_to_playwright(context, sess):
-    """requests.Session cookie를 playwright context에 주입.
-
-    HTTP OAuth로 받은 SESSION/XSRF-TOKEN/JSESSIONID cookie를 playwright context에
-    추가해서, page.goto(D0_URL) 시 OAuth 페이지 안 거치고 즉시 통과되게 함.
-    """
-    cookies_for_pw = []
-    for c in sess.cookies:
-        domain = c.domain or "erp-dev.samsong.com"
-        if domain.startswith("."):
-            domain = domain
-        cookies_for_pw.append({
-            "name": c.name,
-            "value": c.value,
-            "domain": domain,
-            "path": c.path or "/",
-        })
-    if cookies_for_pw:
-        context.add_cookies(cookies_for_pw)
-        print(f"[phase0:http] playwright cookie 주입 {len(cookies_for_pw)}건 ({[c['name'] for c in cookies_for_pw]})")
-
-
-def ensure_erp_login(page):
-    """auth-dev 로그인 페이지면 자동 로그인 — DOM 직접 입력 (page.fill).
-
-    세션153 (2026-05-13): pyautogui 키보드 입력 + Chrome 비번관리자 자동완성 의존 폐기.
-    실측 사고 — 다른 창이 Chrome 위에 떠 있으면 pyautogui 키가 가로채여 빈 form submit
-    → /login?error 반복 (5/13 07:11~07:42 morning 자동화 51min 한계 도달 실패).
-    page.fill()은 DOM API라 OS focus 무관 → 가로채기 불가능.
-
-    ID/PW 원본: 같은 폴더 .oauth.json (gitignore 처리).
-    """
-    if "auth-dev.samsong.com" in page.url and "/login" in page.url:
-        print("[phase0] OAuth 로그인 수행 (DOM 직접 입력)")
-        user_id, password = _load_oauth_cred()
-        page.bring_to_front()
-        page.wait_for_selector('#userId', timeout=10000)
-        page.fill('#userId', user_id)
-        page.fill('#password', password)
-        page.click('#loginBtn')
-        time.sleep(3)
-        if "/login?error" in page.url:
-            print(f"[phase0] ⚠ submit 직후 /login?error — .oauth.json id/pw 검증 필요. URL: {page.url}")
-            # raise 안 하고 caller(navigate_to_d0)의 재시도 분기에서 1회 재시도 흐름 유지
-
-
-def _wait_oauth_complete(page, timeout_sec: float = 10.0):
-    """OAuth 완료 대기 — auth-dev 떠나고 erp-dev 본 페이지(oauth2/sso 콜백 제외) 도달까지.
-
-    세션110 보강: 기존 `"erp-dev.samsong.com" in url` 조건은 OAuth 콜백 중간 단계
-    `oauth2/sso` URL도 매칭되어 잘못 break 발생 → 미완료 상태에서 D0_URL 시도 →
-    auth-dev/login 페이지 redirect → btnExcelUpload timeout 실패 시나리오.
-
-    세션131 [E] 보강: default 30→60s. 5일 중 4일 morning 자동화 OAuth timeout 실패
-    실측 (4/27 4/29 4/30). 7시 ERP 부하 + cold start fresh launch에서 OAuth 콜백 redirect
-    chain이 30s를 넘어가는 케이스 흡수.
-
-    세션152: 60s → 10s. ID typewrite 명시 입력으로 자동완성 실패 케이스 차단된 후
-    OAuth 콜백 정체 시 빠른 fallback 진입 우선. 사용자 명시 변경 (체감 대기 단축).
-    """
-    deadline = time.time() + timeout_sec
-    while time.time() < deadline:
-        url = page.url
-        if ("erp-dev.samsong.com" in url
-                and "auth-dev" not in url
-                and "oauth2/sso" not in url
-                and "/login" not in url):
-            return True
-        time.sleep(0.5)
-    return False
-
-
 def navigate_to_d0(browser, sess=None):
     """D0추가생산지시 화면 탭 확보.
 
@@ -708,58 +503,50 @@ def _find_section_end(ws, start_row, next_header_keyword=None):
     return last
 
 
-def _extract_night_prod_set(ws):
-    """야간 섹션 PROD_NO set만 추출한다. 수량/시간 차이는 stale 판정에 쓰지 않는다."""
-    night_end = 34
-    for r in range(2, ws.max_row + 1):
-        v = ws.cell(row=r, column=2).value
-        if v and "주간계획" in str(v):
-            night_end = r - 1
-            break
+def load_plan_snapshot(plan_path: Path, use_cache: bool = True):
+    """생산지시서 추출 스냅샷 — 파일 내용 해시가 같으면 state/plan_cache 캐시 재사용 (통합문서 로드 생략).
+
+    extract_sp3m3_night / extract_sp3m3_day / extract_outer_d1 / guard_sp3m3_output_stale 은
+    이 스냅샷과 openpyxl Workbook 둘 다 받는다 (Workbook이면 즉석 파싱).
+    """
+    return plan_cache.load_plan(plan_path, PLAN_CACHE_DIR, use_cache=use_cache)
 
-    prod_nos = set()
-    for r in range(3, night_end + 1):
-        part = ws.cell(row=r, column=9).value
-        qty = ws.cell(row=r, column=11).value
-        if not (part and qty):
-            continue
-        try:
-            int(qty)
-        except (ValueError, TypeError):
-            continue
-        pno = str(part).strip()
-        if pno and not any("가" <= ch <= "힣" for ch in pno):
-            prod_nos.add(pno)
-    return prod_nos
+
+def _plan_snapshot(wb):
+    return wb if plan_cache.is_snapshot(wb) else plan_cache.parse_plan_workbook(wb)
+
+
+def _plan_sheet(plan, name):
+    try:
+        return plan["sheets"][name]
+    except KeyError:
+        raise KeyError(f"Worksheet {name} does not exist.") from None
 
 
 def guard_sp3m3_output_stale(wb, threshold=0.70, allow=False):
-    """출력용 야간과 생산계획 야간의 PROD_NO set가 크게 다르면 stale 파일로 차단."""
+    """출력용 야간과 생산계획 야간의 PROD_NO set가 크게 다르면 stale 파일로 차단.
+
+    PROD_NO set만 비교한다 (수량/시간 차이는 stale 판정에 쓰지 않음). 지표는 plan_cache.stale_metrics.
+    """
     if allow:
         print("[stale-guard] --allow-stale-output 활성 — 출력용/생산계획 비교 차단 해제")
         return
-    if "출력용" not in wb.sheetnames or "생산계획" not in wb.sheetnames:
+    m = _plan_snapshot(wb)["stale"]
+    if m is None:
         print("[stale-guard] 출력용/생산계획 시트 비교 불가 — stale 가드 skip")
         return
-
-    out_set = _extract_night_prod_set(wb["출력용"])
-    plan_set = _extract_night_prod_set(wb["생산계획"])
-    if not out_set or not plan_set:
-        print(f"[stale-guard] 비교 set 부족 — 출력용={len(out_set)} 생산계획={len(plan_set)} skip")
+    if not m["out"] or not m["plan"]:
+        print(f"[stale-guard] 비교 set 부족 — 출력용={m['out']} 생산계획={m['plan']} skip")
         return
 
-    overlap = len(out_set & plan_set)
-    ratio = overlap / max(len(out_set), len(plan_set))
-    only_out = sorted(out_set - plan_set)
-    only_plan = sorted(plan_set - out_set)
     print(
-        f"[stale-guard] 출력용/생산계획 PROD_NO 일치율 {ratio:.1%} "
-        f"(overlap={overlap}, 출력용={len(out_set)}, 생산계획={len(plan_set)})"
+        f"[stale-guard] 출력용/생산계획 PROD_NO 일치율 {m['ratio']:.1%} "
+        f"(overlap={m['overlap']}, 출력용={m['out']}, 생산계획={m['plan']})"
     )
-    if ratio < threshold and only_out and only_plan:
+    if m["ratio"] < threshold and m["only_out"] and m["only_plan"]:
         raise RuntimeError(
             "출력용 시트 stale 의심 — 생산계획 야간 PROD_NO와 크게 다릅니다. "
-            f"출력용-only {len(only_out)}건, 생산계획-only {len(only_plan)}건. "
+            f"출력용-only {len(m['only_out'])}건, 생산계획-only {len(m['only_plan'])}건. "
             "사용자 확인 후 --allow-stale-output 명시 시에만 진행"
         )
 
@@ -771,29 +558,14 @@ def extract_sp3m3_night(wb, allow_stale_output=False):
       R1: `◀ D+1 야간계획`
       R2: 데이터 헤더 (순서/신MES 품번/지시)
       R3~: 실제 데이터
-      R?: `◀ D+2 주간계획` (종료 경계)
+      R?: `◀ D+2 주간계획` (종료 경계, 미발견 시 R34까지)
     """
-    guard_sp3m3_output_stale(wb, allow=allow_stale_output)
-    ws = wb["출력용"]
-    start = 3
-    night_end = 34  # 보수적 default
-    for r in range(2, ws.max_row+1):
-        v = ws.cell(row=r, column=2).value
-        if v and "주간계획" in str(v):
-            night_end = r - 1
-            break
+    plan = _plan_snapshot(wb)
+    guard_sp3m3_output_stale(plan, allow=allow_stale_output)
+    sec = _plan_sheet(plan, "출력용")
     items = []
     skipped = []
-    for r in range(start, night_end+1):
-        part = ws.cell(row=r, column=9).value
-        qty = ws.cell(row=r, column=11).value
-        if not (part and qty):
-            continue
-        try:
-            qty_int = int(qty)
-        except (ValueError, TypeError):
-            continue  # 헤더 행 등 숫자 아닌 값 skip
-        pno = str(part).strip()
+    for r, pno, qty_int in sec["night_rows"]:
         # 한글 포함 PROD_NO는 자리표시 문자열 ("구형바코드사용" 등) — ERP 라인배치 미등록 확정, skip
         if any("가" <= ch <= "힣" for ch in pno):
             skipped.append({"row": r, "PROD_NO": pno, "QTY": qty_int})
@@ -816,38 +588,19 @@ def extract_sp3m3_day(wb, cut_threshold=DAY_CUT_THRESHOLD):
       R34~: 실제 데이터
 
     day_start = 주간계획 헤더 r + 2 (데이터 헤더 한 줄 skip).
-    방어: 헤더 행이 추가로 있어도 try/except로 숫자 아닌 K값은 skip.
+    6월 이후 신규 양식 — "주간계획" 섹션헤더 없이 "순서" 컬럼헤더 직접 등장 시 그 다음 행부터.
+    방어: 헤더 행이 추가로 있어도 숫자 아닌 K값은 스냅샷 단계에서 skip.
     """
-    ws = wb["출력용"]
-    day_start = None
-    for r in range(2, ws.max_row+1):
-        v = ws.cell(row=r, column=2).value
-        if v and "주간계획" in str(v):
-            day_start = r + 2  # 섹션 헤더 + 데이터 헤더 둘 다 skip
-            break
-    # fallback: 6월 이후 신규 양식 — "주간계획" 섹션헤더 없이 "순서" 컬럼헤더 직접 등장
-    if day_start is None:
-        for r in range(2, ws.max_row+1):
-            v = ws.cell(row=r, column=2).value
-            if v and str(v).strip() == "순서":
-                day_start = r + 1  # 컬럼헤더만 skip
-                print(f"[phase1] 주간헤더 fallback: r{r} '순서' 컬럼헤더 → day_start=r{r+1}")
-                break
-    if day_start is None:
+    sec = _plan_sheet(_plan_snapshot(wb), "출력용")
+    if sec["day_start"] is None:
         raise ValueError("출력용 시트 주간 헤더 미발견")
+    if sec["day_header"] == "fallback":
+        r = sec["day_header_row"]
+        print(f"[phase1] 주간헤더 fallback: r{r} '순서' 컬럼헤더 → day_start=r{r+1}")
     items = []
     skipped = []
     cumsum = 0
-    for r in range(day_start, ws.max_row+1):
-        part = ws.cell(row=r, column=9).value
-        qty = ws.cell(row=r, column=11).value
-        if not (part and qty):
-            continue
-        try:
-            qty_int = int(qty)
-        except (ValueError, TypeError):
-            continue
-        pno = str(part).strip()
+    for r, pno, qty_int in sec["day_rows"]:
         cumsum += qty_int
         # 한글 포함 PROD_NO는 자리표시 문자열 ("구형바코드사용" 등) — ERP 라인배치 미등록 확정, skip
         if any('가' <= ch <= '힯' for ch in pno):
@@ -872,15 +625,9 @@ def extract_sp3m3_day(wb, cut_threshold=DAY_CUT_THRESHOLD):
 
 
 def extract_outer_d1(wb, target_line="SD9M01"):
-    """OUTER 생산계획 시트 D+1 블록에서 B열 == target_line 필터."""
-    ws = wb["OUTER 생산계획"]
-    items = []
-    for r in range(2, ws.max_row+1):
-        b = ws.cell(row=r, column=2).value  # D+1 라인
-        d = ws.cell(row=r, column=4).value  # 품번 (접미사 포함)
-        e = ws.cell(row=r, column=5).value  # 수량
-        if b and str(b).strip() == target_line and d and e:
-            items.append({"PROD_NO": str(d).strip(), "QTY": int(e)})
+    """OUTER 생산계획 시트 D+1 블록에서 B열 == target_line 필터 (D=품번 접미사 포함, E=수량)."""
+    sec = _plan_sheet(_plan_snapshot(wb), plan_cache.OUTER_SHEET)
+    items = [{"PROD_NO": pno, "QTY": int(qty)} for _, line, pno, qty in sec["rows"] if line == target_line]
     print(f"[phase1] SD9A01 OUTER D+1: {len(items)}건")
     return items
 
@@ -921,14 +668,27 @@ def resolve_xlsx_prod_date(args, session, target_file_date, items):
 
 
 def make_upload_xlsx(items, prod_date: datetime, out_path: Path):
-    """ERP 양식을 Excel COM(win32com)으로 편집·저장.
+    """ERP 양식 업로드 엑셀 작성. UPLOAD_WRITER(--upload-writer)에 따라 OOXML 직접 / Excel COM.
 
-    왜 win32com인가:
+    배경 (세션104, 2026-04-24):
       openpyxl이 생성·저장한 xlsx는 ERP 서버 파서(아마 Apache POI 구버전)가
-      COL2(제품번호)를 빈값으로 파싱하는 이슈 있음 (2026-04-24 세션104 실증).
-      OOXML 내부 구조(shared strings, cell type 속성, 시트 XML 네임스페이스)
-      차이 때문이며, Microsoft Excel이 직접 저장한 파일만 서버가 정상 파싱.
-      → Excel COM으로 실제 Excel 프로세스가 저장해야 호환.
+      COL2(제품번호)를 빈값으로 파싱하는 이슈 있음. OOXML 내부 구조(shared strings,
+      cell type 속성, 시트 XML 네임스페이스) 차이 때문이며, Excel이 저장한 파일만 정상 파싱.
+
+    ooxml (기본): upload_xlsx.write_upload_xlsx — Excel이 저장한 템플릿의 part를 그대로 복제하고
+      sheet1.xml 데이터 행 / sharedStrings.xml 만 같은 형식으로 교체. Excel 프로세스 없이 수 ms.
+    com: 기존 경로 (_make_upload_xlsx_com) — Excel 설치 PC 전용 회귀 fallback.
+    """
+    if UPLOAD_WRITER == "com":
+        return _make_upload_xlsx_com(items, prod_date, out_path)
+    t0 = time.perf_counter()
+    upload_xlsx.write_upload_xlsx(items, prod_date, out_path)
+    print(f"[phase2] 업로드 엑셀 생성: {out_path.name} ({len(items)}건) — 템플릿 OOXML 직접 작성 "
+          f"({(time.perf_counter() - t0) * 1000:.0f}ms)")
+
+
+def _make_upload_xlsx_com(items, prod_date: datetime, out_path: Path):
+    """ERP 양식을 Excel COM(win32com)으로 편집·저장 (--upload-writer com).
 
     흐름:
       1. 템플릿(ERP 양식 또는 SSKR 검증본) 복제
@@ -1170,9 +930,9 @@ def d0_upload_via_http(sess, xlsx_path: Path, parse_only: bool = False):
     parse_only=True: selectList만 (multiList=DB 저장 스킵). 검증 전용.
     """
     import requests as _req  # noqa
-    POPUP_URL = "http://erp-dev.samsong.com:19100/prdtPlanMng/popupPmD0AddnUpload.do?callbackFunid=totGridList"
-    SELECT_URL = "http://erp-dev.samsong.com:19100/prdtPlanMng/selectListPmD0AddnUpload.do"
-    MULTI_URL = "http://erp-dev.samsong.com:19100/prdtPlanMng/multiListPmD0AddnUpload.do"
+    POPUP_URL = ERP_BASE + "/prdtPlanMng/popupPmD0AddnUpload.do?callbackFunid=totGridList"
+    SELECT_URL = ERP_BASE + "/prdtPlanMng/selectListPmD0AddnUpload.do"
+    MULTI_URL = ERP_BASE + "/prdtPlanMng/multiListPmD0AddnUpload.do"
 
     # 1) popup GET — referer/XSRF 갱신
     sess.get(POPUP_URL, timeout=10)
@@ -1399,10 +1159,10 @@ def fetch_tot_grid_via_http(sess, target_date):
     """
     sess.headers["X-XSRF-TOKEN"] = sess.cookies.get("XSRF-TOKEN", "")
     sess.headers["X-Requested-With"] = "XMLHttpRequest"
-    sess.headers["Referer"] = "http://erp-dev.samsong.com:19100/prdtPlanMng/viewListDoAddnPrdtPlanInstrMngNew.do"
+    sess.headers["Referer"] = D0_URL
     sess.headers["ajax"] = "true"
     params = {"searchDate": "", "searchShipDa": target_date, "searchRegUsrNm": "대원테크"}
-    r = sess.get("http://erp-dev.samsong.com:19100/prdtPlanMng/selectListDoAddnPrdtPlanInstrMngNew.do",
+    r = sess.get(ERP_BASE + "/prdtPlanMng/selectListDoAddnPrdtPlanInstrMngNew.do",
                  params=params, timeout=15)
     if r.status_code != 200:
         return []
@@ -1488,42 +1248,12 @@ def dedupe_existing_registrations(page, items, prod_date, line_cd):
 
 
 def build_requests_session_from_page(page):
-    """Playwright page의 cookie + XSRF로 requests Session 구성.
+    """Playwright page의 cookie + XSRF로 requests Session 구성 (Referer = D0 화면).
 
-    P2/P3/P4 검증된 헤더 레시피:
-      - ajax: true (jQuery prefilter 자동 헤더 — 누락 시 multiList 500 / 8ms 즉시 거부)
-      - X-XSRF-TOKEN (매 write 호출 직전 cookie에서 다시 읽어 갱신 필수 — Spring Security 회전)
-      - Content-Type: application/json; charset=UTF-8 (P4 단계 2 발견 — form-urlencoded는 % 파싱 에러)
+    헤더 레시피는 erp_session.cookies.build_session_from_page — ajax: true 누락 시 multiList 500,
+    X-XSRF-TOKEN은 매 write 직전 refresh_xsrf_from_cookies로 갱신.
     """
-    import requests as _req
-    cookies = page.context.cookies()
-    sess = _req.Session()
-    xsrf = None
-    for c in cookies:
-        sess.cookies.set(c["name"], c["value"], domain=c["domain"].lstrip("."), path=c.get("path", "/"))
-        if c["name"].upper() in ("XSRF-TOKEN", "X-XSRF-TOKEN"):
-            xsrf = c["value"]
-    sess.headers.update({
-        "ajax": "true",
-        "X-Requested-With": "XMLHttpRequest",
-        "Referer": D0_URL,
-        "Origin": "http://erp-dev.samsong.com:19100",
-        "Accept": "application/json, text/javascript, */*; q=0.01",
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/147.0.0.0 Safari/537.36",
-        "Accept-Language": "ko-KR,ko;q=0.9",
-    })
-    if xsrf:
-        sess.headers["X-XSRF-TOKEN"] = xsrf
-    return sess
-
-
-def refresh_xsrf_from_cookies(sess):
-    """매 write 호출 직전 cookie에서 X-XSRF-TOKEN 갱신 (Spring Security 회전 대응)."""
-    for c in sess.cookies:
-        if c.name.upper() in ("XSRF-TOKEN", "X-XSRF-TOKEN"):
-            sess.headers["X-XSRF-TOKEN"] = c.value
-            return c.value
-    return None
+    return build_session_from_page(page, referer=D0_URL)
 
 
 def _sort_idx_map_desc(grid_by_pno):
@@ -1564,7 +1294,7 @@ def api_rank_batch(page, items, target_line, save_url, sess=None):
     import requests as _req
     if sess is None:
         sess = build_requests_session_from_page(page)
-    base_url = "http://erp-dev.samsong.com:19100"
+    base_url = ERP_BASE
 
     # 상단 grid REG_NO 오름차순 배열 매핑 (세션151: PROD_NO 단일 키 → 다중 등장 매핑)
     # 같은 PROD_NO가 items에 N번 나오면 grid에도 N행 등록되는데, 기존 단일 키는 N건 모두 같은 ext로 매핑되어
@@ -1726,52 +1456,44 @@ def rank_batch(page, items, target_line, save_url, dry_run=False):
 # ============================================================
 # Phase 5: 최종 저장 (MES 전송)
 # ============================================================
-def process_one_row_via_http(sess, prod_no, target_ext_reg, target_line, save_url, prod_date, day_opt='1'):
-    """phase4 한 row 처리 — requests 직접 (브라우저 page.evaluate 0).
-
-    JS process_one_row 흐름을 그대로 mirror:
-      1) totGrid GET → PROD_NO + REG_NO 매칭 row (totSelectRowData)
-      2) mGrid GET → target_line LINE_CD 매칭 row (mSelectRowData)
-      3) sGrid GET → 현재 누적 dataList
-      4) rowData 구성 (m copy + WORK_STATUS_CD=A, EXT_PLAN_YN=Y 등)
-      5) POST save_url + {dataList + [rowData], PARENT_PROD_ID, sendMesFlag='N'}
-
-    Returns: {ok, addedRank, parent_prod_id, m_row, ...}
-    """
-    BASE = "http://erp-dev.samsong.com:19100"
-    target_date = prod_date.strftime("%Y-%m-%d")
-
+def _prep_erp_ajax_headers(sess):
+    """ERP ajax 공통 헤더 (XSRF 토큰은 매 호출 직전 쿠키에서 갱신)."""
     sess.headers["X-XSRF-TOKEN"] = sess.cookies.get("XSRF-TOKEN", "")
     sess.headers["X-Requested-With"] = "XMLHttpRequest"
-    sess.headers["Referer"] = BASE + "/prdtPlanMng/viewListDoAddnPrdtPlanInstrMngNew.do"
+    sess.headers["Referer"] = D0_URL
     sess.headers["ajax"] = "true"
 
-    # 1) totGrid 조회 + 매칭
-    grid = fetch_tot_grid_via_http(sess, target_date)
-    tot = next((r for r in grid if r.get("PROD_NO") == prod_no and str(r.get("REG_NO")) == str(target_ext_reg)), None)
-    if tot is None:
-        return {"ok": False, "stage": "top_click", "err": "totGrid 매칭 실패"}
 
-    # 2) mGrid GET
+def fetch_m_grid_via_http(sess, tot, day_opt='1'):
+    """mGrid(좌하단 라인 후보) GET — totGrid row 1건 기준."""
     m_params = {"PROD_ID": tot["PROD_ID"], "PLAN_DA": tot["REG_DT"], "PRDT_QTY": tot["PRDT_QTY"],
                 "SHIPTDA": tot["SHIPTDA"], "EXT_PLAN_REG_NO": tot["REG_NO"], "DAY_OPT": day_opt}
-    r = sess.get(BASE + "/prdtPlanMng/selectListDoAddnPrdtConctLineNew.do", params=m_params, timeout=15)
-    m_list = r.json().get("data", {}).get("list", []) or []
+    r = sess.get(ERP_BASE + "/prdtPlanMng/selectListDoAddnPrdtConctLineNew.do", params=m_params, timeout=15)
+    return r.json().get("data", {}).get("list", []) or []
+
+
+def fetch_s_grid_via_http(sess, m_row, day_opt='1'):
+    """sGrid(우하단 서열 누적) GET — m row의 LINE_CD/STD_DA/PLAN_DA/LINE_DIV_CD 기준."""
+    s_params = {"LINE_CD": m_row["LINE_CD"], "STD_DA": m_row["STD_DA"], "PLAN_DA": m_row["PLAN_DA"],
+                "LINE_DIV_CD": m_row["LINE_DIV_CD"], "DAY_OPT": day_opt}
+    r = sess.get(ERP_BASE + "/prdtPlanMng/selectListDoAddnPrdtConctLineDetailNew.do", params=s_params, timeout=15)
+    return r.json().get("data", {}).get("list", []) or []
+
+
+def _pick_m_row(m_list, target_line):
+    """mGrid에서 target_line 행 선택 + 필수값 검증. Returns (m, None) 또는 (None, 실패 dict)."""
     m = next((row for row in m_list if row.get("LINE_CD") == target_line), None)
     if m is None:
-        return {"ok": False, "stage": "m_select", "err": f"line {target_line} 없음", "avail": [x.get("LINE_CD") for x in m_list]}
+        return None, {"ok": False, "stage": "m_select", "err": f"line {target_line} 없음", "avail": [x.get("LINE_CD") for x in m_list]}
     if not m.get("MPRDTN_DIV_CD"):
-        return {"ok": False, "stage": "m_validate", "err": "MPRDTN_DIV_CD 공란"}
+        return None, {"ok": False, "stage": "m_validate", "err": "MPRDTN_DIV_CD 공란"}
     if not m.get("PRDT_CATE_CD"):
-        return {"ok": False, "stage": "m_validate", "err": "PRDT_CATE_CD 공란"}
+        return None, {"ok": False, "stage": "m_validate", "err": "PRDT_CATE_CD 공란"}
+    return m, None
 
-    # 3) sGrid GET
-    s_params = {"LINE_CD": m["LINE_CD"], "STD_DA": m["STD_DA"], "PLAN_DA": m["PLAN_DA"],
-                "LINE_DIV_CD": m["LINE_DIV_CD"], "DAY_OPT": day_opt}
-    r2 = sess.get(BASE + "/prdtPlanMng/selectListDoAddnPrdtConctLineDetailNew.do", params=s_params, timeout=15)
-    s_data = r2.json().get("data", {}).get("list", []) or []
 
-    # 4) rowData = Object.assign({}, m) + 필드 덮어쓰기 (JS code mirror)
+def _build_rank_row(m, day_opt='1'):
+    """rowData = Object.assign({}, m) + 필드 덮어쓰기 (JS addRow code mirror)."""
     row_data = dict(m)
     row_data["DAY_OPT"] = day_opt
     row_data["WORK_STATUS_CD"] = "A"
@@ -1786,30 +1508,92 @@ def process_one_row_via_http(sess, prod_no, target_ext_reg, target_line, save_ur
     row_data["PRDT_PLAN_QTY"] = m["ADD_PRDT_QTY"]
     row_data["OLD_PRDT_PLAN_QTY"] = m["ADD_PRDT_QTY"]
     row_data["NEXT_PLAN_DA"] = m["NEXT_PLAN_DA"]
+    return row_data
+
 
-    # 5) dataList = s_data + [row_data] + POST save_url
-    data_list = list(s_data) + [row_data]
+def post_rank_save_via_http(sess, save_url, data_list, parent_prod_id):
+    """서열 임시저장 POST (sendMesFlag='N'). Returns (ok, err)."""
     sess.headers["X-XSRF-TOKEN"] = sess.cookies.get("XSRF-TOKEN", "")
-    payload = {"dataList": data_list, "PARENT_PROD_ID": tot["PROD_ID"], "sendMesFlag": "N"}
-    r3 = sess.post(BASE + save_url, data=json.dumps(payload),
+    payload = {"dataList": data_list, "PARENT_PROD_ID": parent_prod_id, "sendMesFlag": "N"}
+    r3 = sess.post(ERP_BASE + save_url, data=json.dumps(payload),
                    headers={"Content-Type": "application/json; charset=utf-8",
                             "X-XSRF-TOKEN": sess.cookies.get("XSRF-TOKEN", "")},
                    timeout=30)
     res = r3.json() if r3.headers.get("content-type", "").startswith("application/json") else {}
     if r3.status_code != 200 or str(res.get("statusCode")) != "200":
-        return {"ok": False, "stage": "save", "err": f"status={r3.status_code} body={r3.text[:300]}"}
+        return False, f"status={r3.status_code} body={r3.text[:300]}"
+    return True, None
+
+
+def _s_row_key(row):
+    """sGrid row 식별 키 — (PROD_NO, EXT_PLAN_REG_NO). 키 없으면 REG_NO fallback."""
+    ext = row.get("EXT_PLAN_REG_NO") or row.get("REG_NO")
+    return (row.get("PROD_NO"), str(ext) if ext is not None else "")
+
+
+def process_one_row_via_http(sess, prod_no, target_ext_reg, target_line, save_url, prod_date, day_opt='1'):
+    """phase4 한 row 처리 — requests 직접 (브라우저 page.evaluate 0).
+
+    JS process_one_row 흐름을 그대로 mirror:
+      1) totGrid GET → PROD_NO + REG_NO 매칭 row (totSelectRowData)
+      2) mGrid GET → target_line LINE_CD 매칭 row (mSelectRowData)
+      3) sGrid GET → 현재 누적 dataList
+      4) rowData 구성 (m copy + WORK_STATUS_CD=A, EXT_PLAN_YN=Y 등)
+      5) POST save_url + {dataList + [rowData], PARENT_PROD_ID, sendMesFlag='N'}
+
+    행마다 3 GET + 1 POST. phase4 본 경로는 api_rank_batch_via_http (그리드 1회 조회 + 묶음 저장).
+
+    Returns: {ok, addedRank, parent_prod_id, m_row, ...}
+    """
+    target_date = prod_date.strftime("%Y-%m-%d")
+    _prep_erp_ajax_headers(sess)
+
+    # 1) totGrid 조회 + 매칭
+    grid = fetch_tot_grid_via_http(sess, target_date)
+    tot = next((r for r in grid if r.get("PROD_NO") == prod_no and str(r.get("REG_NO")) == str(target_ext_reg)), None)
+    if tot is None:
+        return {"ok": False, "stage": "top_click", "err": "totGrid 매칭 실패"}
+
+    # 2) mGrid GET
+    m, err = _pick_m_row(fetch_m_grid_via_http(sess, tot, day_opt), target_line)
+    if m is None:
+        return err
+
+    # 3) sGrid GET
+    s_data = fetch_s_grid_via_http(sess, m, day_opt)
+
+    # 4~5) rowData + dataList = s_data + [row_data] + POST save_url
+    data_list = list(s_data) + [_build_rank_row(m, day_opt)]
+    ok, err = post_rank_save_via_http(sess, save_url, data_list, tot["PROD_ID"])
+    if not ok:
+        return {"ok": False, "stage": "save", "err": err}
     return {"ok": True, "addedRank": len(data_list), "parent_prod_id": tot["PROD_ID"],
             "m_row": {k: m[k] for k in ("LINE_CD", "STD_DA", "PLAN_DA", "LINE_DIV_CD") if k in m},
             "dataListLen": len(data_list)}
 
 
-def api_rank_batch_via_http(sess, items, target_line, save_url, prod_date, day_opt='1', strict_regdt=True):
-    """phase4 api_rank_batch HTTP — items 순회하며 process_one_row_via_http 호출.
+def api_rank_batch_via_http(sess, items, target_line, save_url, prod_date, day_opt='1', strict_regdt=True,
+                            chunk=None):
+    """phase4 api_rank_batch HTTP — 그리드 1회 조회 + 묶음 저장.
 
     같은 PROD_NO N회 등장 시 N번째 REG_NO 매칭 (api_rank_batch와 동일 정책).
     last_m_row / last_parent_prod_id 반환 — final_save_via_http에서 사용.
+
+    처리 흐름 (단건 process_one_row_via_http 반복 대비 GET/POST 수 축소):
+      1) totGrid 1회 조회 → items 순서대로 (PROD_NO, REG_NO) 매칭
+      2) mGrid는 (PROD_ID, REG_NO)별 1회만 GET (캐시) → rowData 구성
+      3) sGrid는 키(LINE_CD/STD_DA/PLAN_DA/LINE_DIV_CD)별로 서버 스냅샷 1회 GET 후 로컬 누적.
+         chunk건씩 dataList = 스냅샷 + 신규 행들 → POST 1회 (PARENT_PROD_ID = 묶음 마지막 행)
+      4) 체크포인트: POST 후 sGrid 재조회 → 신규 (PROD_NO, EXT_PLAN_REG_NO)가 서버에 있는지 확인.
+         재조회 결과가 다음 묶음의 스냅샷이 된다.
+         서버에 없는 행(묶음 저장 거부/부분 반영)은 단건 흐름으로 재시도 후 다시 확인.
+
+    chunk: 묶음 크기. None → P4_SAVE_CHUNK (0 = 신규 행 전체 1회).
     """
+    if chunk is None:
+        chunk = P4_SAVE_CHUNK
     target_date = prod_date.strftime("%Y-%m-%d")
+    _prep_erp_ajax_headers(sess)
     grid = fetch_tot_grid_via_http(sess, target_date)
     grid_by_pno = {}
     for g in grid:
@@ -1834,15 +1618,12 @@ def api_rank_batch_via_http(sess, items, target_line, save_url, prod_date, day_o
 
     done = failed = missing = 0
     fails = []
-    last_parent = None
-    last_m_row = None
     pno_idx = {}
-    # 세션159: 야간 신규 (pno, ext_reg) 처리 순서 보존 — final_save_via_http가
-    # s_data sort에 사용. ERP s_data 응답 정렬 키가 excel 입력 순서와 달라
-    # PRDT_RANK가 어긋나는 사고 재발 방지(setBeginTime은 idx+1로 박는다).
-    processed_order = []
+    m_cache = {}   # (PROD_ID, REG_NO) -> mGrid list
+    pending = []   # items 순서 — {seq, pno, ext, parent, m, row, s_key}
 
-    for it in items:
+    # 1~2) 매칭 + rowData 준비 (POST 없음)
+    for seq, it in enumerate(items):
         pno = it["PROD_NO"]
         idx = pno_idx.get(pno, 0)
         cands = grid_by_pno.get(pno, [])
@@ -1851,24 +1632,103 @@ def api_rank_batch_via_http(sess, items, target_line, save_url, prod_date, day_o
             missing += 1
             fails.append({"pno": pno, "stage": "match"})
             continue
-        target_ext_reg = cands[idx]["REG_NO"]
+        tot = cands[idx]
+        target_ext_reg = tot["REG_NO"]
         pno_idx[pno] = idx + 1
 
-        result = process_one_row_via_http(sess, pno, target_ext_reg, target_line, save_url, prod_date, day_opt)
-        if result.get("ok"):
-            done += 1
-            last_parent = result.get("parent_prod_id")
-            last_m_row = result.get("m_row")
-            processed_order.append({"PROD_NO": pno, "EXT_PLAN_REG_NO": target_ext_reg})
-            print(f"[api_phase4:http] {pno} ext={target_ext_reg} -> OK (rank={result.get('addedRank')})")
+        ck = (tot["PROD_ID"], str(target_ext_reg))
+        if ck not in m_cache:
+            m_cache[ck] = fetch_m_grid_via_http(sess, tot, day_opt)
+        m, err = _pick_m_row(m_cache[ck], target_line)
+        if m is None:
+            failed += 1
+            fails.append({"pno": pno, "ext": target_ext_reg, "result": err})
+            print(f"[api_phase4:http] {pno} ext={target_ext_reg} -> FAIL: {err}")
+            if failed >= 3:
+                print("[api_phase4:http] 3회 연속 실패 — 중단")
+                break
+            continue
+        row = _build_rank_row(m, day_opt)
+        pending.append({"seq": seq, "pno": pno, "ext": target_ext_reg, "parent": tot["PROD_ID"], "m": m,
+                        "row": row, "key": _s_row_key(row),
+                        "s_key": tuple(m.get(k) for k in ("LINE_CD", "STD_DA", "PLAN_DA", "LINE_DIV_CD"))})
+
+    # 3) sGrid 키 + chunk 단위 묶음 (items 순서 유지)
+    chunks = []
+    for p in pending:
+        size = chunk if chunk and chunk > 0 else len(pending)
+        if chunks and chunks[-1][-1]["s_key"] == p["s_key"] and len(chunks[-1]) < size:
+            chunks[-1].append(p)
         else:
+            chunks.append([p])
+
+    snapshots = {}  # s_key -> 서버 sGrid (마지막 체크포인트 기준)
+    saved = {}      # seq -> (pending, addedRank)
+    posts = 0
+    stop = False    # 준비 단계 중단(3회 실패) 전까지 준비된 행은 저장한다 — 단건 반복 흐름과 동일
+    for ch in chunks:
+        if stop:
+            break
+        s_key, m0 = ch[0]["s_key"], ch[0]["m"]
+        if s_key not in snapshots:
+            snapshots[s_key] = fetch_s_grid_via_http(sess, m0, day_opt)
+        before = Counter(_s_row_key(r) for r in snapshots[s_key])
+        base_len = len(snapshots[s_key])
+        data_list = list(snapshots[s_key]) + [p["row"] for p in ch]
+        ok, err = post_rank_save_via_http(sess, save_url, data_list, ch[-1]["parent"])
+        posts += 1
+        if not ok:
+            print(f"[api_phase4:http] 묶음 저장 {len(ch)}건 거부 — 단건 재시도: {err}")
+
+        # 4) 체크포인트 — 서버 sGrid에 반영된 신규 행 확인
+        snapshots[s_key] = fetch_s_grid_via_http(sess, m0, day_opt)
+        after = Counter(_s_row_key(r) for r in snapshots[s_key])
+        retry = []
+        for i, p in enumerate(ch):
+            k = p["key"]
+            # 응답이 실패여도 서버에 반영된 행은 재시도하지 않는다 (중복 등록 방지)
+            if after[k] > before[k]:
+                before[k] += 1
+                saved[p["seq"]] = (p, base_len + i + 1)
+            else:
+                retry.append(p)
+        if retry and ok:
+            print(f"[api_phase4:http] 묶음 저장 후 서버 미반영 {len(retry)}/{len(ch)}건 — 단건 재시도")
+
+        for p in retry:
+            # 단건 저장 (process_one_row_via_http와 같은 dataList = 서버 sGrid + [rowData])
+            data_list = list(snapshots[s_key]) + [p["row"]]
+            ok, err = post_rank_save_via_http(sess, save_url, data_list, p["parent"])
+            posts += 1
+            snapshots[s_key] = fetch_s_grid_via_http(sess, m0, day_opt)
+            if sum(1 for r in snapshots[s_key] if _s_row_key(r) == p["key"]) > before[p["key"]]:
+                before[p["key"]] += 1
+                saved[p["seq"]] = (p, len(data_list))
+                continue
+            result = ({"ok": False, "stage": "save", "err": err} if not ok
+                      else {"ok": False, "stage": "verify", "err": "저장 응답 200이나 sGrid 미반영"})
             failed += 1
-            fails.append({"pno": pno, "ext": target_ext_reg, "result": result})
-            print(f"[api_phase4:http] {pno} ext={target_ext_reg} -> FAIL: {result}")
+            fails.append({"pno": p["pno"], "ext": p["ext"], "result": result})
+            print(f"[api_phase4:http] {p['pno']} ext={p['ext']} -> FAIL: {result}")
             if failed >= 3:
                 print("[api_phase4:http] 3회 연속 실패 — 중단")
+                stop = True
                 break
-        time.sleep(0.5)
+
+    last_parent = None
+    last_m_row = None
+    # 세션159: 야간 신규 (pno, ext_reg) 처리 순서 보존 — final_save_via_http가
+    # s_data sort에 사용. ERP s_data 응답 정렬 키가 excel 입력 순서와 달라
+    # PRDT_RANK가 어긋나는 사고 재발 방지(setBeginTime은 idx+1로 박는다).
+    processed_order = []
+    for seq in sorted(saved):
+        p, rank = saved[seq]
+        done += 1
+        last_parent = p["parent"]
+        last_m_row = {k: p["m"][k] for k in ("LINE_CD", "STD_DA", "PLAN_DA", "LINE_DIV_CD") if k in p["m"]}
+        processed_order.append({"PROD_NO": p["pno"], "EXT_PLAN_REG_NO": p["ext"]})
+        print(f"[api_phase4:http] {p['pno']} ext={p['ext']} -> OK (rank={rank})")
+    print(f"[api_phase4:http] 저장 POST {posts}회 / mGrid GET {len(m_cache)}회 / 대상 {len(pending)}건")
 
     return {"done": done, "failed": failed, "missing": missing, "fails": fails,
             "last_parent_prod_id": last_parent, "last_m_row": last_m_row,
@@ -1995,7 +1855,6 @@ def final_save_via_http(sess, save_url, last_m_row, parent_prod_id, day_opt='1',
     last_m_row: api_rank_batch_via_http 결과에서 받은 마지막 처리 m row의 LINE_CD/STD_DA/PLAN_DA/LINE_DIV_CD.
     processed_order: 세션159 추가 — 야간 신규 (pno, ext_reg) items 입력 순서. s_data sort에 사용.
     """
-    BASE = "http://erp-dev.samsong.com:19100"
     if last_m_row is None or parent_prod_id is None:
         raise RuntimeError("final_save_via_http: last_m_row/parent_prod_id 누락")
 
@@ -2006,7 +1865,7 @@ def final_save_via_http(sess, save_url, last_m_row, parent_prod_id, day_opt='1',
     s_params = {"LINE_CD": last_m_row["LINE_CD"], "STD_DA": last_m_row["STD_DA"],
                 "PLAN_DA": last_m_row["PLAN_DA"], "LINE_DIV_CD": last_m_row["LINE_DIV_CD"],
                 "DAY_OPT": day_opt}
-    r = sess.get(BASE + "/prdtPlanMng/selectListDoAddnPrdtConctLineDetailNew.do",
+    r = sess.get(ERP_BASE + "/prdtPlanMng/selectListDoAddnPrdtConctLineDetailNew.do",
                  params=s_params, timeout=15)
     s_data = r.json().get("data", {}).get("list", []) or []
 
@@ -2032,7 +1891,7 @@ def final_save_via_http(sess, save_url, last_m_row, parent_prod_id, day_opt='1',
 
     sess.headers["X-XSRF-TOKEN"] = sess.cookies.get("XSRF-TOKEN", "")
     payload = {"dataList": s_data, "PARENT_PROD_ID": parent_prod_id, "sendMesFlag": send_mes_flag}
-    r2 = sess.post(BASE + save_url, data=json.dumps(payload),
+    r2 = sess.post(ERP_BASE + save_url, data=json.dumps(payload),
                    headers={"Content-Type": "application/json; charset=utf-8",
                             "X-XSRF-TOKEN": sess.cookies.get("XSRF-TOKEN", "")},
                    timeout=120)
@@ -2329,7 +2188,8 @@ def _apply_line_locks(args):
             args.line = "SP3M3"
 
 
-def main():
+def build_arg_parser():
+    """CLI 파서 — main과 bench_http_only.py(로컬 대역 서버 벤치마크)가 공용."""
     ap = argparse.ArgumentParser()
     ap.add_argument("--session", choices=["evening","morning","auto"], required=True)
     ap.add_argument("--line", choices=["SP3M3","SD9A01","ALL"], default="ALL")
@@ -2351,11 +2211,22 @@ def main():
     ap.add_argument("--exclude", default="", help="phase1 추출 후 제외할 PROD_NO 콤마구분 (E 모드 복구용. 예: --exclude RSP3SC0246). P-BOM 미등록 등 단건 차단으로 전체 fail 시 사용")
     ap.add_argument("--no-pbom-guard", action="store_true", help="P-BOM guard 비활성화. Phase5 sendMesFlag=N preflight 및 자동 제외를 건너뜀")
     ap.add_argument("--allow-stale-output", action="store_true", help="SP3M3 야간 출력용/생산계획 PROD_NO set 불일치 차단을 명시적으로 해제")
+    ap.add_argument("--no-plan-cache", action="store_true", help="생산지시서 추출 캐시(state/plan_cache) 무시하고 통합문서 재파싱 (결과는 캐시 갱신)")
     ap.add_argument("--http-upload", action="store_true", help="세션153 A안 2단계: phase3 D0 업로드를 requests 직접 (브라우저·iframe·jQuery 0). HTTP OAuth 성공 시만 활성")
     ap.add_argument("--http-only", action="store_true", help="세션153 A안 3단계: 완전 브라우저-less. phase0~6 전부 requests. ensure_chrome_cdp + playwright 0")
+    ap.add_argument("--p4-chunk", type=int, default=0, help="HTTP Phase 4 서열 임시저장 묶음 크기 (default=0: 신규 행 전체 POST 1회). 묶음 저장이 서버에 반영되지 않으면 해당 행만 단건 재시도")
+    ap.add_argument("--upload-writer", choices=["ooxml", "com"], default="ooxml", help="Phase 2 업로드 엑셀 작성 방식 (default=ooxml: 템플릿 OOXML 직접, Excel 불필요). com = Excel COM 저장 (회귀 fallback, pywin32 + Excel 필요)")
     ap.add_argument("--jobsetup-mode", choices=["list-only","dry-run","commit-one","commit-all"], default="commit-all",
                     help="chain에서 호출할 잡셋업 모드 (default=commit-all). 입회 monitoring 시 list-only 권장")
-    args = ap.parse_args()
+    return ap
+
+
+def main():
+    args = build_arg_parser().parse_args()
+
+    global P4_SAVE_CHUNK, UPLOAD_WRITER
+    P4_SAVE_CHUNK = args.p4_chunk
+    UPLOAD_WRITER = args.upload_writer
 
     # --legacy-mode 명시 시 api_mode를 False로 강제 (화면 모드 fallback)
     if args.legacy_mode:
@@ -2476,7 +2347,7 @@ def main():
             print(f"[skip] 해당일 파일 없음 — 작업 패스: {e}")
             print(f"=== /d0-plan {session} skip (no plan file) ===")
             return  # exit 0 정상 종료. recover/verify_run에서 알림 안 띄움
-        wb = openpyxl.load_workbook(plan_path, data_only=True, keep_vba=True)
+        wb = load_plan_snapshot(plan_path, use_cache=not args.no_plan_cache)
 
         if session == "evening":
             # SP3M3 야간: ERP 생산일 = 파일명 날짜 - 1 (야간 시작일 = 오늘)
@@ -2602,7 +2473,7 @@ def _main_http_only(args, sess, session, target_file_date):
         print(f"[skip:http] 해당일 파일 없음 — 작업 패스: {e}")
         print(f"=== /d0-plan {session} skip (no plan file) http-only ===")
         return
-    wb = openpyxl.load_workbook(plan_path, data_only=True, keep_vba=True)
+    wb = load_plan_snapshot(plan_path, use_cache=not args.no_plan_cache)
     page = None
 
     if session == "evening":
@@ -0,0 +1,260 @@
+"""upload_xlsx.py — D0 업로드 엑셀 OOXML 직접 작성 (Excel COM 불필요).
+
+ERP 업로드 파서(Apache POI 계열 추정)는 Excel이 저장한 파일만 COL2(제품번호)를 정상 파싱한다
+(2026-04-24 세션104 — openpyxl 저장본은 제품번호 빈값). 그래서 make_upload_xlsx 는 Excel COM으로
+템플릿을 열어 저장해 왔다 — 실행마다 Excel 프로세스 기동(수 초), Windows + Excel 설치 필수.
+
+여기서는 Excel이 저장한 템플릿(template/SSKR_D0_template.xlsx) 자체를 원형으로 쓴다:
+  - zip 엔트리 순서·이름·압축방식·시각·속성, 나머지 part(workbook/styles/theme/rels/docProps …) 바이트 그대로
+  - xl/worksheets/sheet1.xml  : 머리(네임스페이스·dimension·cols)·헤더 행·꼬리 그대로, 데이터 행만 교체
+                                셀 속성(s 스타일, t="s" 공유문자열)은 템플릿 R2 그대로 — A/B 텍스트, C 숫자
+  - xl/sharedStrings.xml      : Excel 순서 그대로 (제품번호 고유값 → 헤더 si 원본 → 생산일 si),
+                                count / uniqueCount 재계산
+템플릿 데이터(R2~R6)를 다시 쓰면 두 part가 바이트 단위로 원본과 같다 — check_upload_xlsx.py 가 확인.
+
+read_upload_rows 는 POI XSSF 방식(rels → 시트 part, 공유문자열 rPh 제외, r 속성 셀 주소, t 속성 셀 타입)을
+흉내낸 엄격 리더 — 작성 결과를 서버 파서 관점에서 재확인하는 용도 (mock_erp_server 업로드 파싱도 사용).
+"""
+import io
+import re
+import zipfile
+from functools import lru_cache
+from pathlib import Path
+from xml.etree import ElementTree as ET
+
+TEMPLATE = Path(__file__).resolve().parent / "template" / "SSKR_D0_template.xlsx"
+SHEET_PART = "xl/worksheets/sheet1.xml"
+SST_PART = "xl/sharedStrings.xml"
+
+NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+REL_OFFICE_DOC = NS_REL + "/officeDocument"
+REL_SST = NS_REL + "/sharedStrings"
+
+_ROW_RE = re.compile(rb"<row [^>]*>.*?</row>", re.S)
+_CELL_RE = re.compile(rb'<c r="([A-Z]+)(\d+)"([^>]*)>(.*?)</c>', re.S)
+_SI_RE = re.compile(rb"<si>.*?</si>", re.S)
+_T_RE = re.compile(rb"<t(?: [^>]*)?>.*?</t>", re.S)
+_V_RE = re.compile(rb"<v>(\d+)</v>")
+
+
+class UploadTemplateError(RuntimeError):
+    """템플릿 구조가 예상(헤더 R1 + 데이터 R2~, A/B 공유문자열·C 숫자)과 다름."""
+
+
+# ============================================================
+# 템플릿 분해 (1회 — 경로·mtime 캐시)
+# ============================================================
+@lru_cache(maxsize=4)
+def _load_template(path: str, mtime_ns: int):
+    with zipfile.ZipFile(path) as z:
+        parts = [(info, z.read(info.filename)) for info in z.infolist()]
+    data = {info.filename: raw for info, raw in parts}
+    if SHEET_PART not in data or SST_PART not in data:
+        raise UploadTemplateError(f"템플릿 part 없음: {SHEET_PART} / {SST_PART}")
+
+    sheet = data[SHEET_PART]
+    m = re.search(rb"<sheetData>(.*)</sheetData>", sheet, re.S)
+    if not m:
+        raise UploadTemplateError("sheetData 없음")
+    rows = _ROW_RE.findall(m.group(1))
+    if len(rows) < 2:
+        raise UploadTemplateError("헤더 행 + 데이터 행 1개 이상 필요")
+    head, tail = sheet[:m.start(1)], sheet[m.end(1):]
+    if not re.search(rb'<dimension ref="[^"]*"/>', head):
+        raise UploadTemplateError("dimension 없음")
+
+    sst = data[SST_PART]
+    sis = _SI_RE.findall(sst)
+    sst_head = sst[:sst.index(b"<si>")] if sis else sst[:sst.index(b"</sst>")]
+    sst_tail = sst[sst.rindex(b"</sst>"):]
+
+    # 헤더 행 — 공유문자열 si 원본(phoneticPr 포함)을 그대로 옮겨 쓴다
+    header_cells = _CELL_RE.findall(rows[0])
+    header_si = []
+    for _, _, attrs, inner in header_cells:
+        if b't="s"' in attrs:
+            header_si.append(sis[int(_V_RE.search(inner).group(1))])
+
+    # 데이터 행 원형 — R2의 행 속성 + 열별 셀 속성
+    row_attrs = re.match(rb'<row r="\d+"([^>]*)>', rows[1]).group(1)
+    cells = {col: (attrs, inner) for col, _, attrs, inner in _CELL_RE.findall(rows[1])}
+    if set(cells) != {b"A", b"B", b"C"}:
+        raise UploadTemplateError(f"데이터 행 열 구성 이상: {sorted(cells)}")
+    for col in (b"A", b"B"):
+        if b't="s"' not in cells[col][0]:
+            raise UploadTemplateError(f"{col.decode()}열이 공유문자열 셀이 아님")
+    if b't="' in cells[b"C"][0]:
+        raise UploadTemplateError("C열이 숫자 셀이 아님")
+    date_si = sis[int(_V_RE.search(cells[b"A"][1]).group(1))]
+    pno_si = sis[int(_V_RE.search(cells[b"B"][1]).group(1))]
+
+    return {
+        "parts": parts,
+        "head": head, "tail": tail, "header_row": rows[0], "header_si": header_si,
+        "row_attrs": row_attrs, "cell_attrs": {col: attrs for col, (attrs, _) in cells.items()},
+        "sst_head": sst_head, "sst_tail": sst_tail, "date_si": date_si, "pno_si": pno_si,
+    }
+
+
+def load_template(template: Path = TEMPLATE) -> dict:
+    template = Path(template)
+    if not template.exists():
+        raise FileNotFoundError(f"ERP 양식 템플릿 없음: {template}")
+    return _load_template(str(template), template.stat().st_mtime_ns)
+
+
+# ============================================================
+# part 생성
+# ============================================================
+def _xml_text(s: str) -> bytes:
+    s = s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return s.encode("utf-8")
+
+
+def _with_text(si: bytes, text: str) -> bytes:
+    """si 원형의 첫 <t>만 text로 교체 (phoneticPr 등 나머지는 원형 유지). 앞뒤 공백은 xml:space 보존."""
+    tag = b'<t xml:space="preserve">' if text != text.strip() else b"<t>"
+    return _T_RE.sub(lambda _: tag + _xml_text(text) + b"</t>", si, count=1)
+
+
+def _num(v) -> bytes:
+    f = float(v)
+    return str(int(f) if f.is_integer() else f).encode("ascii")
+
+
+def build_parts(tpl: dict, date_str: str, rows) -> tuple:
+    """(sheet1.xml, sharedStrings.xml) 바이트. rows = [(PROD_NO, QTY), ...]."""
+    # 공유문자열 — 제품번호 고유값(첫 등장 순) → 헤더 → 생산일 (Excel 저장 순서)
+    pno_idx = {}
+    for pno, _ in rows:
+        pno_idx.setdefault(pno, len(pno_idx))
+    header_base = len(pno_idx)
+    date_idx = header_base + len(tpl["header_si"])
+    si_list = [_with_text(tpl["pno_si"], p) for p in pno_idx]
+    si_list += tpl["header_si"]
+    si_list.append(_with_text(tpl["date_si"], date_str))
+    count = len(tpl["header_si"]) + 2 * len(rows)
+    sst_head = re.sub(rb'count="\d+"', b'count="%d"' % count, tpl["sst_head"], count=1)
+    sst_head = re.sub(rb'uniqueCount="\d+"', b'uniqueCount="%d"' % len(si_list), sst_head, count=1)
+    sst = sst_head + b"".join(si_list) + tpl["sst_tail"]
+
+    # 헤더 행 — 공유문자열 인덱스만 새 위치로
+    n = iter(range(header_base, date_idx))
+    header_row = _CELL_RE.sub(
+        lambda m: m.group(0) if b't="s"' not in m.group(3) else
+        b'<c r="%s%s"%s><v>%d</v></c>' % (m.group(1), m.group(2), m.group(3), next(n)),
+        tpl["header_row"])
+
+    ca, cb, cc = (tpl["cell_attrs"][c] for c in (b"A", b"B", b"C"))
+    out = [header_row]
+    for r, (pno, qty) in enumerate(rows, start=2):
+        out.append(b'<row r="%d"%s><c r="A%d"%s><v>%d</v></c><c r="B%d"%s><v>%d</v></c><c r="C%d"%s><v>%s</v></c></row>'
+                   % (r, tpl["row_attrs"], r, ca, date_idx, r, cb, pno_idx[pno], r, cc, _num(qty)))
+    last = len(rows) + 1
+    head = re.sub(rb'<dimension ref="[^"]*"/>', b'<dimension ref="A1:C%d"/>' % last, tpl["head"], count=1)
+    sheet = head + b"".join(out) + tpl["tail"]
+    return sheet, sst
+
+
+def write_upload_xlsx(items, prod_date, out_path: Path, template: Path = TEMPLATE) -> Path:
+    """ERP 업로드 엑셀 작성. items = [{"PROD_NO", "QTY"}, ...], prod_date = datetime 또는 "YYYY-MM-DD"."""
+    tpl = load_template(template)
+    date_str = prod_date if isinstance(prod_date, str) else prod_date.strftime("%Y-%m-%d")
+    rows = [(str(it["PROD_NO"]).strip(), it["QTY"]) for it in items]
+    sheet, sst = build_parts(tpl, date_str, rows)
+    patched = {SHEET_PART: sheet, SST_PART: sst}
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as z:
+        for info, raw in tpl["parts"]:
+            zi = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+            zi.compress_type = info.compress_type
+            zi.create_system = info.create_system
+            zi.create_version = info.create_version
+            zi.extract_version = info.extract_version
+            z.writestr(zi, patched.get(info.filename, raw))
+            # zipfile이 쓰기 시 0 → 0o600<<16 으로 바꾼다. external_attr는 중앙 디렉터리(close 시 기록)에만 있음
+            zi.external_attr = info.external_attr
+    out_path = Path(out_path)
+    out_path.write_bytes(buf.getvalue())
+    return out_path
+
+
+# ============================================================
+# POI 방식 엄격 리더 (검증 / 대역 서버 파싱)
+# ============================================================
+def _rels(z, part: str) -> dict:
+    d, name = part.rsplit("/", 1) if "/" in part else ("", part)
+    rel_path = f"{d}/_rels/{name}.rels" if d else f"_rels/{name}.rels"
+    root = ET.fromstring(z.read(rel_path))
+    out = {}
+    for rel in root.findall(f"{{{NS_PKG_REL}}}Relationship"):
+        target = rel.get("Target")
+        target = target.lstrip("/") if target.startswith("/") else (f"{d}/{target}" if d else target)
+        out[rel.get("Id")] = (rel.get("Type"), target)
+    return out
+
+
+def _si_text(si) -> str:
+    # XSSFRichTextString.getString — <t> + <r><t>, 윗주(rPh)는 제외
+    parts = [t.text or "" for t in si.findall(f"{{{NS_MAIN}}}t")]
+    parts += [t.text or "" for t in si.findall(f"{{{NS_MAIN}}}r/{{{NS_MAIN}}}t")]
+    return "".join(parts)
+
+
+def _col_index(ref: str) -> int:
+    n = 0
+    for ch in ref:
+        if not ch.isalpha():
+            break
+        n = n * 26 + ord(ch.upper()) - 64
+    return n - 1
+
+
+def read_upload_rows(src, max_col: int = 3) -> list:
+    """첫 시트 행 목록 [(row_no, [값, ...]), ...]. src = 경로 또는 bytes.
+
+    셀 값: t="s" → 공유문자열 str, t="inlineStr" → str, t="str" → str, t="b" → bool,
+    t 없음/"n" → float (POI getNumericCellValue), 셀 없음 → None.
+    POI처럼 r 속성 없는 셀·범위 밖 공유문자열 인덱스는 예외.
+    """
+    fp = io.BytesIO(src) if isinstance(src, (bytes, bytearray)) else src
+    with zipfile.ZipFile(fp) as z:
+        wb_part = next(t for typ, t in _rels(z, "").values() if typ == REL_OFFICE_DOC)
+        wb_rels = _rels(z, wb_part)
+        wb = ET.fromstring(z.read(wb_part))
+        first = wb.find(f"{{{NS_MAIN}}}sheets/{{{NS_MAIN}}}sheet")
+        sheet_part = wb_rels[first.get(f"{{{NS_REL}}}id")][1]
+        sst_part = next((t for typ, t in wb_rels.values() if typ == REL_SST), None)
+        sst = [_si_text(si) for si in ET.fromstring(z.read(sst_part))] if sst_part else []
+        sheet = ET.fromstring(z.read(sheet_part))
+
+    out = []
+    for row in sheet.iter(f"{{{NS_MAIN}}}row"):
+        vals = [None] * max_col
+        for c in row.findall(f"{{{NS_MAIN}}}c"):
+            ref = c.get("r")
+            if not ref:
+                raise ValueError(f"셀 주소(r) 없음 — row {row.get('r')}")
+            ci = _col_index(ref)
+            if ci >= max_col:
+                continue
+            t = c.get("t", "n")
+            v = c.find(f"{{{NS_MAIN}}}v")
+            if t == "inlineStr":
+                is_ = c.find(f"{{{NS_MAIN}}}is")
+                vals[ci] = _si_text(is_) if is_ is not None else ""
+            elif v is None or v.text is None:
+                vals[ci] = None
+            elif t == "s":
+                vals[ci] = sst[int(v.text)]
+            elif t in ("str", "e"):
+                vals[ci] = v.text
+            elif t == "b":
+                vals[ci] = v.text == "1"
+            else:
+                vals[ci] = float(v.text)
+        out.append((int(row.get("r")), vals))
+    return out
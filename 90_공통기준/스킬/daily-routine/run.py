@@ -10,10 +10,12 @@ import sys
 import time
 from datetime import datetime, date, timedelta, timezone
 
-
-import openpyxl
 import requests
 
+# BI 저장소 (BI 원본 증분 반영 + 일자 색인 조회)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "05_생산실적", "_자동화"))
+from bi_store import open_store
+
 # ─── MES 인증 정보 ────────────────────────────────────
 MES_USER_ID  = "0109"
 MES_PASSWORD = "samsong1234"
@@ -120,14 +122,9 @@ def mes_refresh_bi():
     return BI_DST
 
 def mes_extract(bi_path, target_str):
-    wb = openpyxl.load_workbook(bi_path, data_only=True, read_only=True)
-    ws = wb.active
     items = []
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        dv = row[7]
-        if dv is None: continue
-        ds = str(dv)[:10]
-        if ds != target_str: continue
+    for row in open_store(bi_path).rows_on(target_str):
+        row = row + (None,) * (22 - len(row))
         item = {}
         for i in range(22):
             val = row[i]
@@ -137,7 +134,6 @@ def mes_extract(bi_path, target_str):
             else: val = str(val)
             item[f"COL{i+1}"] = val
         items.append(item)
-    wb.close()
     return items
 
 # 공백 허용 컬럼: 품질,설비 비가동(h) = COL13
@@ -268,17 +264,8 @@ def run_mes(today):
         print(f"  FAIL: 기등록 조회 오류 - {e}")
         return False
 
-    # BI 데이터 날짜 수집 (check_range 범위)
-    wb = openpyxl.load_workbook(bi, data_only=True, read_only=True)
-    ws = wb.active
-    bi_dates = set()
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        dv = row[7]
-        if dv is None: continue
-        ds = str(dv)[:10]
-        if ds in check_range:
-            bi_dates.add(ds)
-    wb.close()
+    # BI 데이터 날짜 수집 (check_range 범위) — BI 저장소 일자 색인
+    bi_dates = open_store(bi).days(min(check_range), max(check_range)) & set(check_range)
 
     # 누락일: check_range 중 BI 있고 MES 미등록
     targets = [ds for ds in check_range if ds in bi_dates and ds not in mes_dates]
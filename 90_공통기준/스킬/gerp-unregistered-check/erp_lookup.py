@@ -8,7 +8,7 @@ GERP 조립비 현황관리 자동 진입 + 라인별 등록 현황 일괄 수
 4. 입력된 품번 리스트별 라인 등록 현황 수집 → JSON 반환
 
 기반: 05_생산실적/조립비정산/03_정산자동화/extract_erp_assy_data.py
-참조: 90_공통기준/스킬/d0-production-plan/run.py (ensure_chrome_cdp / ensure_erp_login)
+공용: 90_공통기준/ERP세션/erp_session (ensure_chrome_cdp / OAuth / 금지구간)
 
 매시 5구간(x0:10~13, x0:20~23, ..., x0:50~53) 자동 대기 (waitSyncClear).
 
@@ -18,11 +18,9 @@ GERP 조립비 현황관리 자동 진입 + 라인별 등록 현황 일괄 수
     # result = {pn: [{"ASSY_LINE_CD": "SD9A01", "ASSY_CMPY_CD": "0109", ...}, ...]}
 """
 import json
-import subprocess
 import sys
 import time
 import urllib.request
-from datetime import datetime
 from pathlib import Path
 
 try:
@@ -33,91 +31,34 @@ except Exception:
 
 import websocket  # pip install websocket-client
 
+# ERP 세션 공용 패키지 (CDP 기동 · OAuth · 금지구간) — 90_공통기준/ERP세션/
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "ERP세션"))
+from erp_session import (  # noqa: E402,F401 — is_blackout_window/wait_sync_clear는 lookup_*.py가 erp_lookup.* 로 사용
+    ERP_LAYOUT, cdp_url, is_blackout_window, load_oauth_cred, wait_oauth_complete, wait_sync_clear,
+)
+from erp_session import ensure_chrome_cdp as _ensure_chrome_cdp  # noqa: E402
+
 # ============================================================
 # 설정 — d0-production-plan과 user_data_dir 공유 (자격증명 재사용)
 # 단 CDP 포트는 분리 (9224) — d0 9223과 충돌 회피
 # ============================================================
 CDP_PORT = 9224
-CDP_URL = f"http://localhost:{CDP_PORT}"
-CHROME_PATH = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
-CHROME_PROFILE = r"C:\Users\User\.flow-chrome-debug"  # d0와 공유 (password 재사용)
-ERP_LAYOUT = "http://erp-dev.samsong.com:19100/layout/layout.do"
+CDP_URL = cdp_url(CDP_PORT)
 
 CONTEXT_ID_DEFAULT = 17  # ERP iframe (extract_erp_assy_data.py 기준)
 DELAY_SEC = 0.4
 PAGE_SIZE = 10
 
 
-# ============================================================
-# 시간 금지구간 회피 (라인배치 패턴)
-# ============================================================
-def is_blackout_window() -> bool:
-    """매시 x0:10~13 / 20~23 / 30~33 / 40~43 / 50~53 동기화 금지구간."""
-    minute = datetime.now().minute % 10
-    return minute <= 3 and minute != 0  # x0:10~13 등 (정시 :00~03 제외 — 라인배치 지침 권위)
-
-
-def wait_sync_clear():
-    """금지구간이면 빠져나갈 때까지 대기."""
-    while is_blackout_window():
-        now = datetime.now()
-        nxt = (now.minute // 10 + 1) * 10
-        wait_sec = max(1, (nxt - now.minute) * 60 - now.second)
-        if wait_sec > 60:
-            wait_sec = 60
-        print(f"  [동기화 금지] {now.strftime('%H:%M:%S')} 대기 {wait_sec}s")
-        time.sleep(wait_sec)
-
-
 # ============================================================
 # Chrome CDP 기동 (d0 패턴)
 # ============================================================
 def ensure_chrome_cdp():
-    """CDP 9224 기동 확인. 없으면 chrome 띄움."""
-    try:
-        urllib.request.urlopen(f"{CDP_URL}/json/version", timeout=3)
-        print(f"[phase0] CDP {CDP_PORT} alive")
-        return True
-    except Exception:
-        pass
+    """CDP 9224 기동 확인. 없으면 chrome 띄움.
 
-    print(f"[phase0] CDP dead — launching Chrome (port={CDP_PORT})")
-    _suppress_chrome_crash_restore(CHROME_PROFILE)
-
-    subprocess.Popen([
-        CHROME_PATH,
-        f"--remote-debugging-port={CDP_PORT}",
-        "--remote-debugging-address=127.0.0.1",
-        f"--user-data-dir={CHROME_PROFILE}",
-        "--no-first-run", "--no-default-browser-check",
-        "--disable-session-crashed-bubble",
-        "--hide-crash-restore-bubble",
-        ERP_LAYOUT,
-    ])
-    for i in range(15):
-        time.sleep(1.5)
-        try:
-            urllib.request.urlopen(f"{CDP_URL}/json/version", timeout=2)
-            print(f"[phase0] CDP up (try={i+1})")
-            return True
-        except Exception:
-            continue
-    raise RuntimeError(f"CDP {CDP_PORT} 기동 실패")
-
-
-def _suppress_chrome_crash_restore(profile_dir: str):
-    """비정상 종료 잔재 정리 (d0 패턴)."""
-    prefs_path = Path(profile_dir) / "Default" / "Preferences"
-    if not prefs_path.exists():
-        return
-    try:
-        data = json.loads(prefs_path.read_text(encoding="utf-8"))
-        prof = data.setdefault("profile", {})
-        prof["exit_type"] = "Normal"
-        prof["exited_cleanly"] = True
-        prefs_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
-    except Exception as e:
-        print(f"[phase0] Preferences 정리 실패 (무시): {e}")
+    좀비 정리 안 함 — 같은 프로필을 d0(9223)가 쓰는 중일 수 있다.
+    """
+    return _ensure_chrome_cdp(port=CDP_PORT, kill_zombie=False, tries=15)
 
 
 # ============================================================
@@ -127,21 +68,13 @@ def ensure_erp_login_via_playwright():
     """playwright로 OAuth 자동 로그인 처리.
 
     세션153 (2026-05-13): pyautogui click/down/return 폐기 — OS focus 가로채기 위험 0%.
-    ID/PW는 d0-production-plan/.oauth.json에서 로드 (d0 _load_oauth_cred 재사용).
+    ID/PW는 d0-production-plan/.oauth.json에서 로드 (erp_session.load_oauth_cred).
     """
     try:
         from playwright.sync_api import sync_playwright
     except ImportError:
         raise RuntimeError("playwright 미설치 — pip install playwright + playwright install chromium")
 
-    # d0의 _load_oauth_cred 재사용 (auth_extract.py와 동일 import 패턴)
-    import sys
-    from pathlib import Path
-    D0_DIR = Path(__file__).resolve().parent.parent / "d0-production-plan"
-    if str(D0_DIR) not in sys.path:
-        sys.path.insert(0, str(D0_DIR))
-    from run import _load_oauth_cred  # noqa
-
     with sync_playwright() as p:
         browser = p.chromium.connect_over_cdp(CDP_URL)
         ctx = browser.contexts[0]
@@ -166,7 +99,7 @@ def ensure_erp_login_via_playwright():
         # 로그인 페이지면 자동 로그인 (DOM 직접 입력)
         if "auth-dev.samsong.com" in page.url and "/login" in page.url:
             print("[phase0] OAuth 로그인 수행 (DOM 직접 입력)")
-            user_id, password = _load_oauth_cred()
+            user_id, password = load_oauth_cred()
             page.wait_for_selector('#userId', timeout=10000)
             page.fill('#userId', user_id)
             page.fill('#password', password)
@@ -176,16 +109,7 @@ def ensure_erp_login_via_playwright():
                 print(f"[phase0] ⚠ submit 직후 /login?error — .oauth.json id/pw 검증 필요. URL: {page.url}")
 
         # OAuth 완료 대기
-        deadline = time.time() + 60
-        while time.time() < deadline:
-            url = page.url
-            if ("erp-dev.samsong.com" in url
-                    and "auth-dev" not in url
-                    and "oauth2/sso" not in url
-                    and "/login" not in url):
-                break
-            time.sleep(0.5)
-        else:
+        if not wait_oauth_complete(page, timeout_sec=60):
             # OAuth 콜백 정체 시 layout.do 직접 이동
             print(f"[phase0] OAuth 정체 — layout.do 직접 이동")
             page.goto(ERP_LAYOUT, timeout=30000)
@@ -11,7 +11,6 @@
   05_생산실적/조립비정산/{MM+1}월/라인정지_{MM}월_요약.md
 """
 import sys, os, json, time, argparse, calendar
-from datetime import datetime
 from pathlib import Path
 from collections import defaultdict
 
@@ -23,28 +22,22 @@ except Exception:
     pass
 
 REPO_ROOT = Path(__file__).resolve().parents[3]
-D0_SKILL = REPO_ROOT / "90_공통기준" / "스킬" / "d0-production-plan"
-sys.path.insert(0, str(D0_SKILL))
+sys.path.insert(0, str(REPO_ROOT / "90_공통기준" / "ERP세션"))
 
-from run import (  # type: ignore
+# ERP 세션 공용 패키지 (d0 run.py 전체 import 대신 CDP·OAuth·금지구간만)
+from erp_session import (  # type: ignore
     ensure_chrome_cdp, erp_login_via_http,
-    _inject_cookies_to_playwright, ensure_erp_login,
-    CDP_URL,
+    inject_cookies_to_playwright, ensure_erp_login,
+    is_blackout_window, CDP_URL, ERP_BASE,
 )
 from playwright.sync_api import sync_playwright
 import openpyxl
 from openpyxl.styles import Font, PatternFill, Alignment
 
-ERP = "http://erp-dev.samsong.com:19100"
+ERP = ERP_BASE
 PAGE_URL = f"{ERP}/costCharge/viewListCostBillDetail.do"
 
 
-def gerp_blackout_now() -> bool:
-    """매시 x0:10~13/20~23/30~33/40~43/50~53 G-ERP 차단."""
-    m = datetime.now().minute
-    return (10 <= m <= 13) or (20 <= m <= 23) or (30 <= m <= 33) or (40 <= m <= 43) or (50 <= m <= 53)
-
-
 def month_range(yyyymm: str):
     y, m = map(int, yyyymm.split("-"))
     last = calendar.monthrange(y, m)[1]
@@ -74,7 +67,7 @@ def fetch_via_browser(yyyymm: str, cmpy: str, line: str) -> dict:
         browser = pw.chromium.connect_over_cdp(CDP_URL)
         ctx = browser.contexts[0]
         try:
-            _inject_cookies_to_playwright(ctx, sess)
+            inject_cookies_to_playwright(ctx, sess)
         except Exception as e:
             print(f"[warn] cookie 주입 실패: {e}")
 
@@ -231,7 +224,7 @@ def main():
     p.add_argument("--line", default="", help="라인 필터 (예: SP3M3, 빈값=전체)")
     args = p.parse_args()
 
-    if gerp_blackout_now():
+    if is_blackout_window():
         print("[wait] GERP 동기화 차단 시간대 — 60초 대기")
         time.sleep(60)
 
@@ -20,7 +20,11 @@ from openpyxl.utils import get_column_letter
 
 THIS = Path(__file__).resolve()
 sys.path.insert(0, str(THIS.parent))
+sys.path.insert(0, str(THIS.parents[3] / "05_생산실적" / "조립비정산" / "03_정산자동화"))
+sys.path.insert(0, str(THIS.parents[3] / "05_생산실적" / "_자동화"))
 from builders.sheet_94_support import parse_support_file  # noqa: E402
+from bi_store import open_store  # noqa: E402
+from _xlsx_eval import Unsupported, WorkbookEvaluator, XLError, fill_cached_values  # noqa: E402
 
 REPO = Path(r"C:\Users\User\Desktop\업무리스트")
 SETTLE = REPO / "05_생산실적" / "조립비정산"
@@ -236,36 +240,31 @@ def total_row(ws, row, values, types, label_text="합계"):
 # 데이터 로더
 # ============================================================
 
-def extract_bi_night_total(line, year, month):
+def extract_bi_night_totals(lines, year, month):
+    """BI 저장소 조회 → {라인: (야간수량 합, 야간 일수)} (BI 파일 변경분만 저장소에 반영)."""
     if not BI_PATH.exists():
-        return 0, 0
-    wb = openpyxl.load_workbook(BI_PATH, data_only=True, read_only=True)
-    ws = wb.worksheets[0]
-    rows = list(ws.iter_rows(values_only=True))
-    wb.close()
-    night_val = next((r[5] for r in rows[1:]
-                      if r[4] == line and r[5] not in (None, "주간")), None)
-    if night_val is None:
-        return 0, 0
-    total = days = 0
-    for r in rows[1:]:
-        if r[4] != line or r[5] != night_val:
-            continue
-        d = r[7]
-        if not isinstance(d, datetime) or d.year != year or d.month != month:
-            continue
-        if r[14]:
-            total += r[14]
-            days += 1
-    return total, days
+        return {line: (0, 0) for line in lines}
+    return open_store(BI_PATH).night_totals(lines, year, month)
+
+
+def extract_bi_night_total(line, year, month):
+    return extract_bi_night_totals([line], year, month)[line]
+
 
+def _open_book(book_path, wb):
+    """읽기 전용 본체 — 호출자가 연 wb가 있으면 그대로 (닫기는 연 쪽에서)."""
+    if wb is not None:
+        return wb, False
+    return openpyxl.load_workbook(book_path, data_only=True, read_only=True), True
 
-def load_settlement_totals(book_path, work_folder):
-    """라인별 GERP 합계 + 야간수량 계산.
+
+def load_settlement_totals(book_path, work_folder, wb=None):
+    """라인별 GERP 합계 + 야간수량 계산. wb: main이 연 읽기 전용 본체 (없으면 직접 열고 닫음).
 
     우선순위:
     1. 본체 정산집계 cached value (기준단가 적용 K+L — 정산 권위값)
-    2. cached 손실 시 GERP 원본 raw 합산 (fallback, 다중단가 미반영)
+    2. cached 손실 시 본체 수식 Python 평가 (_xlsx_eval — 1과 같은 값)
+    3. 평가 불가 시 GERP 원본 raw 합산 (fallback, 다중단가 미반영)
     """
     line_names = {
         "SD9A01": "아우터", "ANAAS04": "앵커", "DRAAS11": "디링",
@@ -276,30 +275,47 @@ def load_settlement_totals(book_path, work_folder):
     agg = {c: {"day_amt": 0, "night_amt": 0,
                "day_qty": 0, "night_qty": 0} for c in LINES}
 
-    # 1차: 본체 정산집계 cached value
-    cached_ok = False
-    wb = openpyxl.load_workbook(book_path, data_only=True, read_only=True)
-    if "정산집계" in wb.sheetnames:
-        ws = wb["정산집계"]
+    def read_summary(rows):
+        """정산집계 2행부터의 A~F열 값 행 → agg 채움. 반환: 금액 합 (0이면 값 없음)."""
         sum_check = 0
-        for r in range(2, ws.max_row + 1):
-            code = ws.cell(r, 1).value
+        for row in rows:
+            code = row[0]
             if not code or code == "합계":
                 continue
-            day_amt = ws.cell(r, 5).value or 0
-            night_amt = ws.cell(r, 6).value or 0
-            night_qty = ws.cell(r, 4).value or 0
+            day_amt = row[4] or 0
+            night_amt = row[5] or 0
+            night_qty = row[3] or 0
             if code in agg:
                 agg[code]["day_amt"] = day_amt
                 agg[code]["night_amt"] = night_amt
                 agg[code]["night_qty"] = night_qty
                 sum_check += day_amt + night_amt
-        cached_ok = sum_check > 0
-    wb.close()
+        return sum_check
 
-    # 2차: cached 손실 시 GERP raw fallback
+    # 1차: 본체 정산집계 cached value
+    cached_ok = False
+    wb, own = _open_book(book_path, wb)
+    if "정산집계" in wb.sheetnames:
+        cached_ok = read_summary(wb["정산집계"].iter_rows(min_row=2, max_col=6, values_only=True)) > 0
+    if own:
+        wb.close()
+
+    # 2차: cached 손실 시 본체 수식 Python 평가
+    evaluated_ok = False
     if not cached_ok:
-        print("  [WARN] 본체 정산집계 cached value 손실 — GERP raw fallback")
+        print("  [WARN] 본체 정산집계 cached value 손실 — 수식 Python 평가")
+        try:
+            ev = WorkbookEvaluator(book_path)
+            if "정산집계" in ev.sheet_names:
+                evaluated_ok = read_summary(
+                    [ev.value("정산집계", f"{get_column_letter(c)}{r}") for c in range(1, 7)]
+                    for r in range(2, ev.max_row["정산집계"] + 1)) > 0
+        except (Unsupported, XLError, RecursionError) as e:
+            print(f"  [WARN] 정산집계 평가 불가: {type(e).__name__}: {e}")
+
+    # 3차: 평가 불가 시 GERP raw fallback
+    if not cached_ok and not evaluated_ok:
+        print("  [WARN] 본체 정산집계 평가 실패 — GERP raw fallback")
         print("        (사용자 엑셀로 본체 한 번 열고 저장 시 235M 정합값으로 복귀)")
         agg = {c: {"day_amt": 0, "night_amt": 0,
                    "day_qty": 0, "night_qty": 0} for c in LINES}
@@ -337,8 +353,10 @@ def load_settlement_totals(book_path, work_folder):
                     agg[line]["day_amt"] += amt
                     agg[line]["day_qty"] += qty
             wb_g.close()
-    else:
+    elif cached_ok:
         print("  본체 정산집계 cached value 사용 (기준단가 적용 권위값)")
+    else:
+        print("  본체 정산집계 수식 평가값 사용 (기준단가 적용 권위값)")
 
     lines = {}
     grand = 0
@@ -386,22 +404,19 @@ def load_line_stoppage(path):
 
     blame = []
     if "통합집계" in wb.sheetnames:
-        ws = wb["통합집계"]
-        main_end = ws.max_row
-        for r in range(4, ws.max_row + 1):
-            v = ws.cell(r, 1).value
+        # 4행부터 1회 스캔: 본문 (→ '합계' 행) 다음 '귀책 부서' 블록
+        it = wb["통합집계"].iter_rows(min_row=4, max_col=4, values_only=True)
+        for v, claim_type, cnt, amt in it:
             if v == "합계":
-                main_end = r
                 break
             if not v:
                 continue
-            amt = round(num(ws.cell(r, 4).value))
-            rows.append({"system": v, "claim_type": ws.cell(r, 2).value,
-                         "count": ws.cell(r, 3).value or 0, "amount": amt})
+            amt = round(num(amt))
+            rows.append({"system": v, "claim_type": claim_type,
+                         "count": cnt or 0, "amount": amt})
             total += amt
         in_blame = False
-        for r in range(main_end + 1, ws.max_row + 1):
-            v = ws.cell(r, 1).value
+        for v, cnt, amt, _ in it:
             if v == "귀책 부서":
                 in_blame = True
                 continue
@@ -409,36 +424,36 @@ def load_line_stoppage(path):
                 continue
             if v == "합계":
                 break
-            blame.append({"blame": v, "count": ws.cell(r, 2).value or 0,
-                          "amount": ws.cell(r, 3).value or 0})
+            blame.append({"blame": v, "count": cnt or 0,
+                          "amount": amt or 0})
     wb.close()
     return {"exists": True, "rows": rows, "total": total, "blame": blame}
 
 
-def load_error_types(book_path):
-    """본체 유형별요약 시트 5행을 91 ④섹션으로 가져옴."""
-    wb = openpyxl.load_workbook(book_path, data_only=True, read_only=True)
-    if "유형별요약" not in wb.sheetnames:
-        wb.close()
-        return {"exists": False, "rows": [], "total_cnt": 0, "total_diff": 0}
-    ws = wb["유형별요약"]
-    rows = []
-    total_cnt = total_diff = 0
-    for r in range(4, ws.max_row + 1):
-        kind = ws.cell(r, 1).value
-        if not kind or kind == "합계":
-            continue
-        cnt = ws.cell(r, 2).value or 0
-        gerp = ws.cell(r, 3).value or 0
-        old = ws.cell(r, 4).value or 0
-        diff = ws.cell(r, 5).value or 0
-        rows.append({"kind": kind, "cnt": cnt, "gerp": gerp,
-                     "old": old, "diff": diff})
-        if isinstance(cnt, (int, float)):
-            total_cnt += cnt
-        if isinstance(diff, (int, float)):
-            total_diff += diff
-    wb.close()
+def load_error_types(book_path, wb=None):
+    """본체 유형별요약 시트 5행을 91 ④섹션으로 가져옴. wb: main이 연 읽기 전용 본체."""
+    wb, own = _open_book(book_path, wb)
+    try:
+        if "유형별요약" not in wb.sheetnames:
+            return {"exists": False, "rows": [], "total_cnt": 0, "total_diff": 0}
+        rows = []
+        total_cnt = total_diff = 0
+        for kind, cnt, gerp, old, diff in wb["유형별요약"].iter_rows(min_row=4, max_col=5, values_only=True):
+            if not kind or kind == "합계":
+                continue
+            cnt = cnt or 0
+            gerp = gerp or 0
+            old = old or 0
+            diff = diff or 0
+            rows.append({"kind": kind, "cnt": cnt, "gerp": gerp,
+                         "old": old, "diff": diff})
+            if isinstance(cnt, (int, float)):
+                total_cnt += cnt
+            if isinstance(diff, (int, float)):
+                total_diff += diff
+    finally:
+        if own:
+            wb.close()
     return {"exists": True, "rows": rows,
             "total_cnt": total_cnt, "total_diff": total_diff}
 
@@ -484,10 +499,8 @@ def resolve_support_dir(work, mm):
 def compute_night_info(lines_data, year, month):
     night_lines = [c for c in LINES
                    if lines_data["lines"].get(c, {}).get("night_qty", 0) > 0]
-    bi_summary = {}
-    for code in night_lines:
-        qty, days = extract_bi_night_total(code, year, month)
-        bi_summary[code] = {"qty": qty, "days": days}
+    bi_summary = {code: {"qty": qty, "days": days}
+                  for code, (qty, days) in extract_bi_night_totals(night_lines, year, month).items()}
     return {"night_lines": night_lines, "bi_summary": bi_summary}
 
 
@@ -1128,36 +1141,13 @@ def build_sheet_detail(wb, mm, lines_data, support, etc_data,
     ws.row_dimensions[1].height = 22
 
 
-def force_excel_recalc(book_path):
-    """PowerShell + Excel COM 자동 재계산·저장 → cached value 박힘."""
-    import subprocess
-    ps_cmd = f"""
-$ErrorActionPreference = 'Stop'
-Get-Process -Name EXCEL -ErrorAction SilentlyContinue | Stop-Process -Force -ErrorAction SilentlyContinue
-Start-Sleep -Seconds 1
-$Excel = New-Object -ComObject Excel.Application
-$Excel.Visible = $false
-$Excel.DisplayAlerts = $false
-try {{
-    $wb = $Excel.Workbooks.Open('{book_path}', 0, $false)
-    Start-Sleep -Seconds 2
-    $wb.Application.CalculateFullRebuild()
-    Start-Sleep -Seconds 2
-    $wb.Save()
-    $wb.Close($true)
-}} finally {{
-    $Excel.Quit()
-}}
-"""
+def recalc_cached_values(book_path):
+    """본체 수식 Python 평가 → cached value 기록 (Excel COM 불필요). 반환: 통계 dict / 실패 시 None."""
     try:
-        result = subprocess.run(
-            ["powershell", "-NoProfile", "-Command", ps_cmd],
-            capture_output=True, text=True, timeout=120
-        )
-        return result.returncode == 0
+        return fill_cached_values(str(book_path))
     except Exception as e:
-        print(f"  [WARN] force_recalc 실패: {e}")
-        return False
+        print(f"  [WARN] cached value 계산 실패: {type(e).__name__}: {e}")
+        return None
 
 
 def verify_workbook_formulas(book_path):
@@ -1211,12 +1201,17 @@ def main():
         shutil.copy2(book, bak)
         print(f"[BACKUP] {bak.name}")
 
-    print("[LOAD] GERP 원본 직접 합산 …")
-    lines_data = load_settlement_totals(book, work)
-    print(f"  라인 {len(lines_data['lines'])}개, GERP 합계 {lines_data['grand_total']:,}원")
-
-    print("[LOAD] 본체 유형별요약 …")
-    err_types = load_error_types(book)
+    # 본체는 읽기 전용으로 1번만 열어 정산집계·유형별요약을 같이 읽는다
+    book_ro = openpyxl.load_workbook(book, data_only=True, read_only=True)
+    try:
+        print("[LOAD] GERP 원본 직접 합산 …")
+        lines_data = load_settlement_totals(book, work, wb=book_ro)
+        print(f"  라인 {len(lines_data['lines'])}개, GERP 합계 {lines_data['grand_total']:,}원")
+
+        print("[LOAD] 본체 유형별요약 …")
+        err_types = load_error_types(book, wb=book_ro)
+    finally:
+        book_ro.close()
     if err_types["exists"]:
         print(f"  차이 {err_types['total_cnt']}건 / {err_types['total_diff']:+,}원")
     else:
@@ -1283,9 +1278,15 @@ def main():
     print("  ✅ 모든 수식 정상")
 
     # cached value 박기 (다음 실행 시 정합값 사용)
-    print("\n[RECALC] Excel COM 자동 재계산 …")
-    if force_excel_recalc(str(book)):
-        print("  ✅ cached value 박힘 (재실행 시 본체 정산집계 기준 사용)")
+    print("\n[RECALC] 수식 cached value 계산 (Python 평가기) …")
+    stats = recalc_cached_values(book)
+    if stats and not stats["unsupported"]:
+        print(f"  ✅ cached value 박힘 {stats['filled']:,}셀 ({stats['seconds']:.1f}초)"
+              " (재실행 시 본체 정산집계 기준 사용)")
+    elif stats:
+        print(f"  ⚠️ 미지원 수식 {stats['unsupported']}셀 값 비움 — 엑셀에서 열면 재계산됨")
+        for sample in stats["samples"]:
+            print(f"    {sample}")
     else:
         print("  ⚠️ 자동 재계산 실패 — 엑셀에서 한 번 열고 저장하면 갱신됨")
 
@@ -24,9 +24,12 @@ try:
 except Exception:
     pass
 
-# d0-production-plan 함수 재사용 (OAuth 자동 로그인 + Chrome 9223 기동)
-sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "d0-production-plan"))
-from run import ensure_chrome_cdp, ensure_erp_login, CDP_URL  # noqa
+# ERP 세션 공용 패키지 (OAuth 자동 로그인 + Chrome 9223 기동) — d0 run.py import 안 함
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "ERP세션"))
+from erp_session import ensure_chrome_cdp, ensure_erp_login, CDP_URL  # noqa
+# BI 저장소 (BI 원본 증분 반영 + 라인·일자·야간 색인 조회)
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "05_생산실적" / "_자동화"))
+from bi_store import open_store  # noqa
 
 import openpyxl
 from openpyxl.formatting.rule import FormulaRule
@@ -55,27 +58,16 @@ def extract_bi(line: str, year: int, month: int) -> list[dict]:
     print(f"[phase1] BI 추출 — {line} {year}-{month:02d} 야간")
     if not BI_PATH.exists():
         raise FileNotFoundError(f"BI 원본 없음: {BI_PATH}")
-    wb = openpyxl.load_workbook(BI_PATH, data_only=True)
-    ws = wb.worksheets[0]
-    rows = list(ws.iter_rows(values_only=True))
-    # 야간 식별: '주간'이 아닌 shift 값
-    night_val = None
-    for r in rows[1:]:
-        if r[4] == line and r[5] not in (None, "주간"):
-            night_val = r[5]
-            break
-    if night_val is None:
+    # BI 저장소 조회 — 야간 식별: 라인에서 처음 나온 '주간'이 아닌 shift 값
+    store = open_store(BI_PATH)
+    if store.night_shift(line) is None:
         raise RuntimeError(f"BI에서 {line} 야간 데이터 식별 실패")
 
     out = []
-    for r in rows[1:]:
-        if r[4] != line or r[5] != night_val:
-            continue
-        d = r[7]
-        if not isinstance(d, datetime) or d.year != year or d.month != month:
-            continue
+    for r in store.night_rows(line, year, month):
+        r = r + (None,) * (15 - len(r))
         out.append({
-            "date": d, "line": r[4], "shift": r[5], "people": r[6],
+            "date": r[7], "line": r[4], "shift": r[5], "people": r[6],
             "uph_std": r[8], "ct": r[9], "eff": r[10],
             "work_h": r[11], "down_h": r[12], "real_h": r[13],
             "qty": r[14],
@@ -10,9 +10,11 @@ import subprocess
 import sys
 import time
 
-import openpyxl
 import requests
 
+# BI 저장소 (BI 원본 증분 반영 + 일자 색인 조회)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "05_생산실적", "_자동화"))
+
 KST_OFFSET = 9  # hours
 
 def now_kst():
@@ -46,18 +48,11 @@ def refresh_bi():
 
 def extract_bi(bi_path, target_date_str):
     from datetime import datetime as dt
-    wb = openpyxl.load_workbook(bi_path, data_only=True, read_only=True)
-    ws = wb.active
+    from bi_store import open_store
 
     items = []
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        date_val = row[7]
-        if date_val is None:
-            continue
-        date_str = str(date_val)[:10]
-        if date_str != target_date_str:
-            continue
-
+    for row in open_store(bi_path).rows_on(target_date_str):
+        row = row + (None,) * (22 - len(row))
         item = {}
         for i in range(22):
             val = row[i]
@@ -72,7 +67,6 @@ def extract_bi(bi_path, target_date_str):
             item[f"COL{i+1}"] = val
         items.append(item)
 
-    wb.close()
     return items
 
 